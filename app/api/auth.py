@@ -1,7 +1,7 @@
 """用户认证API"""
 from fastapi import APIRouter, HTTPException, Depends, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import JWTError, jwt
+from jose import jwt
 from datetime import datetime, timedelta
 from typing import Optional
 import logging
@@ -10,6 +10,7 @@ import hashlib
 from app.models import User
 from app.schemas import UserLogin, UserPasswordChange, UserResponse, LoginResponse, DashboardStats
 from app.config import settings
+from app.services.auth_service import JWT_ALGORITHM, VERSION_CLAIM, InvalidTokenError, auth_service
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
 security = HTTPBearer()
@@ -18,7 +19,7 @@ logger = logging.getLogger(__name__)
 
 # JWT配置
 SECRET_KEY = settings.jwt_secret_key
-ALGORITHM = "HS256"
+ALGORITHM = JWT_ALGORITHM
 ACCESS_TOKEN_EXPIRE_MINUTES = 30 * 24 * 60  # 30天
 
 
@@ -33,7 +34,7 @@ def get_password_hash(password: str) -> str:
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
-    """创建访问令牌"""
+    """创建访问令牌（data中应包含用户名sub与令牌版本ver）"""
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -45,27 +46,15 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> User:
-    """获取当前用户"""
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    
+    """获取当前用户（令牌校验结果与用户均来自内存缓存）"""
     try:
-        token = credentials.credentials
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-    
-    user = await User.get_or_none(username=username)
-    if user is None:
-        raise credentials_exception
-    
-    return user
+        return await auth_service.authenticate(credentials.credentials)
+    except InvalidTokenError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
 
 
 async def init_default_user():
@@ -110,7 +99,7 @@ async def login(user_login: UserLogin):
     # 创建访问令牌
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+        data={"sub": user.username, VERSION_CLAIM: user.token_version}, expires_delta=access_token_expires
     )
     
     return LoginResponse(
@@ -139,56 +128,28 @@ async def change_password(
             detail="旧密码错误"
         )
     
-    # 更新密码
-    current_user.password_hash = get_password_hash(password_change.new_password)
-    await current_user.save()
+    # 更新密码，已签发的令牌（包括当前令牌）随之失效，返回新令牌供当前页面继续使用
+    await auth_service.set_password(current_user, get_password_hash(password_change.new_password))
+    access_token = create_access_token(
+        data={"sub": current_user.username, VERSION_CLAIM: current_user.token_version},
+        expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
     
-    return {"message": "密码修改成功"}
+    return {"message": "密码修改成功", "access_token": access_token, "token_type": "bearer"}
 
 
 @router.get("/dashboard", response_model=DashboardStats)
 async def get_dashboard_stats(current_user: User = Depends(get_current_user)):
     """获取首页统计数据"""
-    from app.models import Provider, Domain, Certificate, CertificateStatus, DDNSConfig
-    
-    # 统计服务商
-    total_providers = await Provider.all().count()
-    enabled_providers = await Provider.filter(enabled=True).count()
-    
-    # 统计域名
-    total_domains = await Domain.all().count()
+    from app.services.dashboard_service import dashboard_service
     
-    # 统计证书
-    total_certificates = await Certificate.all().count()
-    valid_certificates = await Certificate.filter(status=CertificateStatus.VALID).count()
-    
-    # 统计即将过期的证书（30天内）
-    from datetime import datetime, timedelta
-    thirty_days_later = datetime.now() + timedelta(days=30)
-    expiring_certificates = await Certificate.filter(
-        status=CertificateStatus.VALID,
-        not_after__lte=thirty_days_later
-    ).count()
-    
-    # 统计DDNS配置
-    total_ddns_configs = await DDNSConfig.all().count()
-    active_ddns_configs = await DDNSConfig.filter(enabled=True).count()
-    
-    return DashboardStats(
-        total_providers=total_providers,
-        enabled_providers=enabled_providers,
-        total_domains=total_domains,
-        total_certificates=total_certificates,
-        valid_certificates=valid_certificates,
-        expiring_certificates=expiring_certificates,
-        total_ddns_configs=total_ddns_configs,
-        active_ddns_configs=active_ddns_configs
-    )
+    stats = await dashboard_service.get_stats()
+    return DashboardStats(**{name: stats[name] for name in DashboardStats.model_fields})
 
 
 @router.post("/logout")
 async def logout(current_user: User = Depends(get_current_user)):
     """用户登出"""
-    # JWT是无状态的，这里只是返回成功消息
-    # 实际的登出逻辑在前端删除token
+    # 令牌版本加一，该用户已签发的令牌全部失效；前端同时删除token
+    await auth_service.revoke_tokens(current_user)
     return {"message": "登出成功"}
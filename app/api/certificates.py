@@ -1,19 +1,25 @@
 """证书管理API"""
-from fastapi import APIRouter, HTTPException, Depends
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Request
+from fastapi.responses import StreamingResponse
 from tortoise.exceptions import DoesNotExist
-from typing import List
-from app.models import Certificate, Domain, CertificateType, CertificateStatus
+from typing import List, Optional
+from app.models import Certificate, CertificateJob, Domain, CertificateType, CertificateStatus
 from app.schemas import (
     CertificateCreate, CertificateUpdate, CertificateResponse,
-    CertificateRenewRequest, CertificateRenewResponse
+    CertificateRenewRequest
 )
 from app.services.certificate_service import CertificateService
+from app.services.certificate_scanner import certificate_scanner, evaluate_certificate_status
+from app.services.certificate_store import certificate_store, CertificateStoreError
+from app.services.certificate_export import (
+    EXPORT_FORMATS, EXPORT_ZIP, CertificateExportError, export_certificate
+)
+from app.services.certificate_job_service import certificate_job_service, JOB_FINISHED_STATUSES
 from datetime import datetime, timedelta
+import asyncio
+import json
 import logging
-import os
-import zipfile
-import tempfile
+import urllib.parse
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/certificates", tags=["certificates"])
@@ -48,8 +54,16 @@ async def create_certificate(certificate_data: CertificateCreate):
     except DoesNotExist:
         raise HTTPException(status_code=404, detail="域名不存在")
     
+    # 证书文件内容写入证书存储，表中只保存摘要
+    certificate_dict = certificate_data.dict(exclude={'certificate_file', 'private_key_file', 'ca_bundle_file'})
+    certificate_dict.update(certificate_store.store_bundle(
+        certificate_pem=certificate_data.certificate_file,
+        private_key_pem=certificate_data.private_key_file,
+        ca_bundle_pem=certificate_data.ca_bundle_file
+    ))
+    
     # 创建证书
-    certificate = await Certificate.create(**certificate_data.dict())
+    certificate = await Certificate.create(**certificate_dict)
     await certificate.fetch_related('domain', 'domain__provider')
     return certificate
 
@@ -64,7 +78,12 @@ async def update_certificate(certificate_id: int, certificate_data: CertificateU
     
     # 更新证书
     update_data = certificate_data.dict(exclude_unset=True)
-    await certificate.update_from_dict(update_data)
+    update_data.update(certificate_store.store_bundle(
+        certificate_pem=update_data.pop('certificate_file', None),
+        private_key_pem=update_data.pop('private_key_file', None),
+        ca_bundle_pem=update_data.pop('ca_bundle_file', None)
+    ))
+    certificate.update_from_dict(update_data)
     await certificate.save()
     await certificate.fetch_related('domain', 'domain__provider')
     
@@ -83,35 +102,26 @@ async def delete_certificate(certificate_id: int):
     return {"message": "证书删除成功"}
 
 
-@router.post("/{certificate_id}/renew", response_model=CertificateRenewResponse)
+@router.post("/{certificate_id}/renew")
 async def renew_certificate(certificate_id: int, renew_data: CertificateRenewRequest):
-    """续期证书"""
-    try:
-        certificate = await Certificate.get(id=certificate_id)
-    except DoesNotExist:
+    """续期证书，与 /renew/{certificate_id} 相同，提交签发任务后立即返回任务"""
+    certificate = await Certificate.get_or_none(id=certificate_id)
+    if not certificate:
         raise HTTPException(status_code=404, detail="证书不存在")
-    
-    # 使用真实的证书续期服务
+
     try:
-        from app.services.certificate_service import CertificateService
-        
-        certificate_service = CertificateService()
-        result = await certificate_service.renew_certificate(certificate_id)
-        
-        if result['success']:
-            return CertificateRenewResponse(
-                success=True,
-                message="证书续期成功",
-                renewed_at=datetime.now(timezone.utc)
-            )
-        else:
-            raise HTTPException(status_code=500, detail=result.get('message', '证书续期失败'))
+        job = await certificate_job_service.submit_renewal(certificate, force=renew_data.force)
     except Exception as e:
-        logger.error(f"证书续期失败: {e}")
-        return CertificateRenewResponse(
-            success=False,
-            message=f"证书续期失败: {str(e)}"
-        )
+        logger.error(f"续期证书失败: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"续期证书失败: {str(e)}")
+
+    return {
+        "success": True,
+        "message": f"证书续期任务已提交: {job.full_domain}",
+        "job_id": job.id,
+        "certificate_id": certificate_id,
+        "job": _job_to_dict(job)
+    }
 
 
 @router.get("/domain/{domain_id}", response_model=List[CertificateResponse])
@@ -141,6 +151,20 @@ async def get_expiring_certificates(days: int = 30):
     return certificates
 
 
+@router.post("/check-status")
+async def check_all_certificate_status(
+    probe: bool = Query(False, description="是否连接线上TLS端点核对序列号"),
+    timeout: float = Query(5.0, gt=0, le=30, description="单个主机探测超时（秒）")
+):
+    """批量检查所有证书状态"""
+    report = await certificate_scanner.scan(probe_live=probe, probe_timeout=timeout)
+    return {
+        "success": True,
+        "message": f"证书状态检查完成，{report['changed']} 个证书状态发生变化",
+        "report": report
+    }
+
+
 @router.post("/check-status/{certificate_id}")
 async def check_certificate_status(certificate_id: int):
     """检查证书状态"""
@@ -150,30 +174,10 @@ async def check_certificate_status(certificate_id: int):
         raise HTTPException(status_code=404, detail="证书不存在")
     
     # 检查证书状态（基于到期时间）
-    from datetime import timezone
-    
-    # 获取当前UTC时间
-    now = datetime.now(timezone.utc)
-    
-    if certificate.not_after:
-        # 如果证书到期时间是naive datetime，转换为UTC时间
-        cert_not_after = certificate.not_after
-        if cert_not_after.tzinfo is None:
-            cert_not_after = cert_not_after.replace(tzinfo=timezone.utc)
-        
-        # 如果当前时间是naive datetime，转换为UTC时间
-        if now.tzinfo is None:
-            now = now.replace(tzinfo=timezone.utc)
-            
-        if cert_not_after < now:
-            certificate.status = CertificateStatus.EXPIRED
-        elif cert_not_after < now + timedelta(days=30):
-            certificate.status = CertificateStatus.EXPIRING_SOON
-        else:
-            certificate.status = CertificateStatus.VALID
-    else:
-        certificate.status = CertificateStatus.INVALID
-    
+    certificate.status = evaluate_certificate_status(
+        certificate.not_after,
+        expiring_days=certificate_scanner.config.auto_renewal_days
+    )
     await certificate.save()
     
     return {
@@ -186,43 +190,34 @@ async def check_certificate_status(certificate_id: int):
 
 @router.post("/request/{domain_id}")
 async def request_certificate(domain_id: int, request_data: dict = None):
-    """申请SSL证书（DNS验证）"""
+    """申请SSL证书（DNS验证），提交签发任务后立即返回任务ID"""
     try:
         # 检查域名是否存在
-        domain = await Domain.get(id=domain_id)
+        domain = await Domain.get_or_none(id=domain_id)
         if not domain:
             raise HTTPException(status_code=404, detail="域名不存在")
         
         # 从请求数据中提取参数
-        if request_data:
-            full_domain = request_data.get('full_domain')
-            subdomain = request_data.get('subdomain')
-            name = request_data.get('name')
-            auto_renew = request_data.get('auto_renew', True)
-        else:
-            full_domain = None
-            subdomain = None
-            name = None
-            auto_renew = True
+        request_data = request_data or {}
+        full_domain = request_data.get('full_domain')
+        subdomain = request_data.get('subdomain')
+        if not full_domain:
+            full_domain = f"{subdomain}.{domain.name}" if subdomain else domain.name
         
-        # 调用证书服务申请证书
-        result = await certificate_service.request_certificate(
-            domain_id, 
-            subdomain=subdomain,
-            full_domain=full_domain,
-            name=name,
-            auto_renew=auto_renew
+        job = await certificate_job_service.submit_request(
+            domain,
+            full_domain,
+            name=request_data.get('name'),
+            auto_renew=request_data.get('auto_renew', True)
         )
         
-        if result['success']:
-            return {
-                "success": True,
-                "message": result['message'],
-                "certificate_id": result.get('certificate_id'),
-                "domain": result.get('domain')
-            }
-        else:
-            raise HTTPException(status_code=400, detail=result['message'])
+        return {
+            "success": True,
+            "message": f"证书申请任务已提交: {full_domain}",
+            "job_id": job.id,
+            "certificate_id": job.certificate_id,
+            "domain": full_domain
+        }
             
     except HTTPException:
         raise
@@ -232,25 +227,25 @@ async def request_certificate(domain_id: int, request_data: dict = None):
 
 
 @router.post("/renew/{certificate_id}")
-async def renew_certificate_api(certificate_id: int):
-    """续期证书（DNS验证）"""
+async def renew_certificate_api(
+    certificate_id: int,
+    force: bool = Query(False, description="未到续期时间时也强制重新签发")
+):
+    """续期证书（DNS验证），提交签发任务后立即返回任务ID"""
     try:
         # 检查证书是否存在
-        certificate = await Certificate.get(id=certificate_id)
+        certificate = await Certificate.get_or_none(id=certificate_id)
         if not certificate:
             raise HTTPException(status_code=404, detail="证书不存在")
         
-        # 调用证书服务续期证书
-        result = await certificate_service.renew_certificate(certificate_id)
+        job = await certificate_job_service.submit_renewal(certificate, force=force)
         
-        if result['success']:
-            return {
-                "success": True,
-                "message": result['message'],
-                "renewed_at": result.get('renewed_at')
-            }
-        else:
-            raise HTTPException(status_code=400, detail=result['message'])
+        return {
+            "success": True,
+            "message": f"证书续期任务已提交: {job.full_domain}",
+            "job_id": job.id,
+            "certificate_id": certificate_id
+        }
             
     except HTTPException:
         raise
@@ -259,6 +254,68 @@ async def renew_certificate_api(certificate_id: int):
         raise HTTPException(status_code=500, detail=f"续期证书失败: {str(e)}")
 
 
+def _job_to_dict(job: CertificateJob) -> dict:
+    """签发任务的对外表示"""
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "domain_id": job.domain_id,
+        "certificate_id": job.certificate_id,
+        "full_domain": job.full_domain,
+        "status": job.status,
+        "stage": job.stage,
+        "message": job.message,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+@router.get("/jobs/{job_id}")
+async def get_certificate_job(job_id: str):
+    """获取签发任务状态"""
+    job = await CertificateJob.get_or_none(id=job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="签发任务不存在")
+    return _job_to_dict(job)
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_certificate_job(request: Request, job_id: str):
+    """以SSE推送签发任务的阶段变化，任务结束后关闭连接"""
+    if not await CertificateJob.exists(id=job_id):
+        raise HTTPException(status_code=404, detail="签发任务不存在")
+    
+    async def event_stream():
+        last_state = None
+        idle_seconds = 0
+        while not await request.is_disconnected():
+            job = await CertificateJob.get_or_none(id=job_id)
+            if job is None:
+                break
+            
+            state = (job.status, job.stage, job.message)
+            if state != last_state:
+                last_state = state
+                idle_seconds = 0
+                yield f"event: progress\ndata: {json.dumps(_job_to_dict(job), ensure_ascii=False)}\n\n"
+                if job.status in JOB_FINISHED_STATUSES:
+                    break
+            elif idle_seconds >= 15:
+                # 心跳，防止代理因空闲断开连接
+                idle_seconds = 0
+                yield ": keep-alive\n\n"
+            
+            await asyncio.sleep(1)
+            idle_seconds += 1
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/domains/{domain_id}/available")
 async def get_available_subdomains(domain_id: int):
     """获取可用于申请证书的子域名"""
@@ -294,81 +351,48 @@ async def get_available_subdomains(domain_id: int):
 
 
 @router.get("/{certificate_id}/download")
-async def download_certificate(certificate_id: int):
-    """下载证书文件"""
+async def download_certificate(
+    request: Request,
+    certificate_id: int,
+    format: str = Query(EXPORT_ZIP, description="导出格式: zip, fullchain, pfx"),
+    password: Optional[str] = Header(None, alias="X-PFX-Password", description="PFX保护密码（可选）")
+):
+    """
+    下载证书文件（ZIP边生成边输出；fullchain为完整证书链PEM；pfx为PKCS#12）
+
+    PFX密码通过请求头提交，不放在URL中（URL会出现在访问日志、代理日志与浏览器历史里）。
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"不支持的导出格式: {format}")
+    if "password" in request.query_params:
+        raise HTTPException(status_code=400, detail="PFX密码请通过 X-PFX-Password 请求头提交，不要放在URL中")
     try:
         # 获取证书信息
-        certificate = await Certificate.get(id=certificate_id).prefetch_related('domain')
+        certificate = await Certificate.get_or_none(id=certificate_id).prefetch_related('domain')
         if not certificate:
             raise HTTPException(status_code=404, detail="证书不存在")
         
-        # 构建证书文件路径 - 只使用certbot_config/live目录（真实存储位置）
-        cert_name = certificate.name or certificate.domain.name
-        
-        # 检查可能的证书文件路径
-        possible_paths = [
-            os.path.join("data", "certificates", "certbot_config", "live", cert_name),
-            os.path.join("data", "certificates", "certbot_config", "live", certificate.domain.name),
-        ]
-        
-        # 如果证书名称包含域名，也尝试提取子域名
-        if certificate.domain.name in cert_name and cert_name != certificate.domain.name:
-            # 如果证书名称是 "lal.hualuo063.cn SSL证书"，提取 "lal.hualuo063.cn"
-            actual_domain = cert_name.split()[0]  # 取第一个空格前的部分
-            possible_paths.append(os.path.join("data", "certificates", "certbot_config", "live", actual_domain))
-        
-        # 查找存在的证书文件
-        certbot_config_path = None
-        for path in possible_paths:
-            if os.path.exists(os.path.join(path, "fullchain.pem")):
-                certbot_config_path = path
-                logger.info(f"找到证书文件路径: {path}")
-                break
-        
-        if not certbot_config_path:
-            # 记录所有尝试的路径，便于调试
-            logger.error(f"证书文件不存在，尝试的路径: {possible_paths}")
+        # 旧证书的文件只存在于certbot目录，首次下载时导入证书存储
+        if not await certificate_service.import_lineage(certificate):
             raise HTTPException(status_code=404, detail="证书文件不存在")
         
-        # 检查证书文件是否存在
-        cert_file = os.path.join(certbot_config_path, "fullchain.pem")
-        key_file = os.path.join(certbot_config_path, "privkey.pem")
-        
-        if not os.path.exists(cert_file) or not os.path.exists(key_file):
-            raise HTTPException(status_code=404, detail="证书文件不存在")
+        export = export_certificate(certificate, format, password)
         
-        # 创建临时ZIP文件
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.zip') as temp_zip:
-            with zipfile.ZipFile(temp_zip.name, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                # 添加证书文件
-                zipf.write(cert_file, f"{cert_name}.crt")
-                zipf.write(key_file, f"{cert_name}.key")
-                
-                # 如果有证书链文件，也添加进去
-                chain_file = os.path.join(certbot_config_path, "chain.pem")
-                if os.path.exists(chain_file):
-                    zipf.write(chain_file, f"{cert_name}.chain.pem")
-        
-        # 返回ZIP文件
         # 使用安全的文件名，避免中文字符编码问题
-        import urllib.parse
-        import re
-        
-        # 清理文件名，移除特殊字符和中文字符
-        clean_name = re.sub(r'[^\w\-_.]', '_', cert_name)
-        clean_name = clean_name.replace("SSL证书", "ssl_cert").replace(" ", "_")
-        safe_filename = f"{clean_name}_certificate.zip"
-        encoded_filename = urllib.parse.quote(safe_filename)
-        
-        return FileResponse(
-            path=temp_zip.name,
-            filename=safe_filename,
-            media_type="application/zip",
+        encoded_filename = urllib.parse.quote(export.filename)
+        return StreamingResponse(
+            export.chunks,
+            media_type=export.media_type,
             headers={"Content-Disposition": f"attachment; filename*=UTF-8''{encoded_filename}"}
         )
         
     except HTTPException:
         raise
+    except CertificateExportError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except CertificateStoreError as e:
+        logger.error(f"读取证书存储失败: {str(e)}")
+        raise HTTPException(status_code=404, detail="证书文件不存在")
     except Exception as e:
         logger.error(f"下载证书失败: {str(e)}")
         raise HTTPException(status_code=500, detail=f"下载证书失败: {str(e)}")
@@ -4,14 +4,19 @@ import httpx
 from fastapi import APIRouter, HTTPException, Depends, Query
 from typing import List, Optional
 from tortoise.transactions import atomic
-from datetime import datetime, timedelta
-from app.models import DDNSConfig, DDNSLog, Domain, DNSRecord, RecordType
+from datetime import datetime
+from app.models import DDNSConfig, DNSRecord, RecordType
 from app.schemas import (
     DDNSConfigCreate, DDNSConfigUpdate, DDNSConfigResponse, 
     DDNSLogResponse, DDNSUpdateRequest, DDNSUpdateResponse
 )
 from app.providers import HuaweiProvider, AliyunProvider
 from app.providers.base import get_provider_instance
+from app.services.dashboard_service import dashboard_service
+from app.services.domain_summary_service import domain_summary_service
+from app.services.entity_cache import entity_cache
+from app.pagination import CursorError, pagination_info
+from app.services.log_store import DDNS_LOGS, ddns_log_to_dict, log_store
 import logging
 
 router = APIRouter(prefix="/api/ddns", tags=["ddns"])
@@ -67,7 +72,7 @@ async def get_ddns_configs():
 @router.get("/{config_id}", response_model=DDNSConfigResponse)
 async def get_ddns_config(config_id: str):
     """获取单个DDNS配置"""
-    config = await DDNSConfig.get_or_none(id=config_id).prefetch_related('domain__provider')
+    config = await entity_cache.get_ddns_config(config_id)
     if not config:
         raise HTTPException(status_code=404, detail="DDNS配置不存在")
     return config
@@ -77,7 +82,7 @@ async def get_ddns_config(config_id: str):
 async def create_ddns_config(config_data: DDNSConfigCreate):
     """创建DDNS配置"""
     # 验证域名是否存在
-    domain = await Domain.get_or_none(id=config_data.domain_id).prefetch_related('provider')
+    domain = await entity_cache.get_domain(config_data.domain_id)
     if not domain:
         raise HTTPException(status_code=404, detail="域名不存在")
     
@@ -157,6 +162,7 @@ async def create_ddns_config(config_data: DDNSConfigCreate):
                 external_id=external_id,
                 enabled=True
             )
+            await domain_summary_service.refresh(config_data.domain_id)
             
             # 创建本地DDNS配置
             import uuid
@@ -168,12 +174,12 @@ async def create_ddns_config(config_data: DDNSConfigCreate):
             config = await DDNSConfig.create(**config_dict)
             
             # 添加DDNS日志
-            await DDNSLog.create(
-                ddns_config=config,
-                old_ip=None,
-                new_ip=current_ip,
+            await log_store.write_ddns_log(
+                config.id,
                 status="success",
-                message=f"DDNS配置创建成功，设置初始IP: {current_ip}"
+                message=f"DDNS配置创建成功，设置初始IP: {current_ip}",
+                old_ip=None,
+                new_ip=current_ip
             )
             
     except Exception as e:
@@ -218,7 +224,7 @@ async def update_ddns_config(config_id: str, config_data: DDNSConfigUpdate):
     # 如果修改了子域名，检查是否冲突
     if 'subdomain' in update_data:
         # 验证子域名是否属于指定域名
-        domain = await Domain.get_or_none(id=config.domain_id)
+        domain = await entity_cache.get_domain(config.domain_id)
         if domain and not update_data['subdomain'].endswith(f".{domain.name}") and update_data['subdomain'] != domain.name:
             raise HTTPException(status_code=400, detail=f"子域名必须属于域名 {domain.name}")
         
@@ -239,6 +245,7 @@ async def update_ddns_config(config_id: str, config_data: DDNSConfigUpdate):
     async with in_transaction():
         await config.update_from_dict(update_data)
         await config.save()
+    await entity_cache.invalidate_ddns_config(config_id)
     
     # 获取DDNS服务实例
     from app.services.scheduler_service import scheduler_service
@@ -313,13 +320,15 @@ async def delete_ddns_config(config_id: str):
                 await provider_instance.delete_record(config.domain.name, dns_record.external_id)
                 # 删除本地DNS记录
                 await dns_record.delete()
+                await domain_summary_service.refresh(config.domain_id)
     except Exception as e:
         # 删除DNS记录失败，记录日志但不阻止DDNS配置删除
         logger.warning(f"删除DNS记录失败: {str(e)}")
     
     # 删除相关日志
-    await DDNSLog.filter(ddns_config=config).delete()
+    await log_store.delete_for_owner(DDNS_LOGS, config.id)
     await config.delete()
+    await entity_cache.invalidate_ddns_config(config_id)
     
     return {"message": "删除成功"}
 
@@ -327,56 +336,35 @@ async def delete_ddns_config(config_id: str):
 @router.get("/{config_id}/logs")
 async def get_ddns_logs(
     config_id: str,
-    page: int = Query(1, ge=1, description="页码"),
-    page_size: int = Query(5, ge=1, le=100, description="每页记录数")
+    cursor: Optional[str] = Query(None, description="分页游标（上次返回的 next_cursor / prev_cursor / last_cursor）"),
+    page_size: int = Query(5, ge=1, le=100, description="每页记录数"),
+    include_total: bool = Query(False, description="是否统计日志总数")
 ):
-    """获取DDNS更新日志"""
-    config = await DDNSConfig.get_or_none(id=config_id)
+    """获取DDNS更新日志（按 (created_at, id) 倒序游标分页）"""
+    config = await entity_cache.get_ddns_config(config_id)
     if not config:
         raise HTTPException(status_code=404, detail="DDNS配置不存在")
     
-    # 计算偏移量
-    offset = (page - 1) * page_size
-    
-    # 获取总记录数
-    total = await DDNSLog.filter(ddns_config=config).count()
-    
-    # 获取分页日志
-    logs = await DDNSLog.filter(ddns_config=config).order_by('-created_at').offset(offset).limit(page_size)
-    
-    # 计算总页数
-    total_pages = (total + page_size - 1) // page_size
+    # 日志按月分区存储，只读取填满一页所需的分区
+    filters = {"ddns_config_id": str(config.id)}
+    try:
+        page = await log_store.page(DDNS_LOGS, filters, page_size, cursor)
+    except CursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    # 将日志对象转换为字典格式
-    logs_data = []
-    for log in logs:
-        logs_data.append({
-            "id": log.id,
-            "ddns_config_id": str(log.ddns_config_id),
-            "old_ip": log.old_ip,
-            "new_ip": log.new_ip,
-            "status": log.status,
-            "message": log.message,
-            "created_at": log.created_at.isoformat()
-        })
+    total = await log_store.count(DDNS_LOGS, filters) if include_total else None
     
     return {
-        "logs": logs_data,
-        "pagination": {
-            "page": page,
-            "page_size": page_size,
-            "total": total,
-            "total_pages": total_pages,
-            "has_next": page < total_pages,
-            "has_prev": page > 1
-        }
+        "logs": [ddns_log_to_dict(row) for row in page["items"]],
+        "pagination": pagination_info(page, page_size, total)
     }
 
 
 @router.post("/{config_id}/update", response_model=DDNSUpdateResponse)
 async def update_ddns_record(config_id: str, force: bool = False):
     """手动更新DDNS记录"""
-    config = await DDNSConfig.get_or_none(id=config_id).prefetch_related('domain__provider')
+    # 缓存中的配置为共享对象，只读；更新后的IP直接写库并失效缓存
+    config = await entity_cache.get_ddns_config(config_id)
     if not config:
         raise HTTPException(status_code=404, detail="DDNS配置不存在")
     
@@ -391,12 +379,12 @@ async def update_ddns_record(config_id: str, force: bool = False):
         try:
             from tortoise.transactions import in_transaction
             async with in_transaction():
-                await DDNSLog.create(
-                    ddns_config=config,
-                    old_ip=config.last_ip,
-                    new_ip=None,
+                await log_store.write_ddns_log(
+                    config.id,
                     status="failed",
-                    message=f"获取公网IP失败: {str(e)}"
+                    message=f"获取公网IP失败: {str(e)}",
+                    old_ip=config.last_ip,
+                    new_ip=None
                 )
         except:
             pass
@@ -417,12 +405,12 @@ async def update_ddns_record(config_id: str, force: bool = False):
         try:
             from tortoise.transactions import in_transaction
             async with in_transaction():
-                await DDNSLog.create(
-                    ddns_config=config,
-                    old_ip=old_ip,
-                    new_ip=current_ip,
+                await log_store.write_ddns_log(
+                    config.id,
                     status="success",
-                    message="IP地址未变化，无需更新"
+                    message="IP地址未变化，无需更新",
+                    old_ip=old_ip,
+                    new_ip=current_ip
                 )
         except:
             pass
@@ -444,12 +432,12 @@ async def update_ddns_record(config_id: str, force: bool = False):
         try:
             from tortoise.transactions import in_transaction
             async with in_transaction():
-                await DDNSLog.create(
-                    ddns_config=config,
-                    old_ip=old_ip,
-                    new_ip=current_ip,
+                await log_store.write_ddns_log(
+                    config.id,
                     status="failed",
-                    message="不支持的服务商类型"
+                    message="不支持的服务商类型",
+                    old_ip=old_ip,
+                    new_ip=current_ip
                 )
         except:
             pass
@@ -522,26 +510,29 @@ async def update_ddns_record(config_id: str, force: bool = False):
                         ttl=600,
                         external_id=external_id
                     )
+                await domain_summary_service.refresh(config.domain_id)
                 
                 # 更新配置
-                config.last_ip = current_ip
-                config.last_update_at = datetime.now()
-                await config.save()
+                updated_at = datetime.now()
+                await DDNSConfig.filter(id=config.id).update(last_ip=current_ip, last_update_at=updated_at)
             
             # 记录日志
             log_status = "success" if success else "failed"
             log_message = "DDNS更新成功" if success else (error_message or "DDNS更新失败")
             
-            await DDNSLog.create(
-                ddns_config=config,
-                old_ip=old_ip,
-                new_ip=current_ip,
+            await log_store.write_ddns_log(
+                config.id,
                 status=log_status,
-                message=log_message
+                message=log_message,
+                old_ip=old_ip,
+                new_ip=current_ip
             )
     except Exception as e:
         error_message = f"数据库操作失败: {str(e)}"
         success = False
+    finally:
+        if success:
+            await entity_cache.invalidate_ddns_config(config.id)
     
     # 返回结果
     if success:
@@ -550,7 +541,7 @@ async def update_ddns_record(config_id: str, force: bool = False):
             message="DDNS更新成功",
             old_ip=old_ip,
             new_ip=current_ip,
-            updated_at=config.last_update_at
+            updated_at=updated_at
         )
     else:
         return DDNSUpdateResponse(
@@ -616,27 +607,15 @@ async def update_all_ddns():
 @router.get("/status/summary")
 async def get_ddns_status_summary():
     """获取DDNS状态概览"""
-    total_configs = await DDNSConfig.all().count()
-    enabled_configs = await DDNSConfig.filter(enabled=True).count()
-    
-    # 获取最近24小时的更新统计
-    yesterday = datetime.now() - timedelta(days=1)
-    recent_updates = await DDNSLog.filter(
-        created_at__gte=yesterday,
-        status="success"
-    ).count()
-    
-    recent_failures = await DDNSLog.filter(
-        created_at__gte=yesterday,
-        status="failed"
-    ).count()
+    # 与首页共用缓存的统计数据（含最近24小时的更新统计）
+    stats = await dashboard_service.get_stats()
     
     return {
-        "total_configs": total_configs,
-        "enabled_configs": enabled_configs,
-        "disabled_configs": total_configs - enabled_configs,
-        "recent_updates": recent_updates,
-        "recent_failures": recent_failures,
+        "total_configs": stats["total_ddns_configs"],
+        "enabled_configs": stats["active_ddns_configs"],
+        "disabled_configs": stats["total_ddns_configs"] - stats["active_ddns_configs"],
+        "recent_updates": stats["recent_ddns_updates"],
+        "recent_failures": stats["recent_ddns_failures"],
         "last_check": datetime.now()
     }
 
@@ -1,17 +1,29 @@
 """域名管理API"""
-from fastapi import APIRouter, HTTPException, Depends, Query
-from typing import List, Optional
+import json
+import urllib.parse
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import Any, Dict, List, Optional
 from tortoise.transactions import atomic
-from app.models import Domain, Provider, DNSRecord
-from app.schemas import DomainResponse, DNSRecordCreate, DNSRecordUpdate, DNSRecordResponse
+from app.models import Domain, Provider, DNSRecord, RecordType
+from app.schemas import (
+    DomainListResponse, DNSRecordCreate, DNSRecordUpdate, DNSRecordResponse, RecordRepointRequest
+)
+from app.services.domain_summary_service import domain_summary_service
+from app.services.entity_cache import entity_cache
+from app.providers.base import get_provider_instance
+from app.pagination import CursorError, paginate, pagination_info
+from app.services.record_reference_service import record_reference_service
+from app.services.record_import_service import IMPORT_MODES, IMPORT_MODE_MERGE, record_import_service
+from app.zone_files import WRITERS, ZONE_FORMATS, ZONE_FORMAT_BIND, ZoneFileError
 
 router = APIRouter(prefix="/api/domains", tags=["domains"])
 
 
-@router.get("/", response_model=List[DomainResponse])
+@router.get("/", response_model=List[DomainListResponse])
 async def get_domains(provider_id: Optional[int] = Query(None, description="按服务商ID筛选")):
-    """获取域名列表"""
-    query = Domain.all().prefetch_related('provider', 'records')
+    """获取域名列表（记录统计来自汇总表，不读取解析记录）"""
+    query = Domain.all().prefetch_related('provider', 'summary')
     
     if provider_id:
         query = query.filter(provider_id=provider_id)
@@ -20,10 +32,38 @@ async def get_domains(provider_id: Optional[int] = Query(None, description="按
     return domains
 
 
-@router.get("/{domain_id}", response_model=DomainResponse)
+@router.get("/records/references")
+async def get_record_references(
+    value: str = Query(..., min_length=1, description="记录值，如IP地址或CNAME目标"),
+    type: Optional[RecordType] = Query(None, description="仅查找指定类型的记录")
+):
+    """查找所有服务商下指向该记录值的解析记录"""
+    records = await record_reference_service.find_references(value, type)
+    return {
+        "value": value,
+        "total": len(records),
+        "records": [record_reference_service.describe(record) for record in records]
+    }
+
+
+@router.post("/records/repoint")
+async def repoint_records(repoint_data: RecordRepointRequest):
+    """把所有指向原记录值的解析记录批量修改为新值（通过各服务商接口写入）"""
+    result = await record_reference_service.repoint(
+        repoint_data.old_value,
+        repoint_data.new_value,
+        repoint_data.type,
+        repoint_data.dry_run
+    )
+    if not result['success'] and 'results' not in result:
+        raise HTTPException(status_code=400, detail=result['message'])
+    return result
+
+
+@router.get("/{domain_id}", response_model=DomainListResponse)
 async def get_domain(domain_id: int):
     """获取单个域名"""
-    domain = await Domain.get_or_none(id=domain_id).prefetch_related('provider')
+    domain = await Domain.get_or_none(id=domain_id).prefetch_related('provider', 'summary')
     if not domain:
         raise HTTPException(status_code=404, detail="域名不存在")
     return domain
@@ -44,18 +84,20 @@ async def delete_domain(domain_id: int):
     # 删除相关记录
     await DNSRecord.filter(domain=domain).delete()
     await domain.delete()
+    await entity_cache.invalidate_domain(domain_id)
     return {"message": "删除成功"}
 
 
 @router.get("/{domain_id}/records")
 async def get_domain_records(
     domain_id: int,
-    page: int = Query(1, ge=1, description="页码"),
+    cursor: Optional[str] = Query(None, description="分页游标（上次返回的 next_cursor / prev_cursor / last_cursor）"),
     page_size: int = Query(5, ge=1, le=100, description="每页记录数"),
-    search: Optional[str] = Query(None, description="按记录名称搜索")
+    search: Optional[str] = Query(None, description="按记录名称搜索"),
+    include_total: bool = Query(False, description="搜索时是否统计匹配总数")
 ):
-    """获取域名的解析记录（分页+搜索）"""
-    domain = await Domain.get_or_none(id=domain_id)
+    """获取域名的解析记录（按 (name, id) 游标分页+搜索）"""
+    domain = await Domain.get_or_none(id=domain_id).prefetch_related('summary')
     if not domain:
         raise HTTPException(status_code=404, detail="域名不存在")
     
@@ -63,74 +105,113 @@ async def get_domain_records(
     query = DNSRecord.filter(domain=domain)
     
     # 如果有搜索条件，添加名称模糊匹配
-    if search and search.strip():
-        query = query.filter(name__icontains=search.strip())
-    
-    # 计算偏移量
-    offset = (page - 1) * page_size
-    
-    # 获取总记录数
-    total = await query.count()
+    search = search.strip() if search else ''
+    if search:
+        query = query.filter(name__icontains=search)
     
-    # 获取分页记录
-    records = await query.offset(offset).limit(page_size).all()
+    try:
+        page = await paginate(query, ['name', 'id'], page_size, cursor)
+    except CursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    # 计算总页数
-    total_pages = (total + page_size - 1) // page_size
+    # 未搜索时总数直接取自域名汇总表；搜索时仅在需要时统计
+    total = None
+    if not search:
+        total = domain.summary.record_count if domain.summary else 0
+    elif include_total:
+        total = await query.count()
     
     return {
-        "records": records,
-        "pagination": {
-            "page": page,
-            "page_size": page_size,
-            "total": total,
-            "total_pages": total_pages,
-            "has_next": page < total_pages,
-            "has_prev": page > 1
-        },
+        "records": page["items"],
+        "pagination": pagination_info(page, page_size, total),
         "search": search
     }
 
 
+@router.get("/{domain_id}/records/export")
+async def export_domain_records(
+    domain_id: int,
+    format: str = Query(ZONE_FORMAT_BIND, description="导出格式: bind, csv, json")
+):
+    """导出域名的全部解析记录（边读取边输出）"""
+    if format not in ZONE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"不支持的格式: {format}")
+    domain = await entity_cache.get_domain(domain_id)
+    if not domain:
+        raise HTTPException(status_code=404, detail="域名不存在")
+    
+    writer = WRITERS[format]
+    filename = urllib.parse.quote(f"{domain.name}.{writer.extension}")
+    return StreamingResponse(
+        record_import_service.export(domain, format),
+        media_type=f"{writer.media_type}; charset=utf-8",
+        headers={"Content-Disposition": f"attachment; filename*=UTF-8''{filename}"}
+    )
+
+
+async def _stream_import(domain: Domain, plan):
+    """逐行输出导入进度（NDJSON）"""
+    def line(payload: Dict[str, Any]) -> str:
+        return json.dumps(payload, ensure_ascii=False, default=str) + "\n"
+    
+    try:
+        async for event in record_import_service.apply(domain, plan):
+            yield line(event)
+    except Exception as e:
+        yield line({"type": "failed", "message": str(e)})
+
+
+@router.post("/{domain_id}/records/import")
+async def import_domain_records(
+    domain_id: int,
+    request: Request,
+    format: str = Query(ZONE_FORMAT_BIND, description="文件格式: bind, csv, json"),
+    mode: str = Query(IMPORT_MODE_MERGE, description="merge: 只新增和更新; replace: 同时删除文件中没有的记录"),
+    dry_run: bool = Query(False, description="只返回与当前记录的差异，不实际修改")
+):
+    """
+    批量导入解析记录（请求体为文件内容）
+    
+    先解析并校验全部记录，再与当前记录比对。dry_run=true 时返回差异预览；
+    否则按批次写入服务商，以NDJSON逐行返回进度：首行为 plan，每批一行 progress，
+    失败的记录各一行 error，最后一行为 done。
+    """
+    if format not in ZONE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"不支持的格式: {format}")
+    if mode not in IMPORT_MODES:
+        raise HTTPException(status_code=400, detail=f"不支持的导入模式: {mode}")
+    domain = await entity_cache.get_domain(domain_id)
+    if not domain:
+        raise HTTPException(status_code=404, detail="域名不存在")
+    
+    try:
+        records, issues = await record_import_service.parse(domain, format, request.stream())
+    except ZoneFileError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    plan = await record_import_service.plan(domain, records, issues, mode)
+    
+    if dry_run:
+        return {"domain": domain.name, "dry_run": True, **plan.to_dict(domain.name)}
+    
+    if get_provider_instance(domain.provider) is None:
+        raise HTTPException(status_code=400, detail="不支持的服务商类型")
+    return StreamingResponse(
+        _stream_import(domain, plan),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.post("/{domain_id}/records", response_model=DNSRecordResponse)
 @atomic()
 async def create_domain_record(domain_id: int, record_data: DNSRecordCreate):
     """为域名添加解析记录"""
-    domain = await Domain.get_or_none(id=domain_id).prefetch_related('provider')
+    domain = await entity_cache.get_domain(domain_id)
     if not domain:
         raise HTTPException(status_code=404, detail="域名不存在")
     
     # 获取服务商实例
-    provider = None
-    if domain.provider.type == 1:  # 华为云
-        from app.providers.huawei import HuaweiProvider
-        provider = HuaweiProvider(
-            access_key=domain.provider.access_key,
-            secret_key=domain.provider.secret_key,
-            region=domain.provider.region or "cn-north-4"
-        )
-    elif domain.provider.type == 2:  # 阿里云
-        from app.providers.aliyun import AliyunProvider
-        provider = AliyunProvider(
-            access_key=domain.provider.access_key,
-            secret_key=domain.provider.secret_key,
-            region=domain.provider.region or "cn-hangzhou"
-        )
-    elif domain.provider.type == 3:  # 腾讯云
-        from app.providers.tencent import TencentProvider
-        provider = TencentProvider(
-            access_key=domain.provider.access_key,
-            secret_key=domain.provider.secret_key,
-            region=domain.provider.region or "ap-beijing"
-        )
-    elif domain.provider.type == 4:  # Cloudflare
-        from app.providers.cloudflare import CloudflareProvider
-        provider = CloudflareProvider(
-            access_key=domain.provider.access_key,
-            secret_key=domain.provider.secret_key,
-            region=domain.provider.region or ""
-        )
-    
+    provider = get_provider_instance(domain.provider)
     if not provider:
         raise HTTPException(status_code=400, detail="不支持的服务商类型")
     
@@ -165,6 +246,7 @@ async def create_domain_record(domain_id: int, record_data: DNSRecordCreate):
         # API调用成功，保存到本地数据库
         record_dict['external_id'] = external_id
         record = await DNSRecord.create(domain=domain, **record_dict)
+        await domain_summary_service.refresh(domain.id)
         return record
         
     except Exception as e:
@@ -181,38 +263,9 @@ async def update_domain_record(record_id: int, record_data: DNSRecordUpdate):
         raise HTTPException(status_code=404, detail="解析记录不存在")
     
     domain = record.domain
-    provider_instance = None
     
     # 获取服务商实例
-    if domain.provider.type == 1:  # 华为云
-        from app.providers.huawei import HuaweiProvider
-        provider_instance = HuaweiProvider(
-            access_key=domain.provider.access_key,
-            secret_key=domain.provider.secret_key,
-            region=domain.provider.region or "cn-north-4"
-        )
-    elif domain.provider.type == 2:  # 阿里云
-        from app.providers.aliyun import AliyunProvider
-        provider_instance = AliyunProvider(
-            access_key=domain.provider.access_key,
-            secret_key=domain.provider.secret_key,
-            region=domain.provider.region or "cn-hangzhou"
-        )
-    elif domain.provider.type == 3:  # 腾讯云
-        from app.providers.tencent import TencentProvider
-        provider_instance = TencentProvider(
-            access_key=domain.provider.access_key,
-            secret_key=domain.provider.secret_key,
-            region=domain.provider.region or "ap-beijing"
-        )
-    elif domain.provider.type == 4:  # Cloudflare
-        from app.providers.cloudflare import CloudflareProvider
-        provider_instance = CloudflareProvider(
-            access_key=domain.provider.access_key,
-            secret_key=domain.provider.secret_key,
-            region=domain.provider.region or ""
-        )
-    
+    provider_instance = get_provider_instance(domain.provider)
     if not provider_instance:
         raise HTTPException(status_code=400, detail="不支持的服务商类型")
     
@@ -289,6 +342,7 @@ async def update_domain_record(record_id: int, record_data: DNSRecordUpdate):
             record.enabled = update_dict['enabled']
         
         await record.save()
+        await domain_summary_service.refresh(domain.id)
         return record
         
     except Exception as e:
@@ -305,38 +359,9 @@ async def delete_domain_record(record_id: int):
         raise HTTPException(status_code=404, detail="解析记录不存在")
     
     domain = record.domain
-    provider_instance = None
     
     # 获取服务商实例
-    if domain.provider.type == 1:  # 华为云
-        from app.providers.huawei import HuaweiProvider
-        provider_instance = HuaweiProvider(
-            access_key=domain.provider.access_key,
-            secret_key=domain.provider.secret_key,
-            region=domain.provider.region or "cn-north-4"
-        )
-    elif domain.provider.type == 2:  # 阿里云
-        from app.providers.aliyun import AliyunProvider
-        provider_instance = AliyunProvider(
-            access_key=domain.provider.access_key,
-            secret_key=domain.provider.secret_key,
-            region=domain.provider.region or "cn-hangzhou"
-        )
-    elif domain.provider.type == 3:  # 腾讯云
-        from app.providers.tencent import TencentProvider
-        provider_instance = TencentProvider(
-            access_key=domain.provider.access_key,
-            secret_key=domain.provider.secret_key,
-            region=domain.provider.region or "ap-beijing"
-        )
-    elif domain.provider.type == 4:  # Cloudflare
-        from app.providers.cloudflare import CloudflareProvider
-        provider_instance = CloudflareProvider(
-            access_key=domain.provider.access_key,
-            secret_key=domain.provider.secret_key,
-            region=domain.provider.region or ""
-        )
-    
+    provider_instance = get_provider_instance(domain.provider)
     if not provider_instance:
         raise HTTPException(status_code=400, detail="不支持的服务商类型")
     
@@ -352,6 +377,7 @@ async def delete_domain_record(record_id: int):
         
         # API调用成功，删除本地数据库记录
         await record.delete()
+        await domain_summary_service.refresh(domain.id)
         return {"message": "删除成功"}
         
     except Exception as e:
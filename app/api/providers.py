@@ -1,15 +1,28 @@
 """服务商管理API"""
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
+import asyncio
+import json
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import Any, Dict, List, Optional, Tuple
+from tortoise.expressions import Q
 from tortoise.transactions import atomic
-from app.models import Provider
+from app.config.settings import settings
+from app.models import Provider, ProviderType, ZoneMirror
 from app.schemas import ProviderCreate, ProviderUpdate, ProviderResponse
-from app.providers import HuaweiProvider, AliyunProvider, TencentProvider, CloudflareProvider
+from app.providers.base import get_provider_instance
+from app.providers.registry import provider_registry
+from app.services.entity_cache import entity_cache
 from app.services.scheduler_service import scheduler_service
 
 router = APIRouter(prefix="/api/providers", tags=["providers"])
 
 
+def _check_provider_type(provider_type: Optional[int]):
+    """模拟服务商只在测试环境可用"""
+    if provider_type == ProviderType.FAKE and not settings.fake_provider_enabled:
+        raise HTTPException(status_code=400, detail="模拟服务商未启用（设置 DNS_FAKE_PROVIDER_ENABLED=true 后可用）")
+
+
 @router.get("/", response_model=List[ProviderResponse])
 async def get_providers():
     """获取服务商列表"""
@@ -20,7 +33,7 @@ async def get_providers():
 @router.get("/{provider_id}", response_model=ProviderResponse)
 async def get_provider(provider_id: int):
     """获取单个服务商"""
-    provider = await Provider.get_or_none(id=provider_id)
+    provider = await entity_cache.get_provider(provider_id)
     if not provider:
         raise HTTPException(status_code=404, detail="服务商不存在")
     return provider
@@ -30,38 +43,17 @@ async def get_provider(provider_id: int):
 @atomic()
 async def create_provider(provider_data: ProviderCreate):
     """创建服务商"""
+    _check_provider_type(provider_data.type)
+    
     # 先创建服务商记录（本地保存）
     provider = await Provider.create(**provider_data.dict())
     
     # 如果启用状态为True，则进行连接测试并更新状态
     if provider_data.enabled:
         try:
-            # 创建服务商实例
-            if provider_data.type.value == 1:  # 华为云
-                provider_instance = HuaweiProvider(
-                    provider_data.access_key,
-                    provider_data.secret_key,
-                    provider_data.region or ""
-                )
-            elif provider_data.type.value == 2:  # 阿里云
-                provider_instance = AliyunProvider(
-                    provider_data.access_key,
-                    provider_data.secret_key,
-                    provider_data.region or ""
-                )
-            elif provider_data.type.value == 3:  # 腾讯云
-                provider_instance = TencentProvider(
-                    provider_data.access_key,
-                    provider_data.secret_key,
-                    provider_data.region or ""
-                )
-            elif provider_data.type.value == 4:  # Cloudflare
-                provider_instance = CloudflareProvider(
-                    provider_data.access_key,
-                    provider_data.secret_key,
-                    provider_data.region or ""
-                )
-            else:
+            # 获取服务商实例（由注册表复用）
+            provider_instance = get_provider_instance(provider)
+            if provider_instance is None:
                 # 不支持的服务商类型，设置为禁用状态
                 provider.enabled = False
                 provider.status = "error"
@@ -110,6 +102,7 @@ async def update_provider(provider_id: int, provider_data: ProviderUpdate):
     
     # 只更新提供的字段
     update_data = provider_data.dict(exclude_unset=True)
+    _check_provider_type(update_data.get('type'))
     
     # 如果有密钥更新，测试连接
     if provider_data.access_key or provider_data.secret_key:
@@ -117,23 +110,17 @@ async def update_provider(provider_id: int, provider_data: ProviderUpdate):
         secret_key = provider_data.secret_key or provider.secret_key
         region = provider_data.region or provider.region
         
-        if provider.type.value == 1:  # 华为云
-            provider_instance = HuaweiProvider(access_key, secret_key, region or "")
-        elif provider.type.value == 2:  # 阿里云
-            provider_instance = AliyunProvider(access_key, secret_key, region or "")
-        elif provider.type.value == 3:  # 腾讯云
-            provider_instance = TencentProvider(access_key, secret_key, region or "")
-        elif provider.type.value == 4:  # Cloudflare
-            provider_instance = CloudflareProvider(access_key, secret_key, region or "")
-        else:
-            raise HTTPException(status_code=400, detail="不支持的服务商类型")
-        
-        if not await provider_instance.test_connection():
-            raise HTTPException(status_code=400, detail="连接测试失败，请检查配置")
+        # 新凭据保存前用临时实例测试，保存后注册表按新凭据重建实例
+        async with provider_registry.temporary(provider.type, access_key, secret_key, region) as provider_instance:
+            if provider_instance is None:
+                raise HTTPException(status_code=400, detail="不支持的服务商类型")
+            if not await provider_instance.test_connection():
+                raise HTTPException(status_code=400, detail="连接测试失败，请检查配置")
     
     # 更新数据库
     await provider.update_from_dict(update_data)
     await provider.save()
+    await entity_cache.invalidate_provider(provider.id)
     return provider
 
 
@@ -150,7 +137,14 @@ async def delete_provider(provider_id: int):
     if domain_count > 0:
         raise HTTPException(status_code=400, detail=f"该服务商下还有 {domain_count} 个域名，无法删除")
     
+    # 删除服务商会级联删除区域镜像，但调度器中的镜像任务不会随之删除
+    mirror_count = await ZoneMirror.filter(Q(source_provider_id=provider_id) | Q(target_provider_id=provider_id)).count()
+    if mirror_count > 0:
+        raise HTTPException(status_code=400, detail=f"该服务商还被 {mirror_count} 个区域镜像使用，无法删除")
+    
     await provider.delete()
+    await entity_cache.invalidate_provider(provider_id)
+    await provider_registry.evict(provider_id)
     return {"message": "删除成功"}
 
 
@@ -162,31 +156,8 @@ async def test_provider_connection(provider_id: int):
         raise HTTPException(status_code=404, detail="服务商不存在")
     
     try:
-        if provider.type.value == 1:  # 华为云
-            provider_instance = HuaweiProvider(
-                provider.access_key,
-                provider.secret_key,
-                provider.region or ""
-            )
-        elif provider.type.value == 2:  # 阿里云
-            provider_instance = AliyunProvider(
-                provider.access_key,
-                provider.secret_key,
-                provider.region or ""
-            )
-        elif provider.type.value == 3:  # 腾讯云
-            provider_instance = TencentProvider(
-                provider.access_key,
-                provider.secret_key,
-                provider.region or ""
-            )
-        elif provider.type.value == 4:  # Cloudflare
-            provider_instance = CloudflareProvider(
-                provider.access_key,
-                provider.secret_key,
-                provider.region or ""
-            )
-        else:
+        provider_instance = get_provider_instance(provider)
+        if provider_instance is None:
             raise HTTPException(status_code=400, detail="不支持的服务商类型")
         
         success = await provider_instance.test_connection()
@@ -196,6 +167,7 @@ async def test_provider_connection(provider_id: int):
         provider.status = "connected" if success else "failed"
         provider.last_test_at = datetime.now()
         await provider.save()
+        await entity_cache.invalidate_provider(provider.id)
         
         return {
             "success": success, 
@@ -209,6 +181,7 @@ async def test_provider_connection(provider_id: int):
         provider.status = "error"
         provider.last_test_at = datetime.now()
         await provider.save()
+        await entity_cache.invalidate_provider(provider.id)
         
         return {
             "success": False, 
@@ -218,65 +191,36 @@ async def test_provider_connection(provider_id: int):
         }
 
 
-@router.get("/{provider_id}/domains")
-async def get_provider_domains(provider_id: int):
-    """获取服务商下的域名列表"""
-    provider = await Provider.get_or_none(id=provider_id)
-    if not provider:
-        raise HTTPException(status_code=404, detail="服务商不存在")
+def _zone_rows(provider: Provider, domain_name: str, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """把服务商返回的解析记录转换为接口输出"""
+    return [
+        {
+            "name": record["name"],
+            "domain": domain_name,
+            "provider_name": provider.name,
+            "type": record.get("type"),
+            "records": record.get("records", []),
+            "ttl": record.get("ttl"),
+            "status": record.get("status"),
+            "zone_id": record.get("zone_id", ""),
+            "record_id": record.get("id", "")
+        }
+        for record in records
+    ]
+
+
+def _zone_tasks(provider: Provider, provider_instance, names: List[str]):
+    """为每个域名创建读取记录的协程，同一时间最多 provider_zone_concurrency 个在请求服务商"""
+    semaphore = asyncio.Semaphore(settings.provider_zone_concurrency)
     
-    try:
-        if provider.type.value == 1:  # 华为云
-            provider_instance = HuaweiProvider(
-                provider.access_key,
-                provider.secret_key,
-                provider.region or ""
-            )
-        elif provider.type.value == 2:  # 阿里云
-            provider_instance = AliyunProvider(
-                provider.access_key,
-                provider.secret_key,
-                provider.region or ""
-            )
-        elif provider.type.value == 3:  # 腾讯云
-            provider_instance = TencentProvider(
-                provider.access_key,
-                provider.secret_key,
-                provider.region or ""
-            )
-        elif provider.type.value == 4:  # Cloudflare
-            provider_instance = CloudflareProvider(
-                provider.access_key,
-                provider.secret_key,
-                provider.region or ""
-            )
-        else:
-            raise HTTPException(status_code=400, detail="不支持的服务商类型")
-        
-        domains = await provider_instance.get_domains()
-        
-        # 获取所有域名的记录
-        result = []
-        for domain in domains:
-            domain_name = domain["name"]
+    async def fetch(domain_name: str) -> Tuple[str, List[Dict[str, Any]]]:
+        async with semaphore:
             try:
-                # 获取该域名的所有记录
                 records = await provider_instance.get_records(domain_name)
-                for record in records:
-                    result.append({
-                        "name": record["name"],
-                        "domain": domain_name,
-                        "provider_name": provider.name,
-                        "type": record.get("type"),
-                        "records": record.get("records", []),
-                        "ttl": record.get("ttl"),
-                        "status": record.get("status"),
-                        "zone_id": record.get("zone_id", ""),
-                        "record_id": record.get("id", "")
-                    })
+                return domain_name, _zone_rows(provider, domain_name, records)
             except Exception as e:
                 # 如果获取记录失败，至少显示域名信息
-                result.append({
+                return domain_name, [{
                     "name": domain_name,
                     "domain": domain_name,
                     "provider_name": provider.name,
@@ -287,9 +231,74 @@ async def get_provider_domains(provider_id: int):
                     "zone_id": "",
                     "record_id": "",
                     "error": str(e)
-                })
+                }]
+    
+    return [fetch(name) for name in names]
+
+
+async def _stream_zones(provider: Provider, provider_instance, names: List[str], total_zones: int, offset: int):
+    """按完成顺序逐个输出域名的解析记录（NDJSON）"""
+    def line(payload: Dict[str, Any]) -> str:
+        return json.dumps(payload, ensure_ascii=False, default=str) + "\n"
+    
+    yield line({"type": "meta", "total_zones": total_zones, "offset": offset, "zones": names})
+    tasks = [asyncio.ensure_future(task) for task in _zone_tasks(provider, provider_instance, names)]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            domain_name, rows = await finished
+            yield line({"type": "zone", "domain": domain_name, "records": rows})
+        yield line({"type": "done", "count": len(names)})
+    finally:
+        # 客户端中途断开时取消尚未完成的请求
+        for task in tasks:
+            task.cancel()
+
+
+@router.get("/{provider_id}/domains")
+async def get_provider_domains(
+    provider_id: int,
+    zones: Optional[str] = Query(None, description="只读取这些域名，逗号分隔"),
+    offset: int = Query(0, ge=0, description="跳过的域名数"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="最多读取的域名数，不填为全部"),
+    stream: bool = Query(False, description="以NDJSON逐个域名返回，先完成的先返回")
+):
+    """
+    获取服务商下的域名及其解析记录
+
+    各域名的解析记录并发读取（并发数由 provider_zone_concurrency 控制）。
+    stream=true 时每行一个JSON：首行为 meta（域名总数与本页域名），
+    之后每个域名读取完成即输出一行 zone，最后一行为 done。
+    """
+    provider = await entity_cache.get_provider(provider_id)
+    if not provider:
+        raise HTTPException(status_code=404, detail="服务商不存在")
+    
+    try:
+        provider_instance = get_provider_instance(provider)
+        if provider_instance is None:
+            raise HTTPException(status_code=400, detail="不支持的服务商类型")
+        
+        domains = await provider_instance.get_domains()
         
-        return result
+        names = [domain["name"] for domain in domains]
+        if zones:
+            wanted = {name.strip().rstrip(".") for name in zones.split(",") if name.strip()}
+            names = [name for name in names if name.rstrip(".") in wanted]
+        total_zones = len(names)
+        names = names[offset:offset + limit] if limit else names[offset:]
+        
+        if stream:
+            return StreamingResponse(
+                _stream_zones(provider, provider_instance, names, total_zones, offset),
+                media_type="application/x-ndjson",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+            )
+        
+        # 保持域名顺序输出
+        result = []
+        for _, rows in await asyncio.gather(*_zone_tasks(provider, provider_instance, names)):
+            result.extend(rows)
+        return JSONResponse(result, headers={"X-Total-Zones": str(total_zones)})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取域名列表失败: {str(e)}")
 
@@ -297,36 +306,13 @@ async def get_provider_domains(provider_id: int):
 @router.get("/{provider_id}/domains/{domain_name}/records")
 async def get_domain_records(provider_id: int, domain_name: str):
     """获取指定域名的解析记录"""
-    provider = await Provider.get_or_none(id=provider_id)
+    provider = await entity_cache.get_provider(provider_id)
     if not provider:
         raise HTTPException(status_code=404, detail="服务商不存在")
     
     try:
-        if provider.type.value == 1:  # 华为云
-            provider_instance = HuaweiProvider(
-                provider.access_key,
-                provider.secret_key,
-                provider.region or ""
-            )
-        elif provider.type.value == 2:  # 阿里云
-            provider_instance = AliyunProvider(
-                provider.access_key,
-                provider.secret_key,
-                provider.region or ""
-            )
-        elif provider.type.value == 3:  # 腾讯云
-            provider_instance = TencentProvider(
-                provider.access_key,
-                provider.secret_key,
-                provider.region or ""
-            )
-        elif provider.type.value == 4:  # Cloudflare
-            provider_instance = CloudflareProvider(
-                provider.access_key,
-                provider.secret_key,
-                provider.region or ""
-            )
-        else:
+        provider_instance = get_provider_instance(provider)
+        if provider_instance is None:
             raise HTTPException(status_code=400, detail="不支持的服务商类型")
         
         records = await provider_instance.get_records(domain_name)
@@ -338,36 +324,13 @@ async def get_domain_records(provider_id: int, domain_name: str):
 @router.delete("/{provider_id}/records/{record_name}")
 async def delete_dns_record(provider_id: int, record_name: str):
     """删除DNS记录"""
-    provider = await Provider.get_or_none(id=provider_id)
+    provider = await entity_cache.get_provider(provider_id)
     if not provider:
         raise HTTPException(status_code=404, detail="服务商不存在")
     
     try:
-        if provider.type.value == 1:  # 华为云
-            provider_instance = HuaweiProvider(
-                provider.access_key,
-                provider.secret_key,
-                provider.region or ""
-            )
-        elif provider.type.value == 2:  # 阿里云
-            provider_instance = AliyunProvider(
-                provider.access_key,
-                provider.secret_key,
-                provider.region or ""
-            )
-        elif provider.type.value == 3:  # 腾讯云
-            provider_instance = TencentProvider(
-                provider.access_key,
-                provider.secret_key,
-                provider.region or ""
-            )
-        elif provider.type.value == 4:  # Cloudflare
-            provider_instance = CloudflareProvider(
-                provider.access_key,
-                provider.secret_key,
-                provider.region or ""
-            )
-        else:
+        provider_instance = get_provider_instance(provider)
+        if provider_instance is None:
             raise HTTPException(status_code=400, detail="不支持的服务商类型")
         
         # 先获取记录信息
@@ -0,0 +1,54 @@
+"""全局搜索API"""
+import time
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from app.models import RecordType
+from app.schemas import RecordSearchResponse, RecordSearchResult
+from app.services.record_search_service import SEARCH_FIELDS, record_search_service
+from app.zone_files import absolute_name
+
+router = APIRouter(prefix="/api/search", tags=["search"])
+
+
+@router.get("/records", response_model=RecordSearchResponse)
+async def search_records(
+    q: str = Query(..., min_length=1, max_length=255, description="搜索词，匹配记录名称或记录值的任意子串"),
+    field: str = Query("all", description="搜索范围：all / name / value"),
+    domain_id: Optional[int] = Query(None, description="仅搜索指定域名"),
+    type: Optional[RecordType] = Query(None, description="仅搜索指定记录类型"),
+    limit: int = Query(50, ge=1, le=500, description="最多返回的记录数")
+):
+    """跨所有域名搜索解析记录，如查找指向某个IP或包含 cdn 的记录"""
+    if field not in SEARCH_FIELDS:
+        raise HTTPException(status_code=400, detail=f"不支持的搜索范围: {field}")
+
+    started = time.perf_counter()
+    records = await record_search_service.search(q, field, domain_id, type, limit)
+    took_ms = (time.perf_counter() - started) * 1000
+
+    results = []
+    for record in records:
+        results.append(RecordSearchResult(
+            id=record.id,
+            domain_id=record.domain_id,
+            domain_name=record.domain.name,
+            full_name=absolute_name(record.name, record.domain.name),
+            name=record.name,
+            type=record.type,
+            value=record.value,
+            ttl=record.ttl,
+            priority=record.priority,
+            enabled=record.enabled,
+            created_at=record.created_at,
+            updated_at=record.updated_at
+        ))
+
+    return RecordSearchResponse(
+        query=q.strip(),
+        field=field,
+        count=len(results),
+        took_ms=round(took_ms, 2),
+        records=results
+    )
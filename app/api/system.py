@@ -0,0 +1,12 @@
+"""系统状态API"""
+from fastapi import APIRouter
+
+from app.services.entity_cache import entity_cache
+
+router = APIRouter(prefix="/api/system", tags=["system"])
+
+
+@router.get("/cache")
+async def get_cache_stats():
+    """本进程实体缓存（服务商、域名、DDNS配置）的状态与命中统计"""
+    return entity_cache.info()
@@ -0,0 +1,119 @@
+"""跨服务商区域迁移与镜像API"""
+import logging
+from typing import Any, Dict, List
+
+import dns.exception
+from fastapi import APIRouter, HTTPException, Query
+from tortoise.exceptions import IntegrityError
+
+from app.models import Provider, ZoneMirror
+from app.providers.base import get_provider_instance
+from app.schemas import ZoneMigrationRequest, ZoneMirrorCreate, ZoneMirrorResponse, ZoneMirrorUpdate
+from app.services.zone_migration_service import ZoneMigrationError, zone_migration_service
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/zone-migrations", tags=["zone-migrations"])
+
+
+async def _get_provider(provider_id: int) -> Provider:
+    provider = await Provider.get_or_none(id=provider_id)
+    if not provider:
+        raise HTTPException(status_code=404, detail=f"服务商 {provider_id} 不存在")
+    if not provider.enabled:
+        raise HTTPException(status_code=400, detail=f"服务商 {provider.name} 已禁用")
+    return provider
+
+
+@router.post("")
+async def migrate_zone(request: ZoneMigrationRequest) -> Dict[str, Any]:
+    """把源服务商的区域记录迁移到目标服务商（dry_run时只返回迁移计划）"""
+    target_zone = request.target_zone or request.source_zone
+    source_provider = await _get_provider(request.source_provider_id)
+    target_provider = await _get_provider(request.target_provider_id)
+    if source_provider.id == target_provider.id and request.source_zone == target_zone:
+        raise HTTPException(status_code=400, detail="源区域与目标区域相同")
+
+    try:
+        return await zone_migration_service.migrate(
+            get_provider_instance(source_provider), request.source_zone,
+            get_provider_instance(target_provider), target_zone,
+            delete_extra=request.delete_extra,
+            dry_run=request.dry_run,
+            verify=request.verify,
+            nameservers=request.nameservers,
+        )
+    except (ZoneMigrationError, dns.exception.DNSException) as e:
+        raise HTTPException(status_code=400, detail=f"区域迁移失败: {e}")
+    except Exception as e:
+        logger.error(f"区域迁移失败: {request.source_zone} -> {target_zone}, 错误: {e}")
+        raise HTTPException(status_code=502, detail=f"调用服务商API失败: {e}")
+
+
+@router.get("/mirrors", response_model=List[ZoneMirrorResponse])
+async def get_mirrors():
+    """获取区域镜像列表"""
+    return await ZoneMirror.all().order_by('id')
+
+
+@router.post("/mirrors", response_model=ZoneMirrorResponse)
+async def create_mirror(mirror_data: ZoneMirrorCreate):
+    """创建区域镜像"""
+    await _get_provider(mirror_data.source_provider_id)
+    await _get_provider(mirror_data.target_provider_id)
+    if (mirror_data.source_provider_id == mirror_data.target_provider_id
+            and mirror_data.source_zone == mirror_data.target_zone):
+        raise HTTPException(status_code=400, detail="源区域与目标区域相同")
+
+    try:
+        mirror = await ZoneMirror.create(**mirror_data.dict())
+    except IntegrityError:
+        raise HTTPException(status_code=400, detail="目标区域已被其他镜像使用")
+
+    if mirror.enabled:
+        zone_migration_service.add_mirror_job(mirror)
+    return mirror
+
+
+@router.put("/mirrors/{mirror_id}", response_model=ZoneMirrorResponse)
+async def update_mirror(mirror_id: int, mirror_data: ZoneMirrorUpdate):
+    """更新区域镜像"""
+    mirror = await ZoneMirror.get_or_none(id=mirror_id)
+    if not mirror:
+        raise HTTPException(status_code=404, detail="区域镜像不存在")
+
+    update_data = mirror_data.dict(exclude_unset=True)
+    if update_data.get('delete_extra') is not None and update_data['delete_extra'] != mirror.delete_extra:
+        # 删除策略变化后需要重新与目标区域比较
+        mirror.source_digest = None
+    await mirror.update_from_dict(update_data)
+    await mirror.save()
+
+    zone_migration_service.remove_mirror_job(mirror.id)
+    if mirror.enabled:
+        zone_migration_service.add_mirror_job(mirror)
+    return mirror
+
+
+@router.delete("/mirrors/{mirror_id}")
+async def delete_mirror(mirror_id: int):
+    """删除区域镜像（不删除目标区域已同步的记录）"""
+    mirror = await ZoneMirror.get_or_none(id=mirror_id)
+    if not mirror:
+        raise HTTPException(status_code=404, detail="区域镜像不存在")
+
+    zone_migration_service.remove_mirror_job(mirror.id)
+    await mirror.delete()
+    return {"message": "区域镜像删除成功"}
+
+
+@router.post("/mirrors/{mirror_id}/run")
+async def run_mirror(
+    mirror_id: int,
+    force: bool = Query(False, description="忽略源区域摘要，总是与目标区域比较")
+) -> Dict[str, Any]:
+    """立即执行一次区域镜像"""
+    try:
+        return await zone_migration_service.run_mirror(mirror_id, force=force)
+    except ZoneMigrationError as e:
+        raise HTTPException(status_code=404, detail=str(e))
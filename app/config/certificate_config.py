@@ -28,6 +28,13 @@ class CertificateConfig(BaseSettings):
     
     # 证书存储配置
     certificate_storage_path: str = "./data/certificates"
+    store_encryption_key: str = ""  # 私钥加密密钥（Fernet），为空时使用密钥文件
+    # 自动生成的密钥文件，与加密对象分开保存（备份或泄露证书目录时不带出密钥）
+    store_key_file: str = "./data/keys/certificate_store.key"
+    
+    # 签发任务队列配置
+    job_concurrency: int = 2  # 同时执行的签发任务数
+    job_timeout: int = 900  # 单个签发任务的最长执行时间（秒）
     
     # 证书申请模式（仅支持真实模式）
     real_mode_only: bool = True
@@ -16,15 +16,65 @@ class Settings(BaseSettings):
     log_level: str = "INFO"
     log_file: str = "data/logs/app.log"
     
+    # DDNS日志与任务日志按月分区保存，保留最近几个月（含当月），0为永久保留
+    log_retention_months: int = 6
+    log_compact_interval_hours: int = 24
+    
     # 数据库配置
+    # 支持 sqlite://路径 与 postgres://用户:密码@主机:端口/库名（需安装asyncpg）
     database_url: str = "sqlite://./data/db/dns_management.db"
     
+    # 连接池配置（仅对PostgreSQL生效，SQLite为单连接）
+    database_pool_min_size: int = 1
+    database_pool_max_size: int = 10
+    
+    # 多副本共用PostgreSQL时只有一个副本（持有调度锁的主副本）执行定时任务；
+    # 其他副本按该间隔（秒）尝试接替，主副本按该间隔从数据库重新加载DDNS与区域镜像任务
+    scheduler_leader_interval: int = 30
+    
+    # SQLite调优（仅对sqlite数据库生效）
+    sqlite_journal_mode: str = "WAL"  # WAL模式下读写互不阻塞
+    # 等待写锁的毫秒数，避免直接报database is locked。等待不保证公平：其他进程连续不断地执行
+    # 长写事务时，DDNS等短写入可能一直等到超时（benchmarks/db_concurrency.py --sync-batch-size 50）
+    sqlite_busy_timeout: int = 5000
+    sqlite_synchronous: str = "NORMAL"  # WAL模式下NORMAL即可保证一致性
+    sqlite_mmap_size: int = 268435456  # 内存映射读取大小（字节），0为关闭
+    sqlite_cache_size: int = -65536  # 页缓存大小，负数表示KiB
+    
+    # 服务商/域名/DDNS配置的进程内缓存：条目有效期（秒，0为不缓存）与跨进程版本检查间隔（秒）
+    entity_cache_ttl: int = 300
+    entity_cache_check_interval: float = 5.0
+    
+    # 首页统计缓存秒数（数据写入时立即失效）
+    dashboard_cache_ttl: int = 10
+    
+    # 浏览服务商域名时并发读取解析记录的zone数
+    provider_zone_concurrency: int = 8
+    
+    # 服务商API调用：每个服务商账号的连接池大小与限速（每秒请求数，0为不限速）
+    provider_max_connections: int = 10
+    provider_rate_limit: float = 10.0
+    provider_rate_burst: int = 20
+    
+    # 服务商HTTP流量录制/回放目录（按服务商类写入或读取 <类名>.jsonl，留空不启用；回放优先）
+    provider_http_record_dir: str = ""
+    provider_http_replay_dir: str = ""
+    provider_http_replay_latency: float = 0.0  # 回放时每个响应的模拟延迟（秒）
+    
+    # 启用模拟服务商（服务商类型5，数据保存在内存中，仅用于测试与压测）
+    fake_provider_enabled: bool = False
+    
+    # 解析记录批量导入的单个文件记录数上限
+    record_import_max_records: int = 50000
+    
     # 服务器配置
     host: str = "0.0.0.0"
     port: int = 8000
     
     # 安全配置
     jwt_secret_key: str = "your-jwt-secret-key-here"
+    auth_token_cache_size: int = 1024  # 已验证令牌的缓存条数
+    auth_user_refresh_interval: int = 30  # 重新加载用户表的间隔（秒），其他进程的登出/改密在此时间内生效
     
     # 定时任务配置
     scheduler_timezone: str = "Asia/Shanghai"
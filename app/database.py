@@ -1,25 +1,121 @@
 """数据库配置和初始化"""
+from typing import Dict, Optional
 from tortoise import Tortoise
+from tortoise.backends.base.config_generator import expand_db_url
 from app.config import settings
+from app.db_dialect import is_sqlite
+from app.migrations import LATEST_VERSION, MigrationError, get_schema_version, run_migrations
 import logging
 
 logger = logging.getLogger(__name__)
 
+# PRAGMA synchronous 查询结果与配置名称的对应关系
+_SYNCHRONOUS_LEVELS = {'OFF': 0, 'NORMAL': 1, 'FULL': 2, 'EXTRA': 3}
 
-async def init_database():
-    """初始化数据库连接"""
+
+def get_sqlite_pragmas() -> Dict[str, object]:
+    """从配置中读取SQLite连接参数（每个连接建立时以PRAGMA执行）"""
+    return {
+        'journal_mode': settings.sqlite_journal_mode.upper(),
+        'busy_timeout': settings.sqlite_busy_timeout,
+        'synchronous': settings.sqlite_synchronous.upper(),
+        'mmap_size': settings.sqlite_mmap_size,
+        'cache_size': settings.sqlite_cache_size,
+    }
+
+
+def get_tortoise_config(db_url: Optional[str] = None, pragmas: Optional[Dict[str, object]] = None) -> Dict:
+    """
+    生成Tortoise配置
+    
+    Args:
+        db_url: 数据库连接地址，默认使用配置中的地址
+        pragmas: 覆盖默认的SQLite PRAGMA
+        
+    Returns:
+        Dict: Tortoise.init使用的配置
+    """
+    connection = expand_db_url(db_url or settings.database_url)
+    credentials = connection['credentials']
+    if connection['engine'] == 'tortoise.backends.sqlite':
+        credentials.update(get_sqlite_pragmas() if pragmas is None else pragmas)
+    elif connection['engine'] in ('tortoise.backends.asyncpg', 'tortoise.backends.psycopg'):
+        # 连接串中显式指定的minsize/maxsize优先
+        credentials.setdefault('minsize', settings.database_pool_min_size)
+        credentials.setdefault('maxsize', settings.database_pool_max_size)
+    
+    return {
+        'connections': {'default': connection},
+        'apps': {'models': {'models': ['app.models'], 'default_connection': 'default'}},
+    }
+
+
+async def init_database(migrate: bool = True):
+    """
+    初始化数据库连接
+    
+    Args:
+        migrate: 是否执行未完成的迁移。主服务启动时执行；certbot钩子等辅助进程只检查版本，
+            数据库版本落后时直接报错，避免多个进程同时迁移。
+    """
     try:
-        await Tortoise.init(
-            db_url=settings.database_url,
-            modules={'models': ['app.models']}
-        )
-        await Tortoise.generate_schemas()
-        logger.info("数据库初始化成功")
+        await Tortoise.init(config=get_tortoise_config())
+        
+        if migrate:
+            version = await run_migrations()
+            await verify_sqlite_pragmas()
+        else:
+            version = await get_schema_version()
+            if version < LATEST_VERSION:
+                raise MigrationError(f"数据库版本 {version} 低于 {LATEST_VERSION}，请先启动主服务完成迁移")
+        
+        logger.info(f"数据库初始化成功（版本 {version}）")
     except Exception as e:
         logger.error(f"数据库初始化失败: {e}")
         raise
 
 
+async def verify_sqlite_pragmas() -> Dict[str, object]:
+    """
+    读取当前连接实际生效的PRAGMA并与配置比对
+    
+    journal_mode在网络文件系统等环境下可能无法切换为WAL，此时只记录警告。
+    
+    Returns:
+        Dict: 实际生效的PRAGMA值（非SQLite数据库返回空字典）
+    """
+    conn = Tortoise.get_connection('default')
+    if not is_sqlite(conn):
+        return {}
+    
+    expected = get_sqlite_pragmas()
+    actual = {}
+    for pragma in expected:
+        rows = await conn.execute_query_dict(f"PRAGMA {pragma}")
+        actual[pragma] = next(iter(rows[0].values())) if rows else None
+    
+    mismatched = []
+    for pragma, value in expected.items():
+        current = actual[pragma]
+        if pragma == 'journal_mode':
+            ok = str(current).upper() == value
+        elif pragma == 'synchronous':
+            ok = current == _SYNCHRONOUS_LEVELS.get(value, value)
+        elif pragma == 'mmap_size':
+            # 编译时禁用mmap的SQLite不返回结果，上限也可能被编译参数截断
+            ok = current is None or int(current) <= int(value)
+        else:
+            ok = current is not None and int(current) == int(value)
+        if not ok:
+            mismatched.append(f"{pragma}={current}（期望 {value}）")
+    
+    if mismatched:
+        logger.warning(f"SQLite参数未按配置生效: {', '.join(mismatched)}")
+    else:
+        logger.info(f"SQLite参数已生效: {' '.join(f'{k}={v}' for k, v in actual.items())}")
+    return actual
+
+
 async def close_database():
     """关闭数据库连接"""
     await Tortoise.close_connections()
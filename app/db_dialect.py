@@ -0,0 +1,57 @@
+"""数据库方言工具：屏蔽SQLite与PostgreSQL在原生SQL上的差异"""
+import re
+from typing import Any, Dict, List, Optional, Sequence
+
+from tortoise import Tortoise
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+SQLITE = "sqlite"
+POSTGRES = "postgres"
+
+_PLACEHOLDER = re.compile(r"\?")
+
+
+def get_connection(conn: Optional[BaseDBAsyncClient] = None) -> BaseDBAsyncClient:
+    """未指定连接时使用默认连接"""
+    return conn or Tortoise.get_connection('default')
+
+
+def dialect_of(conn: Optional[BaseDBAsyncClient] = None) -> str:
+    """返回连接的方言名称（sqlite / postgres）"""
+    return get_connection(conn).capabilities.dialect
+
+
+def is_sqlite(conn: Optional[BaseDBAsyncClient] = None) -> bool:
+    return dialect_of(conn) == SQLITE
+
+
+def is_postgres(conn: Optional[BaseDBAsyncClient] = None) -> bool:
+    return dialect_of(conn) == POSTGRES
+
+
+def render_sql(sql: str, conn: Optional[BaseDBAsyncClient] = None) -> str:
+    """
+    将统一使用 ? 书写的占位符转换为当前数据库的写法
+
+    PostgreSQL（asyncpg）使用 $1、$2 …；SQL中不要在字符串字面量里出现问号。
+    """
+    if dialect_of(conn) != POSTGRES:
+        return sql
+    counter = iter(range(1, sql.count("?") + 1))
+    return _PLACEHOLDER.sub(lambda _: f"${next(counter)}", sql)
+
+
+async def execute(sql: str, values: Optional[Sequence[Any]] = None, conn: Optional[BaseDBAsyncClient] = None):
+    """执行带 ? 占位符的语句"""
+    conn = get_connection(conn)
+    return await conn.execute_query(render_sql(sql, conn), list(values or []))
+
+
+async def fetch_all(
+    sql: str,
+    values: Optional[Sequence[Any]] = None,
+    conn: Optional[BaseDBAsyncClient] = None
+) -> List[Dict[str, Any]]:
+    """执行带 ? 占位符的查询并以字典列表返回"""
+    conn = get_connection(conn)
+    return await conn.execute_query_dict(render_sql(sql, conn), list(values or []))
@@ -0,0 +1,22 @@
+"""
+数据库版本迁移
+
+迁移脚本按版本号命名（mNNNN_说明.py），提供 VERSION、DESCRIPTION 和 async upgrade(conn)，
+并在 runner.MIGRATIONS 中登记。脚本需保持幂等：版本表只在脚本成功后写入，
+中途失败的迁移会在下次启动时重新执行。
+"""
+from .runner import (
+    LATEST_VERSION,
+    MigrationError,
+    get_schema_version,
+    pending_migrations,
+    run_migrations,
+)
+
+__all__ = [
+    'LATEST_VERSION',
+    'MigrationError',
+    'get_schema_version',
+    'pending_migrations',
+    'run_migrations',
+]
@@ -0,0 +1,135 @@
+"""0001 建立基础表结构"""
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+from app.migrations.utils import execute_ddl
+
+VERSION = 1
+DESCRIPTION = "建立基础表结构"
+
+# 版本1的表结构；之后的列、表与索引变化由后续迁移完成
+STATEMENTS = (
+    """CREATE TABLE IF NOT EXISTS "providers" (
+        "id" {pk},
+        "name" VARCHAR(100) NOT NULL,
+        "type" SMALLINT NOT NULL,
+        "access_key" VARCHAR(200) NOT NULL,
+        "secret_key" VARCHAR(200) NOT NULL,
+        "region" VARCHAR(50) NOT NULL,
+        "enabled" {bool} NOT NULL,
+        "status" VARCHAR(20) NOT NULL,
+        "last_test_at" {timestamp},
+        "created_at" {timestamp} NOT NULL,
+        "updated_at" {timestamp} NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS "domains" (
+        "id" {pk},
+        "name" VARCHAR(255) NOT NULL UNIQUE,
+        "enabled" {bool} NOT NULL,
+        "auto_update" {bool} NOT NULL,
+        "created_at" {timestamp} NOT NULL,
+        "updated_at" {timestamp} NOT NULL,
+        "provider_id" INT NOT NULL REFERENCES "providers" ("id") ON DELETE CASCADE
+    )""",
+    """CREATE TABLE IF NOT EXISTS "certificates" (
+        "id" {pk},
+        "name" VARCHAR(255) NOT NULL,
+        "type" SMALLINT NOT NULL,
+        "status" SMALLINT NOT NULL,
+        "certificate_hash" VARCHAR(64),
+        "private_key_hash" VARCHAR(64),
+        "ca_bundle_hash" VARCHAR(64),
+        "issuer" VARCHAR(255),
+        "subject" VARCHAR(255),
+        "serial_number" VARCHAR(100),
+        "not_before" {timestamp},
+        "not_after" {timestamp},
+        "auto_renew" {bool} NOT NULL,
+        "renewal_days" INT NOT NULL,
+        "last_renewed_at" {timestamp},
+        "created_at" {timestamp} NOT NULL,
+        "updated_at" {timestamp} NOT NULL,
+        "domain_id" INT NOT NULL REFERENCES "domains" ("id") ON DELETE CASCADE
+    )""",
+    'CREATE INDEX IF NOT EXISTS "idx_certificate_status_aada98" ON "certificates" ("status", "not_after")',
+    """CREATE TABLE IF NOT EXISTS "certificate_jobs" (
+        "id" VARCHAR(36) NOT NULL PRIMARY KEY,
+        "kind" VARCHAR(20) NOT NULL,
+        "full_domain" VARCHAR(255) NOT NULL,
+        "force" {bool} NOT NULL,
+        "status" VARCHAR(20) NOT NULL,
+        "stage" VARCHAR(30) NOT NULL,
+        "message" TEXT NOT NULL,
+        "started_at" {timestamp},
+        "finished_at" {timestamp},
+        "created_at" {timestamp} NOT NULL,
+        "updated_at" {timestamp} NOT NULL,
+        "certificate_id" INT REFERENCES "certificates" ("id") ON DELETE SET NULL,
+        "domain_id" INT NOT NULL REFERENCES "domains" ("id") ON DELETE CASCADE
+    )""",
+    """CREATE TABLE IF NOT EXISTS "ddns_configs" (
+        "id" VARCHAR(36) NOT NULL PRIMARY KEY,
+        "name" VARCHAR(100) NOT NULL,
+        "subdomain" VARCHAR(100) NOT NULL,
+        "record_type" SMALLINT NOT NULL,
+        "enabled" {bool} NOT NULL,
+        "update_interval" INT NOT NULL,
+        "last_update_at" {timestamp},
+        "last_ip" VARCHAR(45),
+        "update_method" VARCHAR(20) NOT NULL,
+        "created_at" {timestamp} NOT NULL,
+        "updated_at" {timestamp} NOT NULL,
+        "domain_id" INT NOT NULL REFERENCES "domains" ("id") ON DELETE CASCADE,
+        CONSTRAINT "uid_ddns_config_domain__fbef93" UNIQUE ("domain_id", "subdomain", "record_type")
+    )""",
+    """CREATE TABLE IF NOT EXISTS "ddns_logs" (
+        "id" {pk},
+        "old_ip" VARCHAR(45),
+        "new_ip" VARCHAR(45) NOT NULL,
+        "status" VARCHAR(20) NOT NULL,
+        "message" TEXT NOT NULL,
+        "created_at" {timestamp} NOT NULL,
+        "ddns_config_id" VARCHAR(36) NOT NULL REFERENCES "ddns_configs" ("id") ON DELETE CASCADE
+    )""",
+    'CREATE INDEX IF NOT EXISTS "idx_ddns_logs_ddns_co_b47618" ON "ddns_logs" ("ddns_config_id", "created_at")',
+    'CREATE INDEX IF NOT EXISTS "idx_ddns_logs_status_f33d17" ON "ddns_logs" ("status", "created_at")',
+    """CREATE TABLE IF NOT EXISTS "dns_records" (
+        "id" {pk},
+        "name" VARCHAR(255) NOT NULL,
+        "type" SMALLINT NOT NULL,
+        "value" VARCHAR(500) NOT NULL,
+        "ttl" INT NOT NULL,
+        "priority" INT,
+        "enabled" {bool} NOT NULL,
+        "external_id" VARCHAR(255),
+        "created_at" {timestamp} NOT NULL,
+        "updated_at" {timestamp} NOT NULL,
+        "domain_id" INT NOT NULL REFERENCES "domains" ("id") ON DELETE CASCADE
+    )""",
+    'CREATE INDEX IF NOT EXISTS "idx_dns_records_domain__762f91" ON "dns_records" ("domain_id", "name", "type")',
+    """CREATE TABLE IF NOT EXISTS "task_logs" (
+        "id" {pk},
+        "action" VARCHAR(50) NOT NULL,
+        "status" VARCHAR(20) NOT NULL,
+        "message" TEXT NOT NULL,
+        "created_at" {timestamp} NOT NULL,
+        "domain_id" INT NOT NULL REFERENCES "domains" ("id") ON DELETE CASCADE
+    )""",
+    """CREATE TABLE IF NOT EXISTS "users" (
+        "id" {pk},
+        "username" VARCHAR(50) NOT NULL UNIQUE,
+        "password_hash" VARCHAR(255) NOT NULL,
+        "is_active" {bool} NOT NULL,
+        "created_at" {timestamp} NOT NULL,
+        "updated_at" {timestamp} NOT NULL
+    )""",
+)
+
+
+async def upgrade(conn: BaseDBAsyncClient):
+    """
+    建立版本1的表（IF NOT EXISTS）
+
+    引入版本迁移之前创建的数据库只补建缺失的表；已有表的列与数据由后续迁移处理，
+    这里建立的索引只涉及这些旧表原有的列。
+    """
+    await execute_ddl(conn, STATEMENTS)
@@ -0,0 +1,59 @@
+"""0002 证书文件迁移到内容寻址存储"""
+import logging
+
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.transactions import in_transaction
+
+from app.db_dialect import execute
+from app.migrations.utils import table_columns
+
+logger = logging.getLogger(__name__)
+
+VERSION = 2
+DESCRIPTION = "证书文件迁移到内容寻址存储"
+
+# 每批迁移的证书数，每批单独提交，避免长时间占用写锁
+BATCH_SIZE = 100
+
+HASH_COLUMNS = ('certificate_hash', 'private_key_hash', 'ca_bundle_hash')
+
+
+async def upgrade(conn: BaseDBAsyncClient):
+    """补充证书摘要列，并把表内保存的证书文件内容分批写入证书存储"""
+    from app.services.certificate_store import certificate_store
+
+    columns = await table_columns(conn, 'certificates')
+    for column in HASH_COLUMNS:
+        if column not in columns:
+            await conn.execute_script(f"ALTER TABLE certificates ADD COLUMN {column} VARCHAR(64)")
+            logger.info(f"证书表新增列: {column}")
+
+    if 'certificate_file' not in columns:
+        return
+
+    migrated = 0
+    while True:
+        rows = await conn.execute_query_dict(
+            "SELECT id, certificate_file, private_key_file, ca_bundle_file FROM certificates "
+            "WHERE certificate_file IS NOT NULL OR private_key_file IS NOT NULL OR ca_bundle_file IS NOT NULL "
+            f"LIMIT {BATCH_SIZE}"
+        )
+        if not rows:
+            break
+
+        async with in_transaction() as transaction:
+            for row in rows:
+                hashes = certificate_store.store_bundle(
+                    certificate_pem=row['certificate_file'],
+                    private_key_pem=row['private_key_file'],
+                    ca_bundle_pem=row['ca_bundle_file']
+                )
+                await execute(
+                    "UPDATE certificates SET certificate_hash = ?, private_key_hash = ?, ca_bundle_hash = ?, "
+                    "certificate_file = NULL, private_key_file = NULL, ca_bundle_file = NULL WHERE id = ?",
+                    [hashes.get('certificate_hash'), hashes.get('private_key_hash'),
+                     hashes.get('ca_bundle_hash'), row['id']],
+                    transaction
+                )
+        migrated += len(rows)
+        logger.info(f"已将 {migrated} 个证书的文件内容迁移到证书存储")
@@ -0,0 +1,50 @@
+"""0003 热点查询索引"""
+import logging
+
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+from app.migrations.utils import table_columns, unique_index_exists
+
+logger = logging.getLogger(__name__)
+
+VERSION = 3
+DESCRIPTION = "热点查询索引与DDNS配置唯一约束"
+
+# 索引名与Tortoise按模型Meta.indexes生成的名称一致，新建数据库上这些语句不会重复建索引
+INDEXES = (
+    ('dns_records', 'CREATE INDEX IF NOT EXISTS "idx_dns_records_domain__762f91" ON "dns_records" ("domain_id", "name", "type")'),
+    ('ddns_logs', 'CREATE INDEX IF NOT EXISTS "idx_ddns_logs_ddns_co_b47618" ON "ddns_logs" ("ddns_config_id", "created_at")'),
+    ('ddns_logs', 'CREATE INDEX IF NOT EXISTS "idx_ddns_logs_status_f33d17" ON "ddns_logs" ("status", "created_at")'),
+    ('certificates', 'CREATE INDEX IF NOT EXISTS "idx_certificate_status_aada98" ON "certificates" ("status", "not_after")'),
+)
+
+DDNS_UNIQUE_COLUMNS = ['domain_id', 'subdomain', 'record_type']
+
+
+async def upgrade(conn: BaseDBAsyncClient):
+    """为旧数据库补建索引；ddns_configs表建于唯一约束声明之前时补建唯一索引"""
+    for table, statement in INDEXES:
+        # ddns_logs自0007起改为按月分区，新建数据库上没有这张表
+        if await table_columns(conn, table):
+            await conn.execute_script(statement)
+
+    if await unique_index_exists(conn, 'ddns_configs', DDNS_UNIQUE_COLUMNS):
+        return
+
+    duplicates = await conn.execute_query_dict(
+        "SELECT domain_id, subdomain, record_type, COUNT(*) AS total FROM ddns_configs "
+        "GROUP BY domain_id, subdomain, record_type HAVING COUNT(*) > 1"
+    )
+    if duplicates:
+        # 不自动删除用户配置，保留重复数据并跳过唯一索引
+        logger.warning(
+            f"DDNS配置表中存在 {len(duplicates)} 组重复的(域名, 子域名, 记录类型)配置，"
+            "未建立唯一索引，请清理重复配置"
+        )
+        return
+
+    await conn.execute_script(
+        'CREATE UNIQUE INDEX IF NOT EXISTS "uid_ddns_configs_domain_subdomain_type" '
+        'ON "ddns_configs" ("domain_id", "subdomain", "record_type")'
+    )
+    logger.info("DDNS配置表已补建唯一索引")
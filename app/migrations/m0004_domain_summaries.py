@@ -0,0 +1,39 @@
+"""0004 域名记录汇总表"""
+import logging
+
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+from app.migrations.utils import execute_ddl
+
+logger = logging.getLogger(__name__)
+
+VERSION = 4
+DESCRIPTION = "域名记录汇总表"
+
+# 每批回填的域名数
+BATCH_SIZE = 200
+
+STATEMENTS = (
+    """CREATE TABLE IF NOT EXISTS "domain_summaries" (
+        "record_count" INT NOT NULL,
+        "type_counts" {json} NOT NULL,
+        "last_synced_at" {timestamp},
+        "last_changed_at" {timestamp},
+        "updated_at" {timestamp} NOT NULL,
+        "domain_id" INT NOT NULL PRIMARY KEY REFERENCES "domains" ("id") ON DELETE CASCADE
+    )""",
+)
+
+
+async def upgrade(conn: BaseDBAsyncClient):
+    """建立domain_summaries表并按现有记录回填"""
+    from app.models import Domain
+    from app.services.domain_summary_service import domain_summary_service
+
+    await execute_ddl(conn, STATEMENTS)
+
+    domain_ids = await Domain.all().order_by('id').values_list('id', flat=True)
+    for offset in range(0, len(domain_ids), BATCH_SIZE):
+        await domain_summary_service.rebuild_all(domain_ids[offset:offset + BATCH_SIZE])
+    if domain_ids:
+        logger.info(f"已为 {len(domain_ids)} 个域名生成记录汇总")
@@ -0,0 +1,58 @@
+"""0005 解析记录全文（三元组）搜索索引"""
+import logging
+
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.exceptions import OperationalError
+
+from app.db_dialect import is_sqlite
+
+logger = logging.getLogger(__name__)
+
+VERSION = 5
+DESCRIPTION = "解析记录三元组搜索索引"
+
+SEARCH_TABLE = "dns_records_fts"
+
+# 外部内容表：索引只保存三元组，内容仍从dns_records读取；由触发器与dns_records保持同步
+SQLITE_STATEMENTS = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+    "name, value, content='dns_records', content_rowid='id', tokenize='trigram')",
+    f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_ai AFTER INSERT ON dns_records BEGIN
+        INSERT INTO {SEARCH_TABLE}(rowid, name, value) VALUES (new.id, new.name, new.value);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_ad AFTER DELETE ON dns_records BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, name, value) VALUES ('delete', old.id, old.name, old.value);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_au AFTER UPDATE OF name, value ON dns_records BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, name, value) VALUES ('delete', old.id, old.name, old.value);
+        INSERT INTO {SEARCH_TABLE}(rowid, name, value) VALUES (new.id, new.name, new.value);
+    END""",
+    # 按现有记录重建索引
+    f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')",
+)
+
+# PostgreSQL的GIN三元组索引支持 ILIKE '%x%'，由数据库自动维护
+POSTGRES_STATEMENTS = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    'CREATE INDEX IF NOT EXISTS "idx_dns_records_name_trgm" ON "dns_records" USING gin ("name" gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS "idx_dns_records_value_trgm" ON "dns_records" USING gin ("value" gin_trgm_ops)',
+)
+
+
+async def upgrade(conn: BaseDBAsyncClient):
+    """建立解析记录名称与记录值的三元组索引"""
+    if not is_sqlite(conn):
+        for statement in POSTGRES_STATEMENTS:
+            await conn.execute_script(statement)
+        return
+
+    try:
+        await conn.execute_script(SQLITE_STATEMENTS[0])
+    except OperationalError as e:
+        # FTS5 trigram 需要 SQLite 3.34+，不支持时搜索退化为 LIKE 扫描
+        logger.warning(f"当前SQLite不支持FTS5三元组分词，记录搜索将使用LIKE扫描: {e}")
+        return
+
+    for statement in SQLITE_STATEMENTS[1:]:
+        await conn.execute_script(statement)
+    logger.info("已建立解析记录三元组搜索索引")
@@ -0,0 +1,55 @@
+"""0006 解析记录值反查索引"""
+import logging
+
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.transactions import in_transaction
+
+from app.db_dialect import execute
+from app.migrations.utils import table_columns
+from app.record_values import normalize_record_value
+
+logger = logging.getLogger(__name__)
+
+VERSION = 6
+DESCRIPTION = "解析记录值反查索引"
+
+# 每批回填的记录数，每批单独提交
+BATCH_SIZE = 500
+
+# 索引名沿用此前按模型Meta.indexes生成的名称，已有数据库中的同名索引可以识别并重建
+INDEX_NAME = "idx_dns_records_value_n_51a84e"
+INDEX = f'CREATE INDEX "{INDEX_NAME}" ON "dns_records" ("value_normalized", "type")'
+
+
+async def upgrade(conn: BaseDBAsyncClient):
+    """新增规范化记录值列并分批回填，回填完成后建立(value_normalized, type)索引"""
+    if 'value_normalized' not in await table_columns(conn, 'dns_records'):
+        await conn.execute_script("ALTER TABLE dns_records ADD COLUMN value_normalized VARCHAR(500)")
+        logger.info("解析记录表新增列: value_normalized")
+
+    filled = 0
+    last_id = 0
+    while True:
+        rows = await conn.execute_query_dict(
+            "SELECT id, type, value FROM dns_records "
+            f"WHERE value_normalized IS NULL AND id > {last_id} ORDER BY id LIMIT {BATCH_SIZE}"
+        )
+        if not rows:
+            break
+
+        async with in_transaction() as transaction:
+            for row in rows:
+                await execute(
+                    "UPDATE dns_records SET value_normalized = ? WHERE id = ?",
+                    [normalize_record_value(row['type'], row['value']), row['id']],
+                    transaction
+                )
+        last_id = rows[-1]['id']
+        filled += len(rows)
+
+    if filled:
+        logger.info(f"已为 {filled} 条解析记录生成规范化记录值")
+
+    # 旧版本按模型建表时可能在列补齐之前留下同名索引，删除后按回填后的数据重建
+    await conn.execute_script(f'DROP INDEX IF EXISTS "{INDEX_NAME}"')
+    await conn.execute_script(INDEX)
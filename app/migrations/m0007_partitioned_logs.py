@@ -0,0 +1,65 @@
+"""0007 日志改为按月分区存储"""
+import logging
+
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.transactions import in_transaction
+
+from app.migrations.utils import table_columns
+
+logger = logging.getLogger(__name__)
+
+VERSION = 7
+DESCRIPTION = "DDNS日志与任务日志按月分区存储"
+
+# 每批迁移的日志数，每批单独提交
+BATCH_SIZE = 1000
+
+# 旧表 -> (日志类型, 旧表中需要迁移的列)
+LEGACY_TABLES = {
+    "ddns_logs": ("DDNS_LOGS", ("ddns_config_id", "old_ip", "new_ip", "status")),
+    "task_logs": ("TASK_LOGS", ("domain_id", "action", "status")),
+}
+
+
+async def upgrade(conn: BaseDBAsyncClient):
+    """建立消息字典表，把旧的ddns_logs、task_logs表按月迁移到分区表后删除旧表"""
+    from app.services import log_store as store
+
+    await store.log_store.create_dictionary(conn)
+
+    for legacy_table, (stream_name, columns) in LEGACY_TABLES.items():
+        existing = await table_columns(conn, legacy_table)
+        if not existing or 'message' not in existing:
+            continue
+        stream = getattr(store, stream_name)
+
+        migrated = 0
+        last_id = 0
+        try:
+            while True:
+                rows = await conn.execute_query_dict(
+                    f"SELECT id, {', '.join(columns)}, message, created_at FROM {legacy_table} "
+                    f"WHERE id > {last_id} ORDER BY id LIMIT {BATCH_SIZE}"
+                )
+                if not rows:
+                    break
+
+                async with in_transaction() as transaction:
+                    for row in rows:
+                        await store.log_store.write(
+                            stream,
+                            row[stream.owner_column],
+                            row['message'],
+                            created_at=store.parse_db_time(row['created_at']),
+                            conn=transaction,
+                            **{column: row[column] for column in columns if column != stream.owner_column}
+                        )
+                last_id = rows[-1]['id']
+                migrated += len(rows)
+        except Exception:
+            # 事务回滚后缓存中的字典ID与分区可能不存在
+            store.log_store.reset_cache()
+            raise
+
+        await conn.execute_script(f"DROP TABLE {legacy_table}")
+        logger.info(f"已将 {legacy_table} 中的 {migrated} 条日志迁移到按月分区表")
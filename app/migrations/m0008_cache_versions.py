@@ -0,0 +1,26 @@
+"""0008 进程内缓存版本表"""
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+from app.db_dialect import execute
+from app.migrations.utils import execute_ddl
+
+VERSION = 8
+DESCRIPTION = "进程内缓存版本表"
+
+STATEMENTS = (
+    """CREATE TABLE IF NOT EXISTS "cache_versions" (
+        "name" VARCHAR(50) NOT NULL PRIMARY KEY,
+        "version" BIGINT NOT NULL
+    )""",
+)
+
+
+async def upgrade(conn: BaseDBAsyncClient):
+    """建立cache_versions表并写入实体缓存的初始版本"""
+    from app.services.entity_cache import VERSION_NAME
+
+    await execute_ddl(conn, STATEMENTS)
+    await execute(
+        "INSERT INTO cache_versions (name, version) VALUES (?, 0) ON CONFLICT (name) DO NOTHING",
+        [VERSION_NAME], conn
+    )
@@ -0,0 +1,18 @@
+"""0009 用户令牌版本"""
+import logging
+
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+from app.migrations.utils import table_columns
+
+logger = logging.getLogger(__name__)
+
+VERSION = 9
+DESCRIPTION = "用户令牌版本"
+
+
+async def upgrade(conn: BaseDBAsyncClient):
+    """用户表新增token_version列，已签发的令牌视为版本0"""
+    if 'token_version' not in await table_columns(conn, 'users'):
+        await conn.execute_script("ALTER TABLE users ADD COLUMN token_version INT NOT NULL DEFAULT 0")
+        logger.info("用户表新增列: token_version")
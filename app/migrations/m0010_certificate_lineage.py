@@ -0,0 +1,32 @@
+"""0010 证书记录保存certbot证书名"""
+import logging
+
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+from app.db_dialect import execute
+from app.migrations.utils import table_columns
+
+logger = logging.getLogger(__name__)
+
+VERSION = 10
+DESCRIPTION = "证书记录保存certbot证书名"
+
+
+async def upgrade(conn: BaseDBAsyncClient):
+    """证书表新增lineage列，已有证书按证书主题CN（缺失时为所属域名）回填"""
+    from app.services.certificate_parser import common_name_from_subject
+
+    if 'lineage' in await table_columns(conn, 'certificates'):
+        return
+    await conn.execute_script("ALTER TABLE certificates ADD COLUMN lineage VARCHAR(255)")
+    logger.info("证书表新增列: lineage")
+
+    rows = await conn.execute_query_dict(
+        "SELECT c.id, c.subject, d.name AS domain_name FROM certificates c "
+        "JOIN domains d ON d.id = c.domain_id"
+    )
+    for row in rows:
+        lineage = common_name_from_subject(row['subject']) or row['domain_name']
+        await execute("UPDATE certificates SET lineage = ? WHERE id = ?", [lineage, row['id']], conn)
+    if rows:
+        logger.info(f"已回填 {len(rows)} 个证书的certbot证书名")
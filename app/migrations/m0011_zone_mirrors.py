@@ -0,0 +1,33 @@
+"""0011 区域镜像表"""
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+from app.migrations.utils import execute_ddl
+
+VERSION = 11
+DESCRIPTION = "区域镜像表"
+
+STATEMENTS = (
+    """CREATE TABLE IF NOT EXISTS "zone_mirrors" (
+        "id" {pk},
+        "name" VARCHAR(100) NOT NULL,
+        "source_zone" VARCHAR(255) NOT NULL,
+        "target_zone" VARCHAR(255) NOT NULL,
+        "interval" INT NOT NULL,
+        "delete_extra" {bool} NOT NULL,
+        "enabled" {bool} NOT NULL,
+        "source_digest" VARCHAR(64),
+        "last_run_at" {timestamp},
+        "last_status" VARCHAR(20),
+        "last_message" TEXT,
+        "created_at" {timestamp} NOT NULL,
+        "updated_at" {timestamp} NOT NULL,
+        "source_provider_id" INT NOT NULL REFERENCES "providers" ("id") ON DELETE CASCADE,
+        "target_provider_id" INT NOT NULL REFERENCES "providers" ("id") ON DELETE CASCADE,
+        CONSTRAINT "uid_zone_mirror_target__a47163" UNIQUE ("target_provider_id", "target_zone")
+    )""",
+)
+
+
+async def upgrade(conn: BaseDBAsyncClient):
+    """建立zone_mirrors表"""
+    await execute_ddl(conn, STATEMENTS)
@@ -0,0 +1,30 @@
+"""0012 日志消息字典最近使用时间"""
+import logging
+from datetime import datetime, timezone
+
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+from app.db_dialect import execute, is_sqlite
+from app.migrations.utils import table_columns
+
+logger = logging.getLogger(__name__)
+
+VERSION = 12
+DESCRIPTION = "日志消息字典最近使用时间"
+
+
+async def upgrade(conn: BaseDBAsyncClient):
+    """log_messages表新增last_used列，已有消息视为刚被使用（一个清理宽限期后才可能被清理）"""
+    if 'last_used' in await table_columns(conn, 'log_messages'):
+        return
+
+    sqlite = is_sqlite(conn)
+    await conn.execute_script(
+        f"ALTER TABLE log_messages ADD COLUMN last_used {'VARCHAR(32)' if sqlite else 'TIMESTAMPTZ'}"
+    )
+    now = datetime.now(timezone.utc)
+    await execute(
+        "UPDATE log_messages SET last_used = ?",
+        [now.isoformat(timespec="microseconds") if sqlite else now], conn
+    )
+    logger.info("日志消息字典表新增列: last_used")
@@ -0,0 +1,129 @@
+"""数据库迁移执行器"""
+import logging
+from datetime import datetime, timezone
+from typing import List
+
+from tortoise import Tortoise
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.exceptions import OperationalError
+
+from app.db_dialect import execute, is_postgres
+from app.migrations import (
+    m0001_initial_schema,
+    m0002_certificate_store,
+    m0003_query_indexes,
+    m0004_domain_summaries,
+    m0005_record_search,
+    m0006_record_value_index,
+    m0007_partitioned_logs,
+    m0008_cache_versions,
+    m0009_user_token_version,
+    m0010_certificate_lineage,
+    m0011_zone_mirrors,
+    m0012_log_message_last_used,
+)
+
+logger = logging.getLogger(__name__)
+
+# 按版本号排序的迁移脚本，每个模块提供 VERSION、DESCRIPTION 和 async upgrade(conn)
+MIGRATIONS = [
+    m0001_initial_schema,
+    m0002_certificate_store,
+    m0003_query_indexes,
+    m0004_domain_summaries,
+    m0005_record_search,
+    m0006_record_value_index,
+    m0007_partitioned_logs,
+    m0008_cache_versions,
+    m0009_user_token_version,
+    m0010_certificate_lineage,
+    m0011_zone_mirrors,
+    m0012_log_message_last_used,
+]
+
+LATEST_VERSION = MIGRATIONS[-1].VERSION
+
+SCHEMA_VERSION_TABLE = "schema_version"
+
+# 多副本共用PostgreSQL时，用会话级咨询锁保证同一时间只有一个进程执行迁移
+MIGRATION_LOCK_ID = 0x444E534D
+
+
+class MigrationError(Exception):
+    """数据库迁移异常"""
+    pass
+
+
+async def get_schema_version(conn: BaseDBAsyncClient = None) -> int:
+    """读取当前数据库版本，未初始化的数据库返回0"""
+    conn = conn or Tortoise.get_connection('default')
+    try:
+        rows = await conn.execute_query_dict(f"SELECT MAX(version) AS version FROM {SCHEMA_VERSION_TABLE}")
+    except OperationalError:
+        return 0
+    return (rows[0]['version'] or 0) if rows else 0
+
+
+def pending_migrations(current_version: int) -> List:
+    """返回尚未执行的迁移"""
+    return [migration for migration in MIGRATIONS if migration.VERSION > current_version]
+
+
+async def run_migrations(conn: BaseDBAsyncClient = None) -> int:
+    """
+    执行所有未完成的迁移
+
+    每个迁移都是幂等的，执行成功后写入版本表；中途失败时下次启动会从该版本重新执行。
+
+    Returns:
+        int: 迁移后的数据库版本
+    """
+    conn = conn or Tortoise.get_connection('default')
+    current_version = await get_schema_version(conn)
+    if current_version == LATEST_VERSION:
+        return current_version
+
+    if not is_postgres(conn):
+        return await _apply_pending(conn)
+
+    # 连接池中的连接各自持有会话，加锁与解锁必须在同一个连接上
+    async with conn.acquire_connection() as connection:
+        await connection.execute(f"SELECT pg_advisory_lock({MIGRATION_LOCK_ID})")
+        try:
+            return await _apply_pending(conn)
+        finally:
+            await connection.execute(f"SELECT pg_advisory_unlock({MIGRATION_LOCK_ID})")
+
+
+async def _apply_pending(conn: BaseDBAsyncClient) -> int:
+    """执行未完成的迁移（加锁后重新读取版本，其他副本可能已完成迁移）"""
+    current_version = await get_schema_version(conn)
+    if current_version > LATEST_VERSION:
+        raise MigrationError(f"数据库版本 {current_version} 高于程序支持的版本 {LATEST_VERSION}，请升级程序")
+
+    pending = pending_migrations(current_version)
+    if not pending:
+        return current_version
+
+    await conn.execute_script(
+        f"CREATE TABLE IF NOT EXISTS {SCHEMA_VERSION_TABLE} ("
+        "version INT NOT NULL PRIMARY KEY, "
+        "description VARCHAR(255) NOT NULL, "
+        "applied_at VARCHAR(32) NOT NULL)"
+    )
+
+    for migration in pending:
+        logger.info(f"执行数据库迁移 {migration.VERSION:04d}: {migration.DESCRIPTION}")
+        try:
+            await migration.upgrade(conn)
+        except Exception as e:
+            raise MigrationError(f"数据库迁移 {migration.VERSION:04d} 失败: {e}") from e
+        await execute(
+            f"INSERT INTO {SCHEMA_VERSION_TABLE} (version, description, applied_at) VALUES (?, ?, ?)",
+            [migration.VERSION, migration.DESCRIPTION, datetime.now(timezone.utc).isoformat()],
+            conn
+        )
+        current_version = migration.VERSION
+
+    logger.info(f"数据库已迁移到版本 {current_version}")
+    return current_version
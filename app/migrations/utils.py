@@ -0,0 +1,70 @@
+"""迁移脚本公用的结构查询工具"""
+from typing import Iterable, List, Set
+
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+from app.db_dialect import fetch_all, is_sqlite
+
+# 建表语句中随数据库方言变化的列类型，语句中以 {pk}、{bool}、{timestamp}、{json} 书写
+COLUMN_TYPES = {
+    'sqlite': {
+        'pk': 'INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL',
+        'bool': 'INT',
+        'timestamp': 'TIMESTAMP',
+        'json': 'JSON',
+    },
+    'postgres': {
+        'pk': 'SERIAL NOT NULL PRIMARY KEY',
+        'bool': 'BOOL',
+        'timestamp': 'TIMESTAMPTZ',
+        'json': 'JSONB',
+    },
+}
+
+
+async def execute_ddl(conn: BaseDBAsyncClient, statements: Iterable[str]):
+    """
+    按当前数据库方言填入列类型后依次执行建表、建索引语句
+
+    迁移脚本写明各自版本的表结构，不随模型定义变化（模型只描述最新版本）。
+    """
+    types = COLUMN_TYPES['sqlite' if is_sqlite(conn) else 'postgres']
+    for statement in statements:
+        await conn.execute_script(statement.format(**types))
+
+
+async def table_columns(conn: BaseDBAsyncClient, table: str) -> Set[str]:
+    """返回表的列名集合，表不存在时返回空集合"""
+    if is_sqlite(conn):
+        rows = await conn.execute_query_dict(f'PRAGMA table_info("{table}")')
+    else:
+        rows = await fetch_all(
+            "SELECT column_name AS name FROM information_schema.columns "
+            "WHERE table_schema = current_schema() AND table_name = ?",
+            [table], conn
+        )
+    return {row['name'] for row in rows}
+
+
+async def unique_index_exists(conn: BaseDBAsyncClient, table: str, columns: List[str]) -> bool:
+    """检查是否已有按给定列（顺序一致）建立的唯一索引或唯一约束"""
+    if is_sqlite(conn):
+        for index in await conn.execute_query_dict(f'PRAGMA index_list("{table}")'):
+            if not index['unique']:
+                continue
+            info = await conn.execute_query_dict(f'PRAGMA index_info("{index["name"]}")')
+            if [column['name'] for column in info] == columns:
+                return True
+        return False
+
+    rows = await fetch_all(
+        "SELECT array_agg(a.attname::text ORDER BY k.ordinality) AS columns "
+        "FROM pg_index i "
+        "JOIN pg_class t ON t.oid = i.indrelid "
+        "CROSS JOIN LATERAL unnest(i.indkey) WITH ORDINALITY AS k(attnum, ordinality) "
+        "JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum = k.attnum "
+        "WHERE t.relname = ? AND i.indisunique "
+        "GROUP BY i.indexrelid",
+        [table], conn
+    )
+    return any(list(row['columns']) == columns for row in rows)
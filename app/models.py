@@ -5,6 +5,8 @@ from datetime import datetime
 from enum import IntEnum
 import uuid
 
+from app.record_values import normalize_record_value
+
 
 class ProviderType(IntEnum):
     """DNS服务商类型"""
@@ -12,6 +14,7 @@ class ProviderType(IntEnum):
     ALIYUN = 2
     TENCENT = 3
     CLOUDFLARE = 4
+    FAKE = 5  # 模拟服务商，仅在启用 fake_provider_enabled 时可用
 
 
 class RecordType(IntEnum):
@@ -72,6 +75,31 @@ class Domain(Model):
         table = "domains"
 
 
+class DomainSummary(Model):
+    """域名记录汇总（由同步与记录接口维护，域名列表无需读取dns_records）"""
+    domain = fields.OneToOneField(
+        'models.Domain', related_name='summary', pk=True,
+        on_delete=fields.CASCADE, description="所属域名"
+    )
+    record_count = fields.IntField(default=0, description="解析记录总数")
+    type_counts = fields.JSONField(default=dict, description="按记录类型统计的数量")
+    last_synced_at = fields.DatetimeField(null=True, description="最后同步时间")
+    last_changed_at = fields.DatetimeField(null=True, description="记录最后变更时间")
+    updated_at = fields.DatetimeField(auto_now=True)
+    
+    class Meta:
+        table = "domain_summaries"
+
+
+class CacheVersion(Model):
+    """进程内缓存的版本号（多个工作进程据此判断本地缓存是否过期）"""
+    name = fields.CharField(max_length=50, pk=True, description="缓存名称")
+    version = fields.BigIntField(default=0, description="版本号，每次失效加一")
+    
+    class Meta:
+        table = "cache_versions"
+
+
 class DNSRecord(Model):
     """DNS记录模型"""
     id = fields.IntField(pk=True)
@@ -83,11 +111,24 @@ class DNSRecord(Model):
     priority = fields.IntField(null=True, description="优先级")
     enabled = fields.BooleanField(default=True, description="是否启用")
     external_id = fields.CharField(max_length=255, null=True, description="服务商记录ID")
+    value_normalized = fields.CharField(max_length=500, null=True, description="规范化记录值（反查引用）")
     created_at = fields.DatetimeField(auto_now_add=True)
     updated_at = fields.DatetimeField(auto_now=True)
     
     class Meta:
         table = "dns_records"
+        # (value_normalized, type) 索引由迁移0006在回填规范化记录值之后建立，不随模型建表
+        indexes = (("domain_id", "name", "type"),)
+    
+    async def save(self, using_db=None, update_fields=None, force_create=False, force_update=False):
+        """保存时同步维护规范化记录值"""
+        self.value_normalized = normalize_record_value(self.type, self.value)
+        if update_fields is not None:
+            update_fields = list(update_fields)
+            if 'value' in update_fields or 'type' in update_fields:
+                update_fields.append('value_normalized')
+        await super().save(using_db=using_db, update_fields=update_fields,
+                           force_create=force_create, force_update=force_update)
 
 
 class Certificate(Model):
@@ -97,9 +138,10 @@ class Certificate(Model):
     name = fields.CharField(max_length=255, description="证书名称")
     type = fields.IntEnumField(CertificateType, description="证书类型")
     status = fields.IntEnumField(CertificateStatus, default=CertificateStatus.PENDING, description="证书状态")
-    certificate_file = fields.TextField(null=True, description="证书文件内容")
-    private_key_file = fields.TextField(null=True, description="私钥文件内容")
-    ca_bundle_file = fields.TextField(null=True, description="CA证书链文件内容")
+    certificate_hash = fields.CharField(max_length=64, null=True, description="证书文件摘要")
+    private_key_hash = fields.CharField(max_length=64, null=True, description="私钥文件摘要")
+    ca_bundle_hash = fields.CharField(max_length=64, null=True, description="CA证书链文件摘要")
+    lineage = fields.CharField(max_length=255, null=True, description="certbot证书名（live目录名）")
     issuer = fields.CharField(max_length=255, null=True, description="颁发机构")
     subject = fields.CharField(max_length=255, null=True, description="证书主题")
     serial_number = fields.CharField(max_length=100, null=True, description="序列号")
@@ -113,6 +155,33 @@ class Certificate(Model):
     
     class Meta:
         table = "certificates"
+        indexes = (("status", "not_after"),)
+
+
+class CertificateJob(Model):
+    """证书签发任务模型"""
+    id = fields.CharField(pk=True, default=lambda: str(uuid.uuid4()), max_length=36, description="任务ID")
+    domain = fields.ForeignKeyField('models.Domain', related_name='certificate_jobs', description="所属域名")
+    certificate = fields.ForeignKeyField(
+        'models.Certificate', related_name='jobs', null=True,
+        on_delete=fields.SET_NULL, description="关联证书"
+    )
+    kind = fields.CharField(max_length=20, default="request", description="任务类型: request, renew")
+    full_domain = fields.CharField(max_length=255, description="证书域名")
+    force = fields.BooleanField(default=False, description="是否强制重新签发")
+    status = fields.CharField(max_length=20, default="queued", description="任务状态: queued, running, succeeded, failed")
+    stage = fields.CharField(
+        max_length=30, default="queued",
+        description="签发阶段: queued, started, challenge_placed, propagated, validated, issued, failed"
+    )
+    message = fields.TextField(default="", description="最新进度消息")
+    started_at = fields.DatetimeField(null=True, description="开始执行时间")
+    finished_at = fields.DatetimeField(null=True, description="结束时间")
+    created_at = fields.DatetimeField(auto_now_add=True)
+    updated_at = fields.DatetimeField(auto_now=True)
+    
+    class Meta:
+        table = "certificate_jobs"
 
 
 class User(Model):
@@ -121,6 +190,7 @@ class User(Model):
     username = fields.CharField(max_length=50, unique=True, description="用户名")
     password_hash = fields.CharField(max_length=255, description="密码哈希")
     is_active = fields.BooleanField(default=True, description="是否激活")
+    token_version = fields.IntField(default=0, description="令牌版本，登出或修改密码时加一使旧令牌失效")
     created_at = fields.DatetimeField(auto_now_add=True)
     updated_at = fields.DatetimeField(auto_now=True)
     
@@ -145,30 +215,27 @@ class DDNSConfig(Model):
     
     class Meta:
         table = "ddns_configs"
+        unique_together = (("domain_id", "subdomain", "record_type"),)
 
 
-class DDNSLog(Model):
-    """DDNS更新日志模型"""
+class ZoneMirror(Model):
+    """区域镜像：定期把源服务商的区域记录同步到目标服务商"""
     id = fields.IntField(pk=True)
-    ddns_config = fields.ForeignKeyField('models.DDNSConfig', related_name='logs', description="DDNS配置")
-    old_ip = fields.CharField(max_length=45, null=True, description="旧IP")
-    new_ip = fields.CharField(max_length=45, description="新IP")
-    status = fields.CharField(max_length=20, description="更新状态: success, failed")
-    message = fields.TextField(description="日志消息")
-    created_at = fields.DatetimeField(auto_now_add=True)
-    
-    class Meta:
-        table = "ddns_logs"
-
-
-class TaskLog(Model):
-    """任务日志模型"""
-    id = fields.IntField(pk=True)
-    domain = fields.ForeignKeyField('models.Domain', related_name='task_logs', description="相关域名")
-    action = fields.CharField(max_length=50, description="操作类型")
-    status = fields.CharField(max_length=20, description="执行状态")
-    message = fields.TextField(description="日志消息")
+    name = fields.CharField(max_length=100, description="镜像名称")
+    source_provider = fields.ForeignKeyField('models.Provider', related_name='mirror_sources', description="源服务商")
+    source_zone = fields.CharField(max_length=255, description="源区域（域名）")
+    target_provider = fields.ForeignKeyField('models.Provider', related_name='mirror_targets', description="目标服务商")
+    target_zone = fields.CharField(max_length=255, description="目标区域（域名）")
+    interval = fields.IntField(default=300, description="同步间隔(秒)")
+    delete_extra = fields.BooleanField(default=False, description="是否删除目标多出的记录")
+    enabled = fields.BooleanField(default=True, description="是否启用")
+    source_digest = fields.CharField(max_length=64, null=True, description="上次同步时源区域记录的摘要")
+    last_run_at = fields.DatetimeField(null=True, description="最后同步时间")
+    last_status = fields.CharField(max_length=20, null=True, description="最后同步状态: success, unchanged, failed")
+    last_message = fields.TextField(null=True, description="最后同步结果说明")
     created_at = fields.DatetimeField(auto_now_add=True)
+    updated_at = fields.DatetimeField(auto_now=True)
     
     class Meta:
-        table = "task_logs"
+        table = "zone_mirrors"
+        unique_together = (("target_provider_id", "target_zone"),)
@@ -0,0 +1,151 @@
+"""基于游标（keyset）的分页工具
+
+按排序键的值定位下一页（WHERE (a, id) > (?, ?) ORDER BY a, id LIMIT n），
+不使用OFFSET，翻到多深的页面都只需读取一页的数据；游标对客户端是不透明字符串。
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from tortoise.expressions import Q
+from tortoise.queryset import QuerySet
+
+
+class CursorError(ValueError):
+    """分页游标无效"""
+    pass
+
+
+def _dump_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+
+def _load_value(value: Any) -> Any:
+    if isinstance(value, dict) and "dt" in value:
+        return datetime.fromisoformat(value["dt"])
+    return value
+
+
+def encode_cursor(keys: Optional[Sequence[Any]], backward: bool = False) -> str:
+    """
+    生成游标
+
+    Args:
+        keys: 排序键的值，None表示从末尾开始
+        backward: 是否向前翻页（取排在keys之前的一页）
+    """
+    payload = {"k": None if keys is None else [_dump_value(key) for key in keys], "b": backward}
+    raw = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+# 指向最后一页的游标（从末尾向前取一页）
+LAST_PAGE_CURSOR = encode_cursor(None, backward=True)
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[List[Any]], bool]:
+    """解析游标，返回 (排序键的值, 是否向前翻页)"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw.decode("utf-8"))
+        keys = payload["k"]
+        backward = bool(payload.get("b", False))
+        if keys is not None:
+            keys = [_load_value(key) for key in keys]
+    except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError) as e:
+        raise CursorError(f"无效的分页游标: {cursor}") from e
+    return keys, backward
+
+
+def _parse_ordering(ordering: Sequence[str]) -> List[Tuple[str, bool]]:
+    """['-created_at', '-id'] -> [('created_at', True), ('id', True)]"""
+    return [(field.lstrip("-"), field.startswith("-")) for field in ordering]
+
+
+def _after(fields: List[Tuple[str, bool]], keys: Sequence[Any]) -> Q:
+    """
+    构造“排在keys之后”的条件
+
+    (a, b) > (x, y) 展开为 a > x OR (a = x AND b > y)，降序字段使用 <。
+    """
+    conditions = []
+    for position, (field, descending) in enumerate(fields):
+        operator = "lt" if descending else "gt"
+        filters = {name: keys[index] for index, (name, _) in enumerate(fields[:position])}
+        filters[f"{field}__{operator}"] = keys[position]
+        conditions.append(Q(**filters))
+    return Q(*conditions, join_type="OR")
+
+
+async def paginate(
+    query: QuerySet,
+    ordering: Sequence[str],
+    page_size: int,
+    cursor: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    按游标分页查询
+
+    Args:
+        query: 已加好过滤条件的查询
+        ordering: 排序字段，最后一个字段必须唯一（通常为id），如 ['name', 'id']
+        page_size: 每页数量
+        cursor: 上一次返回的 next_cursor / prev_cursor / last_cursor
+
+    Returns:
+        Dict: items、next_cursor、prev_cursor、last_cursor、has_next、has_prev
+
+    Raises:
+        CursorError: 游标无效
+    """
+    fields = _parse_ordering(ordering)
+    keys, backward = decode_cursor(cursor) if cursor else (None, False)
+    if keys is not None and len(keys) != len(fields):
+        raise CursorError(f"无效的分页游标: {cursor}")
+
+    if backward:
+        # 向前翻页：反转排序方向取一页，再把结果倒回来
+        fields = [(field, not descending) for field, descending in fields]
+    if keys is not None:
+        query = query.filter(_after(fields, keys))
+    query = query.order_by(*[f"-{field}" if descending else field for field, descending in fields])
+
+    rows = await query.limit(page_size + 1)
+    more = len(rows) > page_size
+    items = rows[:page_size]
+
+    if backward:
+        items.reverse()
+        has_prev, has_next = more, keys is not None
+    else:
+        has_prev, has_next = keys is not None, more
+
+    def key_of(item) -> List[Any]:
+        return [getattr(item, field) for field, _ in fields]
+
+    return {
+        "items": items,
+        "next_cursor": encode_cursor(key_of(items[-1])) if has_next and items else None,
+        "prev_cursor": encode_cursor(key_of(items[0]), backward=True) if has_prev and items else None,
+        "last_cursor": LAST_PAGE_CURSOR,
+        "has_next": has_next,
+        "has_prev": has_prev,
+    }
+
+
+def pagination_info(page: Dict[str, Any], page_size: int, total: Optional[int] = None) -> Dict[str, Any]:
+    """生成接口返回的分页信息，total为None表示未统计总数"""
+    return {
+        "page_size": page_size,
+        "total": total,
+        "total_pages": None if total is None else (total + page_size - 1) // page_size,
+        "has_next": page["has_next"],
+        "has_prev": page["has_prev"],
+        "next_cursor": page["next_cursor"],
+        "prev_cursor": page["prev_cursor"],
+        "last_cursor": page["last_cursor"],
+    }
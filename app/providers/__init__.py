@@ -4,5 +4,6 @@ from .huawei import HuaweiProvider
 from .aliyun import AliyunProvider
 from .tencent import TencentProvider
 from .cloudflare import CloudflareProvider
+from .fake import FakeProvider
 
-__all__ = ['BaseProvider', 'HuaweiProvider', 'AliyunProvider', 'TencentProvider', 'CloudflareProvider']
+__all__ = ['BaseProvider', 'HuaweiProvider', 'AliyunProvider', 'TencentProvider', 'CloudflareProvider', 'FakeProvider']
@@ -1,5 +1,4 @@
 """阿里云DNS服务商集成"""
-import httpx
 import hashlib
 import hmac
 import base64
@@ -13,6 +12,10 @@ from .base import BaseProvider
 class AliyunProvider(BaseProvider):
     """阿里云DNS服务商"""
     
+    # 免费版最小TTL为600秒
+    MIN_TTL = 600
+    MAX_TTL = 86400
+    
     def __init__(self, access_key: str, secret_key: str, region: str = ""):
         super().__init__(access_key, secret_key, region)
         # 阿里云DNS是全局服务，不需要区域参数
@@ -61,7 +64,7 @@ class AliyunProvider(BaseProvider):
         
         query_string = self._sign_request(params)
         
-        async with httpx.AsyncClient() as client:
+        async with self._http() as client:
             response = await client.get(
                 f"{self.base_url}?{query_string}",
                 timeout=10
@@ -90,7 +93,7 @@ class AliyunProvider(BaseProvider):
         
         query_string = self._sign_request(params)
         
-        async with httpx.AsyncClient() as client:
+        async with self._http() as client:
             response = await client.get(
                 f"{self.base_url}?{query_string}",
                 timeout=10
@@ -127,7 +130,7 @@ class AliyunProvider(BaseProvider):
         
         query_string = self._sign_request(params)
         
-        async with httpx.AsyncClient() as client:
+        async with self._http() as client:
             response = await client.get(
                 f"{self.base_url}?{query_string}",
                 timeout=10
@@ -158,7 +161,7 @@ class AliyunProvider(BaseProvider):
         
         query_string = self._sign_request(params)
         
-        async with httpx.AsyncClient() as client:
+        async with self._http() as client:
             response = await client.get(
                 f"{self.base_url}?{query_string}",
                 timeout=10
@@ -175,7 +178,7 @@ class AliyunProvider(BaseProvider):
         
         query_string = self._sign_request(params)
         
-        async with httpx.AsyncClient() as client:
+        async with self._http() as client:
             response = await client.get(
                 f"{self.base_url}?{query_string}",
                 timeout=10
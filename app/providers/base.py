@@ -1,34 +1,101 @@
 """DNS服务商基础类"""
+import asyncio
+import time
 from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
 from typing import List, Dict, Any, Optional
+
+import httpx
+
+from app.config.settings import settings
 from app.models import DNSRecord, RecordType, Provider
 
+# zone ID缓存的有效期（秒），过期后下次查询重新列出zone
+ZONE_CACHE_TTL = 600
+
 
 def get_provider_instance(provider: Provider):
-    """根据服务商类型获取实例"""
-    if provider.type == 1:  # 华为云
-        from app.providers.huawei import HuaweiProvider
-        return HuaweiProvider(provider.access_key, provider.secret_key, provider.region)
-    elif provider.type == 2:  # 阿里云
-        from app.providers.aliyun import AliyunProvider
-        return AliyunProvider(provider.access_key, provider.secret_key, provider.region)
-    elif provider.type == 3:  # 腾讯云
-        from app.providers.tencent import TencentProvider
-        return TencentProvider(provider.access_key, provider.secret_key, provider.region)
-    elif provider.type == 4:  # Cloudflare
-        from app.providers.cloudflare import CloudflareProvider
-        return CloudflareProvider(provider.access_key, provider.secret_key, provider.region)
-    else:
-        return None
+    """获取服务商的共享实例（由服务商注册表按服务商复用），不支持的类型返回None"""
+    from app.providers.registry import provider_registry
+    return provider_registry.get(provider)
+
+
+class RateLimiter:
+    """令牌桶限速：平均每秒rate个请求，最多burst个突发请求"""
+    
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
 
 
 class BaseProvider(ABC):
     """DNS服务商基础抽象类"""
     
+    # 服务商允许的TTL范围（迁移记录时据此调整）
+    MIN_TTL = 1
+    MAX_TTL = 86400
+    # 支持写入的记录类型
+    SUPPORTED_TYPES = frozenset(RecordType)
+    # 根域名是否允许CNAME记录
+    APEX_CNAME = False
+    
     def __init__(self, access_key: str, secret_key: str, region: str):
         self.access_key = access_key
         self.secret_key = secret_key
         self.region = region
+        # 域名 -> 服务商侧zone ID，由get_domains填充
+        self._zone_ids: Dict[str, str] = {}
+        self._zones_loaded_at = 0.0
+        # 连接池复用的HTTP客户端与按服务商账号的限速
+        self._client: Optional[httpx.AsyncClient] = None
+        self._limiter = RateLimiter(settings.provider_rate_limit, settings.provider_rate_burst)
+    
+    @asynccontextmanager
+    async def _http(self):
+        """取得共享的HTTP客户端（保持连接复用），每次请求前先经过限速"""
+        await self._limiter.acquire()
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(transport=self._http_transport())
+        yield self._client
+    
+    def _http_transport(self) -> httpx.AsyncBaseTransport:
+        """HTTP传输层：默认直连，配置录制/回放目录时录制或回放服务商流量"""
+        from app.providers.replay import RecordingTransport, ReplayTransport, cassette_path
+        
+        if settings.provider_http_replay_dir:
+            return ReplayTransport(
+                cassette_path(settings.provider_http_replay_dir, type(self)),
+                latency=settings.provider_http_replay_latency
+            )
+        transport = httpx.AsyncHTTPTransport(limits=httpx.Limits(
+            max_connections=settings.provider_max_connections,
+            max_keepalive_connections=settings.provider_max_connections
+        ))
+        if settings.provider_http_record_dir:
+            return RecordingTransport(cassette_path(settings.provider_http_record_dir, type(self)), transport)
+        return transport
+    
+    async def close(self):
+        """关闭HTTP客户端"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
     
     @abstractmethod
     async def get_domains(self) -> List[Dict[str, Any]]:
@@ -60,6 +127,27 @@ class BaseProvider(ABC):
         """测试连接"""
         pass
     
+    def _remember_zones(self, zones: List[Dict[str, Any]]):
+        """缓存get_domains返回的zone ID"""
+        self._zone_ids = {zone["name"].rstrip("."): zone["id"] for zone in zones}
+        self._zones_loaded_at = time.monotonic()
+    
+    async def _get_zone_id(self, domain: str) -> Optional[str]:
+        """
+        查找域名对应的zone ID
+        
+        同一实例内只在首次查询、缓存过期或遇到未知域名时重新列出全部zone，
+        避免每次记录操作都先调用一遍get_domains。
+        """
+        name = domain.rstrip(".")
+        if name not in self._zone_ids or time.monotonic() - self._zones_loaded_at > ZONE_CACHE_TTL:
+            await self.get_domains()
+        return self._zone_ids.get(name)
+    
+    def clamp_ttl(self, ttl: int) -> int:
+        """把TTL调整到服务商允许的范围内"""
+        return max(self.MIN_TTL, min(self.MAX_TTL, int(ttl)))
+    
     def _convert_record_type(self, record_type: str) -> RecordType:
         """转换记录类型"""
         type_mapping = {
@@ -1,5 +1,4 @@
 """Cloudflare DNS服务商集成"""
-import httpx
 import json
 from datetime import datetime
 from typing import List, Dict, Any
@@ -9,6 +8,12 @@ from .base import BaseProvider
 class CloudflareProvider(BaseProvider):
     """Cloudflare DNS服务商"""
     
+    # TTL为1表示自动，其余最小60秒
+    MIN_TTL = 60
+    MAX_TTL = 86400
+    # 根域名CNAME会被展平
+    APEX_CNAME = True
+    
     def __init__(self, access_key: str, secret_key: str, region: str = ""):
         super().__init__(access_key, secret_key, region)
         # Cloudflare使用API Token，access_key是token，secret_key是email（用于某些API）
@@ -27,7 +32,7 @@ class CloudflareProvider(BaseProvider):
         """获取域名列表（Zones）"""
         headers = self._get_headers()
         
-        async with httpx.AsyncClient() as client:
+        async with self._http() as client:
             response = await client.get(
                 f"{self.base_url}/zones",
                 headers=headers,
@@ -47,33 +52,29 @@ class CloudflareProvider(BaseProvider):
                     error_msg = "未知错误"
                 raise Exception(f"Cloudflare API错误: {error_msg}")
             
-            zones = data.get("result", [])
-            return [
+            zones = [
                 {
                     "id": zone["id"],
                     "name": zone["name"],
                     "status": zone.get("status", "active"),
                     "ttl": zone.get("plan", {}).get("legacy_id", 1)  # 使用plan作为TTL参考
                 }
-                for zone in zones
+                for zone in data.get("result", [])
             ]
+            self._remember_zones(zones)
+            return zones
     
     async def get_records(self, domain: str) -> List[Dict[str, Any]]:
         """获取域名解析记录"""
-        # 首先获取zone_id
-        zones = await self.get_domains()
-        zone_id = None
-        for zone in zones:
-            if zone["name"] == domain or zone["name"] == f"{domain}.":
-                zone_id = zone["id"]
-                break
+        # 首先获取zone_id（实例内缓存）
+        zone_id = await self._get_zone_id(domain)
         
         if not zone_id:
             return []
         
         headers = self._get_headers()
         
-        async with httpx.AsyncClient() as client:
+        async with self._http() as client:
             response = await client.get(
                 f"{self.base_url}/zones/{zone_id}/dns_records",
                 headers=headers,
@@ -109,13 +110,8 @@ class CloudflareProvider(BaseProvider):
     
     async def add_record(self, domain: str, record: Dict[str, Any]) -> str:
         """添加解析记录，返回记录ID"""
-        # 首先获取zone_id
-        zones = await self.get_domains()
-        zone_id = None
-        for zone in zones:
-            if zone["name"] == domain or zone["name"] == f"{domain}.":
-                zone_id = zone["id"]
-                break
+        # 首先获取zone_id（实例内缓存）
+        zone_id = await self._get_zone_id(domain)
         
         if not zone_id:
             raise Exception(f"未找到域名 {domain} 的zone_id")
@@ -132,7 +128,7 @@ class CloudflareProvider(BaseProvider):
         if record.get("priority"):
             params["priority"] = record["priority"]
         
-        async with httpx.AsyncClient() as client:
+        async with self._http() as client:
             response = await client.post(
                 f"{self.base_url}/zones/{zone_id}/dns_records",
                 json=params,
@@ -161,13 +157,8 @@ class CloudflareProvider(BaseProvider):
     
     async def update_record(self, domain: str, record_id: str, record: Dict[str, Any]) -> bool:
         """更新解析记录"""
-        # 首先获取zone_id
-        zones = await self.get_domains()
-        zone_id = None
-        for zone in zones:
-            if zone["name"] == domain or zone["name"] == f"{domain}.":
-                zone_id = zone["id"]
-                break
+        # 首先获取zone_id（实例内缓存）
+        zone_id = await self._get_zone_id(domain)
         
         if not zone_id:
             raise Exception(f"未找到域名 {domain} 的zone_id")
@@ -184,7 +175,7 @@ class CloudflareProvider(BaseProvider):
         if record.get("priority"):
             params["priority"] = record["priority"]
         
-        async with httpx.AsyncClient() as client:
+        async with self._http() as client:
             response = await client.put(
                 f"{self.base_url}/zones/{zone_id}/dns_records/{record_id}",
                 json=params,
@@ -209,20 +200,15 @@ class CloudflareProvider(BaseProvider):
     
     async def delete_record(self, domain: str, record_id: str) -> bool:
         """删除解析记录"""
-        # 首先获取zone_id
-        zones = await self.get_domains()
-        zone_id = None
-        for zone in zones:
-            if zone["name"] == domain or zone["name"] == f"{domain}.":
-                zone_id = zone["id"]
-                break
+        # 首先获取zone_id（实例内缓存）
+        zone_id = await self._get_zone_id(domain)
         
         if not zone_id:
             raise Exception(f"未找到域名 {domain} 的zone_id")
         
         headers = self._get_headers()
         
-        async with httpx.AsyncClient() as client:
+        async with self._http() as client:
             response = await client.delete(
                 f"{self.base_url}/zones/{zone_id}/dns_records/{record_id}",
                 headers=headers,
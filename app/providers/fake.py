@@ -0,0 +1,236 @@
+"""模拟DNS服务商
+
+数据保存在进程内存中，不访问任何云服务，用于离线压测同步、DDNS与证书流程。
+延迟、错误率、分页大小、服务端限速与初始数据规模都可配置，
+配置写在秘密密钥中（如 ``latency=0.05&error_rate=0.01&page_size=50``），
+同一访问密钥的实例共享同一份数据，与真实服务商的账号一致。
+
+仅在 ``DNS_FAKE_PROVIDER_ENABLED=true`` 时可用。
+"""
+import asyncio
+import random
+import time
+from collections import deque
+from dataclasses import dataclass, fields
+from typing import Any, Deque, Dict, List
+from urllib.parse import parse_qsl
+
+from app.models import RecordType
+from app.providers.base import BaseProvider
+from app.zone_files import relative_name
+
+
+class FakeProviderError(Exception):
+    """模拟的服务商接口错误"""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"模拟服务商错误 {status_code}: {message}")
+        self.status_code = status_code
+
+
+@dataclass
+class FakeOptions:
+    """模拟服务商的行为配置"""
+    latency: float = 0.0  # 每次接口调用的延迟（秒）
+    jitter: float = 0.0  # 延迟的随机浮动（秒）
+    error_rate: float = 0.0  # 接口调用失败（500）的概率
+    page_size: int = 100  # 列表接口每页条数，列出全部数据需要多次调用
+    rate_limit: float = 0.0  # 服务端每秒允许的调用数，超出返回429，0为不限
+    zones: int = 3  # 账号初始的域名数
+    records: int = 20  # 每个域名初始的解析记录数
+    seed: int = 0  # 随机数种子，保证初始数据与错误注入可重现
+
+    @classmethod
+    def parse(cls, text: str, **overrides) -> "FakeOptions":
+        """从 ``key=value&key=value`` 形式的文本解析，未知配置项忽略"""
+        types = {item.name: item.type for item in fields(cls)}
+        values: Dict[str, Any] = {}
+        for key, value in parse_qsl(text or "", keep_blank_values=False):
+            if key in types:
+                try:
+                    values[key] = types[key](value)
+                except ValueError:
+                    continue
+        values.update({key: value for key, value in overrides.items() if key in types})
+        return cls(**values)
+
+
+class _FakeAccount:
+    """一个访问密钥对应的模拟账号数据"""
+
+    def __init__(self, access_key: str, options: FakeOptions):
+        self.zones: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.zone_ids: Dict[str, str] = {}
+        self.calls: Deque[float] = deque()
+        self._next_id = 0
+        self._seed(access_key, options)
+
+    def next_id(self) -> str:
+        self._next_id += 1
+        return str(self._next_id)
+
+    def _seed(self, access_key: str, options: FakeOptions):
+        rng = random.Random(options.seed)
+        slug = "".join(ch for ch in access_key.lower() if ch.isalnum()) or "fake"
+        for i in range(options.zones):
+            zone = f"zone{i}.{slug}.test"
+            self.zone_ids[zone] = f"z{i}"
+            records = self.zones[zone] = {}
+            for j in range(options.records):
+                record_id = self.next_id()
+                record_type = rng.choice((RecordType.A, RecordType.A, RecordType.AAAA, RecordType.CNAME,
+                                          RecordType.MX, RecordType.TXT))
+                name = "@" if j == 0 else f"host{j}"
+                if record_type == RecordType.A or j == 0:
+                    record_type = RecordType.A
+                    value = f"10.{i % 256}.{j // 256 % 256}.{j % 256}"
+                elif record_type == RecordType.AAAA:
+                    value = f"fd00::{i:x}:{j:x}"
+                elif record_type == RecordType.CNAME:
+                    value = f"host{rng.randrange(max(1, j))}.{zone}"
+                elif record_type == RecordType.MX:
+                    value = f"mail{j}.{zone}"
+                else:
+                    value = f"fake-verification={rng.getrandbits(64):016x}"
+                records[record_id] = {
+                    "id": record_id,
+                    "name": name,
+                    "type": record_type.name,
+                    "value": value,
+                    "ttl": 600,
+                    "priority": 10 if record_type == RecordType.MX else None,
+                    "status": "ENABLE",
+                }
+
+
+# 访问密钥 -> 模拟账号
+_ACCOUNTS: Dict[str, _FakeAccount] = {}
+
+
+def reset_fake_accounts():
+    """清空所有模拟账号的数据（下次访问时按配置重新生成）"""
+    _ACCOUNTS.clear()
+
+
+class FakeProvider(BaseProvider):
+    """模拟DNS服务商"""
+
+    MIN_TTL = 1
+    MAX_TTL = 86400
+
+    def __init__(self, access_key: str, secret_key: str, region: str = "", **options):
+        super().__init__(access_key, secret_key, region)
+        self.options = FakeOptions.parse(secret_key, **options)
+        if access_key not in _ACCOUNTS:
+            _ACCOUNTS[access_key] = _FakeAccount(access_key, self.options)
+        self.account = _ACCOUNTS[access_key]
+        self._random = random.Random(self.options.seed)
+        # 本实例发出的接口调用数
+        self.call_count = 0
+
+    async def _call(self, action: str):
+        """模拟一次接口调用：客户端限速、网络延迟、服务端限速与随机错误"""
+        await self._limiter.acquire()
+        self.call_count += 1
+        delay = self.options.latency + self._random.uniform(-1, 1) * self.options.jitter
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if self.options.rate_limit > 0:
+            now = time.monotonic()
+            calls = self.account.calls
+            while calls and now - calls[0] >= 1:
+                calls.popleft()
+            if len(calls) >= self.options.rate_limit:
+                raise FakeProviderError(429, f"{action} 请求过于频繁")
+            calls.append(now)
+
+        if self.options.error_rate > 0 and self._random.random() < self.options.error_rate:
+            raise FakeProviderError(500, f"{action} 内部错误")
+
+    async def _paged(self, action: str, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """按页大小逐页调用接口，返回全部数据"""
+        page_size = max(1, self.options.page_size)
+        result = []
+        for start in range(0, max(1, len(items)), page_size):
+            await self._call(action)
+            result.extend(dict(item) for item in items[start:start + page_size])
+        return result
+
+    def _zone(self, domain: str) -> Dict[str, Dict[str, Any]]:
+        records = self.account.zones.get(domain.rstrip("."))
+        if records is None:
+            raise FakeProviderError(404, f"域名 {domain} 不存在")
+        return records
+
+    def _record_data(self, domain: str, record: Dict[str, Any]) -> Dict[str, Any]:
+        record_type = str(record.get("type", "")).upper()
+        if record_type not in RecordType.__members__:
+            raise FakeProviderError(400, f"不支持的记录类型: {record.get('type')}")
+        if not record.get("value"):
+            raise FakeProviderError(400, "记录值不能为空")
+        return {
+            "name": relative_name(str(record.get("name") or "@"), domain.rstrip(".")),
+            "type": record_type,
+            "value": str(record["value"]),
+            "ttl": self.clamp_ttl(record.get("ttl") or 600),
+            "priority": record.get("priority"),
+            "status": "ENABLE",
+        }
+
+    async def get_domains(self) -> List[Dict[str, Any]]:
+        """获取域名列表"""
+        zones = [
+            {"id": self.account.zone_ids[name], "name": name, "status": "ENABLE", "ttl": 600}
+            for name in sorted(self.account.zones)
+        ]
+        result = await self._paged("DescribeDomains", zones)
+        self._remember_zones(result)
+        return result
+
+    async def get_records(self, domain: str) -> List[Dict[str, Any]]:
+        """获取域名解析记录"""
+        records = self._zone(domain)
+        return await self._paged("DescribeRecords", list(records.values()))
+
+    async def add_record(self, domain: str, record: Dict[str, Any]) -> str:
+        """添加解析记录，返回记录ID"""
+        await self._call("CreateRecord")
+        records = self._zone(domain)
+        data = self._record_data(domain, record)
+        for existing in records.values():
+            if (existing["name"], existing["type"], existing["value"]) == (data["name"], data["type"], data["value"]):
+                raise FakeProviderError(409, "记录已存在")
+        record_id = self.account.next_id()
+        records[record_id] = {"id": record_id, **data}
+        return record_id
+
+    async def update_record(self, domain: str, record_id: str, record: Dict[str, Any]) -> bool:
+        """更新解析记录"""
+        await self._call("ModifyRecord")
+        records = self._zone(domain)
+        if str(record_id) not in records:
+            raise FakeProviderError(404, f"记录 {record_id} 不存在")
+        records[str(record_id)] = {"id": str(record_id), **self._record_data(domain, record)}
+        return True
+
+    async def delete_record(self, domain: str, record_id: str) -> bool:
+        """删除解析记录"""
+        await self._call("DeleteRecord")
+        records = self._zone(domain)
+        if records.pop(str(record_id), None) is None:
+            raise FakeProviderError(404, f"记录 {record_id} 不存在")
+        return True
+
+    async def test_connection(self) -> bool:
+        """测试连接"""
+        await self.get_domains()
+        return True
+
+    def add_zone(self, name: str) -> str:
+        """向模拟账号添加一个空域名（压测准备数据用），返回zone ID"""
+        name = name.rstrip(".")
+        if name not in self.account.zones:
+            self.account.zones[name] = {}
+            self.account.zone_ids[name] = f"z{self.account.next_id()}"
+        return self.account.zone_ids[name]
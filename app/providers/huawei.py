@@ -1,5 +1,4 @@
 """华为云DNS服务商集成"""
-import httpx
 import hashlib
 import hmac
 import base64
@@ -13,6 +12,9 @@ from .base import BaseProvider
 class HuaweiProvider(BaseProvider):
     """华为云DNS服务商"""
     
+    MIN_TTL = 1
+    MAX_TTL = 2147483647
+    
     def __init__(self, access_key: str, secret_key: str, region: str = ""):
         super().__init__(access_key, secret_key, region)
         # 如果没有指定区域，使用默认区域
@@ -127,7 +129,7 @@ class HuaweiProvider(BaseProvider):
         
         headers = self._sign_request("GET", uri, query_params, headers)
         
-        async with httpx.AsyncClient() as client:
+        async with self._http() as client:
             response = await client.get(
                 f"{self.base_url}{uri}",
                 params=query_params,
@@ -137,7 +139,7 @@ class HuaweiProvider(BaseProvider):
             response.raise_for_status()
             data = response.json()
             
-            return [
+            zones = [
                 {
                     "id": zone["id"],
                     "name": zone["name"],
@@ -146,16 +148,13 @@ class HuaweiProvider(BaseProvider):
                 }
                 for zone in data.get("zones", [])
             ]
+            self._remember_zones(zones)
+            return zones
     
     async def get_records(self, domain: str) -> List[Dict[str, Any]]:
         """获取域名解析记录"""
-        # 首先获取域名ID
-        zones = await self.get_domains()
-        domain_id = None
-        for zone in zones:
-            if zone["name"] == domain or zone["name"] == f"{domain}.":
-                domain_id = zone["id"]
-                break
+        # 首先获取域名ID（实例内缓存）
+        domain_id = await self._get_zone_id(domain)
         
         if not domain_id:
             return []
@@ -172,7 +171,7 @@ class HuaweiProvider(BaseProvider):
         
         headers = self._sign_request("GET", uri, query_params, headers)
         
-        async with httpx.AsyncClient() as client:
+        async with self._http() as client:
             response = await client.get(
                 f"{self.base_url}{uri}",
                 params=query_params,
@@ -197,13 +196,8 @@ class HuaweiProvider(BaseProvider):
     
     async def add_record(self, domain: str, record: Dict[str, Any]) -> str:
         """添加解析记录，返回记录ID"""
-        # 首先获取域名ID
-        zones = await self.get_domains()
-        domain_id = None
-        for zone in zones:
-            if zone["name"] == domain or zone["name"] == f"{domain}.":
-                domain_id = zone["id"]
-                break
+        # 首先获取域名ID（实例内缓存）
+        domain_id = await self._get_zone_id(domain)
         
         if not domain_id:
             raise Exception(f"未找到域名 {domain} 的zone_id")
@@ -227,7 +221,7 @@ class HuaweiProvider(BaseProvider):
         body_str = json.dumps(body)
         headers = self._sign_request("POST", uri, {}, headers, body_str)
         
-        async with httpx.AsyncClient() as client:
+        async with self._http() as client:
             response = await client.post(
                 f"{self.base_url}{uri}",
                 data=body_str,
@@ -248,13 +242,8 @@ class HuaweiProvider(BaseProvider):
     
     async def update_record(self, domain: str, record_id: str, record: Dict[str, Any]) -> bool:
         """更新解析记录"""
-        # 首先获取域名ID
-        zones = await self.get_domains()
-        domain_id = None
-        for zone in zones:
-            if zone["name"] == domain or zone["name"] == f"{domain}.":
-                domain_id = zone["id"]
-                break
+        # 首先获取域名ID（实例内缓存）
+        domain_id = await self._get_zone_id(domain)
         
         if not domain_id:
             raise Exception(f"未找到域名 {domain} 的zone_id")
@@ -278,7 +267,7 @@ class HuaweiProvider(BaseProvider):
         body_str = json.dumps(body)
         headers = self._sign_request("PUT", uri, {}, headers, body_str)
         
-        async with httpx.AsyncClient() as client:
+        async with self._http() as client:
             response = await client.put(
                 f"{self.base_url}{uri}",
                 data=body_str,
@@ -292,13 +281,8 @@ class HuaweiProvider(BaseProvider):
     
     async def delete_record(self, domain: str, record_id: str) -> bool:
         """删除解析记录"""
-        # 首先获取域名ID
-        zones = await self.get_domains()
-        domain_id = None
-        for zone in zones:
-            if zone["name"] == domain or zone["name"] == f"{domain}.":
-                domain_id = zone["id"]
-                break
+        # 首先获取域名ID（实例内缓存）
+        domain_id = await self._get_zone_id(domain)
         
         if not domain_id:
             raise Exception(f"未找到域名 {domain} 的zone_id")
@@ -311,7 +295,7 @@ class HuaweiProvider(BaseProvider):
         
         headers = self._sign_request("DELETE", uri, {}, headers)
         
-        async with httpx.AsyncClient() as client:
+        async with self._http() as client:
             response = await client.delete(
                 f"{self.base_url}{uri}",
                 headers=headers,
@@ -0,0 +1,157 @@
+"""服务商实例注册表
+
+每个服务商（Provider记录）只保留一个长期存在的实例，实例持有连接池、zone ID缓存、
+限速器与签名器，在多次调用之间复用；访问密钥、区域或类型变化时才重建实例。
+应用关闭时由 close_all 统一关闭连接。
+"""
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, Set, Tuple, Type
+
+from app.config.settings import settings
+from app.models import Provider, ProviderType
+from app.providers.aliyun import AliyunProvider
+from app.providers.base import BaseProvider
+from app.providers.cloudflare import CloudflareProvider
+from app.providers.fake import FakeProvider
+from app.providers.huawei import HuaweiProvider
+from app.providers.tencent import TencentProvider
+
+logger = logging.getLogger(__name__)
+
+# 凭据变化后旧实例延迟关闭的秒数，留给进行中的请求完成
+RETIRED_CLOSE_DELAY = 60
+
+PROVIDER_CLASSES: Dict[ProviderType, Type[BaseProvider]] = {
+    ProviderType.HUAWEI: HuaweiProvider,
+    ProviderType.ALIYUN: AliyunProvider,
+    ProviderType.TENCENT: TencentProvider,
+    ProviderType.CLOUDFLARE: CloudflareProvider,
+    ProviderType.FAKE: FakeProvider,
+}
+
+
+def create_provider_instance(
+    provider_type: int,
+    access_key: str,
+    secret_key: str,
+    region: Optional[str] = None
+) -> Optional[BaseProvider]:
+    """按类型新建一个实例（调用方负责close），不支持的类型返回None"""
+    try:
+        provider_class = PROVIDER_CLASSES.get(ProviderType(int(provider_type)))
+    except ValueError:
+        return None
+    if provider_class is None:
+        return None
+    if provider_class is FakeProvider and not settings.fake_provider_enabled:
+        return None
+    return provider_class(access_key, secret_key, region or "")
+
+
+class ProviderRegistry:
+    """按服务商ID复用服务商实例"""
+
+    def __init__(self):
+        self._instances: Dict[int, Tuple[tuple, BaseProvider]] = {}
+        # 已被替换、等待延迟关闭的旧实例 -> 关闭定时器
+        self._retired: Dict[BaseProvider, Optional[asyncio.TimerHandle]] = {}
+        self._closing: Set[asyncio.Task] = set()
+
+    @staticmethod
+    def _fingerprint(provider: Provider) -> tuple:
+        return int(provider.type), provider.access_key, provider.secret_key, provider.region or ""
+
+    def get(self, provider: Provider) -> Optional[BaseProvider]:
+        """
+        获取服务商的共享实例
+
+        Args:
+            provider: 服务商记录
+
+        Returns:
+            BaseProvider: 服务商实例，不支持的类型返回None
+        """
+        fingerprint = self._fingerprint(provider)
+        cached = self._instances.get(provider.id)
+        if cached is not None:
+            if cached[0] == fingerprint:
+                return cached[1]
+            # 凭据已变化，旧实例上可能仍有进行中的请求，稍后在后台关闭
+            logger.info(f"服务商 {provider.name} 的配置已变化，重建服务商实例")
+            self._close_later(cached[1])
+
+        instance = create_provider_instance(*fingerprint)
+        if instance is None:
+            self._instances.pop(provider.id, None)
+            return None
+        self._instances[provider.id] = (fingerprint, instance)
+        return instance
+
+    @asynccontextmanager
+    async def temporary(
+        self,
+        provider_type: int,
+        access_key: str,
+        secret_key: str,
+        region: Optional[str] = None
+    ):
+        """
+        临时实例（如保存前测试新的凭据），退出时关闭
+
+        Yields:
+            BaseProvider: 服务商实例，不支持的类型为None
+        """
+        instance = create_provider_instance(provider_type, access_key, secret_key, region)
+        try:
+            yield instance
+        finally:
+            if instance is not None:
+                await instance.close()
+
+    async def evict(self, provider_id: int):
+        """移除并关闭服务商实例（服务商被删除时调用）"""
+        cached = self._instances.pop(provider_id, None)
+        if cached is not None:
+            await cached[1].close()
+
+    async def close_all(self):
+        """关闭全部实例"""
+        instances = [instance for _, instance in self._instances.values()]
+        self._instances.clear()
+        # 等待延迟关闭的旧实例一并关闭
+        for instance, timer in self._retired.items():
+            if timer is not None:
+                timer.cancel()
+            instances.append(instance)
+        self._retired.clear()
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
+        for instance in instances:
+            try:
+                await instance.close()
+            except Exception as e:
+                logger.warning(f"关闭服务商实例失败: {e}")
+        if instances:
+            logger.info(f"已关闭 {len(instances)} 个服务商实例")
+
+    def _close_later(self, instance: BaseProvider):
+        """延迟关闭旧实例；应用先关闭时由 close_all 关闭"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._retired[instance] = None
+            return
+        self._retired[instance] = loop.call_later(RETIRED_CLOSE_DELAY, self._close_retired, instance)
+
+    def _close_retired(self, instance: BaseProvider):
+        if self._retired.pop(instance, False) is False:
+            return
+        task = asyncio.ensure_future(instance.close())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+
+# 全局服务商注册表
+provider_registry = ProviderRegistry()
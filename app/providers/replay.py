@@ -0,0 +1,140 @@
+"""服务商HTTP流量的录制与回放
+
+录制：包装真实的HTTP传输层，把每次请求与响应按行写入JSON Lines文件（录像文件）。
+回放：按请求的方法、地址与请求体从录像文件返回响应，不访问网络，
+真实服务商（签名、分页、响应解析）的代码路径可以离线压测。
+
+录像只保存请求的方法、地址与请求体，不保存请求头（签名与令牌都在请求头中），
+地址中的签名、时间戳、随机数与访问密钥参数去掉后再保存与匹配。
+"""
+import asyncio
+import base64
+import json
+import threading
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Any, Deque, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+import httpx
+
+# 每次请求都会变化或含有凭据的查询参数（阿里云签名参数等）
+VOLATILE_PARAMS = frozenset({
+    "Signature", "SignatureNonce", "Timestamp", "AccessKeyId",
+})
+
+# 响应体已解码保存，这些响应头不再适用
+_DROPPED_HEADERS = frozenset({"content-encoding", "content-length", "transfer-encoding"})
+
+ExchangeKey = Tuple[str, str, str]
+
+
+class ReplayMissError(httpx.TransportError):
+    """录像中没有与请求匹配的响应"""
+    pass
+
+
+def _request_key(method: str, url: httpx.URL, body: bytes) -> ExchangeKey:
+    params = sorted(
+        (key, value) for key, value in parse_qsl(url.query.decode(), keep_blank_values=True)
+        if key not in VOLATILE_PARAMS
+    )
+    address = f"{url.scheme}://{url.host}{url.path}"
+    if params:
+        address = f"{address}?{urlencode(params)}"
+    return method.upper(), address, body.decode("utf-8", "replace")
+
+
+def _encode_body(body: bytes) -> Dict[str, str]:
+    try:
+        return {"body": body.decode("utf-8")}
+    except UnicodeDecodeError:
+        return {"body_base64": base64.b64encode(body).decode()}
+
+
+def _decode_body(entry: Dict[str, Any]) -> bytes:
+    if "body_base64" in entry:
+        return base64.b64decode(entry["body_base64"])
+    return entry.get("body", "").encode("utf-8")
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """录制：转发到真实传输层，并把请求与响应追加到录像文件"""
+
+    def __init__(self, path: str, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.transport = transport or httpx.AsyncHTTPTransport()
+        self._lock = threading.Lock()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        request_body = await request.aread()
+        response = await self.transport.handle_async_request(request)
+        # aread按Content-Encoding解码，保存的是解码后的响应体
+        decoded = await response.aread()
+        await response.aclose()
+        headers = {
+            key: value for key, value in response.headers.items()
+            if key.lower() not in _DROPPED_HEADERS
+        }
+
+        method, url, body = _request_key(request.method, request.url, request_body)
+        entry = {
+            "method": method,
+            "url": url,
+            "request_body": body,
+            "status": response.status_code,
+            "headers": headers,
+            **_encode_body(decoded),
+        }
+        with self._lock:
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+        return httpx.Response(response.status_code, headers=headers, content=decoded, request=request)
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """
+    回放：从录像文件返回与请求匹配的响应
+
+    同一请求录制了多次时按录制顺序依次返回，用完后重复返回最后一次的响应
+    （轮询类请求可以无限次回放）。
+    """
+
+    def __init__(self, path: str, latency: float = 0.0):
+        self.path = Path(path)
+        self.latency = latency
+        self._exchanges: Dict[ExchangeKey, Deque[Dict[str, Any]]] = defaultdict(deque)
+        with self.path.open("r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    key = (entry["method"], entry["url"], entry.get("request_body", ""))
+                    self._exchanges[key].append(entry)
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._exchanges.values())
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        key = _request_key(request.method, request.url, await request.aread())
+        entries = self._exchanges.get(key)
+        if not entries:
+            raise ReplayMissError(f"录像中没有匹配的请求: {key[0]} {key[1]}", request=request)
+        entry = entries.popleft() if len(entries) > 1 else entries[0]
+        if self.latency > 0:
+            await asyncio.sleep(self.latency)
+        return httpx.Response(
+            entry["status"],
+            headers=entry.get("headers") or {},
+            content=_decode_body(entry),
+            request=request,
+        )
+
+
+def cassette_path(directory: str, provider_class: type) -> str:
+    """服务商类对应的录像文件，如 recordings/AliyunProvider.jsonl"""
+    return str(Path(directory) / f"{provider_class.__name__}.jsonl")
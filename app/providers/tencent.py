@@ -1,5 +1,4 @@
 """腾讯云DNS服务商集成"""
-import httpx
 import hashlib
 import hmac
 import base64
@@ -13,6 +12,10 @@ from .base import BaseProvider
 class TencentProvider(BaseProvider):
     """腾讯云DNS服务商"""
     
+    # 免费套餐最小TTL为600秒
+    MIN_TTL = 600
+    MAX_TTL = 604800
+    
     def __init__(self, access_key: str, secret_key: str, region: str = ""):
         super().__init__(access_key, secret_key, region)
         # 腾讯云DNS使用DNSPod API
@@ -71,7 +74,7 @@ class TencentProvider(BaseProvider):
         
         headers = self._sign_request("DescribeDomainList", params)
         
-        async with httpx.AsyncClient() as client:
+        async with self._http() as client:
             response = await client.post(
                 self.base_url,
                 json=params,
@@ -106,7 +109,7 @@ class TencentProvider(BaseProvider):
         
         headers = self._sign_request("DescribeRecordList", params)
         
-        async with httpx.AsyncClient() as client:
+        async with self._http() as client:
             response = await client.post(
                 self.base_url,
                 json=params,
@@ -170,7 +173,7 @@ class TencentProvider(BaseProvider):
         
         headers = self._sign_request("CreateRecord", params)
         
-        async with httpx.AsyncClient() as client:
+        async with self._http() as client:
             response = await client.post(
                 self.base_url,
                 json=params,
@@ -216,7 +219,7 @@ class TencentProvider(BaseProvider):
         
         headers = self._sign_request("ModifyRecord", params)
         
-        async with httpx.AsyncClient() as client:
+        async with self._http() as client:
             response = await client.post(
                 self.base_url,
                 json=params,
@@ -241,7 +244,7 @@ class TencentProvider(BaseProvider):
         
         headers = self._sign_request("DeleteRecord", params)
         
-        async with httpx.AsyncClient() as client:
+        async with self._http() as client:
             response = await client.post(
                 self.base_url,
                 json=params,
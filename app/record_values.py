@@ -0,0 +1,30 @@
+"""解析记录值的规范化，用于按记录值反查引用它的记录"""
+import ipaddress
+from typing import Optional
+
+# 记录类型编号与 app.models.RecordType 一致（此模块不依赖模型，供模型保存时调用）
+ADDRESS_TYPES = (1, 2)      # A、AAAA
+TXT_TYPE = 5
+
+
+def normalize_record_value(record_type: int, value: Optional[str]) -> Optional[str]:
+    """
+    规范化记录值
+
+    - A / AAAA：按IP地址规范写法（IPv6压缩、小写）
+    - TXT：去掉首尾引号，其余保持原样
+    - CNAME / MX / NS：主机名不区分大小写，去掉末尾的点
+    """
+    if value is None:
+        return None
+    value = value.strip()
+    record_type = int(record_type)
+
+    if record_type in ADDRESS_TYPES:
+        try:
+            return ipaddress.ip_address(value).compressed
+        except ValueError:
+            return value.lower()
+    if record_type == TXT_TYPE:
+        return value.strip('"')
+    return value.lower().rstrip('.')
@@ -1,6 +1,6 @@
 """Pydantic模型定义"""
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
 from app.models import ProviderType, RecordType, CertificateType, CertificateStatus
 
@@ -64,6 +64,22 @@ class DomainResponse(DomainBase):
         from_attributes = True
 
 
+class DomainSummaryResponse(BaseModel):
+    """域名记录汇总响应模型"""
+    record_count: int = 0
+    type_counts: Dict[str, int] = {}
+    last_synced_at: Optional[datetime] = None
+    last_changed_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class DomainListResponse(DomainResponse):
+    """域名列表响应模型（附带记录汇总）"""
+    summary: Optional[DomainSummaryResponse] = None
+
+
 class DNSRecordBase(BaseModel):
     """DNS记录基础模型"""
     name: str = Field(..., description="记录名称")
@@ -89,6 +105,14 @@ class DNSRecordUpdate(BaseModel):
     enabled: Optional[bool] = None
 
 
+class RecordRepointRequest(BaseModel):
+    """批量修改记录值请求模型"""
+    old_value: str = Field(..., description="原记录值，如下线的IP或CNAME目标")
+    new_value: str = Field(..., description="新记录值")
+    type: Optional[RecordType] = Field(None, description="仅修改指定类型的记录")
+    dry_run: bool = Field(False, description="只列出将被修改的记录，不实际修改")
+
+
 class DNSRecordResponse(DNSRecordBase):
     """DNS记录响应模型"""
     id: int
@@ -100,6 +124,21 @@ class DNSRecordResponse(DNSRecordBase):
         from_attributes = True
 
 
+class RecordSearchResult(DNSRecordResponse):
+    """记录搜索结果模型"""
+    domain_name: str
+    full_name: str
+
+
+class RecordSearchResponse(BaseModel):
+    """记录搜索响应模型"""
+    query: str
+    field: str
+    count: int
+    took_ms: float
+    records: List[RecordSearchResult]
+
+
 class TaskLogResponse(BaseModel):
     """任务日志响应模型"""
     id: int
@@ -134,9 +173,6 @@ class CertificateBase(BaseModel):
     domain_id: int = Field(..., description="所属域名ID")
     type: CertificateType = Field(..., description="证书类型")
     status: CertificateStatus = Field(CertificateStatus.PENDING, description="证书状态")
-    certificate_file: Optional[str] = Field(None, description="证书文件内容")
-    private_key_file: Optional[str] = Field(None, description="私钥文件内容")
-    ca_bundle_file: Optional[str] = Field(None, description="CA证书链文件内容")
     issuer: Optional[str] = Field(None, description="颁发机构")
     subject: Optional[str] = Field(None, description="证书主题")
     serial_number: Optional[str] = Field(None, description="序列号")
@@ -148,7 +184,9 @@ class CertificateBase(BaseModel):
 
 class CertificateCreate(CertificateBase):
     """创建证书模型"""
-    pass
+    certificate_file: Optional[str] = Field(None, description="证书文件内容")
+    private_key_file: Optional[str] = Field(None, description="私钥文件内容")
+    ca_bundle_file: Optional[str] = Field(None, description="CA证书链文件内容")
 
 
 class CertificateUpdate(BaseModel):
@@ -166,6 +204,9 @@ class CertificateResponse(CertificateBase):
     """证书响应模型"""
     id: int
     domain: DomainResponse
+    certificate_hash: Optional[str] = None
+    ca_bundle_hash: Optional[str] = None
+    lineage: Optional[str] = None
     last_renewed_at: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
@@ -287,6 +328,56 @@ class DDNSUpdateResponse(BaseModel):
     updated_at: Optional[datetime] = None
 
 
+class ZoneMigrationRequest(BaseModel):
+    """区域迁移请求模型"""
+    source_provider_id: int = Field(..., description="源服务商ID")
+    source_zone: str = Field(..., description="源区域（域名）")
+    target_provider_id: int = Field(..., description="目标服务商ID")
+    target_zone: Optional[str] = Field(None, description="目标区域（默认与源区域相同）")
+    delete_extra: bool = Field(False, description="是否删除目标区域中源区域没有的记录")
+    dry_run: bool = Field(False, description="只返回迁移计划，不写入")
+    verify: bool = Field(False, description="写入后向权威DNS校验")
+    nameservers: Optional[List[str]] = Field(None, description="校验使用的权威DNS地址（默认查询NS记录）")
+
+
+class ZoneMirrorBase(BaseModel):
+    """区域镜像基础模型"""
+    name: str = Field(..., description="镜像名称")
+    source_provider_id: int = Field(..., description="源服务商ID")
+    source_zone: str = Field(..., description="源区域（域名）")
+    target_provider_id: int = Field(..., description="目标服务商ID")
+    target_zone: str = Field(..., description="目标区域（域名）")
+    interval: int = Field(300, ge=60, description="同步间隔(秒)")
+    delete_extra: bool = Field(False, description="是否删除目标区域中源区域没有的记录")
+    enabled: bool = Field(True, description="是否启用")
+
+
+class ZoneMirrorCreate(ZoneMirrorBase):
+    """创建区域镜像模型"""
+    pass
+
+
+class ZoneMirrorUpdate(BaseModel):
+    """更新区域镜像模型"""
+    name: Optional[str] = None
+    interval: Optional[int] = Field(None, ge=60)
+    delete_extra: Optional[bool] = None
+    enabled: Optional[bool] = None
+
+
+class ZoneMirrorResponse(ZoneMirrorBase):
+    """区域镜像响应模型"""
+    id: int
+    last_run_at: Optional[datetime] = None
+    last_status: Optional[str] = None
+    last_message: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
 class DashboardStats(BaseModel):
     """首页统计模型"""
     total_providers: int = Field(..., description="总服务商数")
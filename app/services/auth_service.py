@@ -0,0 +1,157 @@
+"""令牌校验缓存与内存用户表
+
+已验证的JWT按令牌缓存到过期为止（LRU，有上限），用户表整体缓存在内存中并定期重新加载，
+已认证请求不再访问数据库。令牌中带有签发时的用户令牌版本（ver），登出或修改密码时
+版本加一，旧令牌随即失效；其他工作进程在下次重新加载用户表后生效。
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from jose import JWTError, jwt
+from tortoise.expressions import F
+
+from app.config.settings import settings
+from app.models import User
+
+logger = logging.getLogger(__name__)
+
+JWT_ALGORITHM = "HS256"
+
+# 令牌中的版本声明
+VERSION_CLAIM = "ver"
+
+
+class InvalidTokenError(Exception):
+    """令牌无效、过期或已被吊销"""
+    pass
+
+
+@dataclass(frozen=True)
+class VerifiedToken:
+    """已通过签名与过期校验的令牌"""
+    username: str
+    version: int
+    expires_at: float
+
+
+class AuthService:
+    """令牌校验与用户状态"""
+
+    def __init__(self, secret_key: str, cache_size: int = 1024, refresh_interval: int = 30):
+        self.secret_key = secret_key
+        self.cache_size = cache_size
+        self.refresh_interval = refresh_interval
+        self._tokens: "OrderedDict[str, VerifiedToken]" = OrderedDict()
+        self._users: Dict[str, User] = {}
+        self._users_loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # ---------- 令牌 ----------
+
+    def _verify(self, token: str) -> VerifiedToken:
+        cached = self._tokens.get(token)
+        if cached is not None:
+            if cached.expires_at > time.time():
+                self._tokens.move_to_end(token)
+                self.hits += 1
+                return cached
+            del self._tokens[token]
+
+        self.misses += 1
+        try:
+            payload = jwt.decode(token, self.secret_key, algorithms=[JWT_ALGORITHM])
+        except JWTError as e:
+            raise InvalidTokenError(str(e)) from e
+        username = payload.get("sub")
+        if username is None:
+            raise InvalidTokenError("令牌缺少用户名")
+
+        verified = VerifiedToken(
+            username=username,
+            # 引入版本声明之前签发的令牌视为版本0
+            version=int(payload.get(VERSION_CLAIM, 0)),
+            expires_at=float(payload.get("exp", 0)),
+        )
+        self._tokens[token] = verified
+        if len(self._tokens) > self.cache_size:
+            self._tokens.popitem(last=False)
+        return verified
+
+    async def authenticate(self, token: str) -> User:
+        """
+        校验令牌并返回对应用户（内存中的共享对象）
+
+        Raises:
+            InvalidTokenError: 令牌无效、用户不存在或已禁用、令牌版本已过期
+        """
+        verified = self._verify(token)
+        user = await self.get_user(verified.username)
+        if user is None or not user.is_active:
+            raise InvalidTokenError("用户不存在或已禁用")
+        if verified.version != user.token_version:
+            raise InvalidTokenError("令牌已失效")
+        return user
+
+    # ---------- 用户表 ----------
+
+    async def get_user(self, username: str) -> Optional[User]:
+        """从内存用户表读取用户，超过刷新间隔时重新加载整张表"""
+        loaded_at = self._users_loaded_at
+        if loaded_at is None or time.monotonic() - loaded_at >= self.refresh_interval:
+            async with self._lock:
+                if self._users_loaded_at is loaded_at:
+                    await self.reload_users()
+
+        user = self._users.get(username)
+        if user is None:
+            # 上次加载之后新建的用户
+            user = await User.get_or_none(username=username)
+            if user is not None:
+                self._users[username] = user
+        return user
+
+    async def reload_users(self):
+        """重新加载用户表"""
+        users = await User.all()
+        self._users = {user.username: user for user in users}
+        self._users_loaded_at = time.monotonic()
+
+    async def revoke_tokens(self, user: User):
+        """令牌版本加一，使该用户已签发的令牌全部失效"""
+        await User.filter(id=user.id).update(token_version=F('token_version') + 1)
+        await user.refresh_from_db(fields=['token_version'])
+        self._users[user.username] = user
+        self._forget(user.username)
+
+    async def set_password(self, user: User, password_hash: str):
+        """修改密码并吊销已签发的令牌"""
+        user.password_hash = password_hash
+        await user.save(update_fields=['password_hash', 'updated_at'])
+        await self.revoke_tokens(user)
+
+    def _forget(self, username: str):
+        for token in [token for token, verified in self._tokens.items() if verified.username == username]:
+            del self._tokens[token]
+
+    def info(self):
+        """缓存状态与命中统计"""
+        return {
+            "tokens": len(self._tokens),
+            "users": len(self._users),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# 全局认证服务实例
+auth_service = AuthService(
+    settings.jwt_secret_key,
+    cache_size=settings.auth_token_cache_size,
+    refresh_interval=settings.auth_user_refresh_interval
+)
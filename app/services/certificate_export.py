@@ -0,0 +1,179 @@
+"""证书导出
+
+从证书存储读取证书、私钥与证书链，按请求的格式导出：
+ZIP压缩包（边生成边输出，不落盘也不在内存中组装整个压缩包）、
+完整证书链PEM，以及PKCS#12（PFX）。
+"""
+import re
+import zipfile
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from cryptography import x509
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.serialization import pkcs12
+
+from app.models import Certificate
+from app.services.certificate_store import CertificateStoreError, certificate_store
+
+# 支持的导出格式
+EXPORT_ZIP = "zip"
+EXPORT_FULLCHAIN = "fullchain"
+EXPORT_PFX = "pfx"
+EXPORT_FORMATS = (EXPORT_ZIP, EXPORT_FULLCHAIN, EXPORT_PFX)
+
+_PEM_CERTIFICATE = re.compile(rb"-----BEGIN CERTIFICATE-----.+?-----END CERTIFICATE-----\s*", re.S)
+
+
+class CertificateExportError(Exception):
+    """证书无法按请求的格式导出"""
+    pass
+
+
+@dataclass
+class CertificateExport:
+    """导出结果：分块输出的内容与下载信息"""
+    chunks: Iterator[bytes]
+    media_type: str
+    filename: str
+
+
+class _ZipSink:
+    """ZipFile写入的目标，写入的数据暂存到下次取走为止"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_zip(entries: Iterable[Tuple[str, Iterable[bytes]]]) -> Iterator[bytes]:
+    """
+    流式生成ZIP
+
+    目标不可seek时zipfile改用数据描述符记录大小与校验和，
+    每写入一块就把已生成的字节交给调用方，内存中只保留当前块。
+
+    Args:
+        entries: (文件名, 内容分块) 序列
+    """
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED) as zipf:
+        for name, chunks in entries:
+            with zipf.open(name, "w") as entry:
+                for chunk in chunks:
+                    entry.write(chunk)
+                    data = sink.drain()
+                    if data:
+                        yield data
+            data = sink.drain()
+            if data:
+                yield data
+    yield sink.drain()
+
+
+def _split_pem_certificates(pem: bytes) -> List[bytes]:
+    return [match.group(0).strip() + b"\n" for match in _PEM_CERTIFICATE.finditer(pem)]
+
+
+def fullchain_pem(certificate: Certificate) -> bytes:
+    """
+    完整证书链PEM（服务器证书在前，中间证书在后）
+
+    certbot签发的证书文件本身就是fullchain；只含服务器证书的旧数据补上证书链。
+    """
+    leaf_and_chain = _split_pem_certificates(certificate_store.get(certificate.certificate_hash))
+    if not leaf_and_chain:
+        raise CertificateExportError("证书文件格式无效")
+    if certificate.ca_bundle_hash:
+        for pem in _split_pem_certificates(certificate_store.get(certificate.ca_bundle_hash)):
+            if pem not in leaf_and_chain:
+                leaf_and_chain.append(pem)
+    return b"".join(leaf_and_chain)
+
+
+def pkcs12_bundle(certificate: Certificate, password: Optional[str] = None) -> bytes:
+    """PKCS#12（PFX）：私钥、服务器证书与中间证书，提供密码时加密"""
+    if not certificate.private_key_hash:
+        raise CertificateExportError("证书缺少私钥，无法导出PFX")
+    try:
+        certificates = x509.load_pem_x509_certificates(fullchain_pem(certificate))
+        private_key = serialization.load_pem_private_key(
+            certificate_store.get(certificate.private_key_hash), password=None
+        )
+    except ValueError as e:
+        raise CertificateExportError(f"证书或私钥格式无效: {e}") from e
+
+    encryption = (
+        serialization.BestAvailableEncryption(password.encode())
+        if password else serialization.NoEncryption()
+    )
+    return pkcs12.serialize_key_and_certificates(
+        name=(certificate.lineage or certificate.name or "").encode() or None,
+        key=private_key,
+        cert=certificates[0],
+        cas=certificates[1:] or None,
+        encryption_algorithm=encryption,
+    )
+
+
+def export_certificate(
+    certificate: Certificate,
+    export_format: str = EXPORT_ZIP,
+    password: Optional[str] = None
+) -> CertificateExport:
+    """
+    按格式导出证书（需已导入证书存储）
+
+    Args:
+        certificate: 证书
+        export_format: zip、fullchain 或 pfx
+        password: PFX的保护密码（可选）
+
+    Raises:
+        CertificateExportError: 格式不支持或证书内容无效
+        CertificateStoreError: 证书存储对象缺失或无法解密
+    """
+    base_name = safe_file_name(certificate.name or certificate.domain.name)
+
+    if export_format == EXPORT_ZIP:
+        # ZIP边读边输出，开始输出后无法再返回错误，先确认对象都在
+        for digest in (certificate.certificate_hash, certificate.private_key_hash, certificate.ca_bundle_hash):
+            if digest and not certificate_store.exists(digest):
+                raise CertificateStoreError(f"证书存储对象不存在: {digest}")
+        entries = [
+            (f"{base_name}.crt", certificate_store.iter_chunks(certificate.certificate_hash)),
+            (f"{base_name}.key", certificate_store.iter_chunks(certificate.private_key_hash)),
+        ]
+        # 如果有证书链文件，也添加进去
+        if certificate.ca_bundle_hash:
+            entries.append((f"{base_name}.chain.pem", certificate_store.iter_chunks(certificate.ca_bundle_hash)))
+        return CertificateExport(iter_zip(entries), "application/zip", f"{base_name}_certificate.zip")
+
+    if export_format == EXPORT_FULLCHAIN:
+        return CertificateExport(
+            iter([fullchain_pem(certificate)]), "application/x-pem-file", f"{base_name}_fullchain.pem"
+        )
+
+    if export_format == EXPORT_PFX:
+        return CertificateExport(
+            iter([pkcs12_bundle(certificate, password)]), "application/x-pkcs12", f"{base_name}.pfx"
+        )
+
+    raise CertificateExportError(f"不支持的导出格式: {export_format}")
+
+
+def safe_file_name(name: str) -> str:
+    """下载文件名：移除特殊字符和中文字符"""
+    name = name.replace("SSL证书", "ssl_cert").replace(" ", "_")
+    return re.sub(r'[^\w\-.]', '_', name, flags=re.ASCII)
@@ -0,0 +1,208 @@
+"""证书签发任务队列服务"""
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from app.config.certificate_config import get_certificate_config
+from app.db_dialect import is_sqlite
+from app.models import Certificate, CertificateJob, CertificateStatus, CertificateType, Domain
+
+logger = logging.getLogger(__name__)
+
+# 任务状态
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_FINISHED_STATUSES = (JOB_SUCCEEDED, JOB_FAILED)
+
+# 签发阶段（按先后顺序）
+JOB_STAGES = ("queued", "started", "challenge_placed", "propagated", "validated", "issued", "failed")
+
+
+async def update_job_stage(job_id: Optional[str], stage: str, message: str = ""):
+    """
+    更新任务阶段
+
+    供证书服务与certbot钩子脚本（独立进程，通过环境变量CERT_JOB_ID获得任务ID）调用。
+    """
+    if not job_id:
+        return
+    try:
+        await CertificateJob.filter(id=job_id).update(
+            stage=stage, message=message, updated_at=datetime.now(timezone.utc)
+        )
+    except Exception as e:
+        # 进度上报失败不影响签发本身
+        logger.warning(f"更新签发任务 {job_id} 阶段失败: {str(e)}")
+
+
+class CertificateJobService:
+    """证书签发任务队列服务"""
+
+    def __init__(self):
+        self.config = get_certificate_config()
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._certificate_service = None
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    async def start(self):
+        """启动工作协程，并重新排队上次未完成的任务"""
+        if self.running:
+            return
+
+        self._queue = asyncio.Queue()
+
+        # 进程退出时仍在执行的任务视为中断，重新排队。
+        # 共享数据库（多副本）时其他副本可能正在执行，只回收超过最长执行时间的任务
+        running = CertificateJob.filter(status=JOB_RUNNING)
+        if not is_sqlite():
+            deadline = datetime.now(timezone.utc) - timedelta(seconds=self.config.job_timeout)
+            running = running.filter(started_at__lt=deadline)
+        interrupted = await running.update(
+            status=JOB_QUEUED, stage="queued", message="服务重启，任务重新排队"
+        )
+        pending = await CertificateJob.filter(status=JOB_QUEUED).order_by('created_at').values_list('id', flat=True)
+        for job_id in pending:
+            self._queue.put_nowait(job_id)
+
+        concurrency = max(1, self.config.job_concurrency)
+        self._workers = [
+            asyncio.create_task(self._worker(index), name=f"certificate-job-worker-{index}")
+            for index in range(concurrency)
+        ]
+        logger.info(
+            f"证书签发任务队列已启动: 并发数 {concurrency}，"
+            f"重新排队 {len(pending)} 个任务（其中 {interrupted} 个被中断）"
+        )
+
+    async def stop(self):
+        """停止工作协程，执行中的任务下次启动时重新排队"""
+        for worker in self._workers:
+            worker.cancel()
+        if self._workers:
+            await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+        logger.info("证书签发任务队列已停止")
+
+    async def submit_request(
+        self,
+        domain: Domain,
+        full_domain: str,
+        name: Optional[str] = None,
+        auto_renew: bool = True
+    ) -> CertificateJob:
+        """
+        提交证书申请任务
+
+        证书记录在提交时即以PENDING状态创建，任务重跑时复用同一条记录。
+        """
+        certificate = await Certificate.create(
+            domain=domain,
+            name=name or f"{full_domain} SSL证书",
+            type=CertificateType.LETSENCRYPT,
+            status=CertificateStatus.PENDING,
+            auto_renew=auto_renew
+        )
+        job = await CertificateJob.create(
+            domain=domain,
+            certificate=certificate,
+            kind="request",
+            full_domain=full_domain,
+            message="任务已排队"
+        )
+        self._enqueue(job)
+        return job
+
+    async def submit_renewal(self, certificate: Certificate, force: bool = False) -> CertificateJob:
+        """提交证书续期任务"""
+        from app.services.certificate_service import certificate_lineage_name
+
+        await certificate.fetch_related('domain')
+        job = await CertificateJob.create(
+            domain_id=certificate.domain_id,
+            certificate=certificate,
+            kind="renew",
+            full_domain=certificate_lineage_name(certificate),
+            force=force,
+            message="任务已排队"
+        )
+        self._enqueue(job)
+        return job
+
+    def _get_certificate_service(self):
+        """延迟创建证书服务，未安装certbot时不影响任务的提交与查询"""
+        if self._certificate_service is None:
+            from app.services.certificate_service import CertificateService
+            self._certificate_service = CertificateService()
+        return self._certificate_service
+
+    def _enqueue(self, job: CertificateJob):
+        """放入内存队列；队列未启动时任务留在数据库中，启动后自动排队"""
+        if self._queue is not None:
+            self._queue.put_nowait(job.id)
+        else:
+            logger.warning(f"证书签发任务队列未启动，任务 {job.id} 将在启动后执行")
+
+    async def _worker(self, index: int):
+        """工作协程：逐个执行队列中的任务"""
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"证书签发任务 {job_id} 执行异常: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str):
+        """执行单个任务"""
+        # 原子地认领任务，避免重复执行
+        claimed = await CertificateJob.filter(id=job_id, status=JOB_QUEUED).update(
+            status=JOB_RUNNING, stage="started", message="开始签发", started_at=datetime.now(timezone.utc)
+        )
+        if not claimed:
+            return
+
+        job = await CertificateJob.get(id=job_id)
+        logger.info(f"开始执行证书签发任务: {job.id} ({job.kind} {job.full_domain})")
+
+        try:
+            certificate_service = self._get_certificate_service()
+            if job.kind == "renew":
+                coro = certificate_service.renew_certificate(job.certificate_id, force=job.force, job_id=job.id)
+            else:
+                coro = certificate_service.request_certificate(
+                    job.domain_id,
+                    full_domain=job.full_domain,
+                    certificate_id=job.certificate_id,
+                    job_id=job.id
+                )
+            result = await asyncio.wait_for(coro, timeout=self.config.job_timeout)
+        except asyncio.TimeoutError:
+            result = {'success': False, 'message': f"任务执行超时（{self.config.job_timeout}秒）"}
+        except Exception as e:
+            result = {'success': False, 'message': f"任务执行异常: {str(e)}"}
+
+        if result['success']:
+            await CertificateJob.filter(id=job.id).update(
+                status=JOB_SUCCEEDED, stage="issued", message=result['message'], finished_at=datetime.now(timezone.utc)
+            )
+            logger.info(f"证书签发任务完成: {job.id}")
+        else:
+            await CertificateJob.filter(id=job.id).update(
+                status=JOB_FAILED, stage="failed", message=result['message'], finished_at=datetime.now(timezone.utc)
+            )
+            logger.error(f"证书签发任务失败: {job.id} - {result['message']}")
+
+
+# 全局证书签发任务服务实例
+certificate_job_service = CertificateJobService()
@@ -0,0 +1,183 @@
+"""X.509证书解析服务"""
+import logging
+import re
+from collections import OrderedDict
+from datetime import timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import dsa, ec, ed448, ed25519, rsa
+from cryptography.x509.oid import AuthorityInformationAccessOID, ExtensionOID, NameOID
+
+logger = logging.getLogger(__name__)
+
+# 解析结果缓存上限（按证书SHA256指纹缓存）
+_CACHE_MAX_SIZE = 256
+_parse_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+
+class CertificateParseError(Exception):
+    """证书解析失败"""
+    pass
+
+
+def _to_utc(cert: x509.Certificate, attr: str):
+    """读取证书时间字段并统一为UTC时区"""
+    value = getattr(cert, f"{attr}_utc", None)
+    if value is None:
+        # cryptography < 42 只提供naive的UTC时间
+        value = getattr(cert, attr).replace(tzinfo=timezone.utc)
+    return value
+
+
+def _common_name(name: x509.Name) -> Optional[str]:
+    """提取CN字段"""
+    attributes = name.get_attributes_for_oid(NameOID.COMMON_NAME)
+    return attributes[0].value if attributes else None
+
+
+def _public_key_info(cert: x509.Certificate) -> Dict[str, Any]:
+    """提取公钥类型与长度"""
+    key = cert.public_key()
+    if isinstance(key, rsa.RSAPublicKey):
+        return {'key_type': 'RSA', 'key_size': key.key_size}
+    if isinstance(key, ec.EllipticCurvePublicKey):
+        return {'key_type': f'EC-{key.curve.name}', 'key_size': key.key_size}
+    if isinstance(key, ed25519.Ed25519PublicKey):
+        return {'key_type': 'Ed25519', 'key_size': 256}
+    if isinstance(key, ed448.Ed448PublicKey):
+        return {'key_type': 'Ed448', 'key_size': 456}
+    if isinstance(key, dsa.DSAPublicKey):
+        return {'key_type': 'DSA', 'key_size': key.key_size}
+    return {'key_type': type(key).__name__, 'key_size': None}
+
+
+def _extension_value(cert: x509.Certificate, oid):
+    """读取扩展，不存在时返回None"""
+    try:
+        return cert.extensions.get_extension_for_oid(oid).value
+    except x509.ExtensionNotFound:
+        return None
+
+
+def _subject_alt_names(cert: x509.Certificate) -> List[str]:
+    """提取SAN列表（DNS名称与IP地址）"""
+    san = _extension_value(cert, ExtensionOID.SUBJECT_ALTERNATIVE_NAME)
+    if san is None:
+        return []
+    names = list(san.get_values_for_type(x509.DNSName))
+    names.extend(str(ip) for ip in san.get_values_for_type(x509.IPAddress))
+    return names
+
+
+def _ocsp_urls(cert: x509.Certificate) -> List[str]:
+    """提取OCSP地址"""
+    aia = _extension_value(cert, ExtensionOID.AUTHORITY_INFORMATION_ACCESS)
+    if aia is None:
+        return []
+    return [
+        desc.access_location.value
+        for desc in aia
+        if desc.access_method == AuthorityInformationAccessOID.OCSP
+        and isinstance(desc.access_location, x509.UniformResourceIdentifier)
+    ]
+
+
+def _crl_urls(cert: x509.Certificate) -> List[str]:
+    """提取CRL分发地址"""
+    crl = _extension_value(cert, ExtensionOID.CRL_DISTRIBUTION_POINTS)
+    if crl is None:
+        return []
+    urls = []
+    for point in crl:
+        for name in point.full_name or []:
+            if isinstance(name, x509.UniformResourceIdentifier):
+                urls.append(name.value)
+    return urls
+
+
+def _describe(cert: x509.Certificate) -> Dict[str, Any]:
+    """提取单张证书的字段"""
+    info = {
+        'subject': cert.subject.rfc4514_string(),
+        'issuer': cert.issuer.rfc4514_string(),
+        'common_name': _common_name(cert.subject),
+        'issuer_common_name': _common_name(cert.issuer),
+        'serial_number': format(cert.serial_number, 'X'),
+        'not_before': _to_utc(cert, 'not_valid_before'),
+        'not_after': _to_utc(cert, 'not_valid_after'),
+        'sans': _subject_alt_names(cert),
+        'fingerprint_sha1': cert.fingerprint(hashes.SHA1()).hex().upper(),
+        'fingerprint_sha256': cert.fingerprint(hashes.SHA256()).hex().upper(),
+        'ocsp_urls': _ocsp_urls(cert),
+        'crl_urls': _crl_urls(cert),
+    }
+    info.update(_public_key_info(cert))
+    return info
+
+
+def parse_certificate(pem_data: Union[str, bytes]) -> Dict[str, Any]:
+    """
+    解析PEM格式证书（可包含完整证书链）
+
+    Args:
+        pem_data: PEM内容，第一张为叶子证书，其余为中间证书
+
+    Returns:
+        Dict: 叶子证书字段，chain为颁发链上各证书的摘要
+    """
+    if isinstance(pem_data, str):
+        pem_data = pem_data.encode('utf-8')
+
+    try:
+        certs = x509.load_pem_x509_certificates(pem_data)
+    except ValueError as e:
+        raise CertificateParseError(f"无法解析PEM证书: {e}") from e
+
+    leaf = certs[0]
+    fingerprint = leaf.fingerprint(hashes.SHA256()).hex().upper()
+
+    cached = _parse_cache.get(fingerprint)
+    if cached is not None:
+        _parse_cache.move_to_end(fingerprint)
+        return dict(cached)
+
+    info = _describe(leaf)
+    info['chain'] = [
+        {
+            'subject': cert.subject.rfc4514_string(),
+            'issuer': cert.issuer.rfc4514_string(),
+            'serial_number': format(cert.serial_number, 'X'),
+            'not_after': _to_utc(cert, 'not_valid_after'),
+            'fingerprint_sha256': cert.fingerprint(hashes.SHA256()).hex().upper(),
+        }
+        for cert in certs[1:]
+    ]
+
+    _parse_cache[fingerprint] = info
+    if len(_parse_cache) > _CACHE_MAX_SIZE:
+        _parse_cache.popitem(last=False)
+
+    return dict(info)
+
+
+def parse_certificate_file(path: Union[str, Path]) -> Dict[str, Any]:
+    """读取并解析证书文件"""
+    try:
+        pem_data = Path(path).read_bytes()
+    except OSError as e:
+        raise CertificateParseError(f"无法读取证书文件 {path}: {e}") from e
+    return parse_certificate(pem_data)
+
+
+def common_name_from_subject(subject: Optional[str]) -> Optional[str]:
+    """从已保存的证书主题字符串（如 CN=example.com）中提取CN"""
+    match = re.search(r'CN\s*=\s*([^,/]+)', subject or '')
+    return match.group(1).strip() if match else None
+
+
+def clear_parse_cache():
+    """清空解析缓存"""
+    _parse_cache.clear()
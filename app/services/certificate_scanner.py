@@ -0,0 +1,198 @@
+"""证书状态批量扫描服务"""
+import asyncio
+import logging
+import re
+import ssl
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from cryptography import x509
+
+from app.config.certificate_config import get_certificate_config
+from app.models import Certificate, CertificateStatus
+from app.services.dashboard_service import dashboard_service
+
+logger = logging.getLogger(__name__)
+
+_CN_PATTERN = re.compile(r'CN\s*=\s*([^,/]+)')
+
+
+def evaluate_certificate_status(
+    not_after: Optional[datetime],
+    now: Optional[datetime] = None,
+    expiring_days: int = 30
+) -> CertificateStatus:
+    """
+    根据到期时间计算证书状态
+
+    Args:
+        not_after: 证书到期时间（naive时间视为UTC）
+        now: 当前时间，默认为当前UTC时间
+        expiring_days: 即将过期的判定天数
+
+    Returns:
+        CertificateStatus: 证书状态
+    """
+    if not not_after:
+        return CertificateStatus.INVALID
+
+    now = now or datetime.now(timezone.utc)
+    if now.tzinfo is None:
+        now = now.replace(tzinfo=timezone.utc)
+    if not_after.tzinfo is None:
+        not_after = not_after.replace(tzinfo=timezone.utc)
+
+    if not_after < now:
+        return CertificateStatus.EXPIRED
+    if not_after < now + timedelta(days=expiring_days):
+        return CertificateStatus.EXPIRING_SOON
+    return CertificateStatus.VALID
+
+
+class CertificateStatusScanner:
+    """证书状态批量扫描服务"""
+
+    def __init__(self):
+        self.config = get_certificate_config()
+
+    async def scan(
+        self,
+        probe_live: bool = False,
+        probe_timeout: float = 5.0,
+        probe_concurrency: int = 20,
+        port: int = 443
+    ) -> Dict[str, Any]:
+        """
+        一次性重新评估所有证书状态
+
+        Args:
+            probe_live: 是否连接线上TLS端点核对部署的证书序列号
+            probe_timeout: 单个主机的探测超时（秒）
+            probe_concurrency: 并发探测的主机数
+            port: TLS端口
+
+        Returns:
+            Dict: 扫描报告
+        """
+        started = time.perf_counter()
+        now = datetime.now(timezone.utc)
+
+        # 只读取判定所需的列，申请中的证书不参与评估
+        rows = await Certificate.exclude(status=CertificateStatus.PENDING).values(
+            'id', 'name', 'status', 'not_after', 'serial_number', 'subject', 'domain__name'
+        )
+
+        changed: List[Certificate] = []
+        transitions: Dict[str, int] = {}
+        by_status: Dict[str, int] = {status.name: 0 for status in CertificateStatus}
+
+        for row in rows:
+            old_status = CertificateStatus(row['status'])
+            new_status = evaluate_certificate_status(
+                row['not_after'], now, self.config.auto_renewal_days
+            )
+            by_status[new_status.name] += 1
+            if new_status != old_status:
+                changed.append(Certificate(id=row['id'], status=new_status))
+                key = f"{old_status.name}->{new_status.name}"
+                transitions[key] = transitions.get(key, 0) + 1
+
+        if changed:
+            # 单条 UPDATE ... CASE 语句批量更新状态
+            await Certificate.bulk_update(changed, fields=['status'])
+            # 批量更新不触发模型信号，需手动失效首页统计
+            dashboard_service.invalidate()
+
+        report = {
+            'scanned_at': now,
+            'total': len(rows),
+            'changed': len(changed),
+            'transitions': transitions,
+            'by_status': by_status,
+        }
+
+        if probe_live:
+            report['live'] = await self._probe_all(rows, probe_timeout, probe_concurrency, port)
+
+        report['duration_ms'] = round((time.perf_counter() - started) * 1000, 2)
+        logger.info(
+            f"证书状态扫描完成: 共 {report['total']} 个证书，{report['changed']} 个状态变更，"
+            f"耗时 {report['duration_ms']}ms"
+        )
+        return report
+
+    async def _probe_all(
+        self,
+        rows: List[Dict[str, Any]],
+        timeout: float,
+        concurrency: int,
+        port: int
+    ) -> Dict[str, Any]:
+        """并发探测所有证书对应的线上端点"""
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        targets = [(row, self._certificate_host(row)) for row in rows if row['not_after']]
+
+        async def probe(host: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self._probe_host(host, port, timeout)
+
+        # 同一主机只探测一次
+        hosts = sorted({host for _, host in targets})
+        probes = dict(zip(hosts, await asyncio.gather(*(probe(host) for host in hosts))))
+
+        results = []
+        for row, host in targets:
+            result = dict(probes[host], certificate_id=row['id'], host=host)
+            if result['reachable']:
+                stored = (row['serial_number'] or '').replace(':', '').upper().lstrip('0')
+                result['matched'] = bool(stored) and result['serial_number'].lstrip('0') == stored
+            results.append(result)
+
+        return {
+            'checked': len(results),
+            'matched': sum(1 for r in results if r.get('matched')),
+            'mismatched': sum(1 for r in results if r['reachable'] and not r.get('matched')),
+            'unreachable': sum(1 for r in results if not r['reachable']),
+            'results': results,
+        }
+
+    async def _probe_host(self, host: str, port: int, timeout: float) -> Dict[str, Any]:
+        """连接TLS端点并读取对端证书序列号，超时即放弃"""
+        context = ssl.create_default_context()
+        # 只比对序列号，不要求证书链可信
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+
+        started = time.perf_counter()
+        writer = None
+        try:
+            _, writer = await asyncio.wait_for(
+                asyncio.open_connection(host, port, ssl=context, server_hostname=host),
+                timeout=timeout
+            )
+            der = writer.get_extra_info('ssl_object').getpeercert(binary_form=True)
+            cert = x509.load_der_x509_certificate(der)
+            return {
+                'reachable': True,
+                'serial_number': format(cert.serial_number, 'X'),
+                'latency_ms': round((time.perf_counter() - started) * 1000, 2),
+            }
+        except asyncio.TimeoutError:
+            return {'reachable': False, 'error': f"连接超时（{timeout}秒）"}
+        except Exception as e:
+            return {'reachable': False, 'error': str(e)}
+        finally:
+            if writer is not None:
+                writer.close()
+
+    def _certificate_host(self, row: Dict[str, Any]) -> str:
+        """从证书主题中取出主机名，缺失时使用所属域名"""
+        match = _CN_PATTERN.search(row.get('subject') or '')
+        if match:
+            return match.group(1).strip().lstrip('*.')
+        return row['domain__name']
+
+
+# 全局证书扫描服务实例
+certificate_scanner = CertificateStatusScanner()
@@ -1,23 +1,32 @@
 """证书管理服务"""
 import asyncio
-import subprocess
-import tempfile
 import os
 import sys
 import logging
 from typing import Dict, List, Optional, Tuple
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
 from app.models import Certificate, Domain, CertificateType, CertificateStatus, DNSRecord, RecordType
-from app.providers.base import BaseProvider
-from app.providers.huawei import HuaweiProvider
-from app.providers.aliyun import AliyunProvider
+from app.providers.base import BaseProvider, get_provider_instance
 from app.config.certificate_config import get_certificate_config
+from app.services.certificate_parser import CertificateParseError, common_name_from_subject, parse_certificate_file
+from app.services.certificate_store import certificate_store
+from app.services.entity_cache import entity_cache
+from app.services.certificate_job_service import update_job_stage
 
 logger = logging.getLogger(__name__)
 
 
+def certificate_lineage_name(certificate: Certificate) -> str:
+    """
+    certbot证书名（live目录名）
+    
+    优先使用签发时保存的证书名；没有保存时取证书主题中的CN，都缺失时使用所属域名（需已加载domain）
+    """
+    return certificate.lineage or common_name_from_subject(certificate.subject) or certificate.domain.name
+
+
 class CertificateService:
     """证书管理服务"""
     
@@ -48,7 +57,16 @@ class CertificateService:
         raise RuntimeError("未找到certbot可执行文件，请确保已正确安装certbot")
     
     
-    async def request_certificate(self, domain_id: int, subdomain: str = None, full_domain: str = None, name: str = None, auto_renew: bool = True) -> Dict:
+    async def request_certificate(
+        self,
+        domain_id: int,
+        subdomain: str = None,
+        full_domain: str = None,
+        name: str = None,
+        auto_renew: bool = True,
+        certificate_id: Optional[int] = None,
+        job_id: Optional[str] = None
+    ) -> Dict:
         """
         申请SSL证书
         
@@ -58,13 +76,15 @@ class CertificateService:
             full_domain: 完整域名（如果提供则优先使用）
             name: 证书名称
             auto_renew: 是否自动续期
+            certificate_id: 已创建的待申请证书记录ID（由签发任务提供）
+            job_id: 签发任务ID
             
         Returns:
             Dict: 申请结果
         """
         try:
             # 获取域名信息
-            domain = await Domain.get(id=domain_id).prefetch_related('provider')
+            domain = await entity_cache.get_domain(domain_id)
             if not domain:
                 raise Exception(f"域名ID {domain_id} 不存在")
             
@@ -79,15 +99,17 @@ class CertificateService:
             
             logger.info(f"开始申请证书: {full_domain}")
             
-            # 创建证书记录
-            certificate_name = name or f"{full_domain} SSL证书"
-            certificate = await Certificate.create(
-                domain=domain,
-                name=certificate_name,
-                type=CertificateType.LETSENCRYPT,
-                status=CertificateStatus.PENDING,
-                auto_renew=auto_renew
-            )
+            # 创建证书记录（签发任务已预先创建时直接复用）
+            certificate = await Certificate.get_or_none(id=certificate_id) if certificate_id else None
+            if certificate is None:
+                certificate_name = name or f"{full_domain} SSL证书"
+                certificate = await Certificate.create(
+                    domain=domain,
+                    name=certificate_name,
+                    type=CertificateType.LETSENCRYPT,
+                    status=CertificateStatus.PENDING,
+                    auto_renew=auto_renew
+                )
             
             # 检查是否有certbot
             if not self.certbot_path:
@@ -95,7 +117,7 @@ class CertificateService:
             
             # 执行真实的DNS验证申请
             result = await self._request_certificate_with_dns_validation(
-                domain, full_domain, certificate.id
+                domain, full_domain, certificate.id, job_id=job_id
             )
             
             if result['success']:
@@ -106,6 +128,7 @@ class CertificateService:
                 certificate.issuer = result.get('issuer')
                 certificate.subject = result.get('subject')
                 certificate.serial_number = result.get('serial_number')
+                certificate.update_from_dict(result.get('files', {}))
                 await certificate.save()
                 
                 logger.info(f"证书申请成功: {full_domain}")
@@ -138,15 +161,23 @@ class CertificateService:
         self, 
         domain: Domain, 
         full_domain: str, 
-        certificate_id: int
+        certificate_id: int,
+        force: bool = False,
+        job_id: Optional[str] = None
     ) -> Dict:
         """
         使用DNS验证申请证书
         
+        已存在且未到续期时间的证书直接复用，不调用certbot；已按 auto_renewal_days 判定需要续期时
+        强制重新签发（--force-renewal），否则certbot按自身的30天续期窗口判断，可能什么也不做。
+        首次签发时使用 --keep-until-expiring。
+        
         Args:
             domain: 域名对象
             full_domain: 完整域名
             certificate_id: 证书ID
+            force: 是否强制重新签发
+            job_id: 签发任务ID（通过环境变量CERT_JOB_ID传给DNS验证脚本以上报进度）
             
         Returns:
             Dict: 申请结果
@@ -157,128 +188,148 @@ class CertificateService:
             config_dir = os.path.join(self.config.certificate_storage_path, "certbot_config")
             os.makedirs(config_dir, exist_ok=True)
             
-            # 创建临时工作目录
-            with tempfile.TemporaryDirectory() as temp_dir:
-                # 获取DNS验证脚本路径
-                script_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "scripts", "dns_auth_hook.py")
-                
-                # 获取Python可执行文件路径
-                python_path = sys.executable
-                
-                # 构建certbot命令 - 使用更简单的DNS验证方式
-                cmd = [
-                    self.certbot_path,
-                    "certonly",
-                    "--manual",
-                    "--preferred-challenges", "dns",
-                    "--manual-auth-hook", f"{python_path} {script_path}",
-                    "--manual-cleanup-hook", f"{python_path} {script_path}",
-                    "--non-interactive",
-                    "--agree-tos",
-                    "--register-unsafely-without-email",  # 避免注册新账户，跳过邮箱验证
-                    "--config-dir", config_dir,  # 使用固定配置目录
-                    "--work-dir", temp_dir,
-                    "--logs-dir", temp_dir,
-                    "--force-renewal",  # 强制续期，避免缓存问题
-                    "-d", full_domain
-                ]
+            # 先检查certbot_config/live/下是否已有该证书
+            renewal_due = False
+            if not force and self._lineage_exists(config_dir, full_domain):
+                existing = await self._read_certificate_info(config_dir, full_domain)
+                if existing and not self._is_renewal_due(existing['not_after']):
+                    logger.info(f"证书 {full_domain} 未到续期时间（到期: {existing['not_after']}），复用现有证书")
+                    return self._build_success_result(existing, config_dir, full_domain, reused=True)
+                renewal_due = existing is not None
+            
+            # 每个证书使用固定的工作目录和日志目录，保留certbot自身状态
+            work_dir = os.path.join(self.config.certificate_storage_path, "certbot_work", full_domain)
+            logs_dir = os.path.join(self.config.certificate_storage_path, "certbot_logs", full_domain)
+            os.makedirs(work_dir, exist_ok=True)
+            os.makedirs(logs_dir, exist_ok=True)
+            
+            # 获取DNS验证脚本路径
+            script_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "scripts", "dns_auth_hook.py")
+            
+            # 获取Python可执行文件路径
+            python_path = sys.executable
+            
+            # 构建certbot命令 - 使用更简单的DNS验证方式
+            cmd = [
+                self.certbot_path,
+                "certonly",
+                "--manual",
+                "--preferred-challenges", "dns",
+                "--manual-auth-hook", f"{python_path} {script_path}",
+                "--manual-cleanup-hook", f"{python_path} {script_path}",
+                "--non-interactive",
+                "--agree-tos",
+                "--register-unsafely-without-email",  # 避免注册新账户，跳过邮箱验证
+                "--config-dir", config_dir,  # 使用固定配置目录
+                "--work-dir", work_dir,
+                "--logs-dir", logs_dir,
+                "--cert-name", full_domain,
+                "--force-renewal" if force or renewal_due else "--keep-until-expiring",
+                "-d", full_domain
+            ]
+            
+            logger.info(f"执行certbot命令: {' '.join(cmd)}")
+            
+            env = dict(os.environ)
+            if job_id:
+                env['CERT_JOB_ID'] = job_id
+            
+            # 启动certbot进程
+            process = None
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    *cmd,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    stdin=asyncio.subprocess.PIPE,
+                    env=env
+                )
                 
-                logger.info(f"执行certbot命令: {' '.join(cmd)}")
+                # 等待进程完成（DNS验证脚本会自动处理）
+                logger.info("等待certbot完成证书申请...")
                 
-                # 启动certbot进程
-                process = None
+                # 使用asyncio.wait_for来设置超时，确保进程不会无限等待
                 try:
-                    process = await asyncio.create_subprocess_exec(
-                        *cmd,
-                        stdout=asyncio.subprocess.PIPE,
-                        stderr=asyncio.subprocess.PIPE,
-                        stdin=asyncio.subprocess.PIPE
+                    stdout, stderr = await asyncio.wait_for(
+                        process.communicate(), 
+                        timeout=600  # 10分钟超时，给DNS传播足够时间
                     )
-                    
-                    # 等待进程完成（DNS验证脚本会自动处理）
-                    logger.info("等待certbot完成证书申请...")
-                    
-                    # 使用asyncio.wait_for来设置超时，确保进程不会无限等待
-                    try:
-                        stdout, stderr = await asyncio.wait_for(
-                            process.communicate(), 
-                            timeout=600  # 10分钟超时，给DNS传播足够时间
-                        )
-                    except asyncio.TimeoutError:
-                        logger.error("certbot执行超时，正在终止进程...")
-                        await self._cleanup_process(process)
-                        raise Exception("证书申请超时")
-                    except asyncio.CancelledError:
-                        logger.error("certbot进程被取消，正在清理...")
-                        await self._cleanup_process(process)
-                        raise
-                    except Exception as e:
-                        logger.error(f"certbot进程执行出错: {str(e)}")
-                        await self._cleanup_process(process)
-                        raise
-                        
+                except asyncio.TimeoutError:
+                    logger.error("certbot执行超时，正在终止进程...")
+                    await self._cleanup_process(process)
+                    raise Exception("证书申请超时")
+                except asyncio.CancelledError:
+                    logger.error("certbot进程被取消，正在清理...")
+                    await self._cleanup_process(process)
+                    raise
                 except Exception as e:
-                    logger.error(f"启动certbot进程失败: {str(e)}")
-                    if process:
-                        await self._cleanup_process(process)
+                    logger.error(f"certbot进程执行出错: {str(e)}")
+                    await self._cleanup_process(process)
                     raise
+                    
+            except Exception as e:
+                logger.error(f"启动certbot进程失败: {str(e)}")
+                if process:
+                    await self._cleanup_process(process)
+                raise
+            
+            # 输出所有输出信息
+            if stdout:
+                try:
+                    stdout_text = stdout.decode('utf-8')
+                    logger.info(f"certbot stdout: {stdout_text}")
+                except UnicodeDecodeError:
+                    stdout_text = stdout.decode('utf-8', errors='replace')
+                    logger.info(f"certbot stdout (with encoding errors): {stdout_text}")
+            
+            if stderr:
+                try:
+                    stderr_text = stderr.decode('utf-8')
+                    logger.info(f"certbot stderr: {stderr_text}")
+                except UnicodeDecodeError:
+                    stderr_text = stderr.decode('utf-8', errors='replace')
+                    logger.info(f"certbot stderr (with encoding errors): {stderr_text}")
+            
+            if process.returncode == 0:
+                await update_job_stage(job_id, "validated", "DNS验证通过，正在读取证书")
                 
-                # 输出所有输出信息
-                if stdout:
-                    try:
-                        stdout_text = stdout.decode('utf-8')
-                        logger.info(f"certbot stdout: {stdout_text}")
-                    except UnicodeDecodeError:
-                        stdout_text = stdout.decode('utf-8', errors='replace')
-                        logger.info(f"certbot stdout (with encoding errors): {stdout_text}")
+                # 证书申请成功，直接读取证书信息
+                cert_info = await self._read_certificate_info(config_dir, full_domain)
                 
-                if stderr:
-                    try:
-                        stderr_text = stderr.decode('utf-8')
-                        logger.info(f"certbot stderr: {stderr_text}")
-                    except UnicodeDecodeError:
-                        stderr_text = stderr.decode('utf-8', errors='replace')
-                        logger.info(f"certbot stderr (with encoding errors): {stderr_text}")
+                # DNS验证记录由cleanup hook自动清理
                 
-                if process.returncode == 0:
-                    # 证书申请成功，直接读取证书信息
-                    cert_info = await self._read_certificate_info(config_dir, full_domain)
-                    
-                    # DNS验证记录由cleanup hook自动清理
-                    
+                if cert_info is None:
                     return {
-                        'success': True,
-                        'not_after': cert_info.get('not_after'),
-                        'not_before': cert_info.get('not_before'),
-                        'issuer': cert_info.get('issuer'),
-                        'subject': cert_info.get('subject'),
-                        'serial_number': cert_info.get('serial_number')
+                        'success': False,
+                        'message': "certbot执行成功，但无法解析签发的证书文件"
                     }
+                
+                return self._build_success_result(cert_info, config_dir, full_domain)
+            else:
+                if stderr:
+                    try:
+                        error_msg = stderr.decode('utf-8')
+                    except UnicodeDecodeError:
+                        error_msg = stderr.decode('utf-8', errors='replace')
                 else:
-                    if stderr:
-                        try:
-                            error_msg = stderr.decode('utf-8')
-                        except UnicodeDecodeError:
-                            error_msg = stderr.decode('utf-8', errors='replace')
-                    else:
-                        error_msg = "未知错误"
-                    logger.error(f"certbot执行失败: {error_msg}")
-                    
-                    # DNS验证记录由cleanup hook自动清理
-                    
-                    # 检查是否是权限问题
-                    if "administrative rights" in error_msg or "权限" in error_msg:
-                        logger.error("certbot需要管理员权限")
-                        return {
-                            'success': False,
-                            'message': f"certbot需要管理员权限，请以管理员身份运行应用"
-                        }
-                    
+                    error_msg = "未知错误"
+                logger.error(f"certbot执行失败: {error_msg}")
+                
+                # DNS验证记录由cleanup hook自动清理
+                
+                # 检查是否是权限问题
+                if "administrative rights" in error_msg or "权限" in error_msg:
+                    logger.error("certbot需要管理员权限")
                     return {
                         'success': False,
-                        'message': f"certbot执行失败: {error_msg}"
+                        'message': f"certbot需要管理员权限，请以管理员身份运行应用"
                     }
-                    
+                
+                return {
+                    'success': False,
+                    'message': f"certbot执行失败: {error_msg}"
+                }
+                
         except Exception as e:
             error_str = str(e)
             logger.error(f"DNS验证申请证书失败: {error_str}")
@@ -300,57 +351,6 @@ class CertificateService:
                 'message': f"DNS验证申请证书失败: {error_str}"
             }
     
-    async def _parse_dns_verification_info(
-        self, 
-        process: asyncio.subprocess.Process, 
-        domain: Domain, 
-        full_domain: str
-    ) -> Optional[Dict]:
-        """
-        解析DNS验证信息
-        
-        Args:
-            process: certbot进程
-            domain: 域名对象
-            full_domain: 完整域名
-            
-        Returns:
-            Dict: DNS验证记录信息
-        """
-        try:
-            # 读取更多输出以获取验证信息
-            lines = []
-            for _ in range(10):  # 最多读取10行
-                line = await process.stdout.readline()
-                if not line:
-                    break
-                lines.append(line.decode().strip())
-                logger.info(f"验证信息: {lines[-1]}")
-            
-            # 解析验证记录
-            verification_record = None
-            for line in lines:
-                if "_acme-challenge" in line and "TXT" in line:
-                    # 解析记录名和值
-                    parts = line.split()
-                    if len(parts) >= 3:
-                        record_name = parts[0]
-                        record_value = parts[-1].strip('"')
-                        
-                        verification_record = {
-                            'name': record_name,
-                            'value': record_value,
-                            'type': 'TXT',
-                            'ttl': 300
-                        }
-                        break
-            
-            return verification_record
-            
-        except Exception as e:
-            logger.error(f"解析DNS验证信息失败: {str(e)}")
-            return None
-    
     async def _add_dns_verification_record(
         self, 
         domain: Domain, 
@@ -506,7 +506,7 @@ class CertificateService:
             logger.error(f"清理certbot进程时出错: {str(e)}")
 
     
-    async def _read_certificate_info(self, cert_dir: str, domain: str) -> Dict:
+    async def _read_certificate_info(self, cert_dir: str, domain: str) -> Optional[Dict]:
         """
         读取证书信息
         
@@ -515,91 +515,84 @@ class CertificateService:
             domain: 域名
             
         Returns:
-            Dict: 证书信息
+            Dict: 证书信息，无法读取时返回None
         """
+        cert_file = os.path.join(cert_dir, "live", domain, "fullchain.pem")
         try:
-            # 构建证书文件路径
-            cert_file = os.path.join(cert_dir, "live", domain, "fullchain.pem")
-            
-            if os.path.exists(cert_file):
-                # 尝试读取实际的证书文件信息
-                try:
-                    import subprocess
-                    import platform
-                    
-                    # 根据操作系统选择合适的openssl命令
-                    if platform.system() == "Windows":
-                        # Windows上尝试常见的openssl路径
-                        openssl_paths = [
-                            'openssl',
-                            r'C:\Program Files\OpenSSL-Win64\bin\openssl.exe',
-                            r'C:\Program Files (x86)\OpenSSL-Win32\bin\openssl.exe',
-                            r'C:\OpenSSL-Win64\bin\openssl.exe',
-                            r'C:\OpenSSL-Win32\bin\openssl.exe'
-                        ]
-                        
-                        openssl_cmd = None
-                        for path in openssl_paths:
-                            try:
-                                result = subprocess.run([path, 'version'], capture_output=True, text=True, timeout=5)
-                                if result.returncode == 0:
-                                    openssl_cmd = path
-                                    break
-                            except:
-                                continue
-                        
-                        if not openssl_cmd:
-                            logger.info("Windows系统未找到openssl，使用默认证书信息")
-                            raise FileNotFoundError("openssl not found")
-                        
-                        result = subprocess.run([
-                            openssl_cmd, 'x509', '-in', cert_file, '-noout', '-dates', '-issuer', '-subject', '-serial'
-                        ], capture_output=True, text=True, timeout=10)
-                    else:
-                        # Linux/Mac系统
-                        result = subprocess.run([
-                            'openssl', 'x509', '-in', cert_file, '-noout', '-dates', '-issuer', '-subject', '-serial'
-                        ], capture_output=True, text=True, timeout=10)
-                    
-                    if result.returncode == 0:
-                        # 解析openssl输出
-                        output = result.stdout
-                        info = {}
-                        
-                        for line in output.split('\n'):
-                            if 'notAfter=' in line:
-                                info['not_after'] = datetime.strptime(line.split('=')[1], '%b %d %H:%M:%S %Y %Z')
-                            elif 'notBefore=' in line:
-                                info['not_before'] = datetime.strptime(line.split('=')[1], '%b %d %H:%M:%S %Y %Z')
-                            elif 'issuer=' in line:
-                                info['issuer'] = line.split('=', 1)[1]
-                            elif 'subject=' in line:
-                                info['subject'] = line.split('=', 1)[1]
-                            elif 'serial=' in line:
-                                info['serial_number'] = line.split('=')[1]
-                        
-                        logger.info(f"成功读取证书信息: {domain}")
-                        return info
-                except Exception as e:
-                    logger.info(f"无法使用openssl读取证书信息，使用默认值: {e}")
+            info = parse_certificate_file(cert_file)
+            logger.info(f"成功读取证书信息: {domain} (序列号: {info['serial_number']})")
+            return info
+        except CertificateParseError as e:
+            logger.error(f"读取证书信息失败: {e}")
+            return None
+    
+    def _lineage_exists(self, cert_dir: str, domain: str) -> bool:
+        """检查certbot_config/live/下是否已有该证书"""
+        return os.path.exists(os.path.join(cert_dir, "live", domain, "fullchain.pem"))
+    
+    def _is_renewal_due(self, not_after: Optional[datetime]) -> bool:
+        """证书是否已进入续期窗口"""
+        if not not_after:
+            return True
+        if not_after.tzinfo is None:
+            not_after = not_after.replace(tzinfo=timezone.utc)
+        return not_after - datetime.now(timezone.utc) <= timedelta(days=self.config.auto_renewal_days)
+    
+    def _build_success_result(self, cert_info: Dict, cert_dir: str, domain: str, reused: bool = False) -> Dict:
+        """组装申请/续期成功的结果，并将证书文件写入证书存储"""
+        return {
+            'success': True,
+            'reused': reused,
+            'not_after': cert_info.get('not_after'),
+            'not_before': cert_info.get('not_before'),
+            'issuer': cert_info.get('issuer'),
+            'subject': cert_info.get('subject'),
+            'serial_number': cert_info.get('serial_number'),
+            'files': {**self._store_lineage_files(cert_dir, domain), 'lineage': domain}
+        }
+    
+    def _store_lineage_files(self, cert_dir: str, domain: str) -> Dict[str, str]:
+        """
+        将certbot签发的证书文件写入证书存储
+        
+        Args:
+            cert_dir: 证书配置目录
+            domain: 域名（certbot证书名）
             
-            # 如果无法读取实际证书信息，返回默认值
-            return {
-                'not_after': datetime.now() + timedelta(days=self.config.certificate_validity_days),
-                'not_before': datetime.now(),
-                'issuer': "Let's Encrypt",
-                'subject': domain,
-                'serial_number': "1234567890"
-            }
-        except Exception as e:
-            logger.error(f"读取证书信息失败: {str(e)}")
-            return {
-                'not_after': datetime.now() + timedelta(days=self.config.certificate_validity_days),
-                'not_before': datetime.now(),
-                'issuer': "Let's Encrypt",
-                'subject': domain,
-                'serial_number': "1234567890"
-            }
+        Returns:
+            Dict: 证书、私钥、证书链的摘要
+        """
+        live_dir = Path(cert_dir) / "live" / domain
+        contents = {}
+        for key, filename in (
+            ('certificate_pem', 'fullchain.pem'),
+            ('private_key_pem', 'privkey.pem'),
+            ('ca_bundle_pem', 'chain.pem'),
+        ):
+            path = live_dir / filename
+            if path.exists():
+                contents[key] = path.read_bytes()
+        return certificate_store.store_bundle(**contents)
+    
+    async def import_lineage(self, certificate: Certificate) -> bool:
+        """
+        将尚未导入证书存储的旧证书从certbot目录导入（按保存的证书名定位，需已加载domain）
+        
+        Returns:
+            bool: 证书文件是否已在证书存储中
+        """
+        if certificate.certificate_hash and certificate.private_key_hash:
+            return True
+        
+        config_dir = os.path.join(self.config.certificate_storage_path, "certbot_config")
+        lineage = certificate_lineage_name(certificate)
+        if not self._lineage_exists(config_dir, lineage):
+            logger.error(f"证书文件不存在: {os.path.join(config_dir, 'live', lineage)}")
+            return False
+        
+        certificate.update_from_dict({**self._store_lineage_files(config_dir, lineage), 'lineage': lineage})
+        await certificate.save()
+        return True
     
     def _get_provider_instance(self, provider) -> Optional[BaseProvider]:
         """
@@ -612,30 +605,19 @@ class CertificateService:
             BaseProvider: 服务商实例
         """
         try:
-            if provider.type == 1:  # 华为云
-                return HuaweiProvider(
-                    access_key=provider.access_key,
-                    secret_key=provider.secret_key,
-                    region=provider.region or "cn-north-4"
-                )
-            elif provider.type == 2:  # 阿里云
-                return AliyunProvider(
-                    access_key=provider.access_key,
-                    secret_key=provider.secret_key,
-                    region=provider.region or "cn-hangzhou"
-                )
-            else:
-                return None
+            return get_provider_instance(provider)
         except Exception as e:
             logger.error(f"创建服务商实例失败: {str(e)}")
             return None
     
-    async def renew_certificate(self, certificate_id: int) -> Dict:
+    async def renew_certificate(self, certificate_id: int, force: bool = False, job_id: Optional[str] = None) -> Dict:
         """
         续期证书
         
         Args:
             certificate_id: 证书ID
+            force: 是否在未到续期时间时也强制重新签发
+            job_id: 签发任务ID
             
         Returns:
             Dict: 续期结果
@@ -645,8 +627,7 @@ class CertificateService:
             if not certificate:
                 raise Exception(f"证书ID {certificate_id} 不存在")
             
-            # 构建完整域名
-            full_domain = certificate.domain.name
+            full_domain = certificate_lineage_name(certificate)
             
             logger.info(f"开始续期证书: {full_domain}")
             
@@ -655,8 +636,8 @@ class CertificateService:
                 raise RuntimeError("未找到certbot可执行文件，无法续期证书")
             
             # 执行真实的续期
-            result = await self._renew_certificate_with_dns_validation(
-                certificate.domain, full_domain, certificate_id
+            result = await self._request_certificate_with_dns_validation(
+                certificate.domain, full_domain, certificate_id, force=force, job_id=job_id
             )
             
             if result['success']:
@@ -664,13 +645,17 @@ class CertificateService:
                 certificate.status = CertificateStatus.VALID
                 certificate.not_after = result.get('not_after')
                 certificate.not_before = result.get('not_before')
-                certificate.last_renewed_at = datetime.now()
+                certificate.serial_number = result.get('serial_number')
+                if not result.get('reused'):
+                    certificate.last_renewed_at = datetime.now()
+                certificate.update_from_dict(result.get('files', {}))
                 await certificate.save()
                 
-                logger.info(f"证书续期成功: {full_domain}")
+                message = f'证书未到续期时间，无需续期: {full_domain}' if result.get('reused') else f'证书续期成功: {full_domain}'
+                logger.info(message)
                 return {
                     'success': True,
-                    'message': f'证书续期成功: {full_domain}',
+                    'message': message,
                     'renewed_at': certificate.last_renewed_at
                 }
             else:
@@ -686,117 +671,3 @@ class CertificateService:
                 'success': False,
                 'message': f'证书续期异常: {str(e)}'
             }
-    
-    async def _renew_certificate_with_dns_validation(
-        self, 
-        domain: Domain, 
-        full_domain: str, 
-        certificate_id: int
-    ) -> Dict:
-        """
-        使用DNS验证续期证书
-        
-        Args:
-            domain: 域名对象
-            full_domain: 完整域名
-            certificate_id: 证书ID
-            
-        Returns:
-            Dict: 续期结果
-        """
-        try:
-            # 创建临时目录
-            with tempfile.TemporaryDirectory() as temp_dir:
-                # 构建certbot续期命令
-                cmd = [
-                    self.certbot_path,
-                    "renew",
-                    "--manual",
-                    "--preferred-challenges", "dns",
-                    "--non-interactive",
-                    "--config-dir", temp_dir,
-                    "--work-dir", temp_dir,
-                    "--logs-dir", temp_dir,
-                    "--cert-name", full_domain
-                ]
-                
-                logger.info(f"执行certbot续期命令: {' '.join(cmd)}")
-                
-                # 启动certbot进程
-                process = await asyncio.create_subprocess_exec(
-                    *cmd,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE,
-                    stdin=asyncio.subprocess.PIPE
-                )
-                
-                # 处理DNS验证（类似申请过程）
-                verification_record = None
-                try:
-                    while True:
-                        line = await process.stdout.readline()
-                        if not line:
-                            break
-                            
-                        line_str = line.decode().strip()
-                        logger.info(f"certbot续期输出: {line_str}")
-                        
-                        if "Please deploy a DNS TXT record" in line_str:
-                            verification_record = await self._parse_dns_verification_info(
-                                process, domain, full_domain
-                            )
-                            
-                            if verification_record:
-                                await self._add_dns_verification_record(
-                                    domain, verification_record
-                                )
-                                
-                                await self._wait_for_dns_propagation(
-                                    verification_record['name'], 
-                                    verification_record['value']
-                                )
-                                
-                                await process.stdin.write(b'\n')
-                                await process.stdin.drain()
-                            else:
-                                raise Exception("无法解析DNS验证信息")
-                
-                except Exception as e:
-                    logger.error(f"DNS验证续期过程出错: {str(e)}")
-                    process.terminate()
-                    raise e
-                
-                # 等待进程完成
-                stdout, stderr = await process.communicate()
-                
-                if process.returncode == 0:
-                    # 证书续期成功
-                    cert_info = await self._read_certificate_info(temp_dir, full_domain)
-                    
-                    # DNS验证记录由cleanup hook自动清理
-                    
-                    return {
-                        'success': True,
-                        'not_after': cert_info.get('not_after'),
-                        'not_before': cert_info.get('not_before'),
-                        'issuer': cert_info.get('issuer'),
-                        'subject': cert_info.get('subject'),
-                        'serial_number': cert_info.get('serial_number')
-                    }
-                else:
-                    error_msg = stderr.decode() if stderr else "未知错误"
-                    logger.error(f"certbot续期执行失败: {error_msg}")
-                    
-                    # DNS验证记录由cleanup hook自动清理
-                    
-                    return {
-                        'success': False,
-                        'message': f"certbot续期执行失败: {error_msg}"
-                    }
-                    
-        except Exception as e:
-            logger.error(f"DNS验证续期证书失败: {str(e)}")
-            return {
-                'success': False,
-                'message': f"DNS验证续期证书失败: {str(e)}"
-            }
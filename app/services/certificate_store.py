@@ -0,0 +1,192 @@
+"""证书文件内容寻址存储"""
+import hashlib
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Union
+
+from cryptography.fernet import Fernet, InvalidToken
+
+from app.config.certificate_config import get_certificate_config
+
+logger = logging.getLogger(__name__)
+
+
+class CertificateStoreError(Exception):
+    """证书存储异常"""
+    pass
+
+
+class CertificateStore:
+    """
+    以SHA256摘要为键的证书文件存储
+
+    对象按摘要前两位分目录保存在 certificate_storage_path/objects 下，
+    摘要始终基于明文计算；私钥等敏感内容以Fernet加密后落盘（.enc后缀）。
+    """
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(
+        self,
+        base_path: Optional[str] = None,
+        encryption_key: Optional[str] = None,
+        key_file: Optional[str] = None
+    ):
+        config = get_certificate_config()
+        self.root = Path(base_path or config.certificate_storage_path) / "objects"
+        self._encryption_key = encryption_key or config.store_encryption_key
+        self._key_file = Path(key_file or config.store_key_file)
+        self._fernet: Optional[Fernet] = None
+
+    def _get_fernet(self) -> Fernet:
+        """获取加密器，未配置密钥时读取（或生成）证书目录之外的密钥文件"""
+        if self._fernet is None:
+            key = self._encryption_key or self._load_key_file()
+            self._fernet = Fernet(key.encode() if isinstance(key, str) else key)
+        return self._fernet
+
+    def _load_key_file(self) -> str:
+        """读取密钥文件；不存在时迁移旧版本放在对象目录中的密钥，或生成新密钥"""
+        if not self._key_file.exists():
+            legacy_file = self.root / ".store.key"
+            if legacy_file.exists():
+                self._create_key_file(legacy_file.read_text().strip())
+                legacy_file.unlink()
+                logger.warning(f"证书存储密钥已从对象目录移动到: {self._key_file}")
+            elif self._create_key_file(Fernet.generate_key().decode()):
+                logger.warning(f"未配置证书存储加密密钥，已生成密钥文件: {self._key_file}")
+        return self._key_file.read_text().strip()
+
+    def _create_key_file(self, key: str) -> bool:
+        """
+        创建密钥文件（仅当不存在时），返回是否由本进程创建
+
+        先写临时文件再硬链接到目标路径：多个副本同时生成密钥时只有一个成功，其余读取它的密钥。
+        """
+        self._key_file.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self._key_file.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(key)
+            try:
+                os.chmod(temp_path, 0o600)
+            except (OSError, PermissionError):
+                # Windows上可能无法设置权限，忽略错误
+                pass
+            os.link(temp_path, self._key_file)
+            return True
+        except FileExistsError:
+            return False
+        finally:
+            os.unlink(temp_path)
+
+    def _object_path(self, digest: str, encrypted: bool) -> Path:
+        """计算对象路径"""
+        suffix = ".enc" if encrypted else ""
+        return self.root / digest[:2] / f"{digest}{suffix}"
+
+    def _write_atomic(self, path: Path, data: bytes):
+        """先写临时文件再重命名，避免读到写了一半的对象"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            try:
+                os.chmod(temp_path, 0o600)
+            except (OSError, PermissionError):
+                # Windows上可能无法设置权限，忽略错误
+                pass
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+    def put(self, data: Union[str, bytes], encrypt: bool = False) -> str:
+        """
+        保存内容
+
+        Args:
+            data: 文件内容
+            encrypt: 是否加密保存（用于私钥）
+
+        Returns:
+            str: 内容的SHA256摘要
+        """
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest, encrypt)
+        if not path.exists():
+            payload = self._get_fernet().encrypt(data) if encrypt else data
+            self._write_atomic(path, payload)
+        return digest
+
+    def exists(self, digest: str) -> bool:
+        """检查对象是否存在"""
+        return self._object_path(digest, False).exists() or self._object_path(digest, True).exists()
+
+    def get(self, digest: str) -> bytes:
+        """读取对象内容（加密对象自动解密并校验摘要）"""
+        plain_path = self._object_path(digest, False)
+        if plain_path.exists():
+            return plain_path.read_bytes()
+
+        encrypted_path = self._object_path(digest, True)
+        if not encrypted_path.exists():
+            raise CertificateStoreError(f"证书存储对象不存在: {digest}")
+
+        try:
+            data = self._get_fernet().decrypt(encrypted_path.read_bytes())
+        except InvalidToken as e:
+            raise CertificateStoreError(f"证书存储对象解密失败: {digest}") from e
+
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise CertificateStoreError(f"证书存储对象校验失败: {digest}")
+        return data
+
+    def iter_chunks(self, digest: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        """分块读取对象，明文对象直接从文件流式读取"""
+        plain_path = self._object_path(digest, False)
+        if plain_path.exists():
+            with open(plain_path, "rb") as f:
+                while True:
+                    chunk = f.read(chunk_size)
+                    if not chunk:
+                        break
+                    yield chunk
+            return
+
+        # 加密对象（私钥）体积很小，整体解密后分块输出
+        data = self.get(digest)
+        for offset in range(0, len(data), chunk_size):
+            yield data[offset:offset + chunk_size]
+
+    def store_bundle(
+        self,
+        certificate_pem: Optional[Union[str, bytes]] = None,
+        private_key_pem: Optional[Union[str, bytes]] = None,
+        ca_bundle_pem: Optional[Union[str, bytes]] = None
+    ) -> Dict[str, str]:
+        """
+        保存证书、私钥与证书链
+
+        Returns:
+            Dict: 可直接写入Certificate模型的摘要字段（只包含提供了内容的字段）
+        """
+        hashes = {}
+        if certificate_pem:
+            hashes['certificate_hash'] = self.put(certificate_pem)
+        if private_key_pem:
+            hashes['private_key_hash'] = self.put(private_key_pem, encrypt=True)
+        if ca_bundle_pem:
+            hashes['ca_bundle_hash'] = self.put(ca_bundle_pem)
+        return hashes
+
+
+# 全局证书存储实例
+certificate_store = CertificateStore()
@@ -0,0 +1,95 @@
+"""首页统计服务"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from tortoise.signals import post_delete, post_save
+
+from app.config.settings import settings
+from app.db_dialect import fetch_all
+from app.models import Certificate, CertificateStatus, DDNSConfig, Domain, Provider
+from app.services.log_store import DDNS_LOGS, log_store
+
+logger = logging.getLogger(__name__)
+
+# 即将过期的判定天数
+EXPIRING_DAYS = 30
+
+# 一次往返取回全部计数（每个标量子查询各自走主键或索引计数）
+STATS_SQL = """
+SELECT
+    (SELECT COUNT(*) FROM providers) AS total_providers,
+    (SELECT COUNT(*) FROM providers WHERE enabled = ?) AS enabled_providers,
+    (SELECT COUNT(*) FROM domains) AS total_domains,
+    (SELECT COUNT(*) FROM certificates) AS total_certificates,
+    (SELECT COUNT(*) FROM certificates WHERE status = ?) AS valid_certificates,
+    (SELECT COUNT(*) FROM certificates WHERE status = ? AND not_after <= ?) AS expiring_certificates,
+    (SELECT COUNT(*) FROM ddns_configs) AS total_ddns_configs,
+    (SELECT COUNT(*) FROM ddns_configs WHERE enabled = ?) AS active_ddns_configs
+"""
+
+
+class DashboardService:
+    """
+    首页与DDNS概览的统计数据
+
+    全部计数由一条SQL取回，与最近24小时的DDNS日志计数一起缓存ttl秒；
+    服务商、域名、证书、DDNS配置写入时（模型信号）立即失效，多个页面同时轮询时只查询一次。
+    """
+
+    def __init__(self, ttl: int = 10):
+        self.ttl = ttl
+        self._stats: Optional[Dict[str, Any]] = None
+        self._expires_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def invalidate(self):
+        """丢弃缓存的统计数据"""
+        self._stats = None
+
+    async def get_stats(self) -> Dict[str, Any]:
+        """返回统计数据（缓存未过期时不访问数据库）"""
+        if self._stats is not None and time.monotonic() < self._expires_at:
+            return self._stats
+
+        # 缓存过期时只由一个请求重新统计，其余请求等待结果
+        async with self._lock:
+            if self._stats is None or time.monotonic() >= self._expires_at:
+                stats = await self._compute()
+                self._stats = stats
+                self._expires_at = time.monotonic() + self.ttl
+            return self._stats
+
+    async def _compute(self) -> Dict[str, Any]:
+        now = datetime.now(timezone.utc)
+        rows = await fetch_all(STATS_SQL, [
+            True,
+            int(CertificateStatus.VALID),
+            int(CertificateStatus.VALID),
+            now + timedelta(days=EXPIRING_DAYS),
+            True,
+        ])
+        stats = dict(rows[0])
+
+        # 最近24小时的DDNS更新结果（只访问最近的日志分区）
+        since = now - timedelta(days=1)
+        stats['recent_ddns_updates'] = await log_store.count(DDNS_LOGS, {"status": "success"}, since=since)
+        stats['recent_ddns_failures'] = await log_store.count(DDNS_LOGS, {"status": "failed"}, since=since)
+        stats['computed_at'] = now
+        return stats
+
+
+# 全局首页统计服务实例
+dashboard_service = DashboardService(ttl=settings.dashboard_cache_ttl)
+
+
+@post_save(Provider, Domain, Certificate, DDNSConfig)
+async def _invalidate_on_save(sender, instance, created, using_db, update_fields):
+    dashboard_service.invalidate()
+
+
+@post_delete(Provider, Domain, Certificate, DDNSConfig)
+async def _invalidate_on_delete(sender, instance, using_db):
+    dashboard_service.invalidate()
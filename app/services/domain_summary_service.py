@@ -0,0 +1,104 @@
+"""域名记录汇总服务"""
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional
+
+from tortoise.functions import Count
+
+from app.models import DNSRecord, Domain, DomainSummary, RecordType
+
+logger = logging.getLogger(__name__)
+
+
+class DomainSummaryService:
+    """
+    维护每个域名的记录数量、按类型统计、最后同步与最后变更时间
+
+    每次写入后按域名重新统计（走dns_records的(domain_id, name, type)索引），
+    不做增量加减，避免计数与实际记录出现偏差。
+    """
+
+    async def _count_by_type(self, domain_ids: Iterable[int]) -> Dict[int, Dict[str, int]]:
+        """按域名与类型统计记录数"""
+        rows = await DNSRecord.filter(domain_id__in=list(domain_ids)).annotate(
+            total=Count('id')
+        ).group_by('domain_id', 'type').values('domain_id', 'type', 'total')
+
+        counts: Dict[int, Dict[str, int]] = {}
+        for row in rows:
+            counts.setdefault(row['domain_id'], {})[RecordType(row['type']).name] = row['total']
+        return counts
+
+    async def refresh(self, domain_id: int, synced: bool = False, changed: bool = True) -> DomainSummary:
+        """
+        重新统计单个域名的汇总
+
+        Args:
+            domain_id: 域名ID
+            synced: 是否由同步任务触发（更新最后同步时间）
+            changed: 记录是否发生了变更（更新最后变更时间）
+
+        Returns:
+            DomainSummary: 更新后的汇总
+        """
+        type_counts = (await self._count_by_type([domain_id])).get(domain_id, {})
+        now = datetime.now(timezone.utc)
+
+        values = {
+            'record_count': sum(type_counts.values()),
+            'type_counts': type_counts,
+        }
+        if synced:
+            values['last_synced_at'] = now
+        if changed:
+            values['last_changed_at'] = now
+
+        summary, created = await DomainSummary.get_or_create(domain_id=domain_id, defaults=values)
+        if not created:
+            summary.update_from_dict(values)
+            await summary.save()
+        return summary
+
+    async def rebuild_all(self, domain_ids: Optional[Iterable[int]] = None) -> int:
+        """
+        重建汇总（用于迁移回填），不修改最后同步/变更时间
+
+        Returns:
+            int: 处理的域名数
+        """
+        if domain_ids is None:
+            domain_ids = await Domain.all().values_list('id', flat=True)
+        domain_ids = list(domain_ids)
+        if not domain_ids:
+            return 0
+
+        counts = await self._count_by_type(domain_ids)
+        existing = {
+            summary.domain_id: summary
+            for summary in await DomainSummary.filter(domain_id__in=domain_ids)
+        }
+
+        to_create, to_update = [], []
+        for domain_id in domain_ids:
+            type_counts = counts.get(domain_id, {})
+            summary = existing.get(domain_id)
+            if summary is None:
+                to_create.append(DomainSummary(
+                    domain_id=domain_id,
+                    record_count=sum(type_counts.values()),
+                    type_counts=type_counts
+                ))
+            else:
+                summary.record_count = sum(type_counts.values())
+                summary.type_counts = type_counts
+                to_update.append(summary)
+
+        if to_create:
+            await DomainSummary.bulk_create(to_create)
+        if to_update:
+            await DomainSummary.bulk_update(to_update, fields=['record_count', 'type_counts'])
+        return len(domain_ids)
+
+
+# 全局域名汇总服务实例
+domain_summary_service = DomainSummaryService()
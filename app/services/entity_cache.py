@@ -0,0 +1,174 @@
+"""服务商、域名与DDNS配置的进程内读穿缓存
+
+这些实体很少变化，却几乎是每个接口与定时任务的第一步查询。缓存的对象在进程内共享，
+调用方只读不改；修改实体的代码在写入后调用 invalidate_* 失效缓存。
+失效时同时递增数据库中的版本号（cache_versions），其他工作进程定期比对版本号，
+发现变化即清空本地缓存。
+"""
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple, Type, TypeVar
+
+from tortoise.expressions import F
+from tortoise.models import Model
+
+from app.config.settings import settings
+from app.models import CacheVersion, DDNSConfig, Domain, Provider
+
+logger = logging.getLogger(__name__)
+
+VERSION_NAME = "entities"
+
+T = TypeVar("T", bound=Model)
+
+
+@dataclass
+class CacheStats:
+    """缓存命中统计"""
+    hits: int = 0
+    misses: int = 0
+    invalidations: int = 0
+    version_resets: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "invalidations": self.invalidations,
+            "version_resets": self.version_resets,
+        }
+
+
+class EntityCache:
+    """按 (模型, 主键) 缓存实体，条目按TTL过期，并通过版本号感知其他进程的修改"""
+
+    def __init__(self, ttl: int = 300, check_interval: float = 5.0):
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self._entries: Dict[Tuple[str, Any], Tuple[float, Model]] = {}
+        self._version: Optional[int] = None
+        self._version_checked_at = 0.0
+        self.stats = CacheStats()
+
+    # ---------- 查询 ----------
+
+    async def get_provider(self, provider_id: int) -> Optional[Provider]:
+        """按ID获取服务商"""
+        return await self._get(Provider, provider_id, lambda: Provider.get_or_none(id=provider_id))
+
+    async def get_domain(self, domain_id: int) -> Optional[Domain]:
+        """按ID获取域名（已加载服务商）"""
+        return await self._get(
+            Domain, domain_id, lambda: Domain.get_or_none(id=domain_id).prefetch_related('provider')
+        )
+
+    async def get_ddns_config(self, config_id: str) -> Optional[DDNSConfig]:
+        """按ID获取DDNS配置（已加载域名与服务商）"""
+        return await self._get(
+            DDNSConfig, config_id,
+            lambda: DDNSConfig.get_or_none(id=config_id).prefetch_related('domain__provider')
+        )
+
+    async def _get(self, model: Type[T], pk: Any, load: Callable) -> Optional[T]:
+        if self.ttl <= 0:
+            return await load()
+
+        await self._check_version()
+        key = (model.__name__, pk)
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        if entry and entry[0] > now:
+            self.stats.hits += 1
+            return entry[1]
+
+        self.stats.misses += 1
+        entity = await load()
+        if entity is not None:
+            self._entries[key] = (now + self.ttl, entity)
+        else:
+            self._entries.pop(key, None)
+        return entity
+
+    # ---------- 失效 ----------
+
+    async def invalidate_provider(self, provider_id: int):
+        """服务商变更：同时失效其下域名与DDNS配置（两者缓存了服务商对象）"""
+        self._drop(lambda model, pk, entity: (
+            (model == 'Provider' and pk == provider_id)
+            or (model == 'Domain' and entity.provider_id == provider_id)
+            or (model == 'DDNSConfig' and entity.domain.provider_id == provider_id)
+        ))
+        await self._bump_version()
+
+    async def invalidate_domain(self, domain_id: int):
+        """域名变更：同时失效其下DDNS配置"""
+        self._drop(lambda model, pk, entity: (
+            (model == 'Domain' and pk == domain_id)
+            or (model == 'DDNSConfig' and entity.domain_id == domain_id)
+        ))
+        await self._bump_version()
+
+    async def invalidate_ddns_config(self, config_id: str):
+        """DDNS配置变更"""
+        self._drop(lambda model, pk, entity: model == 'DDNSConfig' and pk == config_id)
+        await self._bump_version()
+
+    def clear(self):
+        """清空本进程的缓存"""
+        self._entries.clear()
+
+    def _drop(self, predicate: Callable[[str, Any, Model], bool]):
+        stale = [key for key, (_, entity) in self._entries.items() if predicate(key[0], key[1], entity)]
+        for key in stale:
+            del self._entries[key]
+        self.stats.invalidations += 1
+
+    # ---------- 跨进程版本 ----------
+
+    async def _check_version(self):
+        """距离上次检查超过间隔时读取版本号，被其他进程递增过则清空本地缓存"""
+        now = time.monotonic()
+        if now - self._version_checked_at < self.check_interval:
+            return
+        self._version_checked_at = now
+
+        row = await CacheVersion.get_or_none(name=VERSION_NAME)
+        version = row.version if row else 0
+        if self._version is not None and version != self._version:
+            logger.debug(f"实体缓存版本 {self._version} -> {version}，清空本地缓存")
+            self._entries.clear()
+            self.stats.version_resets += 1
+        self._version = version
+
+    async def _bump_version(self):
+        updated = await CacheVersion.filter(name=VERSION_NAME).update(version=F('version') + 1)
+        if not updated:
+            await CacheVersion.get_or_create(name=VERSION_NAME, defaults={'version': 1})
+        row = await CacheVersion.get(name=VERSION_NAME)
+        if self._version is not None and row.version != self._version + 1:
+            # 期间还有其他进程递增过版本号，本地其他条目也可能已过期
+            self._entries.clear()
+            self.stats.version_resets += 1
+        self._version = row.version
+        self._version_checked_at = time.monotonic()
+
+    def info(self) -> Dict[str, Any]:
+        """缓存状态与命中统计"""
+        counts: Dict[str, int] = {}
+        for model, _ in self._entries:
+            counts[model] = counts.get(model, 0) + 1
+        return {
+            "ttl": self.ttl,
+            "check_interval": self.check_interval,
+            "version": self._version,
+            "size": len(self._entries),
+            "entries": counts,
+            **self.stats.to_dict(),
+        }
+
+
+# 全局实体缓存实例
+entity_cache = EntityCache(ttl=settings.entity_cache_ttl, check_interval=settings.entity_cache_check_interval)
@@ -0,0 +1,402 @@
+"""按月分区的日志存储
+
+DDNS日志与任务日志按月写入独立的表（如 ddns_logs_202610），查询只访问时间范围内的分区，
+过期数据按分区整表删除；日志消息以字典表（log_messages）编码，重复的消息只保存一份。
+"""
+import hashlib
+import logging
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.exceptions import OperationalError
+
+from app.db_dialect import execute, fetch_all, get_connection, is_sqlite
+from app.pagination import LAST_PAGE_CURSOR, CursorError, decode_cursor, encode_cursor
+
+logger = logging.getLogger(__name__)
+
+MESSAGES_TABLE = "log_messages"
+
+# 消息字典的进程内缓存上限（消息文本 -> 字典ID）
+MESSAGE_CACHE_SIZE = 10000
+
+# 字典ID在进程内缓存的最长时间（秒），过期后重新查询并刷新字典消息的 last_used
+MESSAGE_CACHE_TTL = 3600
+
+# last_used 在此时间内的字典消息不清理；须远大于 MESSAGE_CACHE_TTL，
+# 保证任何工作进程仍缓存着的字典ID都不会被清理
+MESSAGE_PRUNE_GRACE = timedelta(days=1)
+
+
+@dataclass(frozen=True)
+class LogStream:
+    """一类日志的分区表结构"""
+    prefix: str
+    owner_column: str
+    owner_type: str
+    columns: Tuple[Tuple[str, str], ...]
+    indexes: Tuple[Tuple[str, ...], ...]
+
+    def table(self, month: str) -> str:
+        return f"{self.prefix}_{month}"
+
+    def owner_value(self, owner_id):
+        """UUID等以字符串保存的归属ID统一转换为字符串"""
+        return str(owner_id) if self.owner_type.startswith("VARCHAR") else owner_id
+
+    def month_of(self, table: str) -> Optional[str]:
+        match = re.fullmatch(rf"{self.prefix}_(\d{{6}})", table)
+        return match.group(1) if match else None
+
+
+DDNS_LOGS = LogStream(
+    prefix="ddns_logs",
+    owner_column="ddns_config_id",
+    owner_type="VARCHAR(36)",
+    columns=(("old_ip", "VARCHAR(45)"), ("new_ip", "VARCHAR(45)"), ("status", "VARCHAR(20) NOT NULL")),
+    indexes=(("ddns_config_id", "created_at", "id"), ("status", "created_at")),
+)
+
+TASK_LOGS = LogStream(
+    prefix="task_logs",
+    owner_column="domain_id",
+    owner_type="INT",
+    columns=(("action", "VARCHAR(50) NOT NULL"), ("status", "VARCHAR(20) NOT NULL")),
+    indexes=(("domain_id", "created_at", "id"),),
+)
+
+
+def month_key(moment: datetime) -> str:
+    """时间所在的分区月份，如 202610"""
+    return _as_utc(moment).strftime("%Y%m")
+
+
+def _as_utc(moment: datetime) -> datetime:
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc)
+
+
+def parse_db_time(value) -> datetime:
+    """数据库中读出的时间（SQLite为ISO字符串）转换为UTC时间"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return _as_utc(value)
+
+
+def _shift_months(month: str, months: int) -> str:
+    year, month_number = divmod(int(month[:4]) * 12 + int(month[4:]) - 1 + months, 12)
+    return f"{year:04d}{month_number + 1:02d}"
+
+
+class LogStore:
+    """分区日志的写入、查询与压缩"""
+
+    def __init__(self):
+        # 消息文本 -> (字典ID, 缓存过期时间)
+        self._message_ids: "OrderedDict[str, Tuple[int, float]]" = OrderedDict()
+        self._partitions = set()
+
+    # ---------- 存储格式 ----------
+
+    def _to_db_time(self, moment: datetime, conn: BaseDBAsyncClient):
+        # SQLite中以定长ISO字符串保存，字符串顺序即时间顺序
+        moment = _as_utc(moment)
+        return moment.isoformat(timespec="microseconds") if is_sqlite(conn) else moment
+
+    async def create_dictionary(self, conn: Optional[BaseDBAsyncClient] = None):
+        """建立消息字典表"""
+        conn = get_connection(conn)
+        id_column = "INTEGER PRIMARY KEY AUTOINCREMENT" if is_sqlite(conn) else "SERIAL PRIMARY KEY"
+        time_column = "VARCHAR(32)" if is_sqlite(conn) else "TIMESTAMPTZ"
+        await execute(
+            f"CREATE TABLE IF NOT EXISTS {MESSAGES_TABLE} ("
+            f"id {id_column}, hash CHAR(40) NOT NULL UNIQUE, text TEXT NOT NULL, last_used {time_column})",
+            conn=conn
+        )
+
+    async def _ensure_partition(self, stream: LogStream, month: str, conn: BaseDBAsyncClient) -> str:
+        table = stream.table(month)
+        if table in self._partitions:
+            return table
+
+        sqlite = is_sqlite(conn)
+        columns = [
+            f"id {'INTEGER PRIMARY KEY AUTOINCREMENT' if sqlite else 'SERIAL PRIMARY KEY'}",
+            f"{stream.owner_column} {stream.owner_type} NOT NULL",
+            *[f"{name} {column_type}" for name, column_type in stream.columns],
+            "message_id INT NOT NULL",
+            f"created_at {'VARCHAR(32)' if sqlite else 'TIMESTAMPTZ'} NOT NULL",
+        ]
+        # 使用单条语句执行DDL（SQLite的executescript会提交当前事务）
+        await execute(f"CREATE TABLE IF NOT EXISTS {table} ({', '.join(columns)})", conn=conn)
+        for index_columns in stream.indexes:
+            await execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{table}_{'_'.join(index_columns)} "
+                f"ON {table} ({', '.join(index_columns)})",
+                conn=conn
+            )
+        self._partitions.add(table)
+        return table
+
+    async def _message_id(self, text: str, conn: BaseDBAsyncClient) -> int:
+        """取消息的字典ID，不存在时写入字典；从数据库取得时同时刷新 last_used"""
+        cached = self._message_ids.get(text)
+        now = time.monotonic()
+        if cached is not None and cached[1] > now:
+            self._message_ids.move_to_end(text)
+            return cached[0]
+
+        digest = hashlib.sha1(text.encode("utf-8")).hexdigest()
+        # 单条语句写入或刷新 last_used：压缩时要么已删除该消息（这里重新写入），要么看到新的 last_used
+        await execute(
+            f"INSERT INTO {MESSAGES_TABLE} (hash, text, last_used) VALUES (?, ?, ?) "
+            "ON CONFLICT (hash) DO UPDATE SET last_used = excluded.last_used",
+            [digest, text, self._to_db_time(datetime.now(timezone.utc), conn)], conn
+        )
+        rows = await fetch_all(f"SELECT id FROM {MESSAGES_TABLE} WHERE hash = ?", [digest], conn)
+        message_id = rows[0]["id"]
+
+        self._message_ids[text] = (message_id, now + MESSAGE_CACHE_TTL)
+        self._message_ids.move_to_end(text)
+        if len(self._message_ids) > MESSAGE_CACHE_SIZE:
+            self._message_ids.popitem(last=False)
+        return message_id
+
+    def reset_cache(self):
+        """清空字典与分区缓存（分区或字典被删除、事务回滚后调用）"""
+        self._message_ids.clear()
+        self._partitions.clear()
+
+    # ---------- 写入 ----------
+
+    async def write(
+        self,
+        stream: LogStream,
+        owner_id,
+        message: str,
+        created_at: Optional[datetime] = None,
+        conn: Optional[BaseDBAsyncClient] = None,
+        **values
+    ):
+        """写入一条日志到所在月份的分区"""
+        conn = get_connection(conn)
+        created_at = created_at or datetime.now(timezone.utc)
+        # 不加进程内锁：写入可能在调用方的事务中进行（SQLite下已持有连接锁），
+        # 与等待连接锁的压缩互相等待会造成死锁
+        try:
+            await self._insert(stream, owner_id, message, created_at, conn, values)
+        except OperationalError:
+            # 缓存的分区或字典ID可能随事务回滚、日志压缩失效，清空缓存后重试一次
+            self.reset_cache()
+            await self._insert(stream, owner_id, message, created_at, conn, values)
+
+    async def _insert(self, stream: LogStream, owner_id, message: str, created_at: datetime,
+                      conn: BaseDBAsyncClient, values: Dict[str, Any]):
+        table = await self._ensure_partition(stream, month_key(created_at), conn)
+        message_id = await self._message_id(message or "", conn)
+
+        columns = [stream.owner_column, *[name for name, _ in stream.columns], "message_id", "created_at"]
+        params = [
+            stream.owner_value(owner_id),
+            *[values.get(name) for name, _ in stream.columns],
+            message_id,
+            self._to_db_time(created_at, conn),
+        ]
+        await execute(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+            params, conn
+        )
+
+    async def write_ddns_log(self, config_id, status: str, message: str,
+                             old_ip: Optional[str] = None, new_ip: Optional[str] = None):
+        """记录DDNS更新日志"""
+        await self.write(DDNS_LOGS, config_id, message, status=status, old_ip=old_ip, new_ip=new_ip)
+
+    async def write_task_log(self, domain_id: int, action: str, status: str, message: str):
+        """记录任务日志"""
+        await self.write(TASK_LOGS, domain_id, message, action=action, status=status)
+
+    # ---------- 查询 ----------
+
+    async def partitions(self, stream: LogStream, conn: Optional[BaseDBAsyncClient] = None) -> List[Tuple[str, str]]:
+        """现有分区，按月份升序返回 [(月份, 表名)]"""
+        conn = get_connection(conn)
+        if is_sqlite(conn):
+            rows = await fetch_all("SELECT name FROM sqlite_master WHERE type = 'table'", conn=conn)
+        else:
+            rows = await fetch_all(
+                "SELECT table_name AS name FROM information_schema.tables WHERE table_schema = current_schema()",
+                conn=conn
+            )
+        found = [(stream.month_of(row["name"]), row["name"]) for row in rows]
+        return sorted((month, table) for month, table in found if month)
+
+    async def _partitions_since(self, stream: LogStream, since: Optional[datetime]) -> List[Tuple[str, str]]:
+        partitions = await self.partitions(stream)
+        if since is None:
+            return partitions
+        first_month = month_key(since)
+        return [(month, table) for month, table in partitions if month >= first_month]
+
+    def _select(self, stream: LogStream, table: str) -> str:
+        columns = ", ".join(f"p.{name}" for name, _ in stream.columns)
+        return (
+            f"SELECT p.id, p.{stream.owner_column}, {columns}, m.text AS message, p.created_at "
+            f"FROM {table} p LEFT JOIN {MESSAGES_TABLE} m ON m.id = p.message_id"
+        )
+
+    async def page(
+        self,
+        stream: LogStream,
+        filters: Dict[str, Any],
+        page_size: int,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        按 (created_at, id) 倒序游标分页，与 app.pagination.paginate 返回相同结构
+
+        分区按月份依次读取，取满一页即停止；游标所在月份之外的分区不会被访问。
+        """
+        keys, backward = decode_cursor(cursor) if cursor else (None, False)
+        if keys is not None and len(keys) != 2:
+            raise CursorError(f"无效的分页游标: {cursor}")
+
+        conn = get_connection()
+        partitions = await self.partitions(stream)
+        # 倒序浏览时从最新分区往前读；向前翻页时反向读取
+        if not backward:
+            partitions.reverse()
+        cursor_month = month_key(keys[0]) if keys is not None else None
+
+        where = " AND ".join(f"p.{column} = ?" for column in filters)
+        order = "ASC" if backward else "DESC"
+        operator = ">" if backward else "<"
+
+        rows: List[Dict[str, Any]] = []
+        for month, table in partitions:
+            if cursor_month is not None and (month < cursor_month if backward else month > cursor_month):
+                continue
+            conditions, params = ([where] if where else []), list(filters.values())
+            if cursor_month == month:
+                conditions.append(f"(p.created_at {operator} ? OR (p.created_at = ? AND p.id {operator} ?))")
+                created_at = self._to_db_time(keys[0], conn)
+                params += [created_at, created_at, keys[1]]
+            sql = self._select(stream, table)
+            if conditions:
+                sql += " WHERE " + " AND ".join(conditions)
+            sql += f" ORDER BY p.created_at {order}, p.id {order} LIMIT ?"
+            rows += await fetch_all(sql, params + [page_size + 1 - len(rows)], conn)
+            if len(rows) > page_size:
+                break
+
+        for row in rows:
+            row["created_at"] = parse_db_time(row["created_at"])
+        more = len(rows) > page_size
+        items = rows[:page_size]
+        if backward:
+            items.reverse()
+            has_prev, has_next = more, keys is not None
+        else:
+            has_prev, has_next = keys is not None, more
+
+        return {
+            "items": items,
+            "next_cursor": encode_cursor([items[-1]["created_at"], items[-1]["id"]]) if has_next and items else None,
+            "prev_cursor": encode_cursor([items[0]["created_at"], items[0]["id"]], backward=True)
+            if has_prev and items else None,
+            "last_cursor": LAST_PAGE_CURSOR,
+            "has_next": has_next,
+            "has_prev": has_prev,
+        }
+
+    async def count(self, stream: LogStream, filters: Dict[str, Any], since: Optional[datetime] = None) -> int:
+        """统计日志条数，指定since时只访问该时间之后的分区"""
+        conn = get_connection()
+        conditions = [f"{column} = ?" for column in filters]
+        params: List[Any] = list(filters.values())
+        if since is not None:
+            conditions.append("created_at >= ?")
+            params.append(self._to_db_time(since, conn))
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        total = 0
+        for _, table in await self._partitions_since(stream, since):
+            rows = await fetch_all(f"SELECT COUNT(*) AS total FROM {table}{where}", params, conn)
+            total += rows[0]["total"]
+        return total
+
+    async def delete_for_owner(self, stream: LogStream, owner_id):
+        """删除某个配置/域名在所有分区中的日志"""
+        for _, table in await self.partitions(stream):
+            await execute(f"DELETE FROM {table} WHERE {stream.owner_column} = ?", [stream.owner_value(owner_id)])
+
+    # ---------- 保留策略 ----------
+
+    async def compact(self, retention_months: int) -> Dict[str, Any]:
+        """
+        删除超出保留期的分区，并清理不再被引用的字典消息
+
+        只清理 last_used 早于 MESSAGE_PRUNE_GRACE 的消息：各工作进程缓存字典ID不超过
+        MESSAGE_CACHE_TTL，取得ID时刷新 last_used，仍可能被使用的消息不会被清理。
+        只删除早于当月的分区，写入当月日志不会用到被删除的分区；使用了其他分区缓存的写入
+        失败后清空缓存重试。
+
+        Args:
+            retention_months: 保留最近几个月的日志（含当月），0表示不删除
+
+        Returns:
+            Dict: 执行结果
+        """
+        conn = get_connection()
+        dropped: List[str] = []
+        if retention_months > 0:
+            oldest_kept = _shift_months(month_key(datetime.now(timezone.utc)), -(retention_months - 1))
+            for stream in (DDNS_LOGS, TASK_LOGS):
+                for month, table in await self.partitions(stream):
+                    if month < oldest_kept:
+                        await execute(f"DROP TABLE IF EXISTS {table}")
+                        self._partitions.discard(table)
+                        dropped.append(table)
+
+        cutoff = self._to_db_time(datetime.now(timezone.utc) - MESSAGE_PRUNE_GRACE, conn)
+        tables = [table for stream in (DDNS_LOGS, TASK_LOGS) for _, table in await self.partitions(stream)]
+        if tables:
+            referenced = " UNION ".join(f"SELECT message_id FROM {table}" for table in tables)
+            result = await execute(
+                f"DELETE FROM {MESSAGES_TABLE} WHERE last_used < ? AND id NOT IN ({referenced})", [cutoff]
+            )
+        else:
+            result = await execute(f"DELETE FROM {MESSAGES_TABLE} WHERE last_used < ?", [cutoff])
+        pruned = result[0] if isinstance(result, tuple) else 0
+
+        if dropped:
+            logger.info(f"日志压缩完成，删除过期分区: {', '.join(dropped)}，清理字典消息 {pruned} 条")
+        return {
+            'success': True,
+            'message': f'删除 {len(dropped)} 个过期分区，清理 {pruned} 条字典消息',
+            'dropped': dropped,
+            'pruned_messages': pruned
+        }
+
+
+def ddns_log_to_dict(row: Dict[str, Any]) -> Dict[str, Any]:
+    """DDNS日志行转换为接口返回格式"""
+    return {
+        "id": row["id"],
+        "ddns_config_id": str(row["ddns_config_id"]),
+        "old_ip": row["old_ip"],
+        "new_ip": row["new_ip"],
+        "status": row["status"],
+        "message": row["message"] or "",
+        "created_at": row["created_at"].isoformat()
+    }
+
+
+# 全局日志存储实例
+log_store = LogStore()
@@ -0,0 +1,363 @@
+"""解析记录批量导入导出服务"""
+import asyncio
+import codecs
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from app.config.settings import settings
+from app.models import DNSRecord, Domain, RecordType
+from app.providers.base import get_provider_instance
+from app.record_values import normalize_record_value
+from app.services.domain_summary_service import domain_summary_service
+from app.zone_files import (
+    WRITERS, ZONE_FORMAT_JSON, ZoneFileError, ZoneIssue, ZoneRecord,
+    create_parser, parse_json_records, relative_name, validate_record, validate_records
+)
+
+logger = logging.getLogger(__name__)
+
+IMPORT_MODE_MERGE = "merge"
+IMPORT_MODE_REPLACE = "replace"
+IMPORT_MODES = (IMPORT_MODE_MERGE, IMPORT_MODE_REPLACE)
+
+# 每批并发调用服务商接口的记录数
+IMPORT_BATCH_SIZE = 20
+
+# 导出时每次从数据库读取的记录数
+EXPORT_FETCH_SIZE = 500
+
+# 预览时每类变更最多列出的记录数
+PLAN_PREVIEW_LIMIT = 200
+
+RecordKey = Tuple[str, int, str]
+
+
+def _record_key(name: str, record_type: int, value: str, zone: str) -> RecordKey:
+    return relative_name(name, zone), int(record_type), normalize_record_value(record_type, value)
+
+
+def _describe_local(record: DNSRecord, zone: str) -> Dict[str, Any]:
+    return {
+        "id": record.id,
+        "name": relative_name(record.name, zone),
+        "type": RecordType(record.type).name,
+        "value": record.value,
+        "ttl": record.ttl,
+        "priority": record.priority,
+    }
+
+
+@dataclass
+class ImportPlan:
+    """导入文件与当前解析记录的差异"""
+    mode: str
+    creates: List[ZoneRecord] = field(default_factory=list)
+    updates: List[Tuple[DNSRecord, ZoneRecord]] = field(default_factory=list)
+    deletes: List[DNSRecord] = field(default_factory=list)
+    unchanged: int = 0
+    issues: List[ZoneIssue] = field(default_factory=list)
+
+    @property
+    def total_changes(self) -> int:
+        return len(self.creates) + len(self.updates) + len(self.deletes)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "create": len(self.creates),
+            "update": len(self.updates),
+            "delete": len(self.deletes),
+            "unchanged": self.unchanged,
+            "issues": len(self.issues),
+        }
+
+    def to_dict(self, zone: str, limit: int = PLAN_PREVIEW_LIMIT) -> Dict[str, Any]:
+        """预览：变更摘要与各类变更的记录（每类最多limit条）"""
+        return {
+            **self.summary(),
+            "creates": [record.to_dict() for record in self.creates[:limit]],
+            "updates": [
+                {"before": _describe_local(local, zone), "after": record.to_dict()}
+                for local, record in self.updates[:limit]
+            ],
+            "deletes": [_describe_local(local, zone) for local in self.deletes[:limit]],
+            "issue_list": [issue.to_dict() for issue in self.issues[:limit]],
+            "truncated": any(len(items) > limit for items in (self.creates, self.updates, self.deletes, self.issues)),
+        }
+
+
+class RecordImportService:
+    """
+    BIND区域文件 / CSV / JSON 的导入导出
+
+    导入分三步：逐行解析并整体校验 -> 与本地解析记录比对得出差异（可只预览）->
+    按批次并发调用服务商接口写入，成功的记录批量写入本地数据库，每批输出一次进度。
+    记录按 (名称, 类型, 规范化记录值) 匹配，同一名称可以有多个记录值。
+    """
+
+    # ---------- 解析 ----------
+
+    async def parse(
+        self,
+        domain: Domain,
+        zone_format: str,
+        chunks: AsyncIterator[bytes]
+    ) -> Tuple[List[ZoneRecord], List[ZoneIssue]]:
+        """
+        从请求体分块解析记录（BIND与CSV逐行解析，JSON整体解析）
+
+        Raises:
+            ZoneFileError: 文件无法解析或记录数超过上限
+        """
+        max_records = settings.record_import_max_records
+        if zone_format == ZONE_FORMAT_JSON:
+            body = b"".join([chunk async for chunk in chunks])
+            try:
+                data = json.loads(body.decode("utf-8-sig"))
+            except (UnicodeDecodeError, ValueError) as e:
+                raise ZoneFileError(f"JSON格式无效: {e}")
+            records, issues = parse_json_records(data, domain.name)
+        else:
+            parser = create_parser(zone_format, domain.name)
+            records = []
+            async for line in self._iter_lines(chunks):
+                records.extend(parser.feed(line))
+                if len(records) > max_records:
+                    raise ZoneFileError(f"记录数超过上限 {max_records}")
+            records.extend(parser.close())
+            issues = parser.issues
+
+        if len(records) > max_records:
+            raise ZoneFileError(f"记录数超过上限 {max_records}")
+        return self._validate(records, issues)
+
+    @staticmethod
+    async def _iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+        """按行切分请求体（UTF-8，可带BOM）"""
+        decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        pending = ""
+        try:
+            async for chunk in chunks:
+                pending += decoder.decode(chunk)
+                *lines, pending = pending.split("\n")
+                for line in lines:
+                    yield line
+            pending += decoder.decode(b"", final=True)
+        except UnicodeDecodeError as e:
+            raise ZoneFileError(f"文件不是UTF-8编码: {e}")
+        if pending:
+            yield pending
+
+    @staticmethod
+    def _validate(
+        records: List[ZoneRecord],
+        issues: List[ZoneIssue]
+    ) -> Tuple[List[ZoneRecord], List[ZoneIssue]]:
+        """逐条校验并去掉文件内重复的记录，再整体校验"""
+        valid: List[ZoneRecord] = []
+        seen = set()
+        for record in records:
+            problem = validate_record(record)
+            if problem:
+                issues.append(ZoneIssue(record.line, problem, skipped=True))
+                continue
+            key = (record.name, int(record.type), normalize_record_value(record.type, record.value))
+            if key in seen:
+                issues.append(ZoneIssue(record.line, f"重复的记录: {record.name} {record.type.name}", skipped=True))
+                continue
+            seen.add(key)
+            valid.append(record)
+        valid, conflicts = validate_records(valid)
+        issues.extend(conflicts)
+        issues.sort(key=lambda issue: issue.line)
+        return valid, issues
+
+    # ---------- 比对 ----------
+
+    async def plan(
+        self,
+        domain: Domain,
+        records: List[ZoneRecord],
+        issues: List[ZoneIssue],
+        mode: str = IMPORT_MODE_MERGE
+    ) -> ImportPlan:
+        """
+        与本地解析记录比对
+
+        merge只新增和更新；replace还会删除文件中没有的记录（根域名NS记录除外）。
+        """
+        zone = domain.name
+        local_records = await DNSRecord.filter(domain_id=domain.id).order_by('id')
+        local_by_key: Dict[RecordKey, DNSRecord] = {}
+        for local in local_records:
+            local_by_key.setdefault(_record_key(local.name, local.type, local.value, zone), local)
+
+        plan = ImportPlan(mode=mode, issues=issues)
+        matched = set()
+        for record in records:
+            key = _record_key(record.name, record.type, record.value, zone)
+            local = local_by_key.get(key)
+            if local is None:
+                plan.creates.append(record)
+                continue
+            matched.add(local.id)
+            if local.ttl != record.ttl or (record.type == RecordType.MX and local.priority != record.priority):
+                plan.updates.append((local, record))
+            else:
+                plan.unchanged += 1
+
+        if mode == IMPORT_MODE_REPLACE:
+            plan.deletes = [
+                local for local in local_records
+                if local.id not in matched
+                and not (local.type == RecordType.NS and relative_name(local.name, zone) == "@")
+            ]
+        return plan
+
+    # ---------- 写入 ----------
+
+    async def apply(self, domain: Domain, plan: ImportPlan) -> AsyncIterator[Dict[str, Any]]:
+        """
+        执行变更，逐批产出进度事件
+
+        顺序为删除、更新、新增（先删除可以避免替换时与旧记录冲突）；
+        单条失败不影响其他记录，失败的记录以error事件报告。
+        """
+        provider = get_provider_instance(domain.provider)
+        if provider is None:
+            raise ZoneFileError("不支持的服务商类型")
+
+        total = plan.total_changes
+        counts = {"done": 0, "succeeded": 0, "failed": 0}
+        yield {"type": "plan", **plan.summary()}
+
+        steps = (
+            ("delete", plan.deletes, self._delete_batch),
+            ("update", plan.updates, self._update_batch),
+            ("create", plan.creates, self._create_batch),
+        )
+        try:
+            for action, items, run_batch in steps:
+                for start in range(0, len(items), IMPORT_BATCH_SIZE):
+                    batch = items[start:start + IMPORT_BATCH_SIZE]
+                    errors = await run_batch(provider, domain, batch)
+                    counts["done"] += len(batch)
+                    counts["failed"] += len(errors)
+                    counts["succeeded"] += len(batch) - len(errors)
+                    for error in errors:
+                        yield {"type": "error", "action": action, **error}
+                    yield {"type": "progress", "action": action, "total": total, **counts}
+        finally:
+            await domain_summary_service.refresh(domain.id)
+
+        logger.info(
+            f"域名 {domain.name} 导入完成: 成功 {counts['succeeded']} 条，失败 {counts['failed']} 条"
+        )
+        yield {"type": "done", "total": total, **counts}
+
+    @staticmethod
+    def _api_record(name: str, record: ZoneRecord) -> Dict[str, Any]:
+        api_record = {
+            "name": name,
+            "type": record.type.name,
+            "value": record.value,
+            "ttl": record.ttl,
+        }
+        if record.priority is not None:
+            api_record["priority"] = record.priority
+        return api_record
+
+    async def _create_batch(self, provider, domain: Domain, batch: List[ZoneRecord]) -> List[Dict[str, Any]]:
+        async def create(record: ZoneRecord):
+            return await provider.add_record(domain.name, self._api_record(record.name, record))
+
+        results = await asyncio.gather(*[create(record) for record in batch], return_exceptions=True)
+        created, errors = [], []
+        for record, result in zip(batch, results):
+            if isinstance(result, Exception) or not result:
+                errors.append({"record": record.to_dict(), "message": str(result) if result else "服务商未返回记录ID"})
+                continue
+            created.append(DNSRecord(
+                domain_id=domain.id,
+                name=record.name,
+                type=record.type,
+                value=record.value,
+                ttl=record.ttl,
+                priority=record.priority,
+                external_id=str(result),
+                # bulk_create不经过save，规范化记录值需要自行填写
+                value_normalized=normalize_record_value(record.type, record.value),
+            ))
+        if created:
+            await DNSRecord.bulk_create(created)
+        return errors
+
+    async def _update_batch(
+        self,
+        provider,
+        domain: Domain,
+        batch: List[Tuple[DNSRecord, ZoneRecord]]
+    ) -> List[Dict[str, Any]]:
+        async def update(local: DNSRecord, record: ZoneRecord):
+            if not local.external_id:
+                raise ZoneFileError("记录缺少外部ID，无法更新")
+            return await provider.update_record(domain.name, local.external_id, self._api_record(local.name, record))
+
+        results = await asyncio.gather(*[update(local, record) for local, record in batch], return_exceptions=True)
+        updated, errors = [], []
+        for (local, record), result in zip(batch, results):
+            if isinstance(result, Exception) or not result:
+                errors.append({"record": record.to_dict(), "message": str(result) if result else "调用服务商API失败"})
+                continue
+            local.ttl = record.ttl
+            local.priority = record.priority
+            updated.append(local)
+        if updated:
+            await DNSRecord.bulk_update(updated, fields=['ttl', 'priority'])
+        return errors
+
+    async def _delete_batch(self, provider, domain: Domain, batch: List[DNSRecord]) -> List[Dict[str, Any]]:
+        async def delete(local: DNSRecord):
+            # 没有外部ID的记录只存在于本地
+            if not local.external_id:
+                return True
+            return await provider.delete_record(domain.name, local.external_id)
+
+        results = await asyncio.gather(*[delete(local) for local in batch], return_exceptions=True)
+        deleted, errors = [], []
+        for local, result in zip(batch, results):
+            if isinstance(result, Exception) or not result:
+                errors.append({
+                    "record": _describe_local(local, domain.name),
+                    "message": str(result) if result else "调用服务商API失败"
+                })
+                continue
+            deleted.append(local.id)
+        if deleted:
+            await DNSRecord.filter(id__in=deleted).delete()
+        return errors
+
+    # ---------- 导出 ----------
+
+    async def export(self, domain: Domain, zone_format: str) -> AsyncIterator[str]:
+        """按格式导出域名的解析记录（按 (name, id) 顺序分批读取数据库，边读边输出）"""
+        writer = WRITERS[zone_format](domain.name)
+        yield writer.header()
+        last: Optional[Tuple[str, int]] = None
+        while True:
+            query = DNSRecord.filter(domain_id=domain.id)
+            if last is not None:
+                query = query.filter(name__gte=last[0]).exclude(name=last[0], id__lte=last[1])
+            batch = await query.order_by('name', 'id').limit(EXPORT_FETCH_SIZE)
+            if batch:
+                yield "".join(writer.row(record) for record in batch)
+                last = (batch[-1].name, batch[-1].id)
+            if len(batch) < EXPORT_FETCH_SIZE:
+                break
+        yield writer.footer()
+
+
+# 全局解析记录导入导出服务实例
+record_import_service = RecordImportService()
@@ -0,0 +1,170 @@
+"""记录值反查与批量改指向服务"""
+import asyncio
+import ipaddress
+import logging
+from typing import Any, Dict, List, Optional
+
+from app.models import DNSRecord, RecordType
+from app.providers.base import get_provider_instance
+from app.record_values import normalize_record_value
+from app.services.domain_summary_service import domain_summary_service
+from app.zone_files import absolute_name
+
+logger = logging.getLogger(__name__)
+
+# 每个服务商每批并发写入的记录数
+REPOINT_BATCH_SIZE = 10
+
+
+class RecordReferenceService:
+    """按规范化记录值查找引用某个IP或主机名的全部记录，并可批量改为新值"""
+
+    async def find_references(self, value: str, record_type: Optional[RecordType] = None) -> List[DNSRecord]:
+        """
+        查找记录值等于value的所有记录（走(value_normalized, type)索引）
+
+        未指定记录类型时，依次按A/AAAA、TXT、主机名三种规则规范化后查询。
+        """
+        types = [record_type] if record_type is not None else list(RecordType)
+        candidates: Dict[str, List[RecordType]] = {}
+        for item in types:
+            candidates.setdefault(normalize_record_value(item, value), []).append(item)
+
+        records: List[DNSRecord] = []
+        for normalized, matched_types in candidates.items():
+            records.extend(await DNSRecord.filter(
+                value_normalized=normalized, type__in=matched_types
+            ).prefetch_related('domain__provider'))
+        records.sort(key=lambda record: (record.domain.name, record.name, record.id))
+        return records
+
+    def describe(self, record: DNSRecord) -> Dict[str, Any]:
+        """记录的展示信息"""
+        return {
+            "id": record.id,
+            "domain_id": record.domain_id,
+            "domain_name": record.domain.name,
+            "provider_id": record.domain.provider_id,
+            "provider_name": record.domain.provider.name,
+            "name": record.name,
+            "full_name": absolute_name(record.name, record.domain.name),
+            "type": record.type.name,
+            "value": record.value,
+            "ttl": record.ttl,
+        }
+
+    async def repoint(
+        self,
+        old_value: str,
+        new_value: str,
+        record_type: Optional[RecordType] = None,
+        dry_run: bool = False
+    ) -> Dict[str, Any]:
+        """
+        把所有指向old_value的记录改为new_value
+
+        按服务商分组并行执行，每个服务商内按批次并发调用更新接口，
+        单条失败不影响其他记录；成功的记录同步更新本地数据库。
+
+        Returns:
+            Dict: 执行结果，results中包含每条记录的处理情况
+        """
+        new_value = new_value.strip()
+        if not new_value:
+            return {'success': False, 'message': '新记录值不能为空'}
+
+        records = await self.find_references(old_value, record_type)
+        if not records:
+            return {'success': True, 'message': '没有找到引用该记录值的记录', 'total': 0,
+                    'updated': 0, 'failed': 0, 'results': []}
+
+        invalid = [record for record in records if not self._value_fits(record.type, new_value)]
+        if invalid:
+            types = sorted({record.type.name for record in invalid})
+            return {'success': False, 'message': f"新记录值不适用于 {', '.join(types)} 记录，请指定记录类型"}
+
+        if dry_run:
+            return {'success': True, 'message': f'共有 {len(records)} 条记录将被修改', 'total': len(records),
+                    'updated': 0, 'failed': 0, 'results': [self.describe(record) for record in records]}
+
+        by_provider: Dict[int, List[DNSRecord]] = {}
+        for record in records:
+            by_provider.setdefault(record.domain.provider_id, []).append(record)
+
+        grouped = await asyncio.gather(*[
+            self._repoint_provider(provider_records, new_value) for provider_records in by_provider.values()
+        ])
+        results = [result for provider_results in grouped for result in provider_results]
+
+        for domain_id in {record.domain_id for record in records}:
+            await domain_summary_service.refresh(domain_id)
+
+        updated = sum(1 for result in results if result['success'])
+        failed = len(results) - updated
+        logger.info(f"批量修改记录值 {old_value} -> {new_value}: 成功 {updated} 条，失败 {failed} 条")
+        return {
+            'success': failed == 0,
+            'message': f'已修改 {updated} 条记录' + (f'，{failed} 条失败' if failed else ''),
+            'total': len(results),
+            'updated': updated,
+            'failed': failed,
+            'results': results
+        }
+
+    @staticmethod
+    def _value_fits(record_type: RecordType, value: str) -> bool:
+        """A/AAAA记录的新值必须是对应版本的IP地址"""
+        if record_type not in (RecordType.A, RecordType.AAAA):
+            return True
+        try:
+            address = ipaddress.ip_address(value)
+        except ValueError:
+            return False
+        return address.version == (4 if record_type == RecordType.A else 6)
+
+    async def _repoint_provider(self, records: List[DNSRecord], new_value: str) -> List[Dict[str, Any]]:
+        """同一服务商的记录按批次更新"""
+        provider = get_provider_instance(records[0].domain.provider)
+        if provider is None:
+            return [self._result(record, False, '不支持的服务商类型') for record in records]
+
+        results = []
+        for start in range(0, len(records), REPOINT_BATCH_SIZE):
+            batch = records[start:start + REPOINT_BATCH_SIZE]
+            results.extend(await asyncio.gather(*[
+                self._repoint_record(provider, record, new_value) for record in batch
+            ]))
+        return results
+
+    async def _repoint_record(self, provider, record: DNSRecord, new_value: str) -> Dict[str, Any]:
+        if not record.external_id:
+            return self._result(record, False, '记录缺少外部ID，无法更新')
+
+        api_record = {
+            "name": record.name,
+            "type": record.type.name,
+            "value": new_value,
+            "ttl": record.ttl
+        }
+        # MX记录的优先级必须随更新一起提交，否则服务商会重置为默认值或拒绝请求
+        if record.priority is not None:
+            api_record["priority"] = record.priority
+        try:
+            if not await provider.update_record(record.domain.name, record.external_id, api_record):
+                return self._result(record, False, '调用服务商API失败')
+        except Exception as e:
+            logger.error(f"更新记录 {absolute_name(record.name, record.domain.name)} 失败: {e}")
+            return self._result(record, False, str(e))
+
+        record.value = new_value
+        await record.save(update_fields=['value', 'updated_at'])
+        return self._result(record, True, '更新成功')
+
+    def _result(self, record: DNSRecord, success: bool, message: str) -> Dict[str, Any]:
+        result = self.describe(record)
+        result.update({'success': success, 'message': message})
+        return result
+
+
+# 全局记录反查服务实例
+record_reference_service = RecordReferenceService()
@@ -0,0 +1,142 @@
+"""解析记录全局搜索服务"""
+import logging
+from typing import List, Optional
+
+from tortoise.expressions import Q
+
+from app.db_dialect import fetch_all, is_sqlite
+from app.models import DNSRecord, RecordType
+
+logger = logging.getLogger(__name__)
+
+SEARCH_TABLE = "dns_records_fts"
+
+# 三元组索引至少需要3个字符才能命中
+MIN_INDEXED_LENGTH = 3
+
+SEARCH_FIELDS = ('all', 'name', 'value')
+
+# 截取前N条之前先排序，与返回顺序及无索引扫描的结果一致
+RESULT_ORDER = "ORDER BY r.domain_id, r.name, r.id"
+
+
+def _escape_like(term: str) -> str:
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+class RecordSearchService:
+    """
+    跨域名搜索解析记录的名称与记录值（子串匹配，不区分大小写）
+
+    SQLite 使用 FTS5 trigram 外部内容表，PostgreSQL 使用 pg_trgm GIN 索引，
+    索引由迁移0005建立；不可用或搜索词过短时退化为 LIKE 扫描。
+    """
+
+    def __init__(self):
+        self._sqlite_index_available: Optional[bool] = None
+
+    async def _sqlite_index_ready(self) -> bool:
+        if self._sqlite_index_available is None:
+            rows = await fetch_all(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name = ?", [SEARCH_TABLE]
+            )
+            self._sqlite_index_available = bool(rows)
+            if not rows:
+                logger.warning("未找到解析记录搜索索引，记录搜索将使用LIKE扫描")
+        return self._sqlite_index_available
+
+    async def search(
+        self,
+        term: str,
+        field: str = 'all',
+        domain_id: Optional[int] = None,
+        record_type: Optional[RecordType] = None,
+        limit: int = 50
+    ) -> List[DNSRecord]:
+        """
+        搜索解析记录
+
+        Args:
+            term: 搜索词，如 "cdn" 或 "10.1.2.3"
+            field: 搜索范围，all / name / value
+            domain_id: 仅搜索指定域名
+            record_type: 仅搜索指定记录类型
+            limit: 最多返回的记录数
+
+        Returns:
+            List[DNSRecord]: 按域名、记录名称排序的记录（已加载所属域名）
+        """
+        term = term.strip()
+        if not term:
+            return []
+
+        if len(term) < MIN_INDEXED_LENGTH:
+            ids = None
+        elif is_sqlite():
+            ids = await self._search_fts(term, field, domain_id, record_type, limit) \
+                if await self._sqlite_index_ready() else None
+        else:
+            ids = await self._search_trgm(term, field, domain_id, record_type, limit)
+
+        if ids is None:
+            return await self._search_like(term, field, domain_id, record_type, limit)
+        if not ids:
+            return []
+        return await DNSRecord.filter(id__in=ids).order_by('domain_id', 'name', 'id').prefetch_related('domain')
+
+    async def _search_fts(self, term, field, domain_id, record_type, limit) -> List[int]:
+        """SQLite FTS5 trigram：MATCH 短语即为子串匹配"""
+        phrase = '"' + term.replace('"', '""') + '"'
+        columns = {'all': '{name value}', 'name': 'name', 'value': 'value'}[field]
+
+        # CROSS JOIN 固定以全文索引为外层，避免按domain_id遍历记录后逐行MATCH
+        sql = (
+            f"SELECT r.id FROM {SEARCH_TABLE} CROSS JOIN dns_records r ON r.id = {SEARCH_TABLE}.rowid "
+            f"WHERE {SEARCH_TABLE} MATCH ?"
+        )
+        values = [f"{columns} : {phrase}"]
+        sql, values = self._append_filters(sql, values, domain_id, record_type)
+        rows = await fetch_all(f"{sql} {RESULT_ORDER} LIMIT ?", values + [limit])
+        return [row['id'] for row in rows]
+
+    async def _search_trgm(self, term, field, domain_id, record_type, limit) -> List[int]:
+        """PostgreSQL pg_trgm：ILIKE '%x%' 走GIN三元组索引"""
+        pattern = f"%{_escape_like(term)}%"
+        conditions = {
+            'all': ("(r.name ILIKE ? OR r.value ILIKE ?)", [pattern, pattern]),
+            'name': ("r.name ILIKE ?", [pattern]),
+            'value': ("r.value ILIKE ?", [pattern]),
+        }
+        condition, values = conditions[field]
+        sql, values = self._append_filters(f"SELECT r.id FROM dns_records r WHERE {condition}", values,
+                                           domain_id, record_type)
+        rows = await fetch_all(f"{sql} {RESULT_ORDER} LIMIT ?", values + [limit])
+        return [row['id'] for row in rows]
+
+    @staticmethod
+    def _append_filters(sql, values, domain_id, record_type):
+        if domain_id is not None:
+            sql += " AND r.domain_id = ?"
+            values = values + [domain_id]
+        if record_type is not None:
+            sql += " AND r.type = ?"
+            values = values + [int(record_type)]
+        return sql, values
+
+    async def _search_like(self, term, field, domain_id, record_type, limit) -> List[DNSRecord]:
+        """无索引可用时的扫描查询"""
+        conditions = {
+            'all': Q(name__icontains=term) | Q(value__icontains=term),
+            'name': Q(name__icontains=term),
+            'value': Q(value__icontains=term),
+        }
+        query = DNSRecord.filter(conditions[field])
+        if domain_id is not None:
+            query = query.filter(domain_id=domain_id)
+        if record_type is not None:
+            query = query.filter(type=record_type)
+        return await query.order_by('domain_id', 'name', 'id').limit(limit).prefetch_related('domain')
+
+
+# 全局记录搜索服务实例
+record_search_service = RecordSearchService()
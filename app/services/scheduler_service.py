@@ -1,11 +1,18 @@
 """定时任务调度服务"""
+import asyncio
 import logging
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
+from tortoise import Tortoise
+from app.config import settings
+from app.db_dialect import is_postgres
 from app.services.sync_service import DomainSyncService
 
 logger = logging.getLogger(__name__)
 
+# 多副本共用PostgreSQL时，持有该会话级咨询锁的副本为调度主副本，其他副本的调度器保持暂停
+SCHEDULER_LOCK_ID = 0x444E5353
+
 
 class SchedulerService:
     """定时任务调度服务"""
@@ -14,6 +21,9 @@ class SchedulerService:
         self.scheduler = AsyncIOScheduler()
         self.sync_service = DomainSyncService()
         self.ddns_service = None
+        self.is_leader = False
+        self._leader_task = None
+        self._background_tasks = set()
         self._setup_jobs()
     
     def _setup_jobs(self):
@@ -36,6 +46,15 @@ class SchedulerService:
             replace_existing=True
         )
         
+        # 定期删除超出保留期的日志分区
+        self.scheduler.add_job(
+            func=self.compact_logs_job,
+            trigger=IntervalTrigger(hours=settings.log_compact_interval_hours),
+            id='compact_logs',
+            name='日志压缩任务',
+            replace_existing=True
+        )
+        
         logger.info("定时任务设置完成")
     
     async def sync_domains_job(self):
@@ -51,30 +70,136 @@ class SchedulerService:
         """检查证书状态任务"""
         logger.info("开始执行证书状态检查任务")
         try:
-            # 这里可以添加证书状态检查逻辑
-            # 暂时只是记录日志
-            logger.info("证书状态检查任务执行完成")
+            from app.services.certificate_scanner import certificate_scanner
+            report = await certificate_scanner.scan()
+            logger.info(f"证书状态检查任务执行完成，状态变更: {report['transitions']}")
         except Exception as e:
             logger.error(f"证书状态检查任务执行失败: {e}")
     
+    async def compact_logs_job(self):
+        """日志压缩任务"""
+        logger.info("开始执行日志压缩任务")
+        try:
+            from app.services.log_store import log_store
+            result = await log_store.compact(settings.log_retention_months)
+            logger.info(f"日志压缩任务执行完成: {result['message']}")
+        except Exception as e:
+            logger.error(f"日志压缩任务执行失败: {e}")
+    
     def start(self):
-        """启动调度器"""
-        if not self.scheduler.running:
+        """
+        启动调度器
+
+        PostgreSQL上可能有多个副本，调度器以暂停状态启动，取得调度锁成为主副本后才执行任务；
+        SQLite为单进程部署，直接执行。
+        """
+        if self.scheduler.running:
+            return
+        if is_postgres():
+            self.scheduler.start(paused=True)
+            self._leader_task = asyncio.create_task(self._leader_loop())
+            logger.info("定时任务调度器已启动，等待成为调度主副本")
+        else:
+            self.is_leader = True
             self.scheduler.start()
             logger.info("定时任务调度器已启动")
     
     def stop(self):
         """停止调度器"""
+        if self._leader_task is not None:
+            self._leader_task.cancel()
+            self._leader_task = None
         if self.scheduler.running:
             self.scheduler.shutdown()
             logger.info("定时任务调度器已停止")
     
+    async def _leader_loop(self):
+        """竞争调度锁；锁由专用连接的会话持有，副本退出或连接断开时锁随会话释放，由其他副本接替"""
+        conn = Tortoise.get_connection('default')
+        interval = settings.scheduler_leader_interval
+        while True:
+            try:
+                async with conn.acquire_connection() as connection:
+                    if await connection.fetchval(f"SELECT pg_try_advisory_lock({SCHEDULER_LOCK_ID})"):
+                        try:
+                            await self._lead(connection, interval)
+                        finally:
+                            self._step_down()
+                            try:
+                                await connection.execute(f"SELECT pg_advisory_unlock({SCHEDULER_LOCK_ID})")
+                            except Exception:
+                                pass  # 连接已断开时锁已随会话释放
+            except Exception as e:
+                logger.error(f"调度主副本选举失败: {e}")
+            await asyncio.sleep(interval)
+    
+    async def _lead(self, connection, interval: int):
+        """作为主副本执行定时任务，按间隔检查连接并重新加载任务"""
+        self.is_leader = True
+        await self.reload_jobs()
+        self.scheduler.resume()
+        logger.info("本副本成为调度主副本，开始执行定时任务")
+        while True:
+            await asyncio.sleep(interval)
+            # 连接断开时抛出异常，主副本让出
+            await connection.fetchval("SELECT 1")
+            await self.reload_jobs()
+    
+    def _step_down(self):
+        if self.is_leader:
+            self.is_leader = False
+            if self.scheduler.running:
+                self.scheduler.pause()
+            logger.warning("本副本不再是调度主副本，定时任务已暂停")
+    
+    async def reload_jobs(self):
+        """按数据库重新加载DDNS与区域镜像任务（配置可能由其他副本的接口修改）"""
+        from app.models import DDNSConfig, ZoneMirror
+        from app.services.zone_migration_service import zone_migration_service
+
+        if self.ddns_service is None:
+            return
+        wanted = {
+            f"ddns_update_{config.id}": (config, config.update_interval)
+            for config in await DDNSConfig.filter(enabled=True, update_method="auto")
+        }
+        wanted.update({
+            f"zone_mirror_{mirror.id}": (mirror, mirror.interval)
+            for mirror in await ZoneMirror.filter(enabled=True)
+        })
+
+        existing = set()
+        for job in self.scheduler.get_jobs():
+            if not job.id.startswith(("ddns_update_", "zone_mirror_")):
+                continue
+            entry = wanted.get(job.id)
+            # 配置已删除、停用或修改了间隔的任务删除后按新配置添加
+            if entry is None or job.trigger.interval.total_seconds() != entry[1]:
+                self.scheduler.remove_job(job.id)
+            else:
+                existing.add(job.id)
+
+        for job_id, (entity, _) in wanted.items():
+            if job_id in existing:
+                continue
+            if job_id.startswith("ddns_update_"):
+                await self.ddns_service.add_ddns_job(entity)
+            else:
+                zone_migration_service.add_mirror_job(entity)
+    
     def get_jobs(self):
         """获取所有任务"""
         return self.scheduler.get_jobs()
     
     def add_manual_sync_job(self, provider_id: int):
         """添加手动同步任务"""
+        if not self.is_leader:
+            # 非主副本的调度器处于暂停状态，直接在本副本后台执行
+            task = asyncio.create_task(self.manual_sync_job(provider_id))
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
+            logger.info(f"后台执行手动同步: 服务商{provider_id}")
+            return
         job_id = f'manual_sync_{provider_id}'
         self.scheduler.add_job(
             func=self.manual_sync_job,
@@ -113,6 +238,14 @@ class SchedulerService:
         except Exception as e:
             logger.error(f"DDNS服务初始化失败: {str(e)}")
     
+    async def initialize_zone_mirrors(self):
+        """加载区域镜像定时任务"""
+        try:
+            from app.services.zone_migration_service import zone_migration_service
+            await zone_migration_service.load_mirror_jobs(self.scheduler)
+        except Exception as e:
+            logger.error(f"区域镜像任务初始化失败: {str(e)}")
+    
     def get_ddns_service(self):
         """获取DDNS服务实例"""
         return self.ddns_service
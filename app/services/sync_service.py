@@ -3,10 +3,9 @@ import logging
 from typing import List, Dict, Any
 from datetime import datetime
 from app.models import Provider, Domain, DNSRecord, RecordType
-from app.providers.huawei import HuaweiProvider
-from app.providers.aliyun import AliyunProvider
-from app.providers.tencent import TencentProvider
-from app.providers.cloudflare import CloudflareProvider
+from app.providers.base import get_provider_instance
+from app.services.domain_summary_service import domain_summary_service
+from app.services.entity_cache import entity_cache
 
 logger = logging.getLogger(__name__)
 
@@ -14,14 +13,6 @@ logger = logging.getLogger(__name__)
 class DomainSyncService:
     """域名同步服务"""
     
-    def __init__(self):
-        self.providers_map = {
-            1: HuaweiProvider,  # 华为云
-            2: AliyunProvider,  # 阿里云
-            3: TencentProvider,  # 腾讯云
-            4: CloudflareProvider,  # Cloudflare
-        }
-    
     async def sync_all_providers(self):
         """同步所有服务商的域名"""
         logger.info("开始同步所有服务商的域名")
@@ -38,6 +29,7 @@ class DomainSyncService:
                     # 更新服务商状态为失败
                     provider.status = "failed"
                     await provider.save()
+                    await entity_cache.invalidate_provider(provider.id)
             
             logger.info("所有服务商域名同步完成")
             
@@ -49,18 +41,12 @@ class DomainSyncService:
         logger.info(f"开始同步服务商 {provider.name} 的域名")
         
         try:
-            # 创建服务商实例
-            provider_class = self.providers_map.get(provider.type)
-            if not provider_class:
+            # 获取服务商实例
+            provider_instance = get_provider_instance(provider)
+            if not provider_instance:
                 logger.error(f"不支持的服务商类型: {provider.type}")
                 return
             
-            provider_instance = provider_class(
-                access_key=provider.access_key,
-                secret_key=provider.secret_key,
-                region=provider.region
-            )
-            
             # 获取域名列表
             domains_data = await provider_instance.get_domains()
             logger.info(f"服务商 {provider.name} 获取到 {len(domains_data)} 个域名")
@@ -73,6 +59,7 @@ class DomainSyncService:
             provider.status = "connected"
             provider.last_test_at = datetime.now()
             await provider.save()
+            await entity_cache.invalidate_provider(provider.id)
             
             logger.info(f"服务商 {provider.name} 域名同步完成")
             
@@ -81,6 +68,7 @@ class DomainSyncService:
             # 更新服务商状态为失败
             provider.status = "failed"
             await provider.save()
+            await entity_cache.invalidate_provider(provider.id)
             raise
     
     async def sync_domain(self, provider: Provider, domain_data: Dict[str, Any]):
@@ -114,11 +102,7 @@ class DomainSyncService:
             
             # 获取该域名的DNS记录
             try:
-                provider_instance = self.providers_map[provider.type](
-                    access_key=provider.access_key,
-                    secret_key=provider.secret_key,
-                    region=provider.region
-                )
+                provider_instance = get_provider_instance(provider)
                 
                 records_data = await provider_instance.get_records(domain_name)
                 logger.info(f"域名 {domain_name} 获取到 {len(records_data)} 条DNS记录")
@@ -170,27 +154,35 @@ class DomainSyncService:
                 }
             
             # 更新或创建记录
+            changed = False
             for key, record_data in new_records_map.items():
                 if key in existing_records_map:
-                    # 更新现有记录
+                    # 更新现有记录（仅在内容变化时写库）
                     existing_record = existing_records_map[key]
-                    await existing_record.update_from_dict({
-                        'value': record_data['value'],
-                        'ttl': record_data['ttl'],
-                        'priority': record_data['priority'],
-                        'external_id': record_data['external_id']
-                    })
+                    updates = {
+                        field: record_data[field]
+                        for field in ('value', 'ttl', 'priority', 'external_id')
+                        if getattr(existing_record, field) != record_data[field]
+                    }
+                    if updates:
+                        existing_record.update_from_dict(updates)
+                        await existing_record.save(update_fields=list(updates))
+                        changed = True
                 else:
                     # 创建新记录
                     await DNSRecord.create(
                         domain=domain,
                         **record_data
                     )
+                    changed = True
             
             # 删除不再存在的记录
             for key, existing_record in existing_records_map.items():
                 if key not in new_records_map:
                     await existing_record.delete()
+                    changed = True
+            
+            await domain_summary_service.refresh(domain.id, synced=True, changed=changed)
             
             logger.info(f"域名 {domain.name} 的DNS记录同步完成")
             
@@ -0,0 +1,551 @@
+"""跨服务商区域迁移与镜像服务
+
+从源服务商读取整个区域，按目标服务商的限制转换（不支持的记录类型、根域名CNAME、
+TTL范围），与目标区域比较后只提交差异，分批并发调用目标服务商接口。
+写入完成后可直接向区域的权威DNS查询，确认记录已生效。
+
+镜像模式按间隔重复执行：源区域记录的摘要与上次相同时不再读取目标区域，
+有变化时只提交与目标区域的差异。
+"""
+import asyncio
+import hashlib
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import dns.asyncquery
+import dns.asyncresolver
+import dns.exception
+import dns.flags
+import dns.message
+import dns.name
+import dns.rdatatype
+
+from app.models import Provider, RecordType, ZoneMirror
+from app.providers.base import BaseProvider, get_provider_instance
+from app.record_values import normalize_record_value
+from app.zone_files import ZoneRecord, normalize_provider_records
+
+logger = logging.getLogger(__name__)
+
+# 每批并发调用目标服务商接口的记录数
+MIGRATION_BATCH_SIZE = 20
+
+# 权威DNS校验的并发查询数与单次查询超时（秒）
+VERIFY_CONCURRENCY = 10
+VERIFY_TIMEOUT = 3.0
+
+# 预览时每类变更最多列出的记录数
+PLAN_PREVIEW_LIMIT = 200
+
+MIRROR_STATUS_SUCCESS = "success"
+MIRROR_STATUS_UNCHANGED = "unchanged"
+MIRROR_STATUS_FAILED = "failed"
+
+RecordKey = Tuple[str, int, str]
+
+
+class ZoneMigrationError(Exception):
+    """区域无法迁移"""
+    pass
+
+
+def _record_key(record: ZoneRecord) -> RecordKey:
+    return record.name.lower(), int(record.type), normalize_record_value(record.type, record.value)
+
+
+def _is_apex_ns(record: ZoneRecord) -> bool:
+    """根域名NS记录由各服务商按自己的权威服务器维护，不迁移也不删除"""
+    return record.type == RecordType.NS and record.name == "@"
+
+
+def zone_digest(records: Iterable[ZoneRecord]) -> str:
+    """区域记录的摘要，与记录顺序和记录ID无关"""
+    lines = sorted(
+        f"{name}\t{record_type}\t{value}\t{record.ttl}\t{record.priority}"
+        for record in records
+        for name, record_type, value in [_record_key(record)]
+    )
+    return hashlib.sha256("\n".join(lines).encode()).hexdigest()
+
+
+def map_records(records: List[ZoneRecord], target: BaseProvider) -> Tuple[List[ZoneRecord], List[str]]:
+    """
+    按目标服务商的限制转换记录
+
+    根域名NS、不支持的记录类型和目标不允许的根域名CNAME跳过，TTL调整到目标允许的范围。
+
+    Returns:
+        (转换后的记录, 说明)
+    """
+    mapped, notes = [], []
+    for record in records:
+        label = f"{record.name} {record.type.name}"
+        if _is_apex_ns(record):
+            notes.append(f"{label} {record.value}: 根域名NS记录由服务商管理，已跳过")
+            continue
+        if record.type not in target.SUPPORTED_TYPES:
+            notes.append(f"{label}: 目标服务商不支持该记录类型，已跳过")
+            continue
+        if record.type == RecordType.CNAME and record.name == "@" and not target.APEX_CNAME:
+            notes.append(f"{label}: 目标服务商不支持根域名CNAME，已跳过")
+            continue
+        ttl = target.clamp_ttl(record.ttl)
+        if ttl != record.ttl:
+            notes.append(f"{label}: TTL {record.ttl} 超出目标服务商范围，调整为 {ttl}")
+        mapped.append(ZoneRecord(
+            name=record.name,
+            type=record.type,
+            value=record.value,
+            ttl=ttl,
+            priority=record.priority,
+        ))
+    return mapped, notes
+
+
+@dataclass
+class MigrationPlan:
+    """迁移计划：需要在目标区域新增、修改、删除的记录"""
+    source_zone: str
+    target_zone: str
+    creates: List[ZoneRecord] = field(default_factory=list)
+    # (目标记录ID, 新内容)
+    updates: List[Tuple[str, ZoneRecord]] = field(default_factory=list)
+    deletes: List[ZoneRecord] = field(default_factory=list)
+    unchanged: int = 0
+    notes: List[str] = field(default_factory=list)
+    source_digest: Optional[str] = None
+    # 迁移后目标区域应有的记录，用于权威DNS校验
+    expected: List[ZoneRecord] = field(default_factory=list)
+
+    @property
+    def empty(self) -> bool:
+        return not (self.creates or self.updates or self.deletes)
+
+    def summary(self) -> Dict[str, int]:
+        return {
+            "create": len(self.creates),
+            "update": len(self.updates),
+            "delete": len(self.deletes),
+            "unchanged": self.unchanged,
+            "skipped": len(self.notes),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "source_zone": self.source_zone,
+            "target_zone": self.target_zone,
+            "summary": self.summary(),
+            "create": [record.to_dict() for record in self.creates[:PLAN_PREVIEW_LIMIT]],
+            "update": [
+                {"id": record_id, **record.to_dict()}
+                for record_id, record in self.updates[:PLAN_PREVIEW_LIMIT]
+            ],
+            "delete": [
+                {"id": record.external_id, **record.to_dict()}
+                for record in self.deletes[:PLAN_PREVIEW_LIMIT]
+            ],
+            "notes": self.notes[:PLAN_PREVIEW_LIMIT],
+        }
+
+
+class AuthoritativeVerifier:
+    """直接向区域的权威DNS查询，确认记录已生效（不经过递归解析的缓存）"""
+
+    def __init__(self, timeout: float = VERIFY_TIMEOUT, concurrency: int = VERIFY_CONCURRENCY):
+        self.timeout = timeout
+        self.concurrency = concurrency
+
+    async def nameservers_for(self, zone: str) -> List[str]:
+        """查询区域NS记录并解析为IP地址"""
+        resolver = dns.asyncresolver.Resolver()
+        resolver.lifetime = self.timeout * 2
+        answer = await resolver.resolve(zone, "NS")
+        addresses = []
+        for rdata in answer:
+            host = rdata.target.to_text()
+            try:
+                addresses.extend(item.address for item in await resolver.resolve(host, "A"))
+            except dns.exception.DNSException as e:
+                logger.warning(f"解析权威DNS地址失败: {host}, 错误: {e}")
+        if not addresses:
+            raise ZoneMigrationError(f"未找到区域 {zone} 的权威DNS地址")
+        return addresses
+
+    async def query(self, server: str, name: str, record_type: RecordType) -> Set[str]:
+        """向一台权威DNS查询，返回规范化后的记录值（MX含优先级）"""
+        request = dns.message.make_query(name, dns.rdatatype.from_text(record_type.name))
+        response = await dns.asyncquery.udp(request, server, timeout=self.timeout)
+        if response.flags & dns.flags.TC:
+            response = await dns.asyncquery.tcp(request, server, timeout=self.timeout)
+
+        qname = dns.name.from_text(name)
+        values = set()
+        for rrset in response.answer:
+            if rrset.name != qname or rrset.rdtype != request.question[0].rdtype:
+                continue
+            for rdata in rrset:
+                values.add(self._rdata_value(record_type, rdata))
+        return values
+
+    @staticmethod
+    def _rdata_value(record_type: RecordType, rdata) -> str:
+        if record_type in (RecordType.A, RecordType.AAAA):
+            value = rdata.address
+        elif record_type == RecordType.TXT:
+            value = b"".join(rdata.strings).decode("utf-8", "replace")
+        elif record_type == RecordType.MX:
+            return f"{rdata.preference} {normalize_record_value(record_type, rdata.exchange.to_text())}"
+        else:
+            value = rdata.target.to_text()
+        return normalize_record_value(record_type, value)
+
+    @staticmethod
+    def _expected_value(record: ZoneRecord) -> str:
+        value = normalize_record_value(record.type, record.value)
+        if record.type == RecordType.MX:
+            return f"{record.priority or 0} {value}"
+        return value
+
+    async def verify(
+        self,
+        zone: str,
+        records: List[ZoneRecord],
+        nameservers: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        校验记录是否已在权威DNS生效
+
+        Args:
+            zone: 区域（域名）
+            records: 期望存在的记录
+            nameservers: 指定权威DNS地址（默认查询区域的NS记录）
+
+        Returns:
+            {"nameservers", "checked", "matched", "mismatches"}
+        """
+        servers = nameservers or await self.nameservers_for(zone)
+        expected: Dict[Tuple[str, RecordType], Set[str]] = defaultdict(set)
+        for record in records:
+            fqdn = zone if record.name == "@" else f"{record.name}.{zone}"
+            expected[(fqdn.rstrip(".") + ".", record.type)].add(self._expected_value(record))
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        mismatches = []
+
+        async def check(server: str, name: str, record_type: RecordType, values: Set[str]):
+            async with semaphore:
+                try:
+                    actual = await self.query(server, name, record_type)
+                except (dns.exception.DNSException, OSError) as e:
+                    mismatches.append({
+                        "server": server, "name": name, "type": record_type.name,
+                        "expected": sorted(values), "actual": [], "error": str(e),
+                    })
+                    return
+            if not values <= actual:
+                mismatches.append({
+                    "server": server, "name": name, "type": record_type.name,
+                    "expected": sorted(values), "actual": sorted(actual),
+                })
+
+        await asyncio.gather(*[
+            check(server, name, record_type, values)
+            for (name, record_type), values in expected.items()
+            for server in servers
+        ])
+        checked = len(expected) * len(servers)
+        return {
+            "nameservers": servers,
+            "checked": checked,
+            "matched": checked - len(mismatches),
+            "mismatches": mismatches,
+        }
+
+
+class ZoneMigrationService:
+    """跨服务商区域迁移与镜像服务"""
+
+    def __init__(self, verifier: Optional[AuthoritativeVerifier] = None):
+        self.verifier = verifier or AuthoritativeVerifier()
+        self.scheduler = None
+        self._mirror_locks: Dict[int, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+    async def read_zone(self, provider: BaseProvider, zone: str) -> Tuple[List[ZoneRecord], List[str]]:
+        """读取服务商上的区域记录"""
+        return normalize_provider_records(await provider.get_records(zone), zone)
+
+    def diff(
+        self,
+        plan: MigrationPlan,
+        source_records: List[ZoneRecord],
+        target_records: List[ZoneRecord],
+        delete_extra: bool
+    ):
+        """比较源与目标记录，填写迁移计划的新增、修改、删除（根域名NS两侧都不参与比较）"""
+        targets: Dict[RecordKey, ZoneRecord] = {}
+        for record in target_records:
+            if _is_apex_ns(record):
+                continue
+            targets.setdefault(_record_key(record), record)
+
+        seen: Set[RecordKey] = set()
+        missing: List[ZoneRecord] = []
+        for record in source_records:
+            key = _record_key(record)
+            if key in seen or _is_apex_ns(record):
+                continue
+            seen.add(key)
+            plan.expected.append(record)
+            existing = targets.get(key)
+            if existing is None:
+                missing.append(record)
+            elif existing.ttl != record.ttl or (existing.priority or None) != (record.priority or None):
+                plan.updates.append((existing.external_id, record))
+            else:
+                plan.unchanged += 1
+
+        extra = [record for key, record in targets.items() if key not in seen]
+        if not delete_extra:
+            plan.creates.extend(missing)
+            return
+
+        # 同名同类型的多余记录直接改为新值，少一次删除和新增
+        reusable: Dict[Tuple[str, int], List[ZoneRecord]] = defaultdict(list)
+        for record in extra:
+            reusable[(record.name.lower(), int(record.type))].append(record)
+        for record in missing:
+            candidates = reusable.get((record.name.lower(), int(record.type)))
+            if candidates:
+                plan.updates.append((candidates.pop().external_id, record))
+            else:
+                plan.creates.append(record)
+        plan.deletes.extend(record for records in reusable.values() for record in records)
+
+    async def plan(
+        self,
+        source: BaseProvider,
+        source_zone: str,
+        target: BaseProvider,
+        target_zone: str,
+        delete_extra: bool = False,
+        source_records: Optional[List[ZoneRecord]] = None
+    ) -> MigrationPlan:
+        """
+        生成迁移计划
+
+        Args:
+            source: 源服务商实例
+            source_zone: 源区域
+            target: 目标服务商实例
+            target_zone: 目标区域
+            delete_extra: 是否删除目标区域中源区域没有的记录
+            source_records: 已读取的源区域记录（不传时从源服务商读取）
+        """
+        plan = MigrationPlan(source_zone=source_zone, target_zone=target_zone)
+        if source_records is None:
+            source_records, notes = await self.read_zone(source, source_zone)
+            plan.notes.extend(notes)
+        plan.source_digest = zone_digest(source_records)
+
+        mapped, notes = map_records(source_records, target)
+        plan.notes.extend(notes)
+        target_records, _ = await self.read_zone(target, target_zone)
+        self.diff(plan, mapped, target_records, delete_extra)
+        return plan
+
+    @staticmethod
+    def _api_record(record: ZoneRecord) -> Dict[str, Any]:
+        api_record = {
+            "name": record.name,
+            "type": record.type.name,
+            "value": record.value,
+            "ttl": record.ttl,
+        }
+        if record.priority is not None:
+            api_record["priority"] = record.priority
+        return api_record
+
+    async def _run_batches(self, items: List[Any], call) -> List[Dict[str, Any]]:
+        """分批并发执行，返回失败项"""
+        errors = []
+        for start in range(0, len(items), MIGRATION_BATCH_SIZE):
+            batch = items[start:start + MIGRATION_BATCH_SIZE]
+            results = await asyncio.gather(*[call(item) for item in batch], return_exceptions=True)
+            for item, result in zip(batch, results):
+                if isinstance(result, Exception) or not result:
+                    record = item[1] if isinstance(item, tuple) else item
+                    errors.append({
+                        "record": record.to_dict(),
+                        "message": str(result) if result else "服务商返回失败",
+                    })
+        return errors
+
+    async def apply(self, target: BaseProvider, plan: MigrationPlan) -> Dict[str, Any]:
+        """
+        按计划写入目标区域：先删除，再修改，最后新增（避免CNAME与其他记录冲突）
+
+        Returns:
+            {"created", "updated", "deleted", "errors"}
+        """
+        zone = plan.target_zone
+        delete_errors = await self._run_batches(
+            plan.deletes, lambda record: target.delete_record(zone, record.external_id)
+        )
+        update_errors = await self._run_batches(
+            plan.updates, lambda item: target.update_record(zone, item[0], self._api_record(item[1]))
+        )
+        create_errors = await self._run_batches(
+            plan.creates, lambda record: target.add_record(zone, self._api_record(record))
+        )
+        return {
+            "created": len(plan.creates) - len(create_errors),
+            "updated": len(plan.updates) - len(update_errors),
+            "deleted": len(plan.deletes) - len(delete_errors),
+            "errors": delete_errors + update_errors + create_errors,
+        }
+
+    async def migrate(
+        self,
+        source: BaseProvider,
+        source_zone: str,
+        target: BaseProvider,
+        target_zone: str,
+        delete_extra: bool = False,
+        dry_run: bool = False,
+        verify: bool = False,
+        nameservers: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        一次性迁移区域
+
+        Args:
+            dry_run: 只返回迁移计划，不写入目标区域
+            verify: 写入后向目标区域的权威DNS校验
+            nameservers: 校验使用的权威DNS地址（默认查询区域的NS记录）
+        """
+        plan = await self.plan(source, source_zone, target, target_zone, delete_extra)
+        result: Dict[str, Any] = {"plan": plan.to_dict(), "dry_run": dry_run}
+        if dry_run:
+            return result
+
+        result["result"] = await self.apply(target, plan)
+        logger.info(
+            f"区域迁移完成: {source_zone} -> {target_zone}, "
+            f"新增 {result['result']['created']}, 修改 {result['result']['updated']}, "
+            f"删除 {result['result']['deleted']}, 失败 {len(result['result']['errors'])}"
+        )
+        if verify:
+            result["verification"] = await self.verifier.verify(target_zone, plan.expected, nameservers)
+        return result
+
+    # ---------- 镜像 ----------
+
+    async def load_mirror_jobs(self, scheduler):
+        """加载所有启用的区域镜像并添加到调度器"""
+        self.scheduler = scheduler
+        mirrors = await ZoneMirror.filter(enabled=True)
+        for mirror in mirrors:
+            self.add_mirror_job(mirror)
+        logger.info(f"区域镜像定时任务加载完成，共 {len(mirrors)} 个")
+
+    def add_mirror_job(self, mirror: ZoneMirror):
+        """添加或替换区域镜像任务"""
+        if self.scheduler is None:
+            return
+        self.scheduler.add_job(
+            func=self._mirror_job,
+            trigger='interval',
+            seconds=mirror.interval,
+            id=f"zone_mirror_{mirror.id}",
+            args=[mirror.id],
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True,
+            misfire_grace_time=60
+        )
+        logger.info(f"添加区域镜像定时任务: {mirror.name} (间隔: {mirror.interval}秒)")
+
+    def remove_mirror_job(self, mirror_id: int):
+        """从调度器中删除区域镜像任务"""
+        job_id = f"zone_mirror_{mirror_id}"
+        if self.scheduler is not None and self.scheduler.get_job(job_id):
+            self.scheduler.remove_job(job_id)
+            logger.info(f"删除区域镜像定时任务: {mirror_id}")
+
+    async def _mirror_job(self, mirror_id: int):
+        try:
+            await self.run_mirror(mirror_id)
+        except Exception as e:
+            logger.error(f"执行区域镜像任务失败: {mirror_id} - {e}")
+
+    @staticmethod
+    def _provider_instance(provider: Provider) -> BaseProvider:
+        if not provider.enabled:
+            raise ZoneMigrationError(f"服务商 {provider.name} 已禁用")
+        return get_provider_instance(provider)
+
+    async def run_mirror(self, mirror_id: int, force: bool = False) -> Dict[str, Any]:
+        """
+        执行一次区域镜像
+
+        源区域记录摘要与上次成功同步时相同则跳过；否则与目标区域比较，只提交差异。
+        有写入失败时不保存摘要，下次执行会重新比较。
+
+        Args:
+            mirror_id: 镜像ID
+            force: 忽略摘要，总是与目标区域比较（可修正目标区域被手动修改的记录）
+        """
+        async with self._mirror_locks[mirror_id]:
+            mirror = await ZoneMirror.get_or_none(id=mirror_id).prefetch_related(
+                'source_provider', 'target_provider'
+            )
+            if not mirror:
+                raise ZoneMigrationError(f"区域镜像 {mirror_id} 不存在")
+
+            result: Dict[str, Any] = {"status": MIRROR_STATUS_FAILED}
+            try:
+                source = self._provider_instance(mirror.source_provider)
+                target = self._provider_instance(mirror.target_provider)
+                records, notes = await self.read_zone(source, mirror.source_zone)
+                digest = zone_digest(records)
+
+                if not force and digest == mirror.source_digest:
+                    result = {"status": MIRROR_STATUS_UNCHANGED, "message": "源区域没有变化"}
+                else:
+                    plan = await self.plan(
+                        source, mirror.source_zone, target, mirror.target_zone,
+                        mirror.delete_extra, source_records=records
+                    )
+                    plan.notes[:0] = notes
+                    applied = await self.apply(target, plan) if not plan.empty else {
+                        "created": 0, "updated": 0, "deleted": 0, "errors": []
+                    }
+                    failed = len(applied["errors"])
+                    result = {
+                        "status": MIRROR_STATUS_FAILED if failed else MIRROR_STATUS_SUCCESS,
+                        "message": (
+                            f"新增 {applied['created']}，修改 {applied['updated']}，"
+                            f"删除 {applied['deleted']}，失败 {failed}"
+                        ),
+                        "plan": plan.to_dict(),
+                        "result": applied,
+                    }
+                    if not failed:
+                        mirror.source_digest = digest
+            except Exception as e:
+                logger.error(f"区域镜像失败: {mirror.name}, 错误: {e}")
+                result = {"status": MIRROR_STATUS_FAILED, "message": str(e)}
+
+            mirror.last_run_at = datetime.now(timezone.utc)
+            mirror.last_status = result["status"]
+            mirror.last_message = result["message"]
+            await mirror.save(update_fields=['source_digest', 'last_run_at', 'last_status', 'last_message', 'updated_at'])
+            logger.info(f"区域镜像 {mirror.name}: {result['status']} - {result['message']}")
+            return result
+
+
+# 全局区域迁移服务实例
+zone_migration_service = ZoneMigrationService()
@@ -0,0 +1,234 @@
+"""页面与静态文件的内存缓存
+
+启动时一次性读取static目录，预先生成gzip（以及安装了brotli时的br）压缩版本，
+按内容哈希生成ETag，请求时直接从内存返回并处理 If-None-Match / If-Modified-Since。
+HTML中引用的 /static/ 资源地址会被改写为带内容哈希的地址（?v=哈希），
+带正确哈希的请求可以长期缓存；调试模式下文件修改后自动重新加载。
+"""
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, Request
+from starlette.responses import Response
+
+from app.config.settings import settings
+
+try:
+    import brotli
+except ImportError:  # 可选依赖：pip install brotli
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+STATIC_PREFIX = "/static/"
+
+# 小于该大小的文件压缩收益有限，不生成压缩版本
+MIN_COMPRESS_SIZE = 512
+
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml")
+
+# 带内容哈希的资源地址内容不会变化，可以缓存一年
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+# 调试模式下两次检查文件修改时间的最小间隔（秒）
+RELOAD_CHECK_INTERVAL = 1.0
+
+_ASSET_REFERENCE = re.compile(r'(?P<attr>\b(?:src|href)=")(?P<path>/static/[^"?#]+)(?:\?[^"#]*)?(?P<end>[#"])')
+
+
+@dataclass
+class StaticAsset:
+    """一个静态文件及其预压缩版本"""
+    path: str
+    content_type: str
+    body: bytes
+    digest: str
+    last_modified: float
+    encodings: Dict[str, bytes] = field(default_factory=dict)
+
+    @property
+    def etag(self) -> str:
+        # 弱ETag：同一内容的各压缩版本共用
+        return f'W/"{self.digest}"'
+
+    @property
+    def last_modified_header(self) -> str:
+        return formatdate(self.last_modified, usegmt=True)
+
+
+def _accepted_encodings(header: str) -> List[str]:
+    """解析 Accept-Encoding，返回客户端接受的编码（忽略 q=0）"""
+    accepted = []
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        match = re.search(r"q=([0-9.]+)", params)
+        if match:
+            try:
+                quality = float(match.group(1))
+            except ValueError:
+                quality = 0.0
+        if name and quality > 0:
+            accepted.append(name.strip().lower())
+    return accepted
+
+
+class StaticAssetStore:
+    """static目录的内存缓存"""
+
+    def __init__(self, directory: str, reload: bool = False):
+        self.directory = Path(directory)
+        self.reload = reload
+        self._assets: Dict[str, StaticAsset] = {}
+        self._mtimes: Dict[str, float] = {}
+        self._loaded = False
+        self._checked_at = 0.0
+
+    # ---------- 加载 ----------
+
+    def load(self):
+        """读取并预压缩全部文件（先处理其他资源，再按资源哈希改写HTML）"""
+        mtimes = self._scan()
+        others = [path for path in mtimes if not path.endswith(".html")]
+        pages = [path for path in mtimes if path.endswith(".html")]
+        # 改写后的HTML随引用的资源一起变化，修改时间取目录内最新的文件
+        latest = max(mtimes.values(), default=0)
+
+        assets: Dict[str, StaticAsset] = {}
+        for path in others:
+            assets[path] = self._build(path, (self.directory / path).read_bytes(), mtimes[path])
+        for path in pages:
+            html = (self.directory / path).read_text(encoding="utf-8")
+            html = self._rewrite_references(html, assets)
+            assets[path] = self._build(path, html.encode("utf-8"), latest)
+
+        self._assets = assets
+        self._mtimes = mtimes
+        self._loaded = True
+        self._checked_at = time.monotonic()
+        logger.info(f"已加载 {len(assets)} 个静态文件到内存" + ("（brotli可用）" if brotli else ""))
+
+    def _scan(self) -> Dict[str, float]:
+        mtimes = {}
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                full_path = Path(root) / name
+                mtimes[full_path.relative_to(self.directory).as_posix()] = full_path.stat().st_mtime
+        return mtimes
+
+    def _build(self, path: str, body: bytes, mtime: float) -> StaticAsset:
+        content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        if content_type.startswith("text/") or content_type in ("application/javascript", "application/json"):
+            content_type += "; charset=utf-8"
+
+        asset = StaticAsset(
+            path=path,
+            content_type=content_type,
+            body=body,
+            digest=hashlib.sha256(body).hexdigest()[:16],
+            last_modified=int(mtime),
+        )
+        if len(body) >= MIN_COMPRESS_SIZE and content_type.startswith(COMPRESSIBLE_TYPES):
+            variants = {"gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                variants["br"] = brotli.compress(body, quality=11)
+            asset.encodings = {name: data for name, data in variants.items() if len(data) < len(body)}
+        return asset
+
+    def _rewrite_references(self, html: str, assets: Dict[str, StaticAsset]) -> str:
+        """把 /static/xxx 引用改写为带内容哈希的地址"""
+        def replace(match):
+            asset = assets.get(match.group("path")[len(STATIC_PREFIX):])
+            if asset is None:
+                return match.group(0)
+            return f'{match.group("attr")}{match.group("path")}?v={asset.digest}{match.group("end")}'
+        return _ASSET_REFERENCE.sub(replace, html)
+
+    def _refresh(self):
+        """首次访问时加载；调试模式下文件有增删改则整体重新加载"""
+        if not self._loaded:
+            self.load()
+            return
+        if not self.reload or time.monotonic() - self._checked_at < RELOAD_CHECK_INTERVAL:
+            return
+        self._checked_at = time.monotonic()
+        if self._scan() != self._mtimes:
+            logger.info("静态文件已修改，重新加载")
+            self.load()
+
+    # ---------- 查询 ----------
+
+    def get(self, path: str) -> Optional[StaticAsset]:
+        self._refresh()
+        return self._assets.get(path)
+
+    # ---------- 响应 ----------
+
+    def response(self, request: Request, path: str) -> Response:
+        """
+        返回静态文件，支持条件请求与预压缩版本
+
+        请求地址带有与内容一致的 ?v=哈希 时允许长期缓存，否则要求浏览器每次用ETag校验。
+
+        Args:
+            request: 当前请求
+            path: 相对static目录的路径
+        """
+        asset = self.get(path)
+        if asset is None:
+            raise HTTPException(status_code=404, detail="文件不存在")
+
+        immutable = request.query_params.get("v") == asset.digest
+        headers = {
+            "ETag": asset.etag,
+            "Last-Modified": asset.last_modified_header,
+            "Cache-Control": IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL,
+            "Vary": "Accept-Encoding",
+        }
+        if self._not_modified(request, asset):
+            return Response(status_code=304, headers=headers)
+
+        body, encoding = self._select_encoding(request, asset)
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type=asset.content_type, headers=headers)
+
+    @staticmethod
+    def _not_modified(request: Request, asset: StaticAsset) -> bool:
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            tags = [tag.strip() for tag in if_none_match.split(",")]
+            # 弱比较：忽略 W/ 前缀
+            return "*" in tags or asset.etag.removeprefix("W/") in [tag.removeprefix("W/") for tag in tags]
+
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since:
+            try:
+                return parsedate_to_datetime(if_modified_since).timestamp() >= asset.last_modified
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    @staticmethod
+    def _select_encoding(request: Request, asset: StaticAsset) -> Tuple[bytes, Optional[str]]:
+        if not asset.encodings:
+            return asset.body, None
+        accepted = _accepted_encodings(request.headers.get("accept-encoding", ""))
+        for encoding in ("br", "gzip"):
+            if encoding in accepted and encoding in asset.encodings:
+                return asset.encodings[encoding], encoding
+        return asset.body, None
+
+
+# 全局静态文件缓存实例（调试模式下随文件修改自动重新加载）
+static_assets = StaticAssetStore("static", reload=settings.debug)
@@ -0,0 +1,585 @@
+"""解析记录的导入导出格式：BIND区域文件、CSV、JSON
+
+解析器逐行输入（feed），边读边产出记录，不需要先把整个文件读入内存；
+导出按表头、逐条记录、结尾分段输出文本。
+记录名统一为相对域名的写法（根域名为 @），记录值去掉主机名末尾的点，与本地解析记录一致。
+"""
+import csv
+import io
+import ipaddress
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.models import RecordType
+
+ZONE_FORMAT_BIND = "bind"
+ZONE_FORMAT_CSV = "csv"
+ZONE_FORMAT_JSON = "json"
+ZONE_FORMATS = (ZONE_FORMAT_BIND, ZONE_FORMAT_CSV, ZONE_FORMAT_JSON)
+
+CSV_COLUMNS = ("name", "type", "value", "ttl", "priority")
+
+DEFAULT_TTL = 600
+MAX_TTL = 2147483647
+
+# 与 DNSRecord 模型的字段长度一致
+MAX_NAME_LENGTH = 255
+MAX_VALUE_LENGTH = 500
+
+HOSTNAME_TYPES = (RecordType.CNAME, RecordType.MX, RecordType.NS)
+
+_TTL_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+_TTL_PATTERN = re.compile(r"^(?:\d+[smhdw]?)+$", re.I)
+_CLASSES = ("IN", "CH", "HS")
+
+
+class ZoneFileError(Exception):
+    """文件内容无法解析"""
+    pass
+
+
+@dataclass
+class ZoneRecord:
+    """从文件解析出的一条记录"""
+    name: str
+    type: RecordType
+    value: str
+    ttl: int = DEFAULT_TTL
+    priority: Optional[int] = None
+    line: int = 0
+    # 从服务商读取时的记录ID
+    external_id: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "type": self.type.name,
+            "value": self.value,
+            "ttl": self.ttl,
+            "priority": self.priority,
+        }
+
+
+@dataclass
+class ZoneIssue:
+    """解析或校验时发现的问题（对应行被跳过）"""
+    line: int
+    message: str
+    skipped: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"line": self.line, "message": self.message, "skipped": self.skipped}
+
+
+def parse_ttl(text: str) -> int:
+    """解析TTL，支持 3600 与 1h30m 两种写法"""
+    if not _TTL_PATTERN.match(text):
+        raise ZoneFileError(f"TTL无效: {text}")
+    total = 0
+    for number, unit in re.findall(r"(\d+)([smhdw]?)", text.lower()):
+        total += int(number) * _TTL_UNITS.get(unit or "s")
+    if not 0 < total <= MAX_TTL:
+        raise ZoneFileError(f"TTL超出范围: {text}")
+    return total
+
+
+def relative_name(name: str, zone: str) -> str:
+    """完整域名或相对名称转为相对域名的写法（根域名为 @）"""
+    name = name.strip().rstrip(".").lower()
+    zone = zone.rstrip(".").lower()
+    if name in ("", "@", zone):
+        return "@"
+    if name.endswith(f".{zone}"):
+        return name[:-len(zone) - 1]
+    return name
+
+
+def absolute_name(name: str, zone: str) -> str:
+    """相对名称或完整域名转为完整域名（DDNS与Cloudflare同步的记录名称已是完整域名，不再拼接）"""
+    name = name.strip()
+    zone = zone.rstrip(".")
+    if name in ("", "@"):
+        return zone
+    if name.endswith("."):
+        return name.rstrip(".")
+    lowered, zone_lowered = name.lower(), zone.lower()
+    if lowered == zone_lowered or lowered.endswith(f".{zone_lowered}"):
+        return name
+    return f"{name}.{zone}"
+
+
+def record_type_of(text: str) -> RecordType:
+    try:
+        return RecordType[text.strip().upper()]
+    except KeyError:
+        raise ZoneFileError(f"不支持的记录类型: {text}")
+
+
+def validate_record(record: ZoneRecord) -> Optional[str]:
+    """校验单条记录，返回问题描述，没有问题返回None"""
+    if not record.name or len(record.name) > MAX_NAME_LENGTH:
+        return "记录名称为空或过长"
+    if not record.value or len(record.value) > MAX_VALUE_LENGTH:
+        return "记录值为空或过长"
+    if record.type in (RecordType.A, RecordType.AAAA):
+        try:
+            address = ipaddress.ip_address(record.value)
+        except ValueError:
+            return f"{record.type.name} 记录的值不是IP地址: {record.value}"
+        if address.version != (4 if record.type == RecordType.A else 6):
+            return f"{record.type.name} 记录的IP地址版本不匹配: {record.value}"
+    if record.type == RecordType.MX and record.priority is None:
+        return "MX 记录缺少优先级"
+    return None
+
+
+def validate_records(records: List[ZoneRecord]) -> Tuple[List[ZoneRecord], List[ZoneIssue]]:
+    """
+    整体校验：CNAME不能与同名的其他记录共存（跳过冲突的CNAME记录）
+
+    Returns:
+        (通过校验的记录, 问题列表)
+    """
+    types_by_name: Dict[str, set] = {}
+    for record in records:
+        types_by_name.setdefault(record.name, set()).add(record.type)
+    valid, issues = [], []
+    for record in records:
+        if record.type == RecordType.CNAME and len(types_by_name[record.name]) > 1:
+            issues.append(ZoneIssue(record.line, f"{record.name} 的CNAME记录不能与其他类型的记录共存", skipped=True))
+            continue
+        valid.append(record)
+    return valid, issues
+
+
+def _fqdn(name: str, origin: str) -> str:
+    """区域文件中的名称按当前 $ORIGIN 补全"""
+    if name == "@":
+        return origin
+    if name.endswith("."):
+        return name.rstrip(".")
+    return f"{name}.{origin}" if origin else name
+
+
+def _strip_comment(line: str) -> str:
+    """去掉分号注释（引号内的分号保留）"""
+    in_quotes = False
+    escaped = False
+    for index, char in enumerate(line):
+        if escaped:
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char == '"':
+            in_quotes = not in_quotes
+        elif char == ";" and not in_quotes:
+            return line[:index]
+    return line
+
+
+def _tokenize(text: str) -> List[str]:
+    """按空白拆分，引号内的字符串保留为一个带引号的词，括号单独成词"""
+    return re.findall(r'"(?:[^"\\]|\\.)*"|[()]|[^\s"()]+', text)
+
+
+def _unquote(token: str) -> str:
+    """去掉引号并还原转义（\\X 与 \\DDD 十进制写法）"""
+    if len(token) >= 2 and token[0] == '"' and token[-1] == '"':
+        return re.sub(
+            r"\\(\d{3}|.)",
+            lambda match: chr(int(match.group(1))) if match.group(1).isdigit() else match.group(1),
+            token[1:-1]
+        )
+    return token
+
+
+def _quote(text: str) -> str:
+    """TXT字符串加引号，引号、反斜杠与控制字符转义"""
+    escaped = text.replace("\\", "\\\\").replace('"', '\\"')
+    return '"' + re.sub(r"[\x00-\x1f\x7f]", lambda match: f"\\{ord(match.group(0)):03d}", escaped) + '"'
+
+
+class BindParser:
+    """BIND区域文件解析（逐行输入）"""
+
+    def __init__(self, zone: str, default_ttl: int = DEFAULT_TTL):
+        self.zone = zone.rstrip(".").lower()
+        self.origin = self.zone
+        self.default_ttl = default_ttl
+        self.issues: List[ZoneIssue] = []
+        self._owner: Optional[str] = None
+        self._pending: List[str] = []
+        self._pending_line = 0
+        self._depth = 0
+        self._line = 0
+
+    def feed(self, line: str) -> List[ZoneRecord]:
+        """输入一行，返回这一行完成的记录"""
+        self._line += 1
+        text = _strip_comment(line.rstrip("\r\n"))
+        if not self._pending:
+            if not text.strip():
+                return []
+            self._pending_line = self._line
+        self._pending.append(text)
+        tokens = _tokenize(text)
+        self._depth += tokens.count("(") - tokens.count(")")
+        if self._depth > 0:
+            # 括号内的多行记录（如SOA），读到右括号为止
+            return []
+
+        entry = " ".join(self._pending)
+        starts_with_space = self._pending[0][:1].isspace()
+        self._pending = []
+        self._depth = 0
+        try:
+            record = self._parse_entry(entry, starts_with_space)
+        except ZoneFileError as e:
+            self.issues.append(ZoneIssue(self._pending_line, str(e), skipped=True))
+            return []
+        return [record] if record else []
+
+    def close(self) -> List[ZoneRecord]:
+        if self._pending:
+            self.issues.append(ZoneIssue(self._pending_line, "括号未闭合", skipped=True))
+            self._pending = []
+        return []
+
+    def _parse_entry(self, entry: str, starts_with_space: bool) -> Optional[ZoneRecord]:
+        tokens = [token for token in _tokenize(entry) if token not in ("(", ")")]
+        if not tokens:
+            return None
+
+        directive = tokens[0].upper()
+        if directive == "$ORIGIN":
+            if len(tokens) < 2:
+                raise ZoneFileError("$ORIGIN 缺少域名")
+            self.origin = _fqdn(tokens[1], self.origin).lower()
+            return None
+        if directive == "$TTL":
+            if len(tokens) < 2:
+                raise ZoneFileError("$TTL 缺少值")
+            self.default_ttl = parse_ttl(tokens[1])
+            return None
+        if directive.startswith("$"):
+            raise ZoneFileError(f"不支持的指令: {tokens[0]}")
+
+        # 行首为空白时沿用上一条记录的名称
+        if starts_with_space:
+            if self._owner is None:
+                raise ZoneFileError("缺少记录名称")
+        else:
+            self._owner = _fqdn(tokens.pop(0), self.origin).lower()
+
+        ttl = None
+        while tokens and (tokens[0].upper() in _CLASSES or _TTL_PATTERN.match(tokens[0])):
+            token = tokens.pop(0)
+            if token.upper() not in _CLASSES:
+                ttl = parse_ttl(token)
+        if not tokens:
+            raise ZoneFileError("缺少记录类型")
+
+        type_text = tokens.pop(0).upper()
+        if type_text == "SOA":
+            # SOA由服务商维护
+            return None
+        record_type = record_type_of(type_text)
+
+        name = relative_name(self._owner, self.zone)
+        if self._owner != self.zone and not self._owner.endswith(f".{self.zone}"):
+            raise ZoneFileError(f"{self._owner} 不属于域名 {self.zone}")
+        if record_type == RecordType.NS and name == "@":
+            self.issues.append(ZoneIssue(self._pending_line, "跳过根域名的NS记录（由服务商维护）", skipped=True))
+            return None
+
+        priority = None
+        if record_type == RecordType.MX:
+            if len(tokens) < 2 or not tokens[0].isdigit():
+                raise ZoneFileError("MX 记录格式应为: 优先级 主机名")
+            priority = int(tokens.pop(0))
+        if not tokens:
+            raise ZoneFileError("缺少记录值")
+
+        if record_type == RecordType.TXT:
+            value = "".join(_unquote(token) for token in tokens)
+        elif record_type in HOSTNAME_TYPES:
+            value = _fqdn(tokens[0], self.origin)
+        else:
+            value = tokens[0]
+
+        return ZoneRecord(
+            name=name,
+            type=record_type,
+            value=value,
+            ttl=ttl or self.default_ttl,
+            priority=priority,
+            line=self._pending_line,
+        )
+
+
+class CsvParser:
+    """CSV解析（逐行输入），首行为表头，列见 CSV_COLUMNS"""
+
+    def __init__(self, zone: str, default_ttl: int = DEFAULT_TTL):
+        self.zone = zone
+        self.default_ttl = default_ttl
+        self.issues: List[ZoneIssue] = []
+        self._columns: Optional[List[str]] = None
+        self._pending = ""
+        self._pending_line = 0
+        self._line = 0
+
+    def feed(self, line: str) -> List[ZoneRecord]:
+        self._line += 1
+        if not self._pending:
+            self._pending_line = self._line
+        self._pending += line if line.endswith("\n") else line + "\n"
+        # 引号内可以换行，引号未配对时继续读下一行
+        if self._pending.count('"') % 2:
+            return []
+        text, self._pending = self._pending, ""
+        if not text.strip():
+            return []
+
+        row = next(csv.reader(io.StringIO(text)))
+        if self._columns is None:
+            self._columns = [column.strip().lower() for column in row]
+            missing = [column for column in ("name", "type", "value") if column not in self._columns]
+            if missing:
+                raise ZoneFileError(f"CSV表头缺少列: {', '.join(missing)}")
+            return []
+
+        values = dict(zip(self._columns, (cell.strip() for cell in row)))
+        try:
+            return [self._record(values)]
+        except ZoneFileError as e:
+            self.issues.append(ZoneIssue(self._pending_line, str(e), skipped=True))
+            return []
+
+    def close(self) -> List[ZoneRecord]:
+        if self._pending.strip():
+            self.issues.append(ZoneIssue(self._pending_line, "引号未闭合", skipped=True))
+        return []
+
+    def _record(self, values: Dict[str, str]) -> ZoneRecord:
+        return record_from_mapping(values, self.zone, self.default_ttl, self._pending_line)
+
+
+def record_from_mapping(values: Dict[str, Any], zone: str, default_ttl: int, line: int) -> ZoneRecord:
+    """CSV行或JSON对象转为记录"""
+    record_type = record_type_of(str(values.get("type") or ""))
+    value = str(values.get("value") or "").strip()
+    if record_type in HOSTNAME_TYPES:
+        value = value.rstrip(".")
+    elif record_type == RecordType.TXT:
+        value = _unquote(value)
+
+    ttl = values.get("ttl")
+    priority = values.get("priority")
+    try:
+        priority = int(priority) if priority not in (None, "") else None
+    except ValueError:
+        raise ZoneFileError(f"优先级无效: {priority}")
+    return ZoneRecord(
+        name=relative_name(str(values.get("name") or ""), zone),
+        type=record_type,
+        value=value,
+        ttl=parse_ttl(str(ttl)) if ttl not in (None, "") else default_ttl,
+        priority=priority,
+        line=line,
+    )
+
+
+def parse_json_records(data: Any, zone: str, default_ttl: int = DEFAULT_TTL):
+    """
+    解析JSON（记录数组，或导出格式 {"domain": ..., "records": [...]}）
+
+    Returns:
+        (记录列表, 问题列表)
+    """
+    items = data.get("records") if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        raise ZoneFileError("JSON应为记录数组或包含records数组的对象")
+    records, issues = [], []
+    for index, item in enumerate(items, start=1):
+        if not isinstance(item, dict):
+            issues.append(ZoneIssue(index, "记录应为对象", skipped=True))
+            continue
+        try:
+            records.append(record_from_mapping(item, zone, default_ttl, index))
+        except ZoneFileError as e:
+            issues.append(ZoneIssue(index, str(e), skipped=True))
+    return records, issues
+
+
+def normalize_provider_records(raw_records: List[Dict[str, Any]], zone: str) -> Tuple[List[ZoneRecord], List[str]]:
+    """
+    服务商 get_records 的返回统一为记录列表
+
+    各服务商返回的名称有的是完整域名、有的是主机记录，记录值有的是单值、有的是值列表
+    （华为云记录集，MX值带优先级，TXT值带引号），这里统一为每个值一条、相对名称、
+    去掉TXT引号与主机名末尾的点。SOA与不支持的类型跳过。
+
+    Returns:
+        (记录列表, 跳过的记录说明)
+    """
+    records, skipped = [], []
+    for raw in raw_records:
+        type_text = str(raw.get("type") or "").upper()
+        name = relative_name(str(raw.get("name") or ""), zone)
+        if type_text == "SOA":
+            continue
+        if type_text not in RecordType.__members__:
+            skipped.append(f"{name} {type_text}: 不支持的记录类型")
+            continue
+        record_type = RecordType[type_text]
+
+        values = raw.get("value") or raw.get("records") or []
+        if not isinstance(values, list):
+            values = [values]
+        for value in values:
+            value = str(value).strip()
+            priority = raw.get("priority")
+            if record_type == RecordType.MX and priority is None and " " in value:
+                # 华为云的MX值为 "优先级 主机名"
+                first, _, rest = value.partition(" ")
+                if first.isdigit():
+                    priority, value = int(first), rest.strip()
+            if record_type == RecordType.TXT:
+                value = "".join(_unquote(token) for token in _tokenize(value)) if value.startswith('"') else value
+            elif record_type in HOSTNAME_TYPES:
+                value = value.rstrip(".")
+            records.append(ZoneRecord(
+                name=name,
+                type=record_type,
+                value=value,
+                ttl=int(raw.get("ttl") or DEFAULT_TTL),
+                priority=int(priority) if priority is not None else None,
+                external_id=str(raw["id"]) if raw.get("id") is not None else None,
+            ))
+    return records, skipped
+
+
+def create_parser(zone_format: str, zone: str, default_ttl: int = DEFAULT_TTL):
+    """按格式创建逐行解析器（JSON需整体解析，不支持逐行）"""
+    if zone_format == ZONE_FORMAT_BIND:
+        return BindParser(zone, default_ttl)
+    if zone_format == ZONE_FORMAT_CSV:
+        return CsvParser(zone, default_ttl)
+    raise ZoneFileError(f"不支持逐行解析的格式: {zone_format}")
+
+
+# ---------- 导出 ----------
+
+def _bind_owner(name: str) -> str:
+    return "@" if name in ("", "@") else name
+
+
+def _bind_value(record_type: RecordType, value: str, priority: Optional[int]) -> str:
+    if record_type == RecordType.TXT:
+        content = value.strip('"')
+        # 单个字符串最长255字节，超出时拆成多段
+        chunks = [content[i:i + 255] for i in range(0, len(content), 255)] or [""]
+        return " ".join(_quote(chunk) for chunk in chunks)
+    if record_type in HOSTNAME_TYPES:
+        host = f"{value.rstrip('.')}."
+        return f"{priority or 0} {host}" if record_type == RecordType.MX else host
+    return value
+
+
+class BindWriter:
+    """BIND区域文件"""
+    media_type = "text/dns"
+    extension = "zone"
+
+    def __init__(self, zone: str):
+        self.zone = zone.rstrip(".")
+
+    def header(self) -> str:
+        return f"$ORIGIN {self.zone}.\n$TTL {DEFAULT_TTL}\n"
+
+    def row(self, record: Any) -> str:
+        record_type = RecordType(record.type)
+        return (
+            f"{_bind_owner(relative_name(record.name, self.zone))}\t{record.ttl}\tIN\t{record_type.name}\t"
+            f"{_bind_value(record_type, record.value, record.priority)}\n"
+        )
+
+    def footer(self) -> str:
+        return ""
+
+
+class CsvWriter:
+    """CSV，列见 CSV_COLUMNS"""
+    media_type = "text/csv"
+    extension = "csv"
+
+    def __init__(self, zone: str):
+        self.zone = zone.rstrip(".")
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer, lineterminator="\n")
+
+    def _take(self, row: List[Any]) -> str:
+        self._writer.writerow(row)
+        text = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return text
+
+    def header(self) -> str:
+        return self._take(list(CSV_COLUMNS))
+
+    def row(self, record: Any) -> str:
+        return self._take([
+            relative_name(record.name, self.zone), RecordType(record.type).name,
+            record.value, record.ttl, record.priority if record.priority is not None else "",
+        ])
+
+    def footer(self) -> str:
+        return ""
+
+
+class JsonWriter:
+    """JSON：{"domain": ..., "records": [...]}，逐条输出数组元素"""
+    media_type = "application/json"
+    extension = "json"
+
+    def __init__(self, zone: str):
+        self.zone = zone.rstrip(".")
+        self._separator = "\n  "
+
+    def header(self) -> str:
+        return '{"domain": ' + json.dumps(self.zone) + ', "records": ['
+
+    def row(self, record: Any) -> str:
+        item = {
+            "name": relative_name(record.name, self.zone),
+            "type": RecordType(record.type).name,
+            "value": record.value,
+            "ttl": record.ttl,
+            "priority": record.priority,
+        }
+        text = self._separator + json.dumps(item, ensure_ascii=False)
+        self._separator = ",\n  "
+        return text
+
+    def footer(self) -> str:
+        return "\n]}\n"
+
+
+WRITERS = {
+    ZONE_FORMAT_BIND: BindWriter,
+    ZONE_FORMAT_CSV: CsvWriter,
+    ZONE_FORMAT_JSON: JsonWriter,
+}
+
+
+def write_zone(zone_format: str, zone: str, records: Iterable[Any]) -> Iterator[str]:
+    """按格式逐条导出记录（records为DNSRecord或同字段对象）"""
+    writer = WRITERS[zone_format](zone)
+    yield writer.header()
+    for record in records:
+        yield writer.row(record)
+    yield writer.footer()
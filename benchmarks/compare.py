@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+比较两次端到端基准测试结果
+
+按指标路径逐项比较 benchmarks/end_to_end.py 生成的JSON，耗时类指标（*_seconds、*_ms）
+变大、吞吐类指标（*_per_sec）变小即为变差；变差超过阈值的指标以非零退出码返回，可用于CI。
+
+用法:
+    python benchmarks/compare.py before.json after.json --threshold 10
+"""
+import argparse
+import json
+import sys
+
+LOWER_IS_BETTER = ("_seconds", "_ms")
+HIGHER_IS_BETTER = ("_per_sec",)
+
+
+def _key_of(item: dict, index: int) -> str:
+    """列表项的稳定名称（接口名或同步规模），顺序变化时仍能对应"""
+    if "endpoint" in item:
+        return item["endpoint"]
+    if "zones" in item and "records_per_zone" in item:
+        return f"{item['zones']}x{item['records_per_zone']}"
+    return str(index)
+
+
+def flatten(data, prefix: str = ""):
+    """把结果展开为 {指标路径: 数值}，只保留耗时与吞吐类指标"""
+    metrics = {}
+    if isinstance(data, dict):
+        for key, value in data.items():
+            if key == "meta":
+                continue
+            path = f"{prefix}.{key}" if prefix else key
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                if key.endswith(LOWER_IS_BETTER + HIGHER_IS_BETTER):
+                    metrics[path] = value
+            else:
+                metrics.update(flatten(value, path))
+    elif isinstance(data, list):
+        for index, item in enumerate(data):
+            name = _key_of(item, index) if isinstance(item, dict) else str(index)
+            metrics.update(flatten(item, f"{prefix}[{name}]"))
+    return metrics
+
+
+def compare(before: dict, after: dict, threshold: float):
+    """返回 (每项比较结果, 变差超过阈值的项数)"""
+    old, new = flatten(before), flatten(after)
+    rows, regressions = [], 0
+    for path in sorted(old.keys() & new.keys()):
+        if not old[path]:
+            continue
+        change = (new[path] - old[path]) / old[path] * 100
+        worse = change if path.endswith(LOWER_IS_BETTER) else -change
+        regressed = worse > threshold
+        regressions += regressed
+        rows.append((path, old[path], new[path], change, regressed))
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="比较两次端到端基准测试结果")
+    parser.add_argument("before", help="基准结果JSON")
+    parser.add_argument("after", help="新结果JSON")
+    parser.add_argument("--threshold", type=float, default=10.0, help="变差超过该百分比视为性能回退")
+    args = parser.parse_args()
+
+    with open(args.before, encoding="utf-8") as f:
+        before = json.load(f)
+    with open(args.after, encoding="utf-8") as f:
+        after = json.load(f)
+
+    print(f"基准: {before.get('meta', {}).get('commit')}  新: {after.get('meta', {}).get('commit')}")
+    rows, regressions = compare(before, after, args.threshold)
+    for path, old, new, change, regressed in rows:
+        flag = "  <-- 回退" if regressed else ""
+        print(f"{path:<60} {old:>12} {new:>12} {change:+8.1f}%{flag}")
+
+    print(f"共比较 {len(rows)} 项，回退 {regressions} 项（阈值 {args.threshold}%）")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+SQLite并发写入基准测试
+
+模拟多进程混合负载：DDNS更新（写日志并更新配置）与DNS记录同步（逐条更新记录），
+分别在默认参数（回滚日志）和配置中的调优参数（WAL等）下运行。
+
+比较标准是各角色的尾延迟（p99，从第一次尝试到成功，含锁冲突后的重试），其次是吞吐：
+SQLite的busy_timeout不保证公平，连续不断的长写事务会让等待写锁的DDNS更新一直等到超时，
+此时总吞吐可能更高而DDNS的p99明显变差。--sync-batch-size 大于1时同步在一个事务内
+更新一批记录，可用来观察这种情况。
+
+用法:
+    python benchmarks/db_concurrency.py --duration 10 --ddns-workers 4 --sync-workers 2
+    python benchmarks/db_concurrency.py --sync-batch-size 50
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tortoise import Tortoise
+from tortoise.exceptions import OperationalError
+from tortoise.transactions import in_transaction
+
+from app.database import get_sqlite_pragmas, get_tortoise_config
+from app.models import DDNSConfig, DNSRecord, Domain, Provider, RecordType
+from app.services.log_store import DDNS_LOGS, log_store
+
+# SQLite默认行为：回滚日志、不等待写锁、FULL同步
+BASELINE_PRAGMAS = {
+    'journal_mode': 'DELETE',
+    'busy_timeout': 0,
+    'synchronous': 'FULL',
+}
+
+RECORDS_PER_DOMAIN = 200
+
+# 同步一次更新的记录数；sync_service 逐条保存记录，每条是独立的写事务
+SYNC_RECORDS_PER_RUN = 50
+
+
+async def _prepare(db_url: str, ddns_configs: int):
+    """创建表结构与基础数据，返回DDNS配置ID与记录ID"""
+    await Tortoise.init(config=get_tortoise_config(db_url, BASELINE_PRAGMAS))
+    await Tortoise.generate_schemas()
+    await log_store.create_dictionary()
+
+    provider = await Provider.create(name="bench", type=1, access_key="ak", secret_key="sk")
+    domain = await Domain.create(name="bench.example.com", provider=provider)
+    await DNSRecord.bulk_create([
+        DNSRecord(domain=domain, name=f"host{i}.bench.example.com", type=RecordType.A, value="192.0.2.1")
+        for i in range(RECORDS_PER_DOMAIN)
+    ])
+    await DDNSConfig.bulk_create([
+        DDNSConfig(name=f"ddns{i}", domain=domain, subdomain=f"ddns{i}")
+        for i in range(ddns_configs)
+    ])
+    config_ids = await DDNSConfig.all().values_list('id', flat=True)
+    record_ids = await DNSRecord.all().values_list('id', flat=True)
+    await Tortoise.close_connections()
+    return config_ids, record_ids
+
+
+async def _ddns_tick(config_ids):
+    """一次DDNS更新：更新配置的IP并写入日志"""
+    config_id = random.choice(config_ids)
+    new_ip = f"198.51.100.{random.randint(1, 254)}"
+    async with in_transaction():
+        await DDNSConfig.filter(id=config_id).update(last_ip=new_ip)
+        await log_store.write(DDNS_LOGS, config_id, "benchmark", status="success", new_ip=new_ip)
+
+
+async def _sync_batch(record_ids, batch_size: int):
+    """一次同步：更新 SYNC_RECORDS_PER_RUN 条记录，每 batch_size 条一个事务"""
+    records = random.sample(record_ids, SYNC_RECORDS_PER_RUN)
+    value = f"203.0.113.{random.randint(1, 254)}"
+    for start in range(0, len(records), batch_size):
+        async with in_transaction():
+            for record_id in records[start:start + batch_size]:
+                await DNSRecord.filter(id=record_id).update(value=value)
+
+
+async def _worker_main(role: str, db_url: str, pragmas, duration: float, config_ids, record_ids,
+                       sync_batch_size: int):
+    await Tortoise.init(config=get_tortoise_config(db_url, pragmas))
+    operation = (
+        (lambda: _ddns_tick(config_ids)) if role == "ddns" else (lambda: _sync_batch(record_ids, sync_batch_size))
+    )
+
+    ops = 0
+    locked = 0
+    latencies = []
+    deadline = time.perf_counter() + duration
+    started = None
+    while time.perf_counter() < deadline:
+        # 延迟从第一次尝试算起，锁冲突后的重试计入同一次操作
+        started = started or time.perf_counter()
+        try:
+            await operation()
+            ops += 1
+            latencies.append(time.perf_counter() - started)
+            started = None
+        except OperationalError as e:
+            if "locked" not in str(e):
+                raise
+            locked += 1
+            await asyncio.sleep(0.001)
+
+    await Tortoise.close_connections()
+    return {'role': role, 'ops': ops, 'locked': locked, 'latencies': latencies}
+
+
+def _worker(role, db_url, pragmas, duration, config_ids, record_ids, sync_batch_size, queue):
+    try:
+        result = asyncio.run(_worker_main(role, db_url, pragmas, duration, config_ids, record_ids, sync_batch_size))
+    except Exception as e:
+        result = {'role': role, 'ops': 0, 'locked': 0, 'latencies': [], 'error': str(e)}
+    queue.put(result)
+
+
+def _percentile(values, percent):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+def run_profile(name: str, pragmas, args) -> dict:
+    """在独立的临时数据库上运行一组参数"""
+    with tempfile.TemporaryDirectory(prefix="dns-bench-") as tmp:
+        db_url = f"sqlite://{os.path.join(tmp, 'bench.db')}"
+        config_ids, record_ids = asyncio.run(_prepare(db_url, args.ddns_configs))
+
+        ctx = multiprocessing.get_context("spawn")
+        queue = ctx.Queue()
+        roles = ["ddns"] * args.ddns_workers + ["sync"] * args.sync_workers
+        processes = [
+            ctx.Process(target=_worker, args=(
+                role, db_url, pragmas, args.duration, config_ids, record_ids, args.sync_batch_size, queue
+            ))
+            for role in roles
+        ]
+        for process in processes:
+            process.start()
+        results = [queue.get() for _ in processes]
+        for process in processes:
+            process.join()
+
+    summary = {'profile': name, 'pragmas': pragmas, 'sync_batch_size': args.sync_batch_size, 'roles': {}}
+    for role in ("ddns", "sync"):
+        role_results = [r for r in results if r['role'] == role]
+        latencies = [latency for r in role_results for latency in r['latencies']]
+        ops = sum(r['ops'] for r in role_results)
+        summary['roles'][role] = {
+            'workers': len(role_results),
+            'ops': ops,
+            'ops_per_sec': round(ops / args.duration, 1),
+            'locked_errors': sum(r['locked'] for r in role_results),
+            'p50_ms': round(_percentile(latencies, 50) * 1000, 2) if latencies else None,
+            'p99_ms': round(_percentile(latencies, 99) * 1000, 2) if latencies else None,
+            'errors': [r['error'] for r in role_results if 'error' in r],
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite并发写入基准测试")
+    parser.add_argument("--duration", type=float, default=10.0, help="每组参数的运行时长（秒）")
+    parser.add_argument("--ddns-workers", type=int, default=4, help="模拟DDNS更新的进程数")
+    parser.add_argument("--sync-workers", type=int, default=2, help="模拟记录同步的进程数")
+    parser.add_argument("--ddns-configs", type=int, default=50, help="DDNS配置数量")
+    parser.add_argument("--sync-batch-size", type=int, default=1,
+                        help="同步每个写事务更新的记录数（1与sync_service逐条保存一致）")
+    parser.add_argument("--output", help="将结果以JSON写入文件")
+    args = parser.parse_args()
+
+    report = [
+        run_profile("baseline", BASELINE_PRAGMAS, args),
+        run_profile("tuned", get_sqlite_pragmas(), args),
+    ]
+
+    for summary in report:
+        print(f"[{summary['profile']}] {summary['pragmas']}")
+        for role, stats in summary['roles'].items():
+            print(
+                f"  {role:<5} 进程 {stats['workers']}  吞吐 {stats['ops_per_sec']}/s  "
+                f"锁冲突 {stats['locked_errors']}  p50 {stats['p50_ms']}ms  p99 {stats['p99_ms']}ms"
+            )
+
+    # 以各角色的p99比较两组参数，任一角色的尾延迟变差都单独列出
+    baseline, tuned = report
+    for role in ("ddns", "sync"):
+        before, after = baseline['roles'][role]['p99_ms'], tuned['roles'][role]['p99_ms']
+        if before is None or after is None:
+            continue
+        verdict = "变差" if after > before else "改善"
+        print(f"{role:<5} p99 {before}ms -> {after}ms（{verdict}）")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"结果已写入 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
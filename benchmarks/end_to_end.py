@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+端到端基准测试
+
+使用模拟服务商（服务商类型5）与临时SQLite数据库，不需要云服务账号，测量：
+- 全量同步：耗时与域名数、记录数的关系（首次同步与无变化的再次同步）
+- DDNS：每个配置一次更新（tick）的耗时，分新建记录、IP变化、IP未变化与并发更新
+- REST接口：主要接口在并发请求下的p50/p99延迟与吞吐
+- 启动：导入应用与lifespan启动的耗时（空数据库与已迁移数据库）
+
+结果（含git提交、Python版本与运行参数）写入JSON（默认写入不纳入版本库的 benchmarks/results/），
+可用 benchmarks/compare.py 比较两次结果。
+DDNS的公网IP查询替换为本地返回，只测量应用与服务商调用本身的开销。
+
+用法:
+    python benchmarks/end_to_end.py
+    python benchmarks/end_to_end.py --output /tmp/before.json
+    python benchmarks/end_to_end.py --only sync,ddns --sync-grid 1x100,10x1000 --latency 0.005
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SECTIONS = ("sync", "ddns", "api", "startup")
+
+# 未指定 --output 时结果文件所在目录（已在.gitignore中忽略）
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+DEFAULT_SYNC_GRID = "1x100,10x100,10x1000,50x200"
+
+# 并发压测的接口：(名称, 路径模板)，{domain_id} 替换为压测域名
+API_ENDPOINTS = [
+    ("providers", "/api/providers/"),
+    ("domains", "/api/domains/"),
+    ("domain", "/api/domains/{domain_id}"),
+    ("records", "/api/domains/{domain_id}/records"),
+    ("search", "/api/search/records?q=host1"),
+    ("ddns_configs", "/api/ddns/"),
+    ("certificates", "/api/certificates/"),
+    ("dashboard", "/api/auth/dashboard"),
+]
+
+
+def _configure_environment(work_dir: str, args):
+    """应用配置通过环境变量传入，必须在导入应用模块之前设置"""
+    os.environ["DNS_DATABASE_URL"] = f"sqlite://{os.path.join(work_dir, 'bench.db')}"
+    os.environ["DNS_LOG_FILE"] = os.path.join(work_dir, "app.log")
+    os.environ["DNS_LOG_LEVEL"] = "WARNING"
+    os.environ["DNS_FAKE_PROVIDER_ENABLED"] = "true"
+    # 客户端限速会掩盖应用本身的耗时，默认关闭
+    os.environ["DNS_PROVIDER_RATE_LIMIT"] = str(args.rate_limit)
+    # 逐条输出的时区警告会淹没测试结果
+    warnings.filterwarnings("ignore", message=".*naive datetime.*", category=RuntimeWarning)
+
+
+def _percentile(values, percent):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+def _latency_stats(latencies):
+    """延迟统计（毫秒）"""
+    if not latencies:
+        return {"count": 0}
+    return {
+        "count": len(latencies),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 3),
+        "p90_ms": round(_percentile(latencies, 90) * 1000, 3),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(max(latencies) * 1000, 3),
+    }
+
+
+def _parse_grid(text: str):
+    grid = []
+    for item in text.split(","):
+        zones, _, records = item.strip().partition("x")
+        grid.append((int(zones), int(records)))
+    return grid
+
+
+def _git(*command):
+    try:
+        return subprocess.run(
+            ["git", *command], cwd=ROOT, capture_output=True, text=True, timeout=10
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _metadata(args) -> dict:
+    return {
+        "commit": _git("rev-parse", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "params": {key: value for key, value in vars(args).items() if key not in ("output", "startup_probe")},
+    }
+
+
+async def bench_sync(args) -> list:
+    """全量同步耗时与域名数、记录数的关系"""
+    from app.models import DNSRecord, Provider, ProviderType
+    from app.providers.base import get_provider_instance
+    from app.services.sync_service import DomainSyncService
+
+    service = DomainSyncService()
+    results = []
+    for zones, records in _parse_grid(args.sync_grid):
+        provider = await Provider.create(
+            name=f"bench-sync-{zones}x{records}",
+            type=ProviderType.FAKE,
+            access_key=f"sync{zones}x{records}",
+            secret_key=f"zones={zones}&records={records}&page_size={args.page_size}&latency={args.latency}",
+        )
+        instance = get_provider_instance(provider)
+        point = {"zones": zones, "records_per_zone": records}
+        for phase in ("initial", "resync"):
+            calls = instance.call_count
+            started = time.perf_counter()
+            await service.sync_single_provider(provider.id)
+            elapsed = time.perf_counter() - started
+            point[f"{phase}_seconds"] = round(elapsed, 4)
+            point[f"{phase}_api_calls"] = instance.call_count - calls
+        point["records_total"] = await DNSRecord.filter(domain__provider_id=provider.id).count()
+        point["records_per_sec"] = round(point["records_total"] / point["initial_seconds"], 1) \
+            if point["initial_seconds"] else None
+        results.append(point)
+        print(
+            f"  sync {zones}x{records}: 首次 {point['initial_seconds']}s，"
+            f"再次 {point['resync_seconds']}s，{point['records_per_sec']} 条/秒"
+        )
+    return results
+
+
+async def bench_ddns(args) -> dict:
+    """DDNS每个配置一次更新的耗时"""
+    import app.api.ddns as ddns_api
+    from app.models import DDNSConfig, Domain, Provider, ProviderType, RecordType
+    from app.services.ddns_service import DDNSUpdateService
+    from app.services.sync_service import DomainSyncService
+
+    provider = await Provider.create(
+        name="bench-ddns", type=ProviderType.FAKE, access_key="ddns",
+        secret_key=f"zones=1&records=0&latency={args.latency}",
+    )
+    await DomainSyncService().sync_single_provider(provider.id)
+    domain = await Domain.get(provider=provider)
+    await DDNSConfig.bulk_create([
+        DDNSConfig(name=f"bench{i}", domain=domain, subdomain=f"ddns{i}", record_type=RecordType.A,
+                   update_method="manual")
+        for i in range(args.ddns_configs)
+    ])
+    config_ids = await DDNSConfig.filter(domain=domain).values_list("id", flat=True)
+
+    current_ip = {"value": None}
+
+    async def local_public_ip(ip_version=4):
+        return current_ip["value"]
+
+    ddns_api.get_public_ip = local_public_ip
+    service = DDNSUpdateService(scheduler=None)
+    results = {"configs": len(config_ids)}
+
+    # 依次执行：首次（新建记录）、IP变化（更新记录）、IP未变化（只写日志）
+    for phase, ip in (("create", "198.51.100.1"), ("update", "198.51.100.2"), ("unchanged", "198.51.100.2")):
+        current_ip["value"] = ip
+        latencies = []
+        for config_id in config_ids:
+            started = time.perf_counter()
+            await service._ddns_update_job(config_id)
+            latencies.append(time.perf_counter() - started)
+        results[phase] = _latency_stats(latencies)
+
+    # 所有配置同时到期（调度器并发执行）
+    current_ip["value"] = "198.51.100.3"
+    started = time.perf_counter()
+    await asyncio.gather(*[service._ddns_update_job(config_id) for config_id in config_ids])
+    elapsed = time.perf_counter() - started
+    results["concurrent_update"] = {
+        "seconds": round(elapsed, 4),
+        "per_config_ms": round(elapsed / max(1, len(config_ids)) * 1000, 3),
+    }
+    print(
+        f"  ddns {len(config_ids)} 个配置: 新建 p50 {results['create'].get('p50_ms')}ms，"
+        f"更新 p50 {results['update'].get('p50_ms')}ms，未变化 p50 {results['unchanged'].get('p50_ms')}ms，"
+        f"并发 {results['concurrent_update']['per_config_ms']}ms/个"
+    )
+    return results
+
+
+async def _load(client, path: str, headers: dict, total: int, concurrency: int):
+    """固定并发数发出total个请求，返回每个请求的延迟与失败数"""
+    latencies = []
+    errors = 0
+    remaining = {"count": total}
+
+    async def worker():
+        nonlocal errors
+        while remaining["count"] > 0:
+            remaining["count"] -= 1
+            started = time.perf_counter()
+            response = await client.get(path, headers=headers)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return latencies, errors, time.perf_counter() - started
+
+
+async def bench_api(app, args) -> list:
+    """主要REST接口在并发请求下的延迟"""
+    from httpx import ASGITransport, AsyncClient
+
+    from app.models import Domain
+
+    results = []
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        response = await client.post("/api/auth/login", json={"username": "admin", "password": "admin123"})
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        domain = await Domain.all().order_by("id").first()
+        domain_id = domain.id if domain else 0
+
+        for name, template in API_ENDPOINTS:
+            path = template.format(domain_id=domain_id)
+            # 预热：填充缓存与连接
+            await _load(client, path, headers, min(20, args.api_requests), 1)
+            latencies, errors, elapsed = await _load(client, path, headers, args.api_requests, args.api_concurrency)
+            stats = {
+                "endpoint": name,
+                "path": path,
+                "concurrency": args.api_concurrency,
+                "errors": errors,
+                "requests_per_sec": round(len(latencies) / elapsed, 1) if elapsed else None,
+                **_latency_stats(latencies),
+            }
+            results.append(stats)
+            print(
+                f"  api {name:<13} p50 {stats['p50_ms']}ms  p99 {stats['p99_ms']}ms  "
+                f"{stats['requests_per_sec']} 请求/秒  失败 {errors}"
+            )
+    return results
+
+
+def startup_probe():
+    """在子进程中运行：测量导入应用与lifespan启动、关闭的耗时，输出一行JSON"""
+    started = time.perf_counter()
+    import main
+    imported = time.perf_counter()
+
+    async def run():
+        async with main.app.router.lifespan_context(main.app):
+            ready = time.perf_counter()
+        return ready, time.perf_counter()
+
+    ready, stopped = asyncio.run(run())
+    print(json.dumps({
+        "import_seconds": round(imported - started, 4),
+        "startup_seconds": round(ready - imported, 4),
+        "shutdown_seconds": round(stopped - ready, 4),
+    }))
+
+
+def bench_startup(args, work_dir: str) -> dict:
+    """启动耗时：第一次为空数据库（含建表与迁移），之后为已迁移的数据库"""
+    env = dict(os.environ)
+    env["DNS_DATABASE_URL"] = f"sqlite://{os.path.join(work_dir, 'startup.db')}"
+    runs = []
+    for _ in range(1 + args.startup_runs):
+        started = time.perf_counter()
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--startup-probe"],
+            cwd=ROOT, env=env, capture_output=True, text=True, timeout=300,
+        )
+        wall = time.perf_counter() - started
+        if completed.returncode != 0:
+            raise RuntimeError(f"启动测试失败: {completed.stderr.strip()[-500:]}")
+        # 应用导入时会打印其他内容，测量结果在最后一行
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        result["process_seconds"] = round(wall, 4)
+        runs.append(result)
+
+    warm = runs[1:] or runs
+    summary = {
+        "cold": runs[0],
+        "warm_runs": len(warm),
+        "warm_median": {
+            key: round(sorted(run[key] for run in warm)[len(warm) // 2], 4)
+            for key in runs[0]
+        },
+    }
+    print(
+        f"  startup 空数据库 {runs[0]['startup_seconds']}s，"
+        f"已迁移 {summary['warm_median']['startup_seconds']}s，导入 {summary['warm_median']['import_seconds']}s"
+    )
+    return summary
+
+
+async def run_in_app(args, sections) -> dict:
+    """在应用lifespan内（数据库、调度器、默认用户均已初始化）运行同步、DDNS与接口测试"""
+    import main
+
+    report = {}
+    async with main.app.router.lifespan_context(main.app):
+        if "sync" in sections:
+            report["sync"] = await bench_sync(args)
+        if "ddns" in sections:
+            report["ddns"] = await bench_ddns(args)
+        if "api" in sections:
+            report["api"] = await bench_api(main.app, args)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="端到端基准测试（模拟服务商 + 临时SQLite）")
+    parser.add_argument("--only", default=",".join(SECTIONS), help=f"运行的测试，逗号分隔: {','.join(SECTIONS)}")
+    parser.add_argument("--sync-grid", default=DEFAULT_SYNC_GRID, help="同步测试的 域名数x每域名记录数，逗号分隔")
+    parser.add_argument("--page-size", type=int, default=100, help="模拟服务商列表接口每页条数")
+    parser.add_argument("--latency", type=float, default=0.0, help="模拟服务商每次接口调用的延迟（秒）")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="客户端限速（每秒请求数，0为不限）")
+    parser.add_argument("--ddns-configs", type=int, default=100, help="DDNS配置数量")
+    parser.add_argument("--api-requests", type=int, default=500, help="每个接口的请求数")
+    parser.add_argument("--api-concurrency", type=int, default=20, help="接口测试的并发数")
+    parser.add_argument("--startup-runs", type=int, default=3, help="已迁移数据库上的启动测试次数")
+    parser.add_argument("--output", help="JSON结果文件，默认 benchmarks/results/e2e-<时间>.json")
+    parser.add_argument("--startup-probe", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.startup_probe:
+        startup_probe()
+        return
+
+    sections = [section.strip() for section in args.only.split(",") if section.strip()]
+    unknown = set(sections) - set(SECTIONS)
+    if unknown:
+        parser.error(f"未知的测试: {','.join(sorted(unknown))}")
+
+    with tempfile.TemporaryDirectory(prefix="dns-e2e-") as work_dir:
+        _configure_environment(work_dir, args)
+        report = {"meta": _metadata(args)}
+        if set(sections) & {"sync", "ddns", "api"}:
+            report.update(asyncio.run(run_in_app(args, sections)))
+        if "startup" in sections:
+            report["startup"] = bench_startup(args, work_dir)
+
+    if not args.output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        args.output = os.path.join(RESULTS_DIR, f"e2e-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"结果已写入 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,16 @@
 """主应用入口"""
 import logging
 from pathlib import Path
-from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI, Request
 from fastapi.responses import HTMLResponse
 from contextlib import asynccontextmanager
 from app.config import settings
 from app.database import init_database, close_database
-from app.api import providers, domains, certificates, auth, ddns
+from app.static_assets import static_assets
+from app.providers.registry import provider_registry
+from app.api import providers, domains, certificates, auth, ddns, search, system, zone_migrations
 from app.services.scheduler_service import scheduler_service
+from app.services.certificate_job_service import certificate_job_service
 
 # 配置日志
 # 确保日志目录存在
@@ -34,6 +36,9 @@ async def lifespan(app: FastAPI):
     logger.info("正在启动应用...")
     await init_database()
     
+    # 页面与静态文件读入内存并预压缩
+    static_assets.load()
+    
     # 初始化默认用户
     await auth.init_default_user()
     
@@ -44,6 +49,12 @@ async def lifespan(app: FastAPI):
     # 初始化DDNS调度服务
     await scheduler_service.initialize_ddns()
     
+    # 加载区域镜像定时任务
+    await scheduler_service.initialize_zone_mirrors()
+    
+    # 启动证书签发任务队列
+    await certificate_job_service.start()
+    
     logger.info("应用启动完成")
     
     yield
@@ -51,10 +62,16 @@ async def lifespan(app: FastAPI):
     # 关闭时执行
     logger.info("正在关闭应用...")
     
+    # 停止证书签发任务队列
+    await certificate_job_service.stop()
+    
     # 停止定时任务调度器
     scheduler_service.stop()
     logger.info("定时任务调度器已停止")
     
+    # 关闭服务商实例持有的连接池
+    await provider_registry.close_all()
+    
     await close_database()
     logger.info("应用已关闭")
 
@@ -73,60 +90,59 @@ app.include_router(providers.router)
 app.include_router(domains.router)
 app.include_router(certificates.router)
 app.include_router(ddns.router)
+app.include_router(search.router)
+app.include_router(system.router)
+app.include_router(zone_migrations.router)
 
-# 静态文件服务
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# 静态文件服务（内存缓存，带内容哈希的地址长期缓存）
+@app.api_route("/static/{path:path}", methods=["GET", "HEAD"], include_in_schema=False)
+async def static_files(path: str, request: Request):
+    """静态文件"""
+    return static_assets.response(request, path)
 
 
 @app.get("/", response_class=HTMLResponse)
-async def root():
+async def root(request: Request):
     """首页 - 重定向到服务商管理页面"""
-    with open("static/providers.html", "r", encoding="utf-8") as f:
-        return f.read()
+    return static_assets.response(request, "providers.html")
 
 
 @app.get("/login", response_class=HTMLResponse)
-async def login_page():
+async def login_page(request: Request):
     """登录页面"""
-    with open("static/login.html", "r", encoding="utf-8") as f:
-        return f.read()
+    return static_assets.response(request, "login.html")
 
 
 @app.get("/dashboard", response_class=HTMLResponse)
-async def dashboard_page():
+async def dashboard_page(request: Request):
     """仪表板页面"""
-    with open("static/dashboard.html", "r", encoding="utf-8") as f:
-        return f.read()
+    return static_assets.response(request, "dashboard.html")
 
 
 
 
 @app.get("/providers", response_class=HTMLResponse)
-async def providers_page():
+async def providers_page(request: Request):
     """服务商管理页面"""
-    with open("static/providers.html", "r", encoding="utf-8") as f:
-        return f.read()
+    return static_assets.response(request, "providers.html")
 
 
 @app.get("/domains", response_class=HTMLResponse)
-async def domains_page():
+async def domains_page(request: Request):
     """域名管理页面"""
-    with open("static/domains.html", "r", encoding="utf-8") as f:
-        return f.read()
+    return static_assets.response(request, "domains.html")
 
 
 @app.get("/certificates", response_class=HTMLResponse)
-async def certificates_page():
+async def certificates_page(request: Request):
     """证书管理页面"""
-    with open("static/certificates.html", "r", encoding="utf-8") as f:
-        return f.read()
+    return static_assets.response(request, "certificates.html")
 
 
 @app.get("/ddns", response_class=HTMLResponse)
-async def ddns_page():
+async def ddns_page(request: Request):
     """DDNS设置页面"""
-    with open("static/ddns.html", "r", encoding="utf-8") as f:
-        return f.read()
+    return static_assets.response(request, "ddns.html")
 
 
 if __name__ == "__main__":
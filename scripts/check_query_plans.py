@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+热点查询执行计划检查
+
+在内存SQLite数据库上通过版本迁移建立表结构（日志写入一条以建立当月分区），对各热点查询执行
+EXPLAIN QUERY PLAN，若出现全表扫描或为排序建立临时B树则以非零状态退出，可用于CI或发布前检查。
+
+分别检查两种数据库：空数据库，以及引入版本迁移之前的旧版本表结构升级后的数据库。
+
+用法:
+    python scripts/check_query_plans.py
+"""
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tortoise import Tortoise
+
+from app.migrations.runner import run_migrations
+from app.models import Certificate, CertificateStatus, DDNSConfig, DNSRecord, RecordType
+from app.services.log_store import DDNS_LOGS, MESSAGES_TABLE, log_store, month_key
+
+CONFIG_ID = "00000000-0000-0000-0000-000000000000"
+
+# 引入版本迁移之前（启动时按当时的模型建表）的表结构，没有任何二级索引
+LEGACY_SCHEMA = """
+CREATE TABLE "providers" (
+    "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL, "name" VARCHAR(100) NOT NULL, "type" SMALLINT NOT NULL,
+    "access_key" VARCHAR(200) NOT NULL, "secret_key" VARCHAR(200) NOT NULL, "region" VARCHAR(50) NOT NULL,
+    "enabled" INT NOT NULL, "status" VARCHAR(20) NOT NULL, "last_test_at" TIMESTAMP,
+    "created_at" TIMESTAMP NOT NULL, "updated_at" TIMESTAMP NOT NULL
+);
+CREATE TABLE "domains" (
+    "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL, "name" VARCHAR(255) NOT NULL UNIQUE,
+    "enabled" INT NOT NULL, "auto_update" INT NOT NULL,
+    "created_at" TIMESTAMP NOT NULL, "updated_at" TIMESTAMP NOT NULL,
+    "provider_id" INT NOT NULL REFERENCES "providers" ("id") ON DELETE CASCADE
+);
+CREATE TABLE "certificates" (
+    "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL, "name" VARCHAR(255) NOT NULL,
+    "type" SMALLINT NOT NULL, "status" SMALLINT NOT NULL,
+    "certificate_file" TEXT, "private_key_file" TEXT, "ca_bundle_file" TEXT,
+    "issuer" VARCHAR(255), "subject" VARCHAR(255), "serial_number" VARCHAR(100),
+    "not_before" TIMESTAMP, "not_after" TIMESTAMP, "auto_renew" INT NOT NULL, "renewal_days" INT NOT NULL,
+    "last_renewed_at" TIMESTAMP, "created_at" TIMESTAMP NOT NULL, "updated_at" TIMESTAMP NOT NULL,
+    "domain_id" INT NOT NULL REFERENCES "domains" ("id") ON DELETE CASCADE
+);
+CREATE TABLE "ddns_configs" (
+    "id" VARCHAR(36) NOT NULL PRIMARY KEY, "name" VARCHAR(100) NOT NULL, "subdomain" VARCHAR(100) NOT NULL,
+    "record_type" SMALLINT NOT NULL, "enabled" INT NOT NULL, "update_interval" INT NOT NULL,
+    "last_update_at" TIMESTAMP, "last_ip" VARCHAR(45), "update_method" VARCHAR(20) NOT NULL,
+    "created_at" TIMESTAMP NOT NULL, "updated_at" TIMESTAMP NOT NULL,
+    "domain_id" INT NOT NULL REFERENCES "domains" ("id") ON DELETE CASCADE
+);
+CREATE TABLE "ddns_logs" (
+    "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL, "old_ip" VARCHAR(45), "new_ip" VARCHAR(45) NOT NULL,
+    "status" VARCHAR(20) NOT NULL, "message" TEXT NOT NULL, "created_at" TIMESTAMP NOT NULL,
+    "ddns_config_id" VARCHAR(36) NOT NULL REFERENCES "ddns_configs" ("id") ON DELETE CASCADE
+);
+CREATE TABLE "dns_records" (
+    "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL, "name" VARCHAR(255) NOT NULL, "type" SMALLINT NOT NULL,
+    "value" VARCHAR(500) NOT NULL, "ttl" INT NOT NULL, "priority" INT, "enabled" INT NOT NULL,
+    "external_id" VARCHAR(255), "created_at" TIMESTAMP NOT NULL, "updated_at" TIMESTAMP NOT NULL,
+    "domain_id" INT NOT NULL REFERENCES "domains" ("id") ON DELETE CASCADE
+);
+CREATE TABLE "task_logs" (
+    "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL, "action" VARCHAR(50) NOT NULL,
+    "status" VARCHAR(20) NOT NULL, "message" TEXT NOT NULL, "created_at" TIMESTAMP NOT NULL,
+    "domain_id" INT NOT NULL REFERENCES "domains" ("id") ON DELETE CASCADE
+);
+CREATE TABLE "users" (
+    "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL, "username" VARCHAR(50) NOT NULL UNIQUE,
+    "password_hash" VARCHAR(255) NOT NULL, "is_active" INT NOT NULL,
+    "created_at" TIMESTAMP NOT NULL, "updated_at" TIMESTAMP NOT NULL
+);
+"""
+
+
+def hot_queries():
+    """热点查询（与业务代码中的查询条件保持一致）"""
+    since = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return {
+        # update_ddns_record / dns_auth_hook 按域名+名称+类型定位记录
+        "DNSRecord(domain, name, type)": DNSRecord.filter(
+            domain_id=1, name="www.example.com", type=RecordType.A
+        ),
+        # record_reference_service 按记录值反查引用
+        "DNSRecord(value_normalized, type)": DNSRecord.filter(
+            value_normalized="www.example.com", type__in=[RecordType.CNAME, RecordType.MX]
+        ),
+        # 仪表盘与即将过期证书查询
+        "Certificate(status, not_after)": Certificate.filter(
+            status=CertificateStatus.VALID, not_after__lte=since + timedelta(days=30)
+        ),
+        # 创建/修改DDNS配置时的重复检查
+        "DDNSConfig(domain, subdomain, record_type)": DDNSConfig.filter(
+            domain_id=1, subdomain="home.example.com", record_type=RecordType.A
+        ),
+    }
+
+
+def hot_log_queries():
+    """日志分区上的热点查询（与 log_store 中的语句保持一致）"""
+    table = DDNS_LOGS.table(month_key(datetime.now(timezone.utc)))
+    return {
+        # get_ddns_logs 按配置分页查询最近日志
+        "ddns_logs分区(ddns_config_id, created_at, id)": (
+            f"SELECT p.id, p.old_ip, p.new_ip, p.status, m.text AS message, p.created_at FROM {table} p "
+            f"LEFT JOIN {MESSAGES_TABLE} m ON m.id = p.message_id "
+            f"WHERE p.ddns_config_id = '{CONFIG_ID}' ORDER BY p.created_at DESC, p.id DESC LIMIT 20"
+        ),
+        # get_ddns_status_summary 统计最近24小时成功/失败次数
+        "ddns_logs分区(status, created_at)": (
+            f"SELECT COUNT(*) AS total FROM {table} WHERE status = 'success' AND created_at >= '2024-01-01'"
+        ),
+    }
+
+
+def plan_problems(plan_rows):
+    """从执行计划中找出全表扫描与排序临时表"""
+    problems = []
+    for row in plan_rows:
+        detail = row['detail']
+        if detail.startswith("SCAN ") and "USING" not in detail:
+            problems.append(detail)
+        elif "USE TEMP B-TREE FOR ORDER BY" in detail:
+            problems.append(detail)
+    return problems
+
+
+async def check(title: str, legacy: bool) -> int:
+    """在一个新的内存数据库上建表并检查热点查询，返回未使用索引的查询数"""
+    await Tortoise.init(db_url="sqlite://:memory:", modules={'models': ['app.models']})
+    conn = Tortoise.get_connection('default')
+    log_store.reset_cache()
+
+    failed = 0
+    try:
+        if legacy:
+            await conn.execute_script(LEGACY_SCHEMA)
+        await run_migrations(conn)
+        await log_store.write(DDNS_LOGS, CONFIG_ID, "check", status="success")
+
+        queries = {name: queryset.sql(params_inline=True) for name, queryset in hot_queries().items()}
+        queries.update(hot_log_queries())
+
+        print(f"== {title}")
+        for name, sql in queries.items():
+            plan = await conn.execute_query_dict(f"EXPLAIN QUERY PLAN {sql}")
+            problems = plan_problems(plan)
+            details = "; ".join(row['detail'] for row in plan)
+            if problems:
+                failed += 1
+                print(f"FAIL {name}: {details}")
+            else:
+                print(f"OK   {name}: {details}")
+    finally:
+        await Tortoise.close_connections()
+    return failed
+
+
+async def main() -> int:
+    failed = await check("空数据库", legacy=False)
+    failed += await check("旧版本数据库升级", legacy=True)
+
+    if failed:
+        print(f"{failed} 个热点查询未使用索引")
+        return 1
+    print("所有热点查询均使用索引")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
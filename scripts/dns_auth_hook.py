@@ -13,9 +13,14 @@ from datetime import datetime
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.models import Domain, DNSRecord
-from app.providers.huawei import HuaweiProvider
-from app.providers.aliyun import AliyunProvider
+from app.providers.base import get_provider_instance
+from app.providers.registry import provider_registry
 from app.database import init_database, close_database
+from app.services.certificate_job_service import update_job_stage
+from app.services.domain_summary_service import domain_summary_service
+
+# 由证书服务传入的签发任务ID，用于上报签发进度
+JOB_ID = os.environ.get('CERT_JOB_ID')
 
 
 async def add_dns_record(domain_name: str, record_name: str, record_value: str):
@@ -25,7 +30,7 @@ async def add_dns_record(domain_name: str, record_name: str, record_value: str):
         
         # 初始化数据库
         print("INFO: 初始化数据库连接...")
-        await init_database()
+        await init_database(migrate=False)
         print("INFO: 数据库连接成功")
         
         # 查找域名
@@ -37,19 +42,7 @@ async def add_dns_record(domain_name: str, record_name: str, record_value: str):
         print(f"INFO: 找到域名 {domain_name}, 服务商类型: {domain.provider.type}")
         
         # 获取服务商实例
-        provider_instance = None
-        if domain.provider.type == 1:  # 华为云
-            provider_instance = HuaweiProvider(
-                access_key=domain.provider.access_key,
-                secret_key=domain.provider.secret_key,
-                region=domain.provider.region or "cn-north-4"
-            )
-        elif domain.provider.type == 2:  # 阿里云
-            provider_instance = AliyunProvider(
-                access_key=domain.provider.access_key,
-                secret_key=domain.provider.secret_key,
-                region=domain.provider.region or "cn-hangzhou"
-            )
+        provider_instance = get_provider_instance(domain.provider)
         
         if not provider_instance:
             print(f"ERROR: 不支持的服务商类型 {domain.provider.type}")
@@ -139,14 +132,19 @@ async def add_dns_record(domain_name: str, record_name: str, record_value: str):
                     )
                     print(f"INFO: 本地DNS记录已创建: {local_record.id}")
                     
+                await domain_summary_service.refresh(domain.id)
+                    
             except Exception as db_error:
                 print(f"WARNING: 保存到本地数据库失败: {str(db_error)}")
         
+        await update_job_stage(JOB_ID, "challenge_placed", f"已添加DNS验证记录 {record_name}")
+        
         # 等待DNS传播
         print("INFO: 等待DNS记录传播...")
         import asyncio
         await asyncio.sleep(30)  # 等待30秒让DNS传播
         print("INFO: DNS传播等待完成")
+        await update_job_stage(JOB_ID, "propagated", "DNS验证记录已传播，等待CA验证")
         
         return True
             
@@ -161,7 +159,7 @@ async def cleanup_dns_record(domain_name: str, record_name: str, record_value: s
         print(f"INFO: 开始清理DNS记录 - 域名: {domain_name}, 记录名: {record_name}")
         
         # 初始化数据库
-        await init_database()
+        await init_database(migrate=False)
         
         # 查找域名
         domain = await Domain.filter(name=domain_name).prefetch_related('provider').first()
@@ -170,19 +168,7 @@ async def cleanup_dns_record(domain_name: str, record_name: str, record_value: s
             return False
         
         # 获取服务商实例
-        provider_instance = None
-        if domain.provider.type == 1:  # 华为云
-            provider_instance = HuaweiProvider(
-                access_key=domain.provider.access_key,
-                secret_key=domain.provider.secret_key,
-                region=domain.provider.region or "cn-north-4"
-            )
-        elif domain.provider.type == 2:  # 阿里云
-            provider_instance = AliyunProvider(
-                access_key=domain.provider.access_key,
-                secret_key=domain.provider.secret_key,
-                region=domain.provider.region or "cn-hangzhou"
-            )
+        provider_instance = get_provider_instance(domain.provider)
         
         if not provider_instance:
             print(f"ERROR: 不支持的服务商类型 {domain.provider.type}")
@@ -237,6 +223,7 @@ async def cleanup_dns_record(domain_name: str, record_name: str, record_value: s
             print("INFO: 删除本地数据库记录...")
             try:
                 await local_record.delete()
+                await domain_summary_service.refresh(domain.id)
                 print(f"SUCCESS: 本地DNS记录删除成功: {local_record.id}")
             except Exception as e:
                 print(f"ERROR: 删除本地DNS记录失败: {str(e)}")
@@ -287,8 +274,9 @@ async def main():
         # 这是auth hook
         success = await add_dns_record(main_domain, record_name, validation_token)
     
-    # 关闭数据库连接
+    # 关闭服务商连接与数据库连接
     try:
+        await provider_registry.close_all()
         await close_database()
         print("INFO: 数据库连接已关闭")
     except Exception as e:
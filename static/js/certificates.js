@@ -226,7 +226,7 @@ class CertificatesManager {
             if (response.ok) {
                 const result = await response.json();
                 this.showAlert('certificates-alert', result.message, 'success');
-                this.loadCertificates();
+                this.followCertificateJob(result.job_id, '续期证书');
             } else {
                 const error = await response.json();
                 this.showAlert('certificates-alert', '续期失败: ' + error.detail, 'error');
@@ -397,7 +397,8 @@ class CertificatesManager {
                 const result = await response.json();
                 this.showAlert('certificates-alert', result.message, 'success');
                 this.closeRequestCertificateModal();
-                this.loadCertificates(); // 重新加载证书列表
+                this.loadCertificates(); // 重新加载证书列表（显示申请中的证书）
+                this.followCertificateJob(result.job_id, '申请证书');
             } else {
                 const error = await response.json();
                 this.showAlert('certificates-alert', '申请证书失败: ' + error.detail, 'error');
@@ -412,6 +413,44 @@ class CertificatesManager {
         }
     }
 
+    followCertificateJob(jobId, actionText) {
+        // 通过SSE跟踪签发任务的阶段进度
+        const stageTexts = {
+            queued: '排队中',
+            started: '开始签发',
+            challenge_placed: '已添加DNS验证记录',
+            propagated: 'DNS记录已传播',
+            validated: '域名验证通过',
+            issued: '证书已签发',
+            failed: '签发失败'
+        };
+        const source = new EventSource(`/api/certificates/jobs/${jobId}/events`);
+
+        source.addEventListener('progress', (event) => {
+            const job = JSON.parse(event.data);
+            const stageText = stageTexts[job.stage] || job.stage;
+
+            if (job.status === 'succeeded') {
+                source.close();
+                this.showAlert('certificates-alert', `${actionText}成功: ${job.message}`, 'success');
+                this.loadCertificates();
+            } else if (job.status === 'failed') {
+                source.close();
+                this.showAlert('certificates-alert', `${actionText}失败: ${job.message}`, 'error');
+                this.loadCertificates();
+            } else {
+                this.showAlert('certificates-alert', `${actionText} ${job.full_domain}: ${stageText}`, 'info');
+            }
+        });
+
+        source.onerror = () => {
+            // 连接断开时由浏览器自动重连，任务结束后服务端会主动关闭
+            if (source.readyState === EventSource.CLOSED) {
+                this.loadCertificates();
+            }
+        };
+    }
+
     closeRequestCertificateModal() {
         const modal = document.getElementById('requestCertificateModal');
         if (modal) {
@@ -182,6 +182,11 @@ class Dashboard {
             });
             
             if (response.ok) {
+                // 修改密码后旧令牌失效，改用服务端签发的新令牌
+                const result = await response.json();
+                if (result.access_token) {
+                    localStorage.setItem('access_token', result.access_token);
+                }
                 alert('密码修改成功');
                 this.hidePasswordChangeModal();
             } else {
@@ -198,7 +203,16 @@ class Dashboard {
         }
     }
     
-    logout() {
+    logout(revoke = false) {
+        const token = localStorage.getItem('access_token');
+        if (revoke && token) {
+            // 通知服务端吊销令牌，失败不影响本地登出
+            fetch('/api/auth/logout', {
+                method: 'POST',
+                headers: { 'Authorization': `Bearer ${token}` },
+                keepalive: true
+            }).catch(() => {});
+        }
         localStorage.removeItem('access_token');
         localStorage.removeItem('user_info');
         window.location.href = '/login';
@@ -469,10 +469,18 @@ class DDNSManager {
         }
     }
 
-    async viewDDNSLogs(configId, configName, page = 1) {
+    async viewDDNSLogs(configId, configName, page = 1, cursor = null) {
         try {
             const token = localStorage.getItem('access_token');
-            const url = `/api/ddns/${configId}/logs?page=${page}&page_size=5&v=${Date.now()}`;
+            // 游标分页：只在打开日志时统计一次总数，翻页时沿用
+            const countTotal = !cursor || this.logsConfigId !== configId;
+            let url = `/api/ddns/${configId}/logs?page_size=5&v=${Date.now()}`;
+            if (cursor) {
+                url += `&cursor=${encodeURIComponent(cursor)}`;
+            }
+            if (countTotal) {
+                url += '&include_total=true';
+            }
             console.log('DDNS Logs API URL:', url);
             
             const response = await fetch(url, {
@@ -481,6 +489,15 @@ class DDNSManager {
                 }
             });
             const data = await response.json();
+
+            if (countTotal) {
+                this.logsConfigId = configId;
+                this.logsTotal = data.pagination.total;
+                this.logsTotalPages = data.pagination.total_pages;
+            } else {
+                data.pagination.total = this.logsTotal;
+                data.pagination.total_pages = this.logsTotalPages;
+            }
             
             console.log('DDNS Logs API Response:', data);
             this.showDDNSLogsModal(configName, data, configId, page);
@@ -547,22 +564,22 @@ class DDNSManager {
                         ${showNavigation ? `
                         <button class="btn btn-sm btn-secondary" 
                                 onclick="ddnsApp.viewDDNSLogs('${configId}', '${configName.replace(/'/g, '&apos;').replace(/"/g, '&quot;')}', 1)" 
-                                ${currentPage === 1 ? 'disabled' : ''} 
+                                ${!pagination.has_prev ? 'disabled' : ''} 
                                 style="min-width: 60px;">首页</button>
                         <button class="btn btn-sm btn-secondary" 
-                                onclick="ddnsApp.viewDDNSLogs('${configId}', '${configName.replace(/'/g, '&apos;').replace(/"/g, '&quot;')}', ${currentPage - 1})" 
+                                onclick="ddnsApp.viewDDNSLogs('${configId}', '${configName.replace(/'/g, '&apos;').replace(/"/g, '&quot;')}', ${currentPage - 1}, '${pagination.prev_cursor}')" 
                                 ${!pagination.has_prev ? 'disabled' : ''} 
                                 style="min-width: 70px;">上一页</button>
                         ` : ''}
                         <span style="margin: 0 1rem; color: #666; white-space: nowrap;">第 ${currentPage} 页 / 共 ${pagination.total_pages} 页 (总计 ${pagination.total} 条记录)</span>
                         ${showNavigation ? `
                         <button class="btn btn-sm btn-secondary" 
-                                onclick="ddnsApp.viewDDNSLogs('${configId}', '${configName.replace(/'/g, '&apos;').replace(/"/g, '&quot;')}', ${currentPage + 1})" 
+                                onclick="ddnsApp.viewDDNSLogs('${configId}', '${configName.replace(/'/g, '&apos;').replace(/"/g, '&quot;')}', ${currentPage + 1}, '${pagination.next_cursor}')" 
                                 ${!pagination.has_next ? 'disabled' : ''} 
                                 style="min-width: 70px;">下一页</button>
                         <button class="btn btn-sm btn-secondary" 
-                                onclick="ddnsApp.viewDDNSLogs('${configId}', '${configName.replace(/'/g, '&apos;').replace(/"/g, '&quot;')}', ${pagination.total_pages})" 
-                                ${currentPage === pagination.total_pages ? 'disabled' : ''} 
+                                onclick="ddnsApp.viewDDNSLogs('${configId}', '${configName.replace(/'/g, '&apos;').replace(/"/g, '&quot;')}', ${pagination.total_pages}, '${pagination.last_cursor}')" 
+                                ${!pagination.has_next ? 'disabled' : ''} 
                                 style="min-width: 60px;">末页</button>
                         ` : ''}
                     </div>
@@ -95,7 +95,7 @@ class DomainsManager {
 
         if (domains.length === 0) {
             const message = providerId ? '该服务商下没有域名' : '暂无域名数据';
-            tbody.innerHTML = `<tr><td colspan="6" style="text-align: center;">${message}</td></tr>`;
+            tbody.innerHTML = `<tr><td colspan="7" style="text-align: center;">${message}</td></tr>`;
             return;
         }
 
@@ -105,6 +105,7 @@ class DomainsManager {
             const statusClass = domain.enabled ? 'enabled' : 'disabled';
             const statusText = domain.enabled ? '启用' : '禁用';
             const autoUpdateText = domain.auto_update ? '是' : '否';
+            const recordCount = domain.summary ? domain.summary.record_count : 0;
             
             row.innerHTML = `
                 <td style="text-align: center; vertical-align: middle;">${domain.name}</td>
@@ -113,6 +114,7 @@ class DomainsManager {
                     <span class="status ${statusClass}" style="display: inline-block; white-space: nowrap;">${statusText}</span>
                 </td>
                 <td style="text-align: center; vertical-align: middle;">${autoUpdateText}</td>
+                <td style="text-align: center; vertical-align: middle;">${recordCount}</td>
                 <td style="text-align: center; vertical-align: middle;">${new Date(domain.created_at).toLocaleDateString()}</td>
                 <td style="text-align: center;">
                     <button class="btn btn-primary" onclick="domainsApp.viewDomainRecords(${domain.id}, '${domain.name}')">
@@ -127,21 +129,41 @@ class DomainsManager {
         });
     }
 
-    async viewDomainRecords(domainId, domainName, page = 1, search = '') {
+    async viewDomainRecords(domainId, domainName, page = 1, search = '', cursor = null) {
         try {
+            // 搜索条件变化时总数需要重新统计
+            const searchChanged = this.currentDomainId !== domainId || this.currentSearch !== search;
+
             // 保存当前域名ID
             this.currentDomainId = domainId;
             this.currentDomainName = domainName;
             this.currentSearch = search;
+            this.currentCursor = cursor;
+            this.currentPage = page;
 
-            // 构建API URL
-            let url = `/api/domains/${domainId}/records?page=${page}&page_size=5`;
+            // 构建API URL（游标分页，页码只用于显示）
+            let url = `/api/domains/${domainId}/records?page_size=5`;
+            if (cursor) {
+                url += `&cursor=${encodeURIComponent(cursor)}`;
+            }
             if (search && search.trim()) {
                 url += `&search=${encodeURIComponent(search.trim())}`;
+                if (!cursor || searchChanged) {
+                    url += '&include_total=true';
+                }
             }
 
             const response = await fetch(url);
             const data = await response.json();
+
+            // 搜索翻页时不再统计总数，沿用第一页的结果
+            if (data.pagination.total === null && !searchChanged) {
+                data.pagination.total = this.currentTotal;
+                data.pagination.total_pages = this.currentTotalPages;
+            }
+            this.currentTotal = data.pagination.total;
+            this.currentTotalPages = data.pagination.total_pages;
+            data.pagination.page = page;
             
             // 创建模态框显示DNS记录
             this.showDomainRecordsModal(domainName, data, domainId);
@@ -213,26 +235,30 @@ class DomainsManager {
 
         // 分页HTML
         let paginationHtml = '';
-        if (pagination.total_pages > 1) {
+        if (pagination.has_next || pagination.has_prev) {
+            // 总数未知时（搜索翻页到末页）页码显示为 ?
+            const lastPage = pagination.total_pages || null;
+            const prevPage = pagination.page ? pagination.page - 1 : null;
+            const nextPage = pagination.page ? pagination.page + 1 : null;
             paginationHtml = `
                 <div class="pagination-container" style="margin-top: 1rem; padding-top: 1rem; border-top: 1px solid #eee;">
                     <div class="pagination-buttons" style="display: flex; justify-content: center; align-items: center; gap: 8px; flex-wrap: wrap;">
                         <button class="btn btn-sm btn-secondary" 
                                 onclick="domainsApp.viewDomainRecords(${domainId}, '${domainName}', 1, '${search}')" 
-                                ${pagination.page === 1 ? 'disabled' : ''} 
+                                ${!pagination.has_prev ? 'disabled' : ''} 
                                 style="min-width: 60px;">首页</button>
                         <button class="btn btn-sm btn-secondary" 
-                                onclick="domainsApp.viewDomainRecords(${domainId}, '${domainName}', ${pagination.page - 1}, '${search}')" 
+                                onclick="domainsApp.viewDomainRecords(${domainId}, '${domainName}', ${prevPage}, '${search}', '${pagination.prev_cursor}')" 
                                 ${!pagination.has_prev ? 'disabled' : ''} 
                                 style="min-width: 70px;">上一页</button>
-                        <span style="margin: 0 1rem; color: #666; white-space: nowrap;">第 ${pagination.page} 页 / 共 ${pagination.total_pages} 页</span>
+                        <span style="margin: 0 1rem; color: #666; white-space: nowrap;">第 ${pagination.page || '?'} 页 / 共 ${lastPage || '?'} 页</span>
                         <button class="btn btn-sm btn-secondary" 
-                                onclick="domainsApp.viewDomainRecords(${domainId}, '${domainName}', ${pagination.page + 1}, '${search}')" 
+                                onclick="domainsApp.viewDomainRecords(${domainId}, '${domainName}', ${nextPage}, '${search}', '${pagination.next_cursor}')" 
                                 ${!pagination.has_next ? 'disabled' : ''} 
                                 style="min-width: 70px;">下一页</button>
                         <button class="btn btn-sm btn-secondary" 
-                                onclick="domainsApp.viewDomainRecords(${domainId}, '${domainName}', ${pagination.total_pages}, '${search}')" 
-                                ${pagination.page === pagination.total_pages ? 'disabled' : ''} 
+                                onclick="domainsApp.viewDomainRecords(${domainId}, '${domainName}', ${lastPage}, '${search}', '${pagination.last_cursor}')" 
+                                ${!pagination.has_next ? 'disabled' : ''} 
                                 style="min-width: 60px;">末页</button>
                     </div>
                 </div>
@@ -471,7 +497,7 @@ class DomainsManager {
                 const currentPage = this.getCurrentPage();
                 const searchInput = document.getElementById('dnsRecordSearch');
                 const searchTerm = searchInput ? searchInput.value.trim() : '';
-                this.viewDomainRecords(domainId, domainName, currentPage, searchTerm);
+                this.viewDomainRecords(domainId, domainName, currentPage, searchTerm, this.currentCursor);
             } else {
                 const error = await response.json();
                 this.showAddRecordError('添加解析记录失败: ' + error.detail);
@@ -507,7 +533,7 @@ class DomainsManager {
         // 如果缓存中没有，则从API获取
         if (!record && this.currentDomainId) {
             try {
-                const response = await fetch(`/api/domains/${this.currentDomainId}/records?page=1&page_size=100`);
+                const response = await fetch(`/api/domains/${this.currentDomainId}/records?page_size=100`);
                 const data = await response.json();
                 record = data.records.find(r => r.id === recordId);
                 // 更新缓存
@@ -642,7 +668,7 @@ class DomainsManager {
                 if (domainName) {
                     const searchInput = document.getElementById('dnsRecordSearch');
                     const searchTerm = searchInput ? searchInput.value.trim() : '';
-                    this.viewDomainRecords(this.currentDomainId, domainName, currentPage, searchTerm);
+                    this.viewDomainRecords(this.currentDomainId, domainName, currentPage, searchTerm, this.currentCursor);
                 }
             } else {
                 const error = await response.json();
@@ -689,7 +715,7 @@ class DomainsManager {
                 if (domainName) {
                     const searchInput = document.getElementById('dnsRecordSearch');
                     const searchTerm = searchInput ? searchInput.value.trim() : '';
-                    this.viewDomainRecords(this.currentDomainId, domainName, currentPage, searchTerm);
+                    this.viewDomainRecords(this.currentDomainId, domainName, currentPage, searchTerm, this.currentCursor);
                 }
             } else {
                 const error = await response.json();
@@ -723,13 +749,8 @@ class DomainsManager {
     }
 
     getCurrentPage() {
-        // 从分页按钮中提取当前页码
-        const paginationSpan = document.querySelector('.pagination-buttons span');
-        if (paginationSpan) {
-            const match = paginationSpan.textContent.match(/第 (\d+) 页/);
-            return match ? parseInt(match[1]) : 1;
-        }
-        return 1;
+        // 当前页码（与 currentCursor 对应，仅用于显示）
+        return this.currentPage === undefined ? 1 : this.currentPage;
     }
 
     getRecordTypeText(type) {
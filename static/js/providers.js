@@ -75,7 +75,8 @@ class ProvidersManager {
                 1: '华为云',
                 2: '阿里云',
                 3: '腾讯云',
-                4: 'Cloudflare'
+                4: 'Cloudflare',
+                5: '模拟服务商'
             };
             const typeDisplayName = typeMapping[provider.type] || '未知';
             